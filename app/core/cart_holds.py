@@ -0,0 +1,297 @@
+"""
+Short-lived stock holds on cart lines.
+
+``add_to_cart`` may hold the units of a line for a few minutes so they cannot
+be bought by someone else while the buyer finishes shopping. Holds live in
+process memory: one small record per (item, user) plus a running total per
+item, so an availability check is a dict lookup.
+
+Expiry is driven by a hashed timer wheel: each hold is filed in the slot of
+the tick it expires on, and ``advance`` only visits the slots that passed
+since the previous call. The cost of a tick depends on how many holds are
+due, not on how many exist, and nothing is polled in the database.
+
+Holds that changed since the last write are saved to ``cart_holds`` by
+``persist`` and read back by ``load`` after a restart.
+"""
+
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Optional
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import delete, insert, select, tuple_
+from sqlalchemy.orm import Session
+
+from app.db.database import SessionLocal
+from app.db.models.Carts.cart_hold import CartHold
+
+DEFAULT_HOLD_TTL_SECONDS = 10 * 60
+DEFAULT_TICK_SECONDS = 1.0
+DEFAULT_WHEEL_SLOTS = 256
+DEFAULT_PERSIST_INTERVAL_SECONDS = 5.0
+
+_BANGKOK = ZoneInfo("Asia/Bangkok")
+
+HoldKey = tuple[int, int]  # (item_id, user_id)
+
+
+@dataclass(slots=True)
+class _Hold:
+    amount: int
+    expires_at: float  # unix time
+
+
+class CartHoldLedger:
+    """In-memory cart holds with timer-wheel expiry and periodic persistence."""
+
+    def __init__(
+        self,
+        ttl_seconds: Optional[float] = None,
+        tick_seconds: Optional[float] = None,
+        wheel_slots: int = DEFAULT_WHEEL_SLOTS,
+        session_factory: Callable[[], Session] = SessionLocal,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.ttl_seconds = ttl_seconds or float(
+            os.getenv("CART_HOLD_TTL_SECONDS", DEFAULT_HOLD_TTL_SECONDS)
+        )
+        self.tick_seconds = tick_seconds or float(
+            os.getenv("CART_HOLD_TICK_SECONDS", DEFAULT_TICK_SECONDS)
+        )
+        self.session_factory = session_factory
+        self.clock = clock
+        self._wheel: list[set[HoldKey]] = [set() for _ in range(wheel_slots)]
+        self._holds: dict[HoldKey, _Hold] = {}
+        self._held: dict[int, int] = {}
+        self._dirty: set[HoldKey] = set()
+        self._lock = threading.Lock()
+        self._cursor = math.floor(self.clock() / self.tick_seconds)
+        self._loaded = False
+        self.metrics = {
+            "held": 0,
+            "rejected": 0,
+            "released": 0,
+            "expired": 0,
+            "persisted": 0,
+        }
+
+    # ------------------------------------------------------------------ wheel
+
+    def _tick_of(self, timestamp: float) -> int:
+        """First tick at or after ``timestamp``."""
+        return math.ceil(timestamp / self.tick_seconds)
+
+    def _slot_of(self, expires_at: float) -> int:
+        return self._tick_of(expires_at) % len(self._wheel)
+
+    def _put(self, key: HoldKey, amount: int, expires_at: float) -> None:
+        previous = self._holds.get(key)
+        if previous is not None:
+            self._held[key[0]] -= previous.amount
+        self._holds[key] = _Hold(amount, expires_at)
+        self._held[key[0]] = self._held.get(key[0], 0) + amount
+        # a previous slot entry for the key goes stale and is dropped when visited
+        self._wheel[self._slot_of(expires_at)].add(key)
+        self._dirty.add(key)
+
+    def _drop(self, key: HoldKey) -> Optional[_Hold]:
+        hold = self._holds.pop(key, None)
+        if hold is None:
+            return None
+        remaining = self._held[key[0]] - hold.amount
+        if remaining:
+            self._held[key[0]] = remaining
+        else:
+            del self._held[key[0]]
+        self._dirty.add(key)
+        return hold
+
+    def advance(self, now: Optional[float] = None) -> int:
+        """
+        Expire every hold whose time has come (periodic background job).
+
+        Only the slots of the ticks elapsed since the last call are visited;
+        after a long pause each slot is visited once.
+
+        Returns:
+            Number of holds expired
+        """
+        now = self.clock() if now is None else now
+        current = math.floor(now / self.tick_seconds)
+        expired = 0
+        with self._lock:
+            first = max(self._cursor + 1, current - len(self._wheel) + 1)
+            for tick in range(first, current + 1):
+                slot = tick % len(self._wheel)
+                bucket = self._wheel[slot]
+                for key in list(bucket):
+                    hold = self._holds.get(key)
+                    if hold is None or self._slot_of(hold.expires_at) != slot:
+                        bucket.discard(key)
+                    elif hold.expires_at <= now:
+                        bucket.discard(key)
+                        self._drop(key)
+                        expired += 1
+                    # otherwise it is due on a later turn of the wheel
+            self._cursor = max(self._cursor, current)
+        self.metrics["expired"] += expired
+        return expired
+
+    # ------------------------------------------------------------------ holds
+
+    def hold(
+        self, item_id: int, user_id: int, amount: int, available: int
+    ) -> Optional[datetime]:
+        """
+        Hold ``amount`` units of ``item_id`` for ``user_id``, replacing the
+        user's previous hold on the item and restarting its TTL.
+
+        Args:
+            item_id: Item to hold
+            user_id: Buyer
+            amount: Units to hold
+            available: Units in stock, before any cart holds
+
+        Returns:
+            When the hold expires, or None if other buyers' holds leave too few units
+        """
+        key = (item_id, user_id)
+        with self._lock:
+            own = self._holds.get(key)
+            others = self._held.get(item_id, 0) - (own.amount if own else 0)
+            if available - others < amount:
+                self.metrics["rejected"] += 1
+                return None
+            expires_at = self.clock() + self.ttl_seconds
+            self._put(key, amount, expires_at)
+        self.metrics["held"] += 1
+        return datetime.fromtimestamp(expires_at, _BANGKOK)
+
+    def release(self, item_id: int, user_id: int) -> int:
+        """Drop the user's hold on the item. Returns the units released."""
+        with self._lock:
+            hold = self._drop((item_id, user_id))
+        if hold is None:
+            return 0
+        self.metrics["released"] += 1
+        return hold.amount
+
+    def held_by_others(self, item_id: int, user_id: int) -> int:
+        """Units of ``item_id`` held for buyers other than ``user_id``."""
+        with self._lock:
+            own = self._holds.get((item_id, user_id))
+            return self._held.get(item_id, 0) - (own.amount if own else 0)
+
+    def expires_at(self, item_id: int, user_id: int) -> Optional[datetime]:
+        hold = self._holds.get((item_id, user_id))
+        if hold is None:
+            return None
+        return datetime.fromtimestamp(hold.expires_at, _BANGKOK)
+
+    # ------------------------------------------------------------ persistence
+
+    def persist(self, db: Session) -> int:
+        """
+        Write the holds changed since the last call to ``cart_holds`` and
+        commit once. Returns the number of keys written or deleted.
+        """
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            live = [(key, self._holds[key]) for key in dirty if key in self._holds]
+        if not dirty:
+            return 0
+
+        try:
+            db.execute(
+                delete(CartHold).where(
+                    tuple_(CartHold.item_id, CartHold.user_id).in_(list(dirty))
+                )
+            )
+            if live:
+                db.execute(
+                    insert(CartHold),
+                    [
+                        {
+                            "item_id": item_id,
+                            "user_id": user_id,
+                            "amount": hold.amount,
+                            "expires_at": datetime.fromtimestamp(
+                                hold.expires_at, _BANGKOK
+                            ),
+                        }
+                        for (item_id, user_id), hold in live
+                    ],
+                )
+            db.commit()
+        except Exception:
+            db.rollback()
+            with self._lock:
+                self._dirty |= dirty
+            raise
+        self.metrics["persisted"] += len(dirty)
+        return len(dirty)
+
+    def load(self, db: Session) -> int:
+        """
+        Restore unexpired holds saved by ``persist``. Holds already in memory
+        win over saved ones. Returns the number restored.
+        """
+        now = self.clock()
+        restored = 0
+        rows = db.execute(
+            select(
+                CartHold.item_id, CartHold.user_id, CartHold.amount, CartHold.expires_at
+            )
+        ).all()
+        with self._lock:
+            for row in rows:
+                expires_at = row.expires_at
+                if expires_at.tzinfo is None:
+                    # SQLite keeps the Bangkok wall-clock time without an offset
+                    expires_at = expires_at.replace(tzinfo=_BANGKOK)
+                expires_at = expires_at.timestamp()
+                key = (row.item_id, row.user_id)
+                if expires_at <= now or key in self._holds:
+                    continue
+                self._put(key, row.amount, expires_at)
+                self._dirty.discard(key)
+                restored += 1
+            self._loaded = True
+        return restored
+
+    def tick(self) -> int:
+        """Periodic job: restore holds once after start, then save changes."""
+        with self.session_factory() as db:
+            if not self._loaded:
+                self.load(db)
+            return self.persist(db)
+
+    # ---------------------------------------------------------------- general
+
+    def reset(self) -> None:
+        """Forget every hold without writing anything."""
+        with self._lock:
+            for bucket in self._wheel:
+                bucket.clear()
+            self._holds.clear()
+            self._held.clear()
+            self._dirty.clear()
+            self._cursor = math.floor(self.clock() / self.tick_seconds)
+            self._loaded = False
+        self.metrics = dict.fromkeys(self.metrics, 0)
+
+    def stats(self) -> dict:
+        return {
+            **self.metrics,
+            "holds": len(self._holds),
+            "units_held": sum(self._held.values()),
+            "pending_writes": len(self._dirty),
+        }
+
+
+cart_holds = CartHoldLedger()
@@ -0,0 +1,295 @@
+"""
+Real-time fan-out of chat events to connected WebSocket clients.
+
+``ChatHub`` keeps the sockets of this process, per user. Routers publish an
+event for a list of recipients after committing; the hub hands it to a
+broker, and every process receives it back from the broker and pushes it to
+the sockets of those recipients it holds.
+
+Two brokers are available (``CHAT_BROKER``):
+
+- ``memory``: delivers inside the process. Enough for a single worker.
+- ``postgres``: ``pg_notify`` on publish and ``LISTEN`` in every worker, so
+  a message sent through one worker reaches sockets held by the others.
+
+Each socket has a bounded send queue. A client that stops reading fills its
+queue (or takes longer than ``CHAT_SEND_TIMEOUT_SECONDS`` for one send) and
+is disconnected with code 1013, instead of making the hub buffer without
+limit; it should reconnect and reload the history it missed.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+from typing import Callable, Optional, Protocol
+
+from fastapi import WebSocket
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app.db.database import engine
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = 100
+DEFAULT_SEND_TIMEOUT_SECONDS = 5.0
+DEFAULT_NOTIFY_CHANNEL = "chat_events"
+
+# Postgres rejects NOTIFY payloads of 8000 bytes or more
+MAX_NOTIFY_BYTES = 7900
+
+SLOW_CONSUMER_CLOSE_CODE = 1013  # "try again later"
+
+Deliver = Callable[[dict], None]
+
+
+class ChatBroker(Protocol):
+    def attach(self, deliver: Deliver) -> None: ...
+
+    def publish(self, envelope: dict) -> None: ...
+
+    async def start(self) -> None: ...
+
+    async def stop(self) -> None: ...
+
+
+class InMemoryBroker:
+    """Delivers every envelope straight back to the local hub."""
+
+    def __init__(self):
+        self._deliver: Optional[Deliver] = None
+
+    def attach(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+
+    def publish(self, envelope: dict) -> None:
+        if self._deliver is not None:
+            self._deliver(envelope)
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+
+class PostgresBroker:
+    """
+    Fans envelopes out to every worker through Postgres LISTEN/NOTIFY.
+
+    Publishing runs ``pg_notify`` on a pooled connection; each worker listens
+    on its own dedicated connection, read from the event loop. A worker also
+    receives its own notifications, so nothing is delivered locally.
+    """
+
+    def __init__(self, db_engine: Engine = engine, channel: Optional[str] = None):
+        self.engine = db_engine
+        self.channel = channel or os.getenv(
+            "CHAT_NOTIFY_CHANNEL", DEFAULT_NOTIFY_CHANNEL
+        )
+        self._deliver: Optional[Deliver] = None
+        self._listener = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def attach(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+
+    def publish(self, envelope: dict) -> None:
+        payload = json.dumps(envelope, separators=(",", ":"))
+        if len(payload.encode("utf-8")) > MAX_NOTIFY_BYTES:
+            # too large for NOTIFY; only sockets on this worker get it live
+            logger.warning("Chat event too large for NOTIFY, delivered locally only")
+            if self._deliver is not None:
+                self._deliver(envelope)
+            return
+        with self.engine.begin() as conn:
+            conn.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": self.channel, "payload": payload},
+            )
+
+    async def start(self) -> None:
+        import psycopg2
+        from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+        dsn = self.engine.url.set(drivername="postgresql").render_as_string(
+            hide_password=False
+        )
+        self._listener = psycopg2.connect(dsn)
+        self._listener.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+        with self._listener.cursor() as cursor:
+            cursor.execute(f'LISTEN "{self.channel}"')
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(self._listener.fileno(), self._on_readable)
+
+    def _on_readable(self) -> None:
+        self._listener.poll()
+        while self._listener.notifies:
+            notify = self._listener.notifies.pop(0)
+            if self._deliver is not None:
+                self._deliver(json.loads(notify.payload))
+
+    async def stop(self) -> None:
+        if self._listener is None:
+            return
+        self._loop.remove_reader(self._listener.fileno())
+        self._listener.close()
+        self._listener = None
+
+
+def make_broker(name: Optional[str] = None) -> ChatBroker:
+    name = (name or os.getenv("CHAT_BROKER", "memory")).lower()
+    if name == "memory":
+        return InMemoryBroker()
+    if name == "postgres":
+        return PostgresBroker()
+    raise ValueError(f"Unknown CHAT_BROKER: {name}")
+
+
+class Subscriber:
+    """One connected socket with a bounded queue of events waiting to be sent."""
+
+    def __init__(
+        self, websocket: WebSocket, user_id: int, queue_size: int, send_timeout: float
+    ):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.send_timeout = send_timeout
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.closed = False
+        self.slow = False
+        self._sender = self.loop.create_task(self._run())
+
+    def offer(self, event: dict) -> None:
+        """Queue ``event`` (loop thread only); a full queue disconnects the client."""
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.loop.create_task(self.close(slow=True))
+
+    def offer_threadsafe(self, event: dict) -> None:
+        self.loop.call_soon_threadsafe(self.offer, event)
+
+    async def _run(self) -> None:
+        while True:
+            event = await self.queue.get()
+            try:
+                await asyncio.wait_for(
+                    self.websocket.send_json(event), timeout=self.send_timeout
+                )
+            except asyncio.TimeoutError:
+                self.loop.create_task(self.close(slow=True))
+                return
+            except Exception:
+                # the socket is gone; the endpoint notices and unregisters it
+                return
+
+    async def close(self, slow: bool = False) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self.slow = slow
+        self._sender.cancel()
+        if slow:
+            try:
+                await self.websocket.close(
+                    code=SLOW_CONSUMER_CLOSE_CODE, reason="consumer too slow"
+                )
+            except Exception:
+                pass
+
+
+class ChatHub:
+    """Per-process registry of chat sockets, fed by a broker."""
+
+    def __init__(
+        self,
+        broker: Optional[ChatBroker] = None,
+        queue_size: Optional[int] = None,
+        send_timeout: Optional[float] = None,
+    ):
+        self.queue_size = queue_size or int(
+            os.getenv("CHAT_SUBSCRIBER_QUEUE_SIZE", DEFAULT_QUEUE_SIZE)
+        )
+        self.send_timeout = send_timeout or float(
+            os.getenv("CHAT_SEND_TIMEOUT_SECONDS", DEFAULT_SEND_TIMEOUT_SECONDS)
+        )
+        self._subscribers: dict[int, set[Subscriber]] = {}
+        self._lock = threading.Lock()
+        self.metrics = {"published": 0, "delivered": 0, "slow_disconnects": 0}
+        self.broker = broker or make_broker()
+        self.broker.attach(self.deliver)
+
+    async def start(self) -> None:
+        await self.broker.start()
+
+    async def stop(self) -> None:
+        await self.broker.stop()
+
+    async def connect(self, websocket: WebSocket, user_id: int) -> Subscriber:
+        """Register an accepted socket of ``user_id``."""
+        subscriber = Subscriber(websocket, user_id, self.queue_size, self.send_timeout)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscriber)
+        return subscriber
+
+    async def disconnect(self, subscriber: Subscriber) -> None:
+        with self._lock:
+            sockets = self._subscribers.get(subscriber.user_id)
+            if sockets is not None:
+                sockets.discard(subscriber)
+                if not sockets:
+                    del self._subscribers[subscriber.user_id]
+        if subscriber.slow:
+            self.metrics["slow_disconnects"] += 1
+        await subscriber.close()
+
+    def is_connected(self, user_id: int) -> bool:
+        """Whether ``user_id`` has a socket on this process."""
+        with self._lock:
+            return user_id in self._subscribers
+
+    def publish(self, user_ids, event: dict) -> None:
+        """
+        Send ``event`` to every socket of ``user_ids``, in any worker.
+
+        Safe to call from sync route handlers. Call it after committing: a
+        broker failure is logged, never raised, so it cannot fail a request
+        whose change is already stored.
+        """
+        try:
+            self.broker.publish({"user_ids": list(user_ids), "event": event})
+            self.metrics["published"] += 1
+        except Exception:
+            logger.exception("Publishing chat event failed")
+
+    def deliver(self, envelope: dict) -> None:
+        """Broker callback: push an envelope to the local sockets it targets."""
+        with self._lock:
+            targets = [
+                subscriber
+                for user_id in envelope["user_ids"]
+                for subscriber in self._subscribers.get(user_id, ())
+            ]
+        for subscriber in targets:
+            subscriber.offer_threadsafe(envelope["event"])
+        self.metrics["delivered"] += len(targets)
+
+    def stats(self) -> dict:
+        with self._lock:
+            sockets = sum(len(s) for s in self._subscribers.values())
+            users = len(self._subscribers)
+        return {
+            **self.metrics,
+            "broker": type(self.broker).__name__,
+            "users": users,
+            "sockets": sockets,
+        }
+
+
+chat_hub = ChatHub()
@@ -0,0 +1,134 @@
+"""
+Inserting chat messages together with their chat's last-message columns.
+
+``chats.last_message_id`` and ``chats.last_message_at`` let the inbox sort
+chats and show their newest message without scanning ``chat_messages``.
+``insert_messages`` keeps them in step with every insert: on PostgreSQL the
+INSERT and the UPDATE of ``chats`` are a single statement per message
+(data-modifying CTEs); on other databases they are two statements for the
+whole batch. Either way they run in the caller's transaction, and the chat
+only moves to a higher message id, so concurrent sends committing out of
+order never move it backwards. ``publish_messages`` pushes committed
+messages to the chat members' sockets.
+"""
+
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import Row, bindparam, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.chat_hub import chat_hub
+from app.db.models.Chats.chat import Chat
+from app.db.models.Chats.chat_member import ChatMember
+from app.db.models.Chats.chat_message import ChatMessage
+from app.schemas.chat_message_schema import ChatMessageResponse
+
+_messages = ChatMessage.__table__
+_chats = Chat.__table__
+
+
+def _newer_than_last(message_id):
+    """
+    Only move a chat's last message forward: a concurrent send holding a
+    lower id may commit after a higher one and must not overwrite it.
+    """
+    return or_(
+        _chats.c.last_message_id.is_(None), _chats.c.last_message_id < message_id
+    )
+
+
+# one statement, executed with many parameter sets (executemany)
+_bump_chat_stmt = (
+    update(_chats)
+    .where(
+        _chats.c.id == bindparam("b_chat_id"),
+        _newer_than_last(bindparam("b_message_id")),
+    )
+    .values(
+        last_message_id=bindparam("b_message_id"),
+        last_message_at=bindparam("b_send_at"),
+        updated_at=bindparam("b_send_at"),
+    )
+)
+
+
+def _insert_and_bump_stmt(value: dict):
+    """INSERT one message and move its chat to it, as one PostgreSQL statement."""
+    inserted = insert(_messages).values(value).returning(*_messages.c).cte("inserted")
+    bumped = (
+        update(_chats)
+        .where(
+            _chats.c.id == inserted.c.chat_id,
+            _newer_than_last(inserted.c.id),
+        )
+        .values(
+            last_message_id=inserted.c.id,
+            last_message_at=value["send_at"],
+            updated_at=value["send_at"],
+        )
+        .returning(_chats.c.id)
+        .cte("bumped")
+    )
+    return select(inserted).add_cte(bumped)
+
+
+def insert_messages(db: Session, rows: list[dict]) -> list[Row]:
+    """
+    Insert chat messages and point their chats at the newest one.
+
+    Nothing is committed. Membership and content checks are the caller's.
+
+    Args:
+        db: Database session
+        rows: One dict per message with chat_id, sender_id, text, image_url
+
+    Returns:
+        The inserted ``chat_messages`` rows, in the order of ``rows``
+    """
+    now = datetime.now(ZoneInfo("Asia/Bangkok"))
+    values = [
+        {
+            "chat_id": row["chat_id"],
+            "sender_id": row["sender_id"],
+            "text": row.get("text"),
+            "image_url": row.get("image_url"),
+            "send_at": now,
+        }
+        for row in rows
+    ]
+
+    if db.get_bind().dialect.name == "postgresql":
+        # one statement per message: RETURNING of a multi-row VALUES insert
+        # is not guaranteed to come back in input order, so a batch could
+        # hand a message to the wrong sender; the batch still shares a commit
+        return [db.execute(_insert_and_bump_stmt(value)).one() for value in values]
+
+    inserted = db.execute(
+        insert(_messages).returning(*_messages.c, sort_by_parameter_order=True), values
+    ).all()
+    latest = {row.chat_id: row for row in inserted}  # ids ascend, the last one wins
+    db.execute(
+        _bump_chat_stmt,
+        [
+            {"b_chat_id": chat_id, "b_message_id": row.id, "b_send_at": row.send_at}
+            for chat_id, row in latest.items()
+        ],
+    )
+    return inserted
+
+
+def publish_messages(db: Session, messages: list[Row]) -> None:
+    """Send committed messages to every member of their chats (one query)."""
+    chat_ids = {message.chat_id for message in messages}
+    members: dict[int, list[int]] = {chat_id: [] for chat_id in chat_ids}
+    for chat_id, user_id in db.execute(
+        select(ChatMember.chat_id, ChatMember.user_id).where(
+            ChatMember.chat_id.in_(chat_ids)
+        )
+    ):
+        members[chat_id].append(user_id)
+
+    for message in messages:
+        data = ChatMessageResponse.model_validate(message).model_dump(mode="json")
+        chat_hub.publish(members[message.chat_id], {"type": "message", "data": data})
@@ -0,0 +1,216 @@
+"""
+One chat per pair of users.
+
+A 1:1 chat stores its two members as ``(user_low_id, user_high_id)``, lower
+id first, under a unique index. ``get_or_create_direct_chat`` finds the
+pair's chat with one indexed lookup and only creates it when there is none;
+two concurrent first messages cannot create two chats because the insert is
+an upsert on that index.
+
+``dedupe_direct_chats`` merges the duplicate chats created before the key
+existed and fills the key in; run it once with
+``python -m app.core.chat_pairs``.
+"""
+
+from collections import defaultdict
+from typing import Optional
+
+from sqlalchemy import bindparam, case, delete, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.core.outbox import emit
+from app.db.database import SessionLocal
+from app.db.models.Chats.chat import Chat
+from app.db.models.Chats.chat_member import ChatMember
+from app.db.models.Chats.chat_message import ChatMessage
+
+_members = ChatMember.__table__
+_chats = Chat.__table__
+
+# executed with many parameter sets (executemany)
+_set_marker_stmt = (
+    update(_members)
+    .where(
+        _members.c.chat_id == bindparam("b_chat_id"),
+        _members.c.user_id == bindparam("b_user_id"),
+    )
+    .values(last_read_message_id=bindparam("b_last_read"))
+)
+_set_pair_stmt = (
+    update(_chats)
+    .where(_chats.c.id == bindparam("b_chat_id"))
+    .values(user_low_id=bindparam("b_low"), user_high_id=bindparam("b_high"))
+)
+
+
+def pair_key(user_id: int, other_user_id: int) -> tuple[int, int]:
+    return min(user_id, other_user_id), max(user_id, other_user_id)
+
+
+def _find(db: Session, low: int, high: int) -> Optional[Chat]:
+    return db.scalar(
+        select(Chat).where(Chat.user_low_id == low, Chat.user_high_id == high)
+    )
+
+
+def _insert_pair(db: Session, low: int, high: int) -> Optional[int]:
+    """Insert the pair's chat unless it exists; returns the new id or None."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        stmt = postgresql.insert(Chat)
+    elif dialect == "sqlite":
+        stmt = sqlite.insert(Chat)
+    else:
+        raise NotImplementedError(f"chat pairs do not support {dialect}")
+    stmt = (
+        stmt.values(user_low_id=low, user_high_id=high)
+        .on_conflict_do_nothing(index_elements=["user_low_id", "user_high_id"])
+        .returning(Chat.id)
+    )
+    return db.scalar(stmt)
+
+
+def get_or_create_direct_chat(
+    db: Session, user_id: int, other_user_id: int
+) -> tuple[Chat, bool]:
+    """
+    Return the 1:1 chat of two users, creating it (with both members) if
+    they have none. Commits when a chat is created.
+
+    Returns:
+        ``(chat, created)``
+    """
+    low, high = pair_key(user_id, other_user_id)
+    chat = _find(db, low, high)
+    if chat is not None:
+        return chat, False
+
+    chat_id = _insert_pair(db, low, high)
+    if chat_id is None:
+        # created by a concurrent request since the lookup
+        db.rollback()
+        return _find(db, low, high), False
+
+    db.add_all(
+        [
+            ChatMember(chat_id=chat_id, user_id=user_id),
+            ChatMember(chat_id=chat_id, user_id=other_user_id),
+        ]
+    )
+    chat = db.get(Chat, chat_id)
+    emit(db, "chat.created", chat, member_ids=[user_id, other_user_id])
+    db.commit()
+    db.refresh(chat)
+    return chat, True
+
+
+def dedupe_direct_chats(db: Session) -> dict:
+    """
+    Merge 1:1 chats that share the same two members into the oldest one and
+    set the pair key on every 1:1 chat. Commits once.
+
+    Messages of the duplicates move to the kept chat, each member keeps the
+    furthest read marker, and the kept chat's last message is recomputed.
+
+    Returns:
+        Counts: pairs, merged (chats removed), messages_moved
+    """
+    pairs = db.execute(
+        select(
+            ChatMember.chat_id,
+            func.min(ChatMember.user_id).label("low"),
+            func.max(ChatMember.user_id).label("high"),
+        )
+        .group_by(ChatMember.chat_id)
+        .having(func.count(func.distinct(ChatMember.user_id)) == 2)
+        .order_by(ChatMember.chat_id)
+    ).all()
+
+    chats_by_pair: dict[tuple[int, int], list[int]] = defaultdict(list)
+    for row in pairs:
+        chats_by_pair[(row.low, row.high)].append(row.chat_id)
+    keeper_of = {
+        chat_id: chat_ids[0]
+        for chat_ids in chats_by_pair.values()
+        for chat_id in chat_ids[1:]
+    }
+
+    messages_moved = 0
+    if keeper_of:
+        duplicates = list(keeper_of)
+        messages_moved = db.execute(
+            update(ChatMessage)
+            .where(ChatMessage.chat_id.in_(duplicates))
+            .values(chat_id=case(keeper_of, value=ChatMessage.chat_id))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+        # each member keeps the furthest read marker over all merged chats
+        markers: dict[tuple[int, int], int] = {}
+        involved = duplicates + list(set(keeper_of.values()))
+        for chat_id, user_id, last_read in db.execute(
+            select(
+                ChatMember.chat_id, ChatMember.user_id, ChatMember.last_read_message_id
+            ).where(ChatMember.chat_id.in_(involved))
+        ):
+            key = (keeper_of.get(chat_id, chat_id), user_id)
+            markers[key] = max(markers.get(key, 0), last_read or 0)
+        marker_rows = [
+            {"b_chat_id": chat_id, "b_user_id": user_id, "b_last_read": last_read}
+            for (chat_id, user_id), last_read in markers.items()
+            if last_read
+        ]
+        if marker_rows:
+            db.execute(_set_marker_stmt, marker_rows)
+
+        db.execute(delete(ChatMember).where(ChatMember.chat_id.in_(duplicates)))
+        db.execute(delete(Chat).where(Chat.id.in_(duplicates)))
+
+    keepers = [chat_ids[0] for chat_ids in chats_by_pair.values()]
+    if keepers:
+        db.execute(
+            _set_pair_stmt,
+            [
+                {"b_chat_id": chat_ids[0], "b_low": low, "b_high": high}
+                for (low, high), chat_ids in chats_by_pair.items()
+            ],
+        )
+        merged = ChatMessage.__table__.alias("merged")
+        newest = (
+            select(func.max(merged.c.id))
+            .where(merged.c.chat_id == _chats.c.id)
+            .correlate(_chats)
+            .scalar_subquery()
+        )
+        db.execute(
+            update(_chats)
+            .where(_chats.c.id.in_(keepers))
+            .values(
+                last_message_id=newest,
+                last_message_at=select(ChatMessage.send_at)
+                .where(ChatMessage.id == newest)
+                .correlate(_chats)
+                .scalar_subquery(),
+            )
+        )
+
+    db.commit()
+    return {
+        "pairs": len(chats_by_pair),
+        "merged": len(keeper_of),
+        "messages_moved": messages_moved,
+    }
+
+
+def main():
+    with SessionLocal() as db:
+        result = dedupe_direct_chats(db)
+    print(
+        f"1:1 chats: {result['pairs']} pairs, {result['merged']} duplicates merged, "
+        f"{result['messages_moved']} messages moved"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Online presence of chat users.
+
+A user is online while they keep a chat socket open and send a heartbeat
+(``ping``) at least every ``CHAT_PRESENCE_TTL_SECONDS``; closing the last
+socket takes them offline at once. Heartbeats only touch memory: users are
+kept in the order of their last heartbeat, so a heartbeat is a move to the
+end and ``expire`` pops from the front only the users whose time is up.
+
+Only transitions are published: when a user comes online or goes offline,
+the members of their chats get a ``presence`` event over the real-time
+channel.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Optional
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import and_, select
+from sqlalchemy.orm import Session, aliased
+
+from app.core.chat_hub import chat_hub
+from app.db.database import SessionLocal
+from app.db.models.Chats.chat_member import ChatMember
+from app.schemas.chat_schema import ChatPresence
+
+DEFAULT_PRESENCE_TTL_SECONDS = 60.0
+DEFAULT_EXPIRY_INTERVAL_SECONDS = 5.0
+
+_BANGKOK = ZoneInfo("Asia/Bangkok")
+
+
+class PresenceTracker:
+    """Heartbeat-based online state with expiry in heartbeat order."""
+
+    def __init__(
+        self,
+        ttl_seconds: Optional[float] = None,
+        session_factory: Callable[[], Session] = SessionLocal,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.ttl_seconds = ttl_seconds or float(
+            os.getenv("CHAT_PRESENCE_TTL_SECONDS", DEFAULT_PRESENCE_TTL_SECONDS)
+        )
+        self.session_factory = session_factory
+        self.clock = clock
+        # online users, oldest heartbeat first
+        self._online: OrderedDict[int, float] = OrderedDict()
+        self._last_seen: dict[int, float] = {}
+        self._lock = threading.Lock()
+        self.metrics = {"heartbeats": 0, "online_events": 0, "offline_events": 0}
+
+    def heartbeat(self, user_id: int) -> bool:
+        """Record a sign of life. Returns True if the user just came online."""
+        now = self.clock()
+        with self._lock:
+            came_online = user_id not in self._online
+            self._online[user_id] = now
+            self._online.move_to_end(user_id)
+            self._last_seen[user_id] = now
+        self.metrics["heartbeats"] += 1
+        if came_online:
+            self.metrics["online_events"] += 1
+        return came_online
+
+    def leave(self, user_id: int) -> bool:
+        """Take the user offline now. Returns True if they were online."""
+        with self._lock:
+            was_online = self._online.pop(user_id, None) is not None
+        if was_online:
+            self.metrics["offline_events"] += 1
+        return was_online
+
+    def expire(self, now: Optional[float] = None) -> list[int]:
+        """Take offline every user without a heartbeat within the TTL."""
+        deadline = (self.clock() if now is None else now) - self.ttl_seconds
+        expired = []
+        with self._lock:
+            while self._online:
+                user_id, last = next(iter(self._online.items()))
+                if last > deadline:
+                    break
+                del self._online[user_id]
+                expired.append(user_id)
+        self.metrics["offline_events"] += len(expired)
+        return expired
+
+    def is_online(self, user_id: int) -> bool:
+        return user_id in self._online
+
+    def last_seen_at(self, user_id: int) -> Optional[datetime]:
+        last = self._last_seen.get(user_id)
+        return None if last is None else datetime.fromtimestamp(last, _BANGKOK)
+
+    def describe(self, user_id: int) -> ChatPresence:
+        return ChatPresence(
+            user_id=user_id,
+            online=self.is_online(user_id),
+            last_seen_at=self.last_seen_at(user_id),
+        )
+
+    def tick(self) -> int:
+        """Periodic job: expire silent users and tell their contacts."""
+        expired = self.expire()
+        if expired:
+            with self.session_factory() as db:
+                publish_presence(db, expired, self)
+        return len(expired)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._online.clear()
+            self._last_seen.clear()
+        self.metrics = dict.fromkeys(self.metrics, 0)
+
+    def stats(self) -> dict:
+        return {**self.metrics, "online": len(self._online)}
+
+
+def contacts_of(db: Session, user_ids: list[int]) -> dict[int, set[int]]:
+    """The users sharing a chat with each of ``user_ids`` (one query)."""
+    me = aliased(ChatMember, name="me")
+    other = aliased(ChatMember, name="other")
+    contacts: dict[int, set[int]] = {user_id: set() for user_id in user_ids}
+    for user_id, contact_id in db.execute(
+        select(me.user_id, other.user_id)
+        .join(other, and_(other.chat_id == me.chat_id, other.user_id != me.user_id))
+        .where(me.user_id.in_(user_ids))
+        .distinct()
+    ):
+        contacts[user_id].add(contact_id)
+    return contacts
+
+
+def publish_presence(
+    db: Session, user_ids: list[int], tracker: PresenceTracker
+) -> None:
+    """Send the current presence of ``user_ids`` to their contacts."""
+    for user_id, contacts in contacts_of(db, user_ids).items():
+        if contacts:
+            data = tracker.describe(user_id).model_dump(mode="json")
+            chat_hub.publish(contacts, {"type": "presence", "data": data})
+
+
+presence = PresenceTracker()
@@ -0,0 +1,153 @@
+"""
+Coalesced read receipts.
+
+Marking a chat as read happens on every scroll and every received message,
+so ``POST /v1/chats/{chat_id}/read`` does not write to the database. It
+keeps the highest message id read per (chat, user) in memory, pushes a
+``read`` event to the chat's members right away, and a periodic job writes
+all pending markers with one statement and one commit. However many times a
+member reads a chat between two flushes, the database sees one update.
+
+A marker never moves backwards, in memory or in ``chat_members``. Markers
+not yet flushed are lost if the process dies; the member then sees a few
+messages as unread again, nothing worse.
+"""
+
+import threading
+from typing import Callable, Optional
+
+from sqlalchemy import bindparam, case, func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.chat_hub import chat_hub
+from app.db.database import SessionLocal
+from app.db.models.Chats.chat_member import ChatMember
+
+DEFAULT_FLUSH_INTERVAL_SECONDS = 2.0
+
+ReceiptKey = tuple[int, int]  # (chat_id, user_id)
+
+_members = ChatMember.__table__
+_marker = _members.c.last_read_message_id
+_last_read = bindparam("b_last_read")
+
+# executed with many parameter sets (executemany); never moves a marker back
+_advance_marker_stmt = (
+    update(_members)
+    .where(
+        _members.c.chat_id == bindparam("b_chat_id"),
+        _members.c.user_id == bindparam("b_user_id"),
+    )
+    .values(
+        last_read_message_id=case(
+            (func.coalesce(_marker, 0) < _last_read, _last_read), else_=_marker
+        )
+    )
+)
+
+
+class ReadReceiptBuffer:
+    """Highest read message id per (chat, user), written in bulk."""
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
+        self.session_factory = session_factory
+        self._pending: dict[ReceiptKey, int] = {}
+        self._lock = threading.Lock()
+        self.metrics = {"recorded": 0, "coalesced": 0, "flushed": 0}
+
+    def record(self, chat_id: int, user_id: int, message_id: int) -> bool:
+        """
+        Remember that ``user_id`` read ``chat_id`` up to ``message_id``.
+
+        Returns:
+            False if an equal or later marker is already pending
+        """
+        key = (chat_id, user_id)
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is not None and pending >= message_id:
+                return False
+            self._pending[key] = message_id
+        self.metrics["recorded"] += 1
+        if pending is not None:
+            self.metrics["coalesced"] += 1
+        return True
+
+    def pending(self, chat_id: int, user_id: int) -> Optional[int]:
+        return self._pending.get((chat_id, user_id))
+
+    def overlay(self, chat_id: int, markers: dict[int, Optional[int]]) -> dict:
+        """Raise stored markers ``{user_id: message_id}`` to the pending ones."""
+        return {
+            user_id: max(stored or 0, self._pending.get((chat_id, user_id), 0)) or None
+            for user_id, stored in markers.items()
+        }
+
+    def flush(self, db: Session, user_id: Optional[int] = None) -> int:
+        """
+        Write pending markers (only ``user_id``'s if given) and commit once.
+
+        Returns:
+            Number of markers written
+        """
+        with self._lock:
+            if user_id is None:
+                batch, self._pending = self._pending, {}
+            else:
+                keys = [key for key in self._pending if key[1] == user_id]
+                batch = {key: self._pending.pop(key) for key in keys}
+        if not batch:
+            return 0
+
+        try:
+            db.execute(
+                _advance_marker_stmt,
+                [
+                    {"b_chat_id": chat_id, "b_user_id": member_id, "b_last_read": last}
+                    for (chat_id, member_id), last in batch.items()
+                ],
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            with self._lock:
+                for key, last in batch.items():
+                    self._pending[key] = max(last, self._pending.get(key, 0))
+            raise
+        self.metrics["flushed"] += len(batch)
+        return len(batch)
+
+    def tick(self) -> int:
+        """Periodic job: write every pending marker."""
+        with self.session_factory() as db:
+            return self.flush(db)
+
+    def reset(self) -> None:
+        """Forget pending markers without writing them."""
+        with self._lock:
+            self._pending.clear()
+        self.metrics = dict.fromkeys(self.metrics, 0)
+
+    def stats(self) -> dict:
+        return {**self.metrics, "pending": len(self._pending)}
+
+
+def publish_read(db: Session, chat_id: int, user_id: int, message_id: int) -> None:
+    """Tell the members of ``chat_id`` how far ``user_id`` has read."""
+    member_ids = db.scalars(
+        select(ChatMember.user_id).where(ChatMember.chat_id == chat_id)
+    ).all()
+    chat_hub.publish(
+        member_ids,
+        {
+            "type": "read",
+            "data": {
+                "chat_id": chat_id,
+                "user_id": user_id,
+                "last_read_message_id": message_id,
+            },
+        },
+    )
+
+
+read_receipts = ReadReceiptBuffer()
@@ -0,0 +1,110 @@
+"""
+Full-text search over the messages of a user's chats.
+
+Only chats the user is a member of are searched: the membership join is
+part of the query. Matching uses an inverted index instead of scanning
+``chat_messages``:
+
+- PostgreSQL: a GIN index on ``to_tsvector('simple', text)``, queried with
+  ``plainto_tsquery`` and highlighted with ``ts_headline``.
+- SQLite: the ``chat_messages_fts`` FTS5 table, kept in step by triggers.
+
+Both use the ``simple``/``unicode61`` word rules (no stemming, every word
+of the query must appear). Results are newest first and paged with a
+message id cursor, like the chat history.
+"""
+
+import html
+import re
+from typing import Optional
+
+from sqlalchemy import Row, and_, column, func, literal_column, select, table
+from sqlalchemy.dialects import postgresql  # noqa: F401 (registers to_tsvector)
+from sqlalchemy.orm import Session
+
+from app.db.models.Chats.chat_member import ChatMember
+from app.db.models.Chats.chat_message import ChatMessage
+
+# private-use characters mark matches until the text is HTML-escaped
+_START, _STOP = "\ue000", "\ue001"
+_WORD = re.compile(r"\w+")
+
+_SIMPLE = literal_column("'simple'")
+_fts = table("chat_messages_fts", column("rowid"))
+
+
+def search_document():
+    """The indexed tsvector (same expression as ix_chat_messages_text_search)."""
+    return func.to_tsvector(
+        _SIMPLE, func.coalesce(ChatMessage.text, literal_column("''"))
+    )
+
+
+def highlight(marked: str) -> str:
+    """HTML-escape a marked-up match and wrap the matches in ``<mark>``."""
+    return (
+        html.escape(marked)
+        .replace(_START, "<mark>")
+        .replace(_STOP, "</mark>")
+    )
+
+
+def search_messages(
+    db: Session,
+    user_id: int,
+    query: str,
+    limit: int,
+    before: Optional[int] = None,
+    chat_id: Optional[int] = None,
+) -> list[Row]:
+    """
+    Messages of ``user_id``'s chats containing every word of ``query``.
+
+    Args:
+        db: Database session
+        user_id: Searching user; only their chats are searched
+        query: Words to look for
+        limit: Maximum rows to return
+        before: Only messages with a smaller id (the previous page's last)
+        chat_id: Only this chat
+
+    Returns:
+        Rows of (ChatMessage, marked text), newest first; the marked text
+        has the matches between private-use marks (see ``highlight``)
+    """
+    words = _WORD.findall(query)
+    if not words:
+        return []
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        tsquery = func.plainto_tsquery(_SIMPLE, " ".join(words))
+        marked = func.ts_headline(
+            _SIMPLE,
+            func.coalesce(ChatMessage.text, literal_column("''")),
+            tsquery,
+            f"StartSel={_START}, StopSel={_STOP}, HighlightAll=true",
+        )
+        stmt = select(ChatMessage, marked).where(search_document().op("@@")(tsquery))
+    elif dialect == "sqlite":
+        # every word as a quoted phrase: user input never reaches FTS5 syntax
+        match = " ".join('"{}"'.format(word.replace('"', '""')) for word in words)
+        fts = literal_column("chat_messages_fts")
+        marked = func.highlight(fts, 0, _START, _STOP)
+        stmt = (
+            select(ChatMessage, marked)
+            .join(_fts, _fts.c.rowid == ChatMessage.id)
+            .where(fts.op("MATCH")(match))
+        )
+    else:
+        raise NotImplementedError(f"chat search does not support {dialect}")
+
+    stmt = stmt.join(
+        ChatMember,
+        and_(ChatMember.chat_id == ChatMessage.chat_id, ChatMember.user_id == user_id),
+    )
+    if chat_id is not None:
+        stmt = stmt.where(ChatMessage.chat_id == chat_id)
+    if before is not None:
+        stmt = stmt.where(ChatMessage.id < before)
+    return db.execute(stmt.order_by(ChatMessage.id.desc()).limit(limit)).all()
@@ -0,0 +1,189 @@
+"""
+Group commit for chat messages (opt-in: ``CHAT_WRITE_BUFFER_ENABLED``).
+
+With the buffer on, ``send_message`` does not commit on its own. It hands
+the message to a writer thread and awaits the result on the event loop, so
+no worker thread is tied up while the batch fills. The writer collects whatever
+arrives within ``CHAT_WRITE_BUFFER_MAX_DELAY_MS`` (up to
+``CHAT_WRITE_BUFFER_MAX_BATCH`` messages), stores them with one multi-row
+INSERT ... RETURNING, commits once and only then releases the waiting
+requests. Under load many messages share one commit (and one fsync)
+instead of paying for one each; a lone message waits at most the delay.
+
+Committed messages are pushed to the chat members' sockets by the writer,
+like on the direct path.
+"""
+
+import asyncio
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+from sqlalchemy import Row
+from sqlalchemy.orm import Session
+
+from app.core.chat_messages import insert_messages, publish_messages
+from app.core.outbox import emit
+from app.db.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BATCH = 200
+DEFAULT_MAX_DELAY_MS = 5.0
+DEFAULT_ACK_TIMEOUT_SECONDS = 10.0
+
+_STOP = object()
+
+
+class ChatWriteBuffer:
+    """Batches chat message inserts from many requests into one commit."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        enabled: Optional[bool] = None,
+        max_batch: Optional[int] = None,
+        max_delay_ms: Optional[float] = None,
+        ack_timeout: Optional[float] = None,
+    ):
+        self.session_factory = session_factory
+        self.enabled = (
+            enabled
+            if enabled is not None
+            else os.getenv("CHAT_WRITE_BUFFER_ENABLED", "false").lower() == "true"
+        )
+        self.max_batch = max_batch or int(
+            os.getenv("CHAT_WRITE_BUFFER_MAX_BATCH", DEFAULT_MAX_BATCH)
+        )
+        self.max_delay = (
+            max_delay_ms
+            or float(os.getenv("CHAT_WRITE_BUFFER_MAX_DELAY_MS", DEFAULT_MAX_DELAY_MS))
+        ) / 1000
+        self.ack_timeout = ack_timeout or float(
+            os.getenv("CHAT_WRITE_BUFFER_ACK_TIMEOUT_SECONDS", DEFAULT_ACK_TIMEOUT_SECONDS)
+        )
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.metrics = {"batches": 0, "messages": 0, "failed": 0, "largest_batch": 0}
+
+    def submit(self, row: dict) -> Row:
+        """
+        Store one message with the next batch and wait until it is committed.
+
+        Args:
+            row: chat_id, sender_id, text, image_url (already validated)
+
+        Returns:
+            The inserted ``chat_messages`` row
+
+        Raises:
+            TimeoutError: The batch was not committed within ``ack_timeout``;
+                the message may still be stored later
+            Exception: Whatever made the insert fail
+        """
+        return self._enqueue(row).result(timeout=self.ack_timeout)
+
+    async def submit_async(self, row: dict) -> Row:
+        """``submit`` for async routes: waits on the event loop, not a thread."""
+        future = asyncio.wrap_future(self._enqueue(row))
+        # a timed-out request must not cancel the future the writer resolves
+        return await asyncio.wait_for(asyncio.shield(future), self.ack_timeout)
+
+    def _enqueue(self, row: dict) -> Future:
+        self._ensure_writer()
+        future: Future = Future()
+        self._queue.put((row, future))
+        return future
+
+    def _ensure_writer(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="chat-write-buffer", daemon=True
+                )
+                self._thread.start()
+
+    def close(self) -> None:
+        """Write what is queued and stop the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join()
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch = [first]
+            stopping = False
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._write(batch)
+            if stopping:
+                return
+
+    def _write(self, batch: list[tuple[dict, Future]]) -> None:
+        with self.session_factory() as db:
+            try:
+                messages = insert_messages(db, [row for row, _ in batch])
+                for message in messages:
+                    emit(db, "chat.message_sent", message, aggregate_id=message.chat_id)
+                db.commit()
+                error = None
+            except Exception as exc:
+                db.rollback()
+                error = exc
+
+            if error is None:
+                for (_, future), message in zip(batch, messages):
+                    future.set_result(message)
+                self.metrics["batches"] += 1
+                self.metrics["messages"] += len(messages)
+                self.metrics["largest_batch"] = max(
+                    self.metrics["largest_batch"], len(messages)
+                )
+                try:
+                    publish_messages(db, messages)
+                except Exception:
+                    logger.exception("Publishing chat messages failed")
+                return
+
+        if len(batch) > 1:
+            # one bad message must not fail the others: retry them one by one
+            for item in batch:
+                self._write([item])
+            return
+        logger.error("Chat message write failed", exc_info=error)
+        self.metrics["failed"] += 1
+        batch[0][1].set_exception(error)
+
+    def stats(self) -> dict:
+        batches = self.metrics["batches"]
+        return {
+            **self.metrics,
+            "enabled": self.enabled,
+            "avg_batch": self.metrics["messages"] / batches if batches else None,
+            "queued": self._queue.qsize(),
+        }
+
+
+chat_write_buffer = ChatWriteBuffer()
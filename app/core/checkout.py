@@ -0,0 +1,228 @@
+"""Checkout of a whole cart into transactions in one database transaction."""
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from app.core.cart_holds import cart_holds
+from app.core.outbox import emit
+from app.core.reservations import reservation_engine
+from app.db.models.Carts.cart import Cart
+from app.db.models.Carts.cart_item import CartItem
+from app.db.models.items.item import Item
+from app.db.models.Transactions.transaction_model import Transaction
+from app.schemas.cart_schema import CheckoutLineStatus
+from app.schemas.item_schema import ItemStatus
+from app.schemas.transaction_schema import TransactionStatus
+
+
+@dataclass
+class CheckoutLine:
+    cart_item_id: int
+    product_id: int
+    quantity: int
+    status: CheckoutLineStatus = CheckoutLineStatus.CREATED
+    seller_id: Optional[int] = None
+    available: Optional[int] = None
+    transaction_id: Optional[int] = None
+    agreed_price: Optional[Decimal] = None
+
+
+@dataclass
+class CheckoutResult:
+    lines: list[CheckoutLine] = field(default_factory=list)
+
+    @property
+    def created(self) -> list[CheckoutLine]:
+        return [line for line in self.lines if line.status == CheckoutLineStatus.CREATED]
+
+    def by_seller(self) -> dict[int, list[CheckoutLine]]:
+        groups: dict[int, list[CheckoutLine]] = defaultdict(list)
+        for line in self.created:
+            groups[line.seller_id].append(line)
+        return dict(groups)
+
+
+def available_units(item: Item, user_id: int) -> int:
+    """
+    Units of ``item`` that ``user_id`` can buy right now: the in-memory stock
+    of a hot item or the row's quantity, less the units held in other buyers'
+    carts. 0 if the item is deleted or not for sale.
+    """
+    if item.deleted_at is not None or item.status != ItemStatus.AVAILABLE.value:
+        return 0
+    available = reservation_engine.available(item.id)
+    if available is None:
+        available = item.quantity
+    return max(available - cart_holds.held_by_others(item.id, user_id), 0)
+
+
+def _check_line(line: CheckoutLine, item: Item, user_id: int) -> None:
+    """Set ``line.status`` to the first reason the line cannot be bought."""
+    if item.deleted_at is not None:
+        line.status = CheckoutLineStatus.NOT_FOUND
+        return
+    if item.owner_id == user_id:
+        line.status = CheckoutLineStatus.OWN_ITEM
+        return
+    if item.status != ItemStatus.AVAILABLE.value:
+        line.status = CheckoutLineStatus.UNAVAILABLE
+        line.available = 0
+        return
+
+    line.available = available_units(item, user_id)
+    if line.available < line.quantity:
+        line.status = CheckoutLineStatus.INSUFFICIENT_STOCK
+
+
+def _reject(result: CheckoutResult) -> None:
+    raise HTTPException(
+        status_code=409,
+        detail={
+            "message": "Some cart items cannot be bought",
+            "lines": [
+                {
+                    "cart_item_id": line.cart_item_id,
+                    "status": line.status.value,
+                    "available": line.available,
+                }
+                for line in result.lines
+                if line.status != CheckoutLineStatus.CREATED
+            ],
+        },
+    )
+
+
+def checkout_cart(
+    db: Session,
+    user_id: int,
+    cart_item_ids: Optional[list[int]] = None,
+    allow_partial: bool = True,
+) -> CheckoutResult:
+    """
+    Turn the caller's cart lines into pending transactions and commit once.
+
+    All cart lines and their items are read in one query that locks the item
+    rows (in id order, so concurrent checkouts cannot deadlock). Units held
+    in other buyers' carts do not count as available. Lines that can be
+    bought become transactions in a single bulk INSERT, ordered by seller,
+    and are removed from the cart in the same commit. Lines that cannot be
+    bought stay in the cart and are reported with a reason.
+
+    Args:
+        db: Database session
+        user_id: Buyer
+        cart_item_ids: Only check out these cart lines (default: whole cart)
+        allow_partial: If False, nothing is bought unless every line can be
+
+    Returns:
+        Per-line outcome
+
+    Raises:
+        HTTPException: 404 if the cart is empty, 409 if ``allow_partial`` is
+            False and some line cannot be bought
+    """
+    stmt = (
+        select(CartItem, Item)
+        .join(Cart, Cart.id == CartItem.cart_id)
+        .join(Item, Item.id == CartItem.product_id)
+        .where(Cart.user_id == user_id)
+        .order_by(CartItem.product_id)
+        .with_for_update(of=Item)
+    )
+    if cart_item_ids is not None:
+        stmt = stmt.where(CartItem.id.in_(cart_item_ids))
+    rows = db.execute(stmt).all()
+    if not rows:
+        raise HTTPException(status_code=404, detail="Cart is empty")
+
+    result = CheckoutResult()
+    buyable: list[tuple[CheckoutLine, Item]] = []
+    for cart_item, item in rows:
+        line = CheckoutLine(
+            cart_item_id=cart_item.id,
+            product_id=cart_item.product_id,
+            quantity=cart_item.quantity,
+            seller_id=item.owner_id,
+        )
+        _check_line(line, item, user_id)
+        result.lines.append(line)
+        if line.status == CheckoutLineStatus.CREATED:
+            buyable.append((line, item))
+
+    if not allow_partial and len(buyable) < len(result.lines):
+        db.rollback()
+        _reject(result)
+    if not buyable:
+        db.rollback()
+        return result
+
+    buyable.sort(key=lambda pair: (pair[1].owner_id, pair[1].id))
+    transactions = db.scalars(
+        insert(Transaction).returning(Transaction, sort_by_parameter_order=True),
+        [
+            {
+                "item_id": item.id,
+                "seller_id": item.owner_id,
+                "buyer_id": user_id,
+                "status": TransactionStatus.PENDING.value,
+                "agreed_price": item.price * line.quantity,
+                "amount": line.quantity,
+                "version": 1,
+            }
+            for line, item in buyable
+        ],
+    ).all()
+
+    held: list[tuple[int, int]] = []
+    lost: list[int] = []
+    for (line, item), transaction in zip(buyable, transactions):
+        line.transaction_id = transaction.id
+        line.agreed_price = transaction.agreed_price
+        if reservation_engine.is_hot(item.id):
+            # hot items: another buyer may have taken the stock in memory since the check
+            if reservation_engine.hold(
+                item.id,
+                transaction.id,
+                line.quantity,
+                reserved=cart_holds.held_by_others(item.id, user_id),
+            ):
+                held.append((item.id, transaction.id))
+            else:
+                line.status = CheckoutLineStatus.INSUFFICIENT_STOCK
+                line.transaction_id = None
+                lost.append(transaction.id)
+                continue
+        emit(db, "transaction.created", transaction)
+
+    if lost and not allow_partial:
+        db.rollback()
+        for item_id, transaction_id in held:
+            reservation_engine.release(item_id, transaction_id)
+        _reject(result)
+    if lost:
+        db.execute(
+            delete(Transaction)
+            .where(Transaction.id.in_(lost))
+            .execution_options(synchronize_session=False)
+        )
+    bought = [line.cart_item_id for line in result.created]
+    if bought:
+        db.execute(delete(CartItem).where(CartItem.id.in_(bought)))
+
+    try:
+        db.commit()
+    except Exception:
+        db.rollback()
+        for item_id, transaction_id in held:
+            reservation_engine.release(item_id, transaction_id)
+        raise
+    # the bought lines no longer need their cart holds
+    for line in result.created:
+        cart_holds.release(line.product_id, user_id)
+    return result
@@ -0,0 +1,58 @@
+"""Optimistic concurrency helpers (version counters, ETag / If-Match)."""
+
+from typing import Optional
+
+from fastapi import HTTPException, Response
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
+
+
+def etag(version: int) -> str:
+    """ETag header value for a row version."""
+    return f'"{version}"'
+
+
+def set_etag(response: Response, version: int) -> None:
+    response.headers["ETag"] = etag(version)
+
+
+def check_if_match(if_match: Optional[str], version: int) -> None:
+    """
+    Compare an ``If-Match`` header with the current row version.
+
+    Args:
+        if_match: Raw header value (``"3"``, ``W/"3"``, ``3`` or ``*``), if sent
+        version: Current version of the row
+
+    Raises:
+        HTTPException: 412 if the client edited an older version
+    """
+    if if_match is None or if_match.strip() == "*":
+        return
+
+    candidates = {
+        tag.strip().removeprefix("W/").strip('"') for tag in if_match.split(",")
+    }
+    if str(version) not in candidates:
+        raise HTTPException(
+            status_code=412,
+            detail="Resource has been modified, reload it and try again",
+            headers={"ETag": etag(version)},
+        )
+
+
+def commit_or_conflict(db: Session) -> None:
+    """
+    Commit, turning a lost optimistic-lock race into a 409.
+
+    Raises:
+        HTTPException: 409 if another request updated the row first
+    """
+    try:
+        db.commit()
+    except StaleDataError:
+        db.rollback()
+        raise HTTPException(
+            status_code=409,
+            detail="Resource was modified by another request, reload it and try again",
+        )
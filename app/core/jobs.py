@@ -0,0 +1,139 @@
+"""Registration of the application's periodic background jobs and outbox consumers."""
+
+import os
+
+from app.core.cart_holds import DEFAULT_PERSIST_INTERVAL_SECONDS, cart_holds
+from app.core.chat_presence import (
+    DEFAULT_EXPIRY_INTERVAL_SECONDS as DEFAULT_PRESENCE_EXPIRY_INTERVAL_SECONDS,
+    presence,
+)
+from app.core.chat_receipts import (
+    DEFAULT_FLUSH_INTERVAL_SECONDS as DEFAULT_READ_FLUSH_INTERVAL_SECONDS,
+    read_receipts,
+)
+from app.core.partitions import (
+    DEFAULT_MAINTENANCE_INTERVAL_SECONDS as DEFAULT_PARTITION_INTERVAL_SECONDS,
+    partition_manager,
+)
+from app.core.notifications import notify_transaction_event
+from app.core.outbox import (
+    DEFAULT_DISPATCH_INTERVAL_SECONDS,
+    OutboxDispatcher,
+    outbox,
+)
+from app.core.price_alerts import DEFAULT_ALERT_INTERVAL_SECONDS, make_price_alert_job
+from app.core.price_history import (
+    DEFAULT_STATS_REFRESH_INTERVAL_SECONDS,
+    make_price_stats_job,
+)
+from app.core.reservations import DEFAULT_FLUSH_INTERVAL_SECONDS, reservation_engine
+from app.core.scheduler import BackgroundScheduler
+from app.core.transaction_expiry import DEFAULT_EXPIRY_INTERVAL_SECONDS, make_expiry_job
+from app.core.webhooks import (
+    DEFAULT_DELIVERY_INTERVAL_SECONDS,
+    enqueue_transaction_webhooks,
+    webhook_worker,
+)
+
+
+def register_jobs(scheduler: BackgroundScheduler) -> None:
+    """Add every periodic job to ``scheduler`` (intervals from the environment)."""
+    scheduler.add_job(
+        "hot-item-flush",
+        reservation_engine.tick,
+        interval=float(
+            os.getenv("STOCK_FLUSH_INTERVAL_SECONDS", DEFAULT_FLUSH_INTERVAL_SECONDS)
+        ),
+    )
+    scheduler.add_job(
+        "cart-hold-expiry", cart_holds.advance, interval=cart_holds.tick_seconds
+    )
+    scheduler.add_job(
+        "cart-hold-persist",
+        cart_holds.tick,
+        interval=float(
+            os.getenv(
+                "CART_HOLD_PERSIST_INTERVAL_SECONDS", DEFAULT_PERSIST_INTERVAL_SECONDS
+            )
+        ),
+    )
+    scheduler.add_job(
+        "chat-read-flush",
+        read_receipts.tick,
+        interval=float(
+            os.getenv(
+                "CHAT_READ_FLUSH_INTERVAL_SECONDS", DEFAULT_READ_FLUSH_INTERVAL_SECONDS
+            )
+        ),
+    )
+    scheduler.add_job(
+        "chat-presence-expiry",
+        presence.tick,
+        interval=float(
+            os.getenv(
+                "CHAT_PRESENCE_EXPIRY_INTERVAL_SECONDS",
+                DEFAULT_PRESENCE_EXPIRY_INTERVAL_SECONDS,
+            )
+        ),
+    )
+    scheduler.add_job(
+        "db-partitions",
+        partition_manager.tick,
+        interval=float(
+            os.getenv("DB_PARTITION_INTERVAL_SECONDS", DEFAULT_PARTITION_INTERVAL_SECONDS)
+        ),
+    )
+    scheduler.add_job(
+        "transaction-expiry",
+        make_expiry_job(),
+        interval=float(
+            os.getenv(
+                "TRANSACTION_EXPIRY_INTERVAL_SECONDS", DEFAULT_EXPIRY_INTERVAL_SECONDS
+            )
+        ),
+    )
+    scheduler.add_job(
+        "price-stats-refresh",
+        make_price_stats_job(),
+        interval=float(
+            os.getenv(
+                "PRICE_STATS_REFRESH_INTERVAL_SECONDS",
+                DEFAULT_STATS_REFRESH_INTERVAL_SECONDS,
+            )
+        ),
+    )
+    scheduler.add_job(
+        "price-drop-alerts",
+        make_price_alert_job(),
+        interval=float(
+            os.getenv("PRICE_ALERT_INTERVAL_SECONDS", DEFAULT_ALERT_INTERVAL_SECONDS)
+        ),
+    )
+    scheduler.add_job(
+        "outbox-dispatch",
+        outbox.tick,
+        interval=float(
+            os.getenv(
+                "OUTBOX_DISPATCH_INTERVAL_SECONDS", DEFAULT_DISPATCH_INTERVAL_SECONDS
+            )
+        ),
+    )
+    scheduler.add_job(
+        "webhook-delivery",
+        webhook_worker.run_once,
+        interval=float(
+            os.getenv(
+                "WEBHOOK_DELIVERY_INTERVAL_SECONDS", DEFAULT_DELIVERY_INTERVAL_SECONDS
+            )
+        ),
+    )
+
+
+def register_consumers(dispatcher: OutboxDispatcher) -> None:
+    """Subscribe every in-process consumer of domain events to ``dispatcher``."""
+    dispatcher.subscribe(
+        "transaction.*", enqueue_transaction_webhooks, name="webhooks"
+    )
+    dispatcher.subscribe(
+        "transaction.*", notify_transaction_event, name="notifications"
+    )
@@ -0,0 +1,181 @@
+"""JWT key management with cached key objects and ``kid`` based rotation."""
+
+import json
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from dotenv import load_dotenv
+from jose import JWTError, jwk, jwt
+from jose.backends.base import Key
+from jose.constants import ALGORITHMS
+
+load_dotenv()
+
+DEFAULT_ALGORITHM = "HS256"
+DEFAULT_KID = "default"
+
+
+@dataclass(frozen=True)
+class JWTKey:
+    """A prepared signing/verification key identified by ``kid``."""
+
+    kid: str
+    algorithm: str
+    verification_key: Key
+    signing_key: Optional[Key] = None
+
+    @property
+    def is_asymmetric(self) -> bool:
+        return self.algorithm not in ALGORITHMS.HMAC
+
+
+class JWTKeyRing:
+    """
+    Set of active JWT keys.
+
+    Tokens are signed with the active key and carry its ``kid`` in the header.
+    Verification picks the key named by the token's ``kid`` so old keys can
+    stay verify-only until every token they signed has expired.
+
+    Tokens issued before kids were added have none; they were signed with
+    the single HS256 secret and are verified with the ``legacy_kid`` key
+    only, whatever the active key is. Drop that key once they have expired.
+    """
+
+    def __init__(
+        self, keys: list[JWTKey], active_kid: str, legacy_kid: Optional[str] = None
+    ):
+        self._keys = {key.kid: key for key in keys}
+        if active_kid not in self._keys:
+            raise ValueError(f"Active JWT key '{active_kid}' is not configured")
+        if self._keys[active_kid].signing_key is None:
+            raise ValueError(f"Active JWT key '{active_kid}' has no signing material")
+        legacy = self._keys.get(legacy_kid)
+        if legacy is not None and legacy.algorithm not in ALGORITHMS.HMAC:
+            raise ValueError(f"Legacy JWT key '{legacy_kid}' must be an HMAC key")
+        self.active_kid = active_kid
+        self.legacy_kid = legacy_kid
+
+    @property
+    def active(self) -> JWTKey:
+        return self._keys[self.active_kid]
+
+    def get(self, kid: Optional[str]) -> Optional[JWTKey]:
+        """Return the key for ``kid``; tokens without a kid use the legacy key."""
+        if kid is None:
+            kid = self.legacy_kid
+        return self._keys.get(kid) if kid is not None else None
+
+    def encode(self, claims: dict) -> str:
+        """Sign ``claims`` with the active key."""
+        key = self.active
+        return jwt.encode(
+            claims, key.signing_key, algorithm=key.algorithm, headers={"kid": key.kid}
+        )
+
+    def decode(self, token: str) -> dict:
+        """
+        Verify ``token`` with the key named in its header.
+
+        Raises:
+            JWTError: If the kid is unknown or the token is invalid
+        """
+        header = jwt.get_unverified_header(token)
+        key = self.get(header.get("kid"))
+        if key is None:
+            raise JWTError("Unknown signing key")
+        return jwt.decode(token, key.verification_key, algorithms=[key.algorithm])
+
+    def public_jwks(self) -> dict:
+        """JWK Set of the asymmetric public keys, for local verification elsewhere."""
+        keys = []
+        for key in self._keys.values():
+            if not key.is_asymmetric:
+                continue
+            public = key.verification_key.to_dict()
+            public.update({"kid": key.kid, "alg": key.algorithm, "use": "sig"})
+            keys.append(public)
+        return {"keys": keys}
+
+
+def _read_material(entry: dict, name: str) -> Optional[str]:
+    """Read key material inline (``name``) or from a file (``name_file``)."""
+    if entry.get(name):
+        return entry[name]
+    if entry.get(f"{name}_file"):
+        return Path(entry[f"{name}_file"]).read_text()
+    return None
+
+
+def _build_key(entry: dict) -> JWTKey:
+    kid = entry["kid"]
+    algorithm = entry.get("alg", DEFAULT_ALGORITHM)
+
+    if algorithm in ALGORITHMS.HMAC:
+        secret = _read_material(entry, "secret")
+        if not secret:
+            raise ValueError(f"JWT key '{kid}' requires a secret")
+        prepared = jwk.construct(secret, algorithm)
+        return JWTKey(kid, algorithm, prepared, prepared)
+
+    private_pem = _read_material(entry, "private_key")
+    public_pem = _read_material(entry, "public_key")
+    signing_key = jwk.construct(private_pem, algorithm) if private_pem else None
+    if public_pem:
+        verification_key = jwk.construct(public_pem, algorithm)
+    elif signing_key is not None:
+        verification_key = signing_key.public_key()
+    else:
+        raise ValueError(f"JWT key '{kid}' requires a public or private key")
+    return JWTKey(kid, algorithm, verification_key, signing_key)
+
+
+def load_key_ring() -> JWTKeyRing:
+    """
+    Build the key ring from environment variables.
+
+    ``JWT_KEYS`` holds a JSON list of keys (``kid``, ``alg`` and ``secret`` or
+    ``private_key``/``public_key``, each also accepted as a ``*_file`` path)
+    and ``JWT_ACTIVE_KID`` names the signing key. ``JWT_LEGACY_KID``
+    (default ``default``) names the HS256 key that verifies tokens without a
+    kid. Without ``JWT_KEYS`` the single ``JWT_SECRET_KEY``/``JWT_ALGORITHM``
+    pair is used.
+
+    Raises:
+        ValueError: If required environment variables are missing
+    """
+    raw_keys = os.getenv("JWT_KEYS")
+    if raw_keys:
+        entries = json.loads(raw_keys)
+        keys = [_build_key(entry) for entry in entries]
+        active_kid = os.getenv("JWT_ACTIVE_KID", keys[0].kid)
+        return JWTKeyRing(
+            keys, active_kid, legacy_kid=os.getenv("JWT_LEGACY_KID", DEFAULT_KID)
+        )
+
+    secret_key = os.getenv("JWT_SECRET_KEY")
+    if not secret_key:
+        raise ValueError("JWT_SECRET_KEY environment variable is required")
+
+    entry = {
+        "kid": DEFAULT_KID,
+        "alg": os.getenv("JWT_ALGORITHM", DEFAULT_ALGORITHM),
+        "secret": secret_key,
+    }
+    legacy_kid = DEFAULT_KID if entry["alg"] in ALGORITHMS.HMAC else None
+    return JWTKeyRing([_build_key(entry)], DEFAULT_KID, legacy_kid=legacy_kid)
+
+
+@lru_cache(maxsize=1)
+def get_key_ring() -> JWTKeyRing:
+    """Key ring loaded once per process; call ``reload_key_ring`` after rotation."""
+    return load_key_ring()
+
+
+def reload_key_ring() -> JWTKeyRing:
+    """Drop the cached key ring and load it again from the environment."""
+    get_key_ring.cache_clear()
+    return get_key_ring()
@@ -0,0 +1,195 @@
+"""
+In-app notification inbox.
+
+Producers add notifications inside their own transaction, so a rolled back
+change notifies nobody:
+
+- ``notify`` fans one notification out to any number of users with a
+  single multi-row INSERT;
+- set-based producers (``app.core.price_alerts``) insert their rows with
+  ``INSERT ... SELECT`` and report the recipients to ``increment_unread``.
+
+Each user's unread total is cached in ``notification_counters``. It only
+changes by atomic ``unread = unread + n`` statements, in the same
+transaction as the rows they count, so concurrent producers and readers
+never lose an update and the badge is a primary-key read instead of a
+COUNT over the inbox. ``mark_all_read`` is one UPDATE and takes its
+rowcount off the counter.
+"""
+
+from collections import Counter
+from datetime import datetime
+from typing import Iterable, Mapping, Optional
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.core.outbox import DomainEvent
+from app.db.models.Notifications.notification import (
+    Notification,
+    NotificationCounter,
+)
+
+# who hears about a transaction event, by payload field
+TRANSACTION_RECIPIENTS = {
+    "transaction.created": ("seller_id",),
+    "transaction.updated": ("seller_id", "buyer_id"),
+    "transaction.accepted": ("seller_id", "buyer_id"),
+    "transaction.paid": ("seller_id",),
+    "transaction.cancelled": ("seller_id", "buyer_id"),
+}
+
+_counters = NotificationCounter.__table__
+
+
+def _now() -> datetime:
+    return datetime.now(ZoneInfo("Asia/Bangkok"))
+
+
+def increment_unread(db: Session, counts: Mapping[int, int]) -> None:
+    """Add ``counts[user_id]`` to each user's unread counter, atomically."""
+    rows = [
+        {"user_id": user_id, "unread": n} for user_id, n in counts.items() if n
+    ]
+    if not rows:
+        return
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        stmt = postgresql.insert(_counters)
+    elif dialect == "sqlite":
+        stmt = sqlite.insert(_counters)
+    else:
+        raise NotImplementedError(f"notification counters do not support {dialect}")
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id"],
+        set_={"unread": _counters.c.unread + stmt.excluded.unread},
+    )
+    db.execute(stmt, rows)
+
+
+def _decrement_unread(db: Session, user_id: int, n: int) -> None:
+    if n:
+        db.execute(
+            update(_counters)
+            .where(_counters.c.user_id == user_id)
+            .values(unread=_counters.c.unread - n)
+        )
+
+
+def notify(
+    db: Session,
+    user_ids: Iterable[int],
+    type: str,
+    data: dict,
+    item_id: Optional[int] = None,
+    event_id: Optional[int] = None,
+) -> int:
+    """
+    Add the same notification for every user in ``user_ids`` (duplicates
+    ignored) with one bulk INSERT, and bump their counters. Does not commit.
+
+    Returns:
+        Number of notifications added
+    """
+    recipients = list(dict.fromkeys(user_ids))
+    if not recipients:
+        return 0
+    now = _now()
+    db.execute(
+        insert(Notification),
+        [
+            {
+                "user_id": user_id,
+                "type": type,
+                "item_id": item_id,
+                "data": data,
+                "event_id": event_id,
+                "created_at": now,
+            }
+            for user_id in recipients
+        ],
+    )
+    increment_unread(db, Counter(recipients))
+    return len(recipients)
+
+
+def unread_count(db: Session, user_id: int) -> int:
+    return db.scalar(
+        select(_counters.c.unread).where(_counters.c.user_id == user_id)
+    ) or 0
+
+
+def mark_read(db: Session, user_id: int, notification_id: int) -> bool:
+    """
+    Mark one of the user's notifications read. Does not commit.
+
+    Returns:
+        False if it does not exist, is not the user's or was already read
+    """
+    marked = db.execute(
+        update(Notification)
+        .where(
+            Notification.id == notification_id,
+            Notification.user_id == user_id,
+            Notification.read_at.is_(None),
+        )
+        .values(read_at=_now())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    _decrement_unread(db, user_id, marked)
+    return bool(marked)
+
+
+def mark_all_read(db: Session, user_id: int, up_to: Optional[int] = None) -> int:
+    """
+    Mark every unread notification of the user read, or only those with id
+    at most ``up_to`` (the newest one the client has shown), in one UPDATE.
+    Does not commit.
+
+    Returns:
+        Number of notifications marked read
+    """
+    stmt = update(Notification).where(
+        Notification.user_id == user_id, Notification.read_at.is_(None)
+    )
+    if up_to is not None:
+        stmt = stmt.where(Notification.id <= up_to)
+    marked = db.execute(
+        stmt.values(read_at=_now()).execution_options(synchronize_session=False)
+    ).rowcount
+    _decrement_unread(db, user_id, marked)
+    return marked
+
+
+def notify_transaction_event(db: Session, event: DomainEvent) -> None:
+    """
+    Outbox consumer: tell the parties of a transaction about its event.
+    Redelivered events are ignored.
+    """
+    fields = TRANSACTION_RECIPIENTS.get(event.event_type)
+    if fields is None:
+        return
+    already_notified = set(
+        db.scalars(
+            select(Notification.user_id).where(Notification.event_id == event.id)
+        )
+    )
+    recipients = [
+        event.payload[field]
+        for field in fields
+        if event.payload.get(field) is not None
+        and event.payload[field] not in already_notified
+    ]
+    notify(
+        db,
+        recipients,
+        event.event_type,
+        {
+            "transaction_id": event.aggregate_id,
+            "status": event.payload.get("status"),
+        },
+        item_id=event.payload.get("item_id"),
+        event_id=event.id,
+    )
@@ -0,0 +1,317 @@
+"""
+Transactional outbox for domain events.
+
+Routers call ``emit`` next to the change they make, before committing, so the
+event row and the change are stored atomically. ``OutboxDispatcher`` drains
+the table in the background and hands each event to the consumers registered
+for its type. Side effects therefore never run on the request path, and an
+event is never published for a change that was rolled back.
+"""
+
+import fnmatch
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, Optional
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session, aliased
+
+from app.db.database import SessionLocal
+from app.db.models.Outbox.outbox_event import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_MAX_BATCHES = 10
+DEFAULT_MAX_ATTEMPTS = 10
+DEFAULT_DISPATCH_INTERVAL_SECONDS = 1.0
+DEFAULT_RETRY_BASE_SECONDS = 1.0
+DEFAULT_RETRY_MAX_SECONDS = 300.0
+
+# fields copied into the payload, by event type or by aggregate type
+EVENT_FIELDS = {
+    "item": ("id", "owner_id", "group_id", "name", "price", "quantity", "status"),
+    "transaction": (
+        "id",
+        "item_id",
+        "seller_id",
+        "buyer_id",
+        "status",
+        "amount",
+        "agreed_price",
+    ),
+    "group": ("id", "owner_id", "name"),
+    "chat": ("id",),
+    "chat.message_sent": ("id", "chat_id", "sender_id", "text", "image_url"),
+}
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def emit(
+    db: Session,
+    event_type: str,
+    entity: Any,
+    aggregate_id: Optional[int] = None,
+    **extra: Any,
+) -> OutboxEvent:
+    """
+    Add a domain event to the current database transaction.
+
+    The payload is a snapshot of ``entity`` (see ``EVENT_FIELDS``) updated
+    with ``extra``. New entities must be flushed first so they have an id.
+
+    Args:
+        db: Database session; the event is committed with the caller's change
+        event_type: ``<aggregate>.<action>``, e.g. ``transaction.accepted``
+        entity: Model (or row) the event describes
+        aggregate_id: Entity whose events are delivered in order; defaults to
+            ``entity.id``
+        **extra: Additional or overriding payload fields
+
+    Returns:
+        The pending outbox row
+    """
+    aggregate_type = event_type.split(".", 1)[0]
+    fields = EVENT_FIELDS.get(event_type, EVENT_FIELDS.get(aggregate_type, ("id",)))
+    payload = {name: getattr(entity, name) for name in fields}
+    payload.update(extra)
+
+    event = OutboxEvent(
+        aggregate_type=aggregate_type,
+        aggregate_id=entity.id if aggregate_id is None else aggregate_id,
+        event_type=event_type,
+        payload={key: _json_value(value) for key, value in payload.items()},
+    )
+    db.add(event)
+    return event
+
+
+@dataclass(frozen=True)
+class DomainEvent:
+    """Read-only view of an outbox row handed to consumers."""
+
+    id: int
+    aggregate_type: str
+    aggregate_id: int
+    event_type: str
+    payload: dict
+    created_at: datetime
+
+
+Consumer = Callable[[Session, DomainEvent], None]
+
+
+class OutboxDispatcher:
+    """
+    Delivers outbox events to registered consumers, in batches.
+
+    Events are processed in id order. When a consumer fails, the event stays
+    pending and is retried after an exponential backoff (``retry_base_seconds``
+    doubling per attempt, capped at ``retry_max_seconds``); meanwhile later
+    events of the same aggregate are held back, so each entity's events are
+    always delivered in the order they were written. After ``max_attempts``
+    failures an event is marked dead and skipped.
+
+    Consumers run inside a savepoint of the dispatcher's transaction, so any
+    rows they write are committed together with the event being marked as
+    dispatched. Delivery is at least once: consumers must be idempotent.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        max_attempts: Optional[int] = None,
+        retry_base_seconds: Optional[float] = None,
+        retry_max_seconds: Optional[float] = None,
+    ):
+        self.session_factory = session_factory
+        self.max_attempts = max_attempts or int(
+            os.getenv("OUTBOX_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS)
+        )
+        if retry_base_seconds is None:
+            retry_base_seconds = float(
+                os.getenv("OUTBOX_RETRY_BASE_SECONDS", DEFAULT_RETRY_BASE_SECONDS)
+            )
+        if retry_max_seconds is None:
+            retry_max_seconds = float(
+                os.getenv("OUTBOX_RETRY_MAX_SECONDS", DEFAULT_RETRY_MAX_SECONDS)
+            )
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self._consumers: list[tuple[str, str, Consumer]] = []
+        self.metrics = {"batches": 0, "dispatched": 0, "failed": 0, "dead": 0}
+
+    def subscribe(self, pattern: str, consumer: Consumer, name: Optional[str] = None):
+        """
+        Register ``consumer`` for event types matching ``pattern``.
+
+        Patterns are shell-style: ``transaction.accepted``, ``transaction.*``
+        or ``*``. A consumer registered twice under the same name is replaced.
+        """
+        name = name or getattr(consumer, "__qualname__", repr(consumer))
+        self._consumers = [c for c in self._consumers if c[1] != name]
+        self._consumers.append((pattern, name, consumer))
+
+    def consumer(self, pattern: str, name: Optional[str] = None):
+        """Decorator form of ``subscribe``."""
+
+        def register(func: Consumer) -> Consumer:
+            self.subscribe(pattern, func, name=name)
+            return func
+
+        return register
+
+    def unsubscribe(self, name: str) -> None:
+        self._consumers = [c for c in self._consumers if c[1] != name]
+
+    def consumers_for(self, event_type: str) -> list[Consumer]:
+        return [
+            consumer
+            for pattern, _, consumer in self._consumers
+            if fnmatch.fnmatchcase(event_type, pattern)
+        ]
+
+    def retry_delay(self, attempts: int) -> timedelta:
+        """Wait before retry number ``attempts`` (1-based): base * 2^(n-1), capped."""
+        return timedelta(
+            seconds=min(
+                self.retry_base_seconds * 2 ** (attempts - 1), self.retry_max_seconds
+            )
+        )
+
+    def dispatch_batch(self, db: Session, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """
+        Deliver up to ``batch_size`` due events and commit.
+
+        The batch is claimed with ``FOR UPDATE`` so dispatchers in other
+        processes wait instead of delivering the same aggregate out of order.
+        Events waiting out a retry backoff are not claimed, nor are later
+        events of their aggregate.
+
+        Returns:
+            Number of events claimed (delivered, failed or dead)
+        """
+        return self._dispatch_batch(db, batch_size)[0]
+
+    def _dispatch_batch(self, db: Session, batch_size: int) -> tuple[int, int]:
+        """Returns (events claimed, events dispatched or marked dead)."""
+        now = datetime.now(ZoneInfo("Asia/Bangkok"))
+        earlier = aliased(OutboxEvent)
+        backing_off = (
+            select(earlier.id)
+            .where(
+                earlier.aggregate_type == OutboxEvent.aggregate_type,
+                earlier.aggregate_id == OutboxEvent.aggregate_id,
+                earlier.id < OutboxEvent.id,
+                earlier.dispatched_at.is_(None),
+                earlier.next_attempt_at > now,
+            )
+            .exists()
+        )
+        events = db.scalars(
+            select(OutboxEvent)
+            .where(
+                OutboxEvent.dispatched_at.is_(None),
+                or_(
+                    OutboxEvent.next_attempt_at.is_(None),
+                    OutboxEvent.next_attempt_at <= now,
+                ),
+                ~backing_off,
+            )
+            .order_by(OutboxEvent.id)
+            .limit(batch_size)
+            .with_for_update()
+        ).all()
+
+        progressed = 0
+        blocked: set[tuple[str, int]] = set()
+        for event in events:
+            key = (event.aggregate_type, event.aggregate_id)
+            if key in blocked:
+                continue
+
+            domain_event = DomainEvent(
+                id=event.id,
+                aggregate_type=event.aggregate_type,
+                aggregate_id=event.aggregate_id,
+                event_type=event.event_type,
+                payload=event.payload,
+                created_at=event.created_at,
+            )
+            try:
+                with db.begin_nested():
+                    for consumer in self.consumers_for(event.event_type):
+                        consumer(db, domain_event)
+            except Exception as exc:
+                logger.exception("Outbox event %s failed", event.id)
+                event.attempts += 1
+                event.last_error = repr(exc)
+                if event.attempts >= self.max_attempts:
+                    event.dead = True
+                    event.dispatched_at = datetime.now(ZoneInfo("Asia/Bangkok"))
+                    self.metrics["dead"] += 1
+                    progressed += 1
+                else:
+                    event.next_attempt_at = now + self.retry_delay(event.attempts)
+                    blocked.add(key)
+                    self.metrics["failed"] += 1
+                continue
+
+            event.dispatched_at = datetime.now(ZoneInfo("Asia/Bangkok"))
+            self.metrics["dispatched"] += 1
+            progressed += 1
+
+        db.commit()
+        if events:
+            self.metrics["batches"] += 1
+        return len(events), progressed
+
+    def drain(
+        self,
+        db: Session,
+        batch_size: Optional[int] = None,
+        max_batches: int = DEFAULT_MAX_BATCHES,
+    ) -> int:
+        """
+        Dispatch batches until the outbox has nothing due, ``max_batches`` ran,
+        or a batch delivered nothing (every claimed event failed or was held
+        back behind one that did).
+        """
+        batch_size = batch_size or int(
+            os.getenv("OUTBOX_BATCH_SIZE", DEFAULT_BATCH_SIZE)
+        )
+        claimed = 0
+        for _ in range(max_batches):
+            count, progressed = self._dispatch_batch(db, batch_size)
+            claimed += count
+            if count < batch_size or not progressed:
+                break
+        return claimed
+
+    def tick(self) -> int:
+        """Periodic job: drain the outbox with a fresh session."""
+        with self.session_factory() as db:
+            return self.drain(db)
+
+    def stats(self) -> dict:
+        return {
+            **self.metrics,
+            "consumers": [(pattern, name) for pattern, name, _ in self._consumers],
+        }
+
+
+outbox = OutboxDispatcher()
@@ -0,0 +1,290 @@
+"""
+Monthly range partitions for the append-only tables (PostgreSQL only).
+
+With ``DB_PARTITIONING=true`` on PostgreSQL, ``chat_messages`` is
+partitioned by ``send_at`` and ``price_histories`` by ``start_date``, one
+partition per calendar month (Bangkok time) named ``<table>_pYYYY_MM``.
+
+``PartitionManager`` keeps the layout going:
+
+- ``ensure`` creates the partitions of the current month and of the next
+  ``DB_PARTITION_PREMAKE_MONTHS``. There is no default partition (it would
+  block concurrent detaches), so a row dated past the last partition is
+  rejected; the periodic job stays months ahead of that.
+- ``archive`` detaches partitions older than ``DB_PARTITION_RETENTION_MONTHS``
+  (0 keeps everything) with ``DETACH PARTITION ... CONCURRENTLY`` and moves
+  them to the ``DB_PARTITION_ARCHIVE_SCHEMA`` schema, where they remain
+  plain tables to dump or drop. Requires PostgreSQL 14+.
+- ``convert`` turns an existing plain table into the partitioned layout
+  (``python -m app.core.partitions convert``), copying its rows.
+
+A query only skips partitions when it bounds the partition key, so the
+routers add bounds the data guarantees: a chat has no messages older than
+the chat, an item no prices older than the item.
+"""
+
+import argparse
+import logging
+import os
+import re
+from datetime import datetime
+from typing import Callable, Optional
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import Connection, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import AddConstraint
+
+from app.db.database import PARTITIONING_ENABLED, Base, engine
+
+logger = logging.getLogger(__name__)
+
+# partitioned table -> partition key
+PARTITIONED_TABLES = {"chat_messages": "send_at", "price_histories": "start_date"}
+
+DEFAULT_PREMAKE_MONTHS = 3
+DEFAULT_RETENTION_MONTHS = 0  # keep every partition
+DEFAULT_ARCHIVE_SCHEMA = "archive"
+DEFAULT_MAINTENANCE_INTERVAL_SECONDS = 60 * 60
+
+_BANGKOK = ZoneInfo("Asia/Bangkok")
+_PARTITION_NAME = re.compile(r"_p(\d{4})_(\d{2})$")
+
+
+def month_start(moment: datetime) -> datetime:
+    """First instant of the (Bangkok) month containing ``moment``."""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=_BANGKOK)
+    moment = moment.astimezone(_BANGKOK)
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_p{month.year:04d}_{month.month:02d}"
+
+
+def create_partition_sql(table: str, month: datetime) -> str:
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(table, month)} "
+        f"PARTITION OF {table} FOR VALUES "
+        f"FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    )
+
+
+class PartitionManager:
+    """Creates upcoming monthly partitions and archives expired ones."""
+
+    def __init__(
+        self,
+        db_engine: Engine = engine,
+        enabled: bool = PARTITIONING_ENABLED,
+        premake_months: Optional[int] = None,
+        retention_months: Optional[int] = None,
+        archive_schema: Optional[str] = None,
+        clock: Callable[[], datetime] = lambda: datetime.now(_BANGKOK),
+    ):
+        self.engine = db_engine
+        self.enabled = enabled
+        self.premake_months = (
+            premake_months
+            if premake_months is not None
+            else int(os.getenv("DB_PARTITION_PREMAKE_MONTHS", DEFAULT_PREMAKE_MONTHS))
+        )
+        self.retention_months = (
+            retention_months
+            if retention_months is not None
+            else int(
+                os.getenv("DB_PARTITION_RETENTION_MONTHS", DEFAULT_RETENTION_MONTHS)
+            )
+        )
+        self.archive_schema = archive_schema or os.getenv(
+            "DB_PARTITION_ARCHIVE_SCHEMA", DEFAULT_ARCHIVE_SCHEMA
+        )
+        self.clock = clock
+        self.metrics = {"created": 0, "archived": 0}
+
+    # --------------------------------------------------------------- catalog
+
+    @staticmethod
+    def is_partitioned(conn: Connection, table: str) -> bool:
+        return (
+            conn.scalar(
+                text(
+                    "SELECT 1 FROM pg_partitioned_table "
+                    "WHERE partrelid = to_regclass(:table)"
+                ),
+                {"table": table},
+            )
+            is not None
+        )
+
+    @staticmethod
+    def partitions(conn: Connection, table: str) -> dict[datetime, str]:
+        """Attached monthly partitions of ``table`` by month."""
+        names = conn.scalars(
+            text(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = to_regclass(:table)"
+            ),
+            {"table": table},
+        )
+        months = {}
+        for name in names:
+            match = _PARTITION_NAME.search(name)
+            if match:
+                year, month = int(match[1]), int(match[2])
+                months[datetime(year, month, 1, tzinfo=_BANGKOK)] = name
+        return months
+
+    # ------------------------------------------------------------ maintenance
+
+    def _create(
+        self, conn: Connection, table: str, first: datetime, last: datetime
+    ) -> list[str]:
+        created = []
+        existing = self.partitions(conn, table)
+        month = month_start(first)
+        while month <= last:
+            if month not in existing:
+                conn.execute(text(create_partition_sql(table, month)))
+                created.append(partition_name(table, month))
+            month = add_months(month, 1)
+        return created
+
+    def ensure(self, now: Optional[datetime] = None) -> list[str]:
+        """Create this month's partitions and the next ``premake_months``."""
+        if not self.enabled:
+            return []
+        current = month_start(now or self.clock())
+        last = add_months(current, self.premake_months)
+        created = []
+        with self.engine.begin() as conn:
+            for table in PARTITIONED_TABLES:
+                if not self.is_partitioned(conn, table):
+                    logger.warning("%s is not partitioned; run convert first", table)
+                    continue
+                created += self._create(conn, table, current, last)
+        self.metrics["created"] += len(created)
+        return created
+
+    def archive(self, now: Optional[datetime] = None) -> list[str]:
+        """
+        Detach the partitions whose whole month is older than the retention
+        and move them to the archive schema.
+        """
+        if not self.enabled or not self.retention_months:
+            return []
+        cutoff = add_months(month_start(now or self.clock()), -self.retention_months)
+        archived = []
+        # DETACH ... CONCURRENTLY cannot run inside a transaction block
+        with self.engine.connect().execution_options(
+            isolation_level="AUTOCOMMIT"
+        ) as conn:
+            conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {self.archive_schema}"))
+            for table in PARTITIONED_TABLES:
+                for month, name in sorted(self.partitions(conn, table).items()):
+                    if add_months(month, 1) > cutoff:
+                        break
+                    conn.execute(
+                        text(f"ALTER TABLE {table} DETACH PARTITION {name} CONCURRENTLY")
+                    )
+                    conn.execute(
+                        text(f"ALTER TABLE {name} SET SCHEMA {self.archive_schema}")
+                    )
+                    archived.append(name)
+        self.metrics["archived"] += len(archived)
+        return archived
+
+    def tick(self) -> dict:
+        """Periodic job: premake partitions, then archive expired ones."""
+        return {"created": self.ensure(), "archived": self.archive()}
+
+    # -------------------------------------------------------------- upgrade
+
+    def convert(self, table: str) -> int:
+        """
+        Replace the plain ``table`` with a partitioned one holding the same
+        rows, in one transaction (the table is locked meanwhile).
+
+        Returns:
+            Rows copied (0 if the table is already partitioned)
+        """
+        column = PARTITIONED_TABLES[table]
+        legacy = f"{table}_unpartitioned"
+        model = Base.metadata.tables[table]
+        with self.engine.begin() as conn:
+            if self.is_partitioned(conn, table):
+                return 0
+            sequence = conn.scalar(
+                text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": table}
+            )
+            conn.execute(text(f"ALTER TABLE {table} RENAME TO {legacy}"))
+            conn.execute(
+                text(
+                    f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS) "
+                    f"PARTITION BY RANGE ({column})"
+                )
+            )
+            conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN {column} SET NOT NULL"))
+
+            now = self.clock()
+            oldest, newest = conn.execute(
+                text(f"SELECT min({column}), max({column}) FROM {legacy}")
+            ).one()
+            last = add_months(month_start(max(newest or now, now)), self.premake_months)
+            self._create(conn, table, oldest or now, last)
+
+            copied = conn.execute(
+                text(f"INSERT INTO {table} SELECT * FROM {legacy}")
+            ).rowcount
+            if sequence:
+                conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {table}.id"))
+            conn.execute(text(f"DROP TABLE {legacy}"))
+
+            # after the drop, so the names of the old constraints are free again
+            conn.execute(text(f"ALTER TABLE {table} ADD PRIMARY KEY (id, {column})"))
+            for constraint in model.foreign_key_constraints:
+                conn.execute(AddConstraint(constraint))
+            for index in model.indexes:
+                index.create(conn)
+        return copied
+
+    def stats(self) -> dict:
+        return {**self.metrics, "enabled": self.enabled}
+
+
+partition_manager = PartitionManager()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain monthly partitions")
+    parser.add_argument(
+        "command",
+        nargs="?",
+        default="maintain",
+        choices=["maintain", "convert"],
+        help="maintain: premake and archive partitions; "
+        "convert: partition existing tables (locks them while copying)",
+    )
+    args = parser.parse_args()
+
+    if not partition_manager.enabled:
+        parser.error("set DB_PARTITIONING=true with a PostgreSQL DATABASE_URL")
+    if args.command == "convert":
+        for table in PARTITIONED_TABLES:
+            print(f"{table}: {partition_manager.convert(table)} rows copied")
+    result = partition_manager.tick()
+    print(
+        f"partitions: {len(result['created'])} created, "
+        f"{len(result['archived'])} archived"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Price-drop alerts for wishers.
+
+A price edit only flags the drop: ``record_price`` sets
+``item_price_stats.drop_pending`` when the new price is lower than the
+previous one (a rise clears it again). The periodic job then handles many
+items per statement, off the request path:
+
+1. claim a batch of flagged stats rows (``FOR UPDATE SKIP LOCKED``, so
+   several workers never alert the same drop twice);
+2. one DELETE drops the unread price-drop alerts already sent for those
+   items: a user holds at most one unread alert per item, so a further
+   drop before it is read replaces it instead of adding another. The
+   replacement gets a new id, so it moves to the top of the inbox;
+3. one ``INSERT ... SELECT`` joins the items with ``wishItems`` and writes a
+   ``price_drop`` notification for every other wisher (not the owner, not
+   for deleted items);
+4. the unread counters (``app.core.notifications``) take the added minus
+   the replaced alerts, the flags are cleared, and everything commits.
+"""
+
+import os
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Optional
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import DateTime, delete, func, literal, literal_column, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.core.notifications import increment_unread
+from app.db.database import SessionLocal
+from app.db.models.items.item import Item
+from app.db.models.items.price_stats import ItemPriceStats
+from app.db.models.items.wishItem import WishItem
+from app.db.models.Notifications.notification import Notification
+
+PRICE_DROP = "price_drop"
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_MAX_BATCHES = 10
+DEFAULT_ALERT_INTERVAL_SECONDS = 60
+
+# cumulative counters since process start
+metrics = {"runs": 0, "drops": 0, "notifications": 0}
+
+_notifications = Notification.__table__
+
+
+def _insert(dialect: str):
+    if dialect == "postgresql":
+        return postgresql.insert(_notifications), func.json_build_object
+    if dialect == "sqlite":
+        return sqlite.insert(_notifications), func.json_object
+    raise NotImplementedError(f"price alerts do not support {dialect}")
+
+
+def notify_batch(db: Session, batch_size: int, now: datetime) -> dict:
+    """
+    Alert the wishers of one batch of dropped items, and commit.
+
+    Returns:
+        Counts for this batch: drops, notifications
+    """
+    item_ids = db.scalars(
+        select(ItemPriceStats.item_id)
+        .where(ItemPriceStats.drop_pending.is_(True))
+        .order_by(ItemPriceStats.item_id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not item_ids:
+        return {"drops": 0, "notifications": 0}
+
+    stmt, json_object = _insert(db.get_bind().dialect.name)
+    alert_data = json_object(
+        "name",
+        Item.name,
+        "price",
+        ItemPriceStats.current_price,
+        "previous_price",
+        ItemPriceStats.previous_price,
+        "change_percent",
+        ItemPriceStats.change_percent,
+    )
+    replaced = db.scalars(
+        delete(Notification)
+        .where(
+            Notification.type == PRICE_DROP,
+            Notification.read_at.is_(None),
+            Notification.item_id.in_(item_ids),
+        )
+        .returning(Notification.user_id)
+        .execution_options(synchronize_session=False)
+    ).all()
+
+    wishers = (
+        select(
+            WishItem.user_id,
+            literal(PRICE_DROP),
+            ItemPriceStats.item_id,
+            alert_data,
+            literal(now, DateTime(timezone=True)),
+        )
+        .join(Item, Item.id == ItemPriceStats.item_id)
+        .join(WishItem, WishItem.item_id == ItemPriceStats.item_id)
+        .where(
+            ItemPriceStats.item_id.in_(item_ids),
+            Item.deleted_at.is_(None),
+            WishItem.user_id != Item.owner_id,
+        )
+    )
+    stmt = (
+        stmt.from_select(["user_id", "type", "item_id", "data", "created_at"], wishers)
+        .on_conflict_do_nothing(
+            index_elements=["user_id", "item_id"],
+            # inline, so PostgreSQL can match it to the partial unique index
+            index_where=(
+                _notifications.c.type == literal_column(f"'{PRICE_DROP}'")
+            )
+            & _notifications.c.read_at.is_(None),
+        )
+        .returning(_notifications.c.user_id)
+    )
+    added = db.scalars(stmt).all()
+    unread = Counter(added)
+    unread.subtract(replaced)
+    increment_unread(db, unread)
+
+    db.execute(
+        update(ItemPriceStats)
+        .where(ItemPriceStats.item_id.in_(item_ids))
+        .values(drop_pending=False)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return {"drops": len(item_ids), "notifications": len(added)}
+
+
+def notify_price_drops(
+    db: Session,
+    batch_size: Optional[int] = None,
+    max_batches: int = DEFAULT_MAX_BATCHES,
+) -> dict:
+    """
+    Alert the wishers of every pending price drop, one batch at a time.
+
+    Returns:
+        Totals over all batches: drops, notifications, batches
+    """
+    batch_size = batch_size or int(
+        os.getenv("PRICE_ALERT_BATCH_SIZE", DEFAULT_BATCH_SIZE)
+    )
+    now = datetime.now(ZoneInfo("Asia/Bangkok"))
+    totals = {"drops": 0, "notifications": 0, "batches": 0}
+    for _ in range(max_batches):
+        result = notify_batch(db, batch_size, now)
+        if result["drops"]:
+            totals["batches"] += 1
+            totals["drops"] += result["drops"]
+            totals["notifications"] += result["notifications"]
+        if result["drops"] < batch_size:
+            break
+
+    metrics["runs"] += 1
+    metrics["drops"] += totals["drops"]
+    metrics["notifications"] += totals["notifications"]
+    return totals
+
+
+def make_price_alert_job(
+    session_factory: Callable[[], Session] = SessionLocal,
+) -> Callable[[], dict]:
+    """Build the periodic job callable that opens its own session."""
+
+    def run() -> dict:
+        with session_factory() as db:
+            return notify_price_drops(db)
+
+    return run
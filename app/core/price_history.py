@@ -0,0 +1,269 @@
+"""
+Price validity intervals.
+
+Each ``price_histories`` row is the price of an item over
+``[start_date, end_date)``; the current price has ``end_date`` NULL. A
+price change closes the open row and opens the next one at the same
+instant, inside the caller's transaction, so an item's intervals never
+overlap or leave gaps and a rolled back change leaves no trace.
+
+Both reads are one range scan of the (item_id, start_date) index:
+
+- ``price_at``: the last interval starting at or before the moment.
+- ``price_series``: the interval in effect at the start of the range and
+  every one starting inside it.
+
+The same write keeps the item's ``item_price_stats`` row (all-time low,
+30-day low, change against the previous price) up to date, so listings
+read the badges with a join. The 30-day low only changes without a write
+when the interval holding it leaves the window: the row records when that
+happens (``low_30d_expires_at``) and ``refresh_price_stats`` recomputes
+such rows periodically. ``python -m app.core.price_history`` rebuilds
+every row from ``price_histories``.
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Callable, Optional
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.db.database import SessionLocal
+from app.db.models.items.item import Item
+from app.db.models.items.price_stats import ItemPriceStats
+from app.db.models.PriceHistorys.main import PriceHistory
+
+LOW_WINDOW = timedelta(days=30)
+DEFAULT_REFRESH_BATCH_SIZE = 500
+DEFAULT_STATS_REFRESH_INTERVAL_SECONDS = 15 * 60
+
+_BANGKOK = ZoneInfo("Asia/Bangkok")
+_CENT = Decimal("0.01")
+
+
+def as_bangkok(moment: datetime) -> datetime:
+    """``moment`` in Bangkok time (naive values are taken as Bangkok time)."""
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=_BANGKOK)
+    return moment.astimezone(_BANGKOK)
+
+
+def record_price(
+    db: Session,
+    item: Item,
+    price: Decimal,
+    user_id: int,
+    at: Optional[datetime] = None,
+) -> PriceHistory:
+    """
+    Close the item's open interval and open one for ``price`` at ``at``
+    (default now), and update the item's stats. Flushes, does not commit.
+    """
+    at = as_bangkok(at or datetime.now(_BANGKOK))
+    db.execute(
+        update(PriceHistory)
+        .where(PriceHistory.item_id == item.id, PriceHistory.end_date.is_(None))
+        .values(end_date=at)
+        .execution_options(synchronize_session=False)
+    )
+    _update_stats(db, item.id, Decimal(price), at)
+    history = PriceHistory(
+        price=price, item_id=item.id, user_id=user_id, start_date=at, end_date=None
+    )
+    db.add(history)
+    # sessions do not autoflush: the next change must see this interval
+    db.flush()
+    return history
+
+
+def price_at(db: Session, item_id: int, at: datetime) -> Optional[PriceHistory]:
+    """The interval holding ``item_id``'s price at ``at``, if it had one."""
+    at = as_bangkok(at)
+    history = db.scalars(
+        select(PriceHistory)
+        .where(PriceHistory.item_id == item_id, PriceHistory.start_date <= at)
+        .order_by(PriceHistory.start_date.desc(), PriceHistory.id.desc())
+        .limit(1)
+    ).first()
+    if history is None or (
+        history.end_date is not None and as_bangkok(history.end_date) <= at
+    ):
+        return None
+    return history
+
+
+def price_series(
+    db: Session, item_id: int, start: datetime, end: datetime
+) -> list[PriceHistory]:
+    """The intervals of ``item_id`` overlapping ``[start, end)``, oldest first."""
+    start, end = as_bangkok(start), as_bangkok(end)
+    # the interval already in effect at ``start`` begins at this instant
+    in_effect = (
+        select(func.max(PriceHistory.start_date))
+        .where(PriceHistory.item_id == item_id, PriceHistory.start_date <= start)
+        .scalar_subquery()
+    )
+    return db.scalars(
+        select(PriceHistory)
+        .where(
+            PriceHistory.item_id == item_id,
+            PriceHistory.start_date >= func.coalesce(in_effect, start),
+            PriceHistory.start_date < end,
+        )
+        .order_by(PriceHistory.start_date, PriceHistory.id)
+    ).all()
+
+
+# ------------------------------------------------------------------ stats
+
+
+def _window_low(
+    db: Session, item_id: int, now: datetime
+) -> tuple[Optional[Decimal], Optional[datetime]]:
+    """
+    Lowest price in effect during the ``LOW_WINDOW`` before ``now`` and when
+    it leaves the window (None while an open interval holds it).
+    """
+    intervals = price_series(db, item_id, now - LOW_WINDOW, now)
+    if not intervals:
+        return None, None
+    low = min(history.price for history in intervals)
+    ends = [history.end_date for history in intervals if history.price == low]
+    if None in ends:
+        return low, None
+    return low, max(as_bangkok(end) for end in ends) + LOW_WINDOW
+
+
+def _change_percent(
+    previous: Optional[Decimal], current: Decimal
+) -> Optional[Decimal]:
+    if not previous:
+        return None
+    return ((current - previous) * 100 / previous).quantize(_CENT)
+
+
+def _update_stats(db: Session, item_id: int, price: Decimal, at: datetime) -> None:
+    """Fold a new price starting at ``at`` into the item's stats row."""
+    stats = db.get(ItemPriceStats, item_id)
+    if stats is None:
+        db.add(
+            ItemPriceStats(
+                item_id=item_id,
+                current_price=price,
+                price_changed_at=at,
+                all_time_low=price,
+                low_30d=price,
+                low_30d_expires_at=None,
+                drop_pending=False,
+            )
+        )
+        return
+
+    if stats.low_30d_expires_at is None:
+        # the interval ending now held the low: it stays in the window 30 days
+        stats.low_30d_expires_at = at + LOW_WINDOW
+    elif as_bangkok(stats.low_30d_expires_at) <= at:
+        stats.low_30d, stats.low_30d_expires_at = _window_low(db, item_id, at)
+    if stats.low_30d is None or price <= stats.low_30d:
+        stats.low_30d, stats.low_30d_expires_at = price, None
+
+    stats.all_time_low = min(stats.all_time_low, price)
+    stats.previous_price = stats.current_price
+    stats.change_percent = _change_percent(stats.previous_price, price)
+    # a rise before the alert job ran cancels the pending drop alert
+    stats.drop_pending = price < stats.previous_price
+    stats.current_price = price
+    stats.price_changed_at = at
+
+
+def refresh_price_stats(
+    db: Session,
+    now: Optional[datetime] = None,
+    batch_size: int = DEFAULT_REFRESH_BATCH_SIZE,
+) -> int:
+    """
+    Recompute the 30-day low of up to ``batch_size`` items whose low has
+    left the window, and commit.
+
+    Returns:
+        Number of stats rows refreshed
+    """
+    now = as_bangkok(now or datetime.now(_BANGKOK))
+    expired = db.scalars(
+        select(ItemPriceStats)
+        .where(ItemPriceStats.low_30d_expires_at <= now)
+        .order_by(ItemPriceStats.low_30d_expires_at)
+        .limit(batch_size)
+    ).all()
+    for stats in expired:
+        low, expires_at = _window_low(db, stats.item_id, now)
+        stats.low_30d = low if low is not None else stats.current_price
+        stats.low_30d_expires_at = expires_at
+    db.commit()
+    return len(expired)
+
+
+def make_price_stats_job(
+    session_factory: Callable[[], Session] = SessionLocal,
+) -> Callable[[], int]:
+    """Build the periodic job callable that opens its own session."""
+
+    def run() -> int:
+        with session_factory() as db:
+            return refresh_price_stats(db)
+
+    return run
+
+
+def rebuild_price_stats(db: Session, now: Optional[datetime] = None) -> int:
+    """
+    Recompute every ``item_price_stats`` row from ``price_histories``.
+
+    Use it once to backfill an existing database, or to repair drift.
+
+    Returns:
+        Number of stats rows written
+    """
+    now = as_bangkok(now or datetime.now(_BANGKOK))
+    db.query(ItemPriceStats).delete()
+    item_ids = db.scalars(select(PriceHistory.item_id).distinct()).all()
+    for item_id in item_ids:
+        latest = db.execute(
+            select(PriceHistory.price, PriceHistory.start_date)
+            .where(PriceHistory.item_id == item_id)
+            .order_by(PriceHistory.start_date.desc(), PriceHistory.id.desc())
+            .limit(2)
+        ).all()
+        current, changed_at = latest[0]
+        previous = latest[1].price if len(latest) > 1 else None
+        low, expires_at = _window_low(db, item_id, now)
+        db.add(
+            ItemPriceStats(
+                item_id=item_id,
+                current_price=current,
+                previous_price=previous,
+                change_percent=_change_percent(previous, current),
+                price_changed_at=changed_at,
+                all_time_low=db.scalar(
+                    select(func.min(PriceHistory.price)).where(
+                        PriceHistory.item_id == item_id
+                    )
+                ),
+                low_30d=low if low is not None else current,
+                low_30d_expires_at=expires_at,
+            )
+        )
+    db.commit()
+    return len(item_ids)
+
+
+def main():
+    with SessionLocal() as db:
+        rows = rebuild_price_stats(db)
+    print(f"item_price_stats rebuilt: {rows} rows")
+
+
+if __name__ == "__main__":
+    main()
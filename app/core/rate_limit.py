@@ -0,0 +1,230 @@
+"""Admission control and rate limiting for CPU-heavy authentication endpoints."""
+
+import math
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from fastapi import HTTPException, Request
+
+# Constants with safe defaults (override through environment variables)
+DEFAULT_IP_BURST = 20
+DEFAULT_IP_REFILL_PER_SECOND = 1.0
+DEFAULT_USERNAME_BURST = 5
+DEFAULT_USERNAME_REFILL_PER_SECOND = 0.2
+DEFAULT_MAX_CONCURRENT_AUTH = 4
+DEFAULT_MAX_TRACKED_KEYS = 50_000
+
+
+class RateLimitStore(ABC):
+    """
+    Storage backend for token buckets.
+
+    The default implementation keeps buckets in process memory. Deployments
+    running several workers can plug in a shared backend (e.g. Redis) by
+    implementing ``consume`` atomically on the server side.
+    """
+
+    @abstractmethod
+    def consume(
+        self, key: str, capacity: float, refill_per_second: float, cost: float = 1.0
+    ) -> tuple[bool, float]:
+        """
+        Take ``cost`` tokens from the bucket identified by ``key``.
+
+        Args:
+            key: Bucket identifier (e.g. ``ip:1.2.3.4``)
+            capacity: Maximum number of tokens in the bucket
+            refill_per_second: Tokens added back per second
+            cost: Number of tokens this request needs
+
+        Returns:
+            Tuple of (allowed, retry_after_seconds)
+        """
+
+    @abstractmethod
+    def reset(self) -> None:
+        """Forget every bucket."""
+
+
+class InMemoryRateLimitStore(RateLimitStore):
+    """Thread-safe token buckets stored as ``key -> (tokens, last_refill)``."""
+
+    def __init__(self, max_keys: int = DEFAULT_MAX_TRACKED_KEYS):
+        self._buckets: dict[str, tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self._max_keys = max_keys
+
+    def consume(
+        self, key: str, capacity: float, refill_per_second: float, cost: float = 1.0
+    ) -> tuple[bool, float]:
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - last) * refill_per_second)
+
+            if tokens >= cost:
+                self._buckets[key] = (tokens - cost, now)
+                allowed, retry_after = True, 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                allowed = False
+                retry_after = (cost - tokens) / refill_per_second
+
+            if len(self._buckets) > self._max_keys:
+                self._prune(now, capacity, refill_per_second)
+
+        return allowed, retry_after
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+    def _prune(self, now: float, capacity: float, refill_per_second: float) -> None:
+        """Drop buckets that would already be full again (caller holds the lock)."""
+        full_after = capacity / refill_per_second
+        self._buckets = {
+            key: value
+            for key, value in self._buckets.items()
+            if now - value[1] < full_after
+        }
+
+
+def _setting(value, env_name: str, default, cast):
+    """``value`` if given (0 included), else the environment, else ``default``."""
+    if value is None:
+        value = os.getenv(env_name, default)
+    return cast(value)
+
+
+class AuthAdmissionControl:
+    """
+    Rate limiting per IP / per username plus a global concurrency cap.
+
+    Every check runs before any password is hashed or verified, so a burst of
+    login attempts is rejected cheaply instead of queueing bcrypt work.
+    """
+
+    def __init__(
+        self,
+        store: Optional[RateLimitStore] = None,
+        ip_burst: Optional[float] = None,
+        ip_refill_per_second: Optional[float] = None,
+        username_burst: Optional[float] = None,
+        username_refill_per_second: Optional[float] = None,
+        max_concurrent: Optional[int] = None,
+    ):
+        self.store = store or InMemoryRateLimitStore()
+        self.ip_burst = _setting(
+            ip_burst, "AUTH_RATE_LIMIT_IP_BURST", DEFAULT_IP_BURST, float
+        )
+        self.ip_refill_per_second = _setting(
+            ip_refill_per_second,
+            "AUTH_RATE_LIMIT_IP_REFILL",
+            DEFAULT_IP_REFILL_PER_SECOND,
+            float,
+        )
+        self.username_burst = _setting(
+            username_burst,
+            "AUTH_RATE_LIMIT_USERNAME_BURST",
+            DEFAULT_USERNAME_BURST,
+            float,
+        )
+        self.username_refill_per_second = _setting(
+            username_refill_per_second,
+            "AUTH_RATE_LIMIT_USERNAME_REFILL",
+            DEFAULT_USERNAME_REFILL_PER_SECOND,
+            float,
+        )
+        self.max_concurrent = _setting(
+            max_concurrent, "AUTH_MAX_CONCURRENT", DEFAULT_MAX_CONCURRENT_AUTH, int
+        )
+        # buckets compute retry-after and pruning age by dividing by the rate
+        if self.ip_refill_per_second <= 0 or self.username_refill_per_second <= 0:
+            raise ValueError("Auth rate limit refill rates must be positive")
+
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self.rejected: Counter = Counter()
+
+    def set_store(self, store: RateLimitStore) -> None:
+        """Swap the bucket storage backend (e.g. for a shared store)."""
+        self.store = store
+
+    @contextmanager
+    def admit(self, request: Request, username: Optional[str]) -> Iterator[None]:
+        """
+        Admit one authentication attempt or fail fast.
+
+        Args:
+            request: Incoming request (used for the client IP)
+            username: Username the attempt targets, if any
+
+        Raises:
+            HTTPException: 429 when a rate limit is exceeded,
+                503 when too many attempts are already being processed
+        """
+        client_ip = request.client.host if request.client else "unknown"
+
+        allowed, retry_after = self.store.consume(
+            f"ip:{client_ip}", self.ip_burst, self.ip_refill_per_second
+        )
+        if not allowed:
+            self._reject("ip", retry_after)
+
+        if username:
+            allowed, retry_after = self.store.consume(
+                f"user:{username.lower()}",
+                self.username_burst,
+                self.username_refill_per_second,
+            )
+            if not allowed:
+                self._reject("username", retry_after)
+
+        with self._lock:
+            if self._in_flight >= self.max_concurrent:
+                admitted = False
+            else:
+                self._in_flight += 1
+                admitted = True
+        if not admitted:
+            self._reject("concurrency", 1.0, status_code=503)
+
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def stats(self) -> dict:
+        """Return rejection counters and current load."""
+        return {
+            "rejected": {
+                "ip": self.rejected["ip"],
+                "username": self.rejected["username"],
+                "concurrency": self.rejected["concurrency"],
+            },
+            "in_flight": self._in_flight,
+            "max_concurrent": self.max_concurrent,
+        }
+
+    def reset(self) -> None:
+        """Clear buckets and counters."""
+        self.store.reset()
+        self.rejected.clear()
+
+    def _reject(self, reason: str, retry_after: float, status_code: int = 429):
+        with self._lock:
+            self.rejected[reason] += 1
+        raise HTTPException(
+            status_code=status_code,
+            detail="Too many authentication attempts, please try again later",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+
+auth_admission = AuthAdmissionControl()
@@ -0,0 +1,278 @@
+"""Stock reservation engine for hot (flash-sale) items.
+
+While an item is hot its available stock lives in process memory. Holds are
+taken and confirmed under a per-item lock, so requests for the same item are
+served one at a time without touching the ``items`` row. Confirmed units are
+written back in batches by ``flush``: one UPDATE per item per flush instead of
+one per acceptance. Holds that are not confirmed before their TTL expire and
+return to the pool; both happen in ``tick``, run by the background scheduler.
+
+The ledger is per process, so a hot item must be served by a single worker.
+"""
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.stock import decrement_stock, increment_stock
+from app.db.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOLD_TTL_SECONDS = 15 * 60
+DEFAULT_FLUSH_INTERVAL_SECONDS = 0.5
+
+
+@dataclass
+class StockHold:
+    """Units held for one transaction until ``expires_at`` (monotonic time)."""
+
+    amount: int
+    expires_at: float
+
+
+@dataclass
+class _HotItem:
+    available: int
+    holds: dict[int, StockHold] = field(default_factory=dict)
+    pending: int = 0  # net units confirmed in memory but not yet written
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class StockReservationEngine:
+    """In-memory, per-item serialized stock ledger with batched write-back."""
+
+    def __init__(
+        self,
+        hold_ttl_seconds: Optional[float] = None,
+        session_factory: Callable[[], Session] = SessionLocal,
+    ):
+        self.hold_ttl_seconds = hold_ttl_seconds or float(
+            os.getenv("STOCK_HOLD_TTL_SECONDS", DEFAULT_HOLD_TTL_SECONDS)
+        )
+        self.session_factory = session_factory
+        self._items: dict[int, _HotItem] = {}
+        self._registry_lock = threading.Lock()
+        self.metrics = {
+            "held": 0,
+            "rejected": 0,
+            "confirmed": 0,
+            "expired": 0,
+            "write_back_failed": 0,
+        }
+
+    # ---------------------------------------------------------------- registry
+
+    def activate(self, item_id: int, quantity: int) -> None:
+        """Start serving ``item_id`` from memory with ``quantity`` units."""
+        with self._registry_lock:
+            self._items.setdefault(item_id, _HotItem(available=quantity))
+
+    def deactivate(self, db: Session, item_id: int) -> bool:
+        """
+        Write back pending units and stop serving ``item_id`` from memory.
+
+        Returns:
+            False if the write-back failed: the item stays hot so its pending
+            units are not lost
+        """
+        self.flush(db, item_ids=[item_id])
+        with self._registry_lock:
+            state = self._items.get(item_id)
+            if state is not None and state.pending:
+                return False
+            self._items.pop(item_id, None)
+        return True
+
+    def is_hot(self, item_id: int) -> bool:
+        return item_id in self._items
+
+    def available(self, item_id: int) -> Optional[int]:
+        state = self._items.get(item_id)
+        return state.available if state else None
+
+    # ------------------------------------------------------------------- holds
+
+    def hold(self, item_id: int, key: int, amount: int, reserved: int = 0) -> bool:
+        """
+        Hold ``amount`` units for transaction ``key``.
+
+        Args:
+            item_id: Hot item
+            key: Transaction id
+            amount: Units to hold
+            reserved: Units held elsewhere that are not for sale (other
+                buyers' cart holds)
+
+        Returns:
+            True if the units were held, False if there is not enough stock
+            or the item is no longer hot
+        """
+        state = self._items.get(item_id)
+        if state is None:
+            return False
+        with state.lock:
+            if state.available - reserved < amount:
+                self.metrics["rejected"] += 1
+                return False
+            state.available -= amount
+            expires_at = time.monotonic() + self.hold_ttl_seconds
+            state.holds[key] = StockHold(amount, expires_at)
+            self.metrics["held"] += 1
+            return True
+
+    def confirm(self, item_id: int, key: int, amount: int) -> bool:
+        """
+        Turn the hold of transaction ``key`` into a sale.
+
+        An expired hold is re-taken from the pool if stock is still left.
+
+        Returns:
+            True if the units are sold, False if there is not enough stock
+            or the item is no longer hot
+        """
+        state = self._items.get(item_id)
+        if state is None:
+            return False
+        with state.lock:
+            hold = state.holds.pop(key, None)
+            if hold is not None:
+                state.available += hold.amount
+            if state.available < amount:
+                if hold is not None:
+                    state.available -= hold.amount
+                    state.holds[key] = hold
+                self.metrics["rejected"] += 1
+                return False
+            state.available -= amount
+            state.pending += amount
+            self.metrics["confirmed"] += 1
+            return True
+
+    def release(self, item_id: int, key: int) -> None:
+        """
+        Give back the hold of transaction ``key`` (e.g. on cancellation).
+        Holds of an item that is no longer hot are already gone.
+        """
+        state = self._items.get(item_id)
+        if state is None:
+            return
+        with state.lock:
+            hold = state.holds.pop(key, None)
+            if hold is not None:
+                state.available += hold.amount
+
+    def restock(self, item_id: int, amount: int) -> bool:
+        """
+        Return ``amount`` sold units (e.g. an accepted transaction cancelled).
+
+        Returns:
+            False if the item is no longer hot: its sold units were written
+            back, so the caller returns them to the ``items`` row instead
+        """
+        state = self._items.get(item_id)
+        if state is None:
+            return False
+        with state.lock:
+            state.available += amount
+            state.pending -= amount
+        return True
+
+    def expire_holds(self) -> int:
+        """Release every hold past its TTL. Returns the number released."""
+        now = time.monotonic()
+        expired = 0
+        for state in list(self._items.values()):
+            with state.lock:
+                for key in [k for k, h in state.holds.items() if h.expires_at <= now]:
+                    state.available += state.holds.pop(key).amount
+                    expired += 1
+        self.metrics["expired"] += expired
+        return expired
+
+    # -------------------------------------------------------------- write-back
+
+    def flush(self, db: Session, item_ids: Optional[list[int]] = None) -> int:
+        """
+        Write confirmed units to the database in one commit.
+
+        Args:
+            db: Database session
+            item_ids: Only flush these items (default: every hot item)
+
+        An item whose conditional UPDATE matches no row (missing, or short
+        of stock in the database) keeps its units pending and is counted in
+        ``metrics["write_back_failed"]``.
+
+        Returns:
+            Number of items whose stock was written
+        """
+        batch: dict[int, int] = {}
+        for item_id in item_ids if item_ids is not None else list(self._items):
+            state = self._items.get(item_id)
+            if state is None:
+                continue
+            with state.lock:
+                if state.pending:
+                    batch[item_id] = state.pending
+                    state.pending = 0
+        if not batch:
+            return 0
+
+        failed: dict[int, int] = {}
+        try:
+            for item_id, delta in batch.items():
+                if delta > 0:
+                    remaining = decrement_stock(db, item_id, delta)
+                else:
+                    remaining = increment_stock(db, item_id, -delta)
+                if remaining is None:
+                    failed[item_id] = delta
+            db.commit()
+        except Exception:
+            db.rollback()
+            self._restore_pending(batch)
+            raise
+
+        if failed:
+            # units already sold to buyers: keep them pending and retry on the
+            # next flush; the database row must be fixed for that to succeed
+            self._restore_pending(failed)
+            self.metrics["write_back_failed"] += len(failed)
+            for item_id, delta in failed.items():
+                logger.error(
+                    "Stock write-back of %s units failed for hot item %s; "
+                    "kept pending",
+                    delta,
+                    item_id,
+                )
+        return len(batch) - len(failed)
+
+    def _restore_pending(self, deltas: dict[int, int]) -> None:
+        for item_id, delta in deltas.items():
+            state = self._items.get(item_id)
+            if state is not None:
+                with state.lock:
+                    state.pending += delta
+
+    def reset(self) -> None:
+        """Forget every hot item without writing anything back."""
+        with self._registry_lock:
+            self._items.clear()
+        self.metrics = dict.fromkeys(self.metrics, 0)
+
+    def tick(self) -> int:
+        """Expire holds and flush pending units (periodic background job)."""
+        if not self._items:
+            return 0
+        self.expire_holds()
+        with self.session_factory() as db:
+            return self.flush(db)
+
+
+reservation_engine = StockReservationEngine()
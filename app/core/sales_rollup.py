@@ -0,0 +1,156 @@
+"""
+Incrementally maintained seller sales rollup (``seller_daily_sales``).
+
+Every transaction is counted once, in the bucket of its seller, item, status
+and creation day (Asia/Bangkok). Only ACCEPTED, PAID and CANCELLED are
+tracked. When a transaction changes status the caller records the move with
+``record_status_change`` in the same database transaction, which takes it out
+of the old bucket and adds it to the new one. ``rebuild_sales_rollup``
+recomputes the whole table from ``transactions`` in one statement.
+"""
+
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Iterable, Optional
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.db.database import SessionLocal
+from app.db.models.SellerSales.daily_sales import SellerDailySales
+from app.db.models.Transactions.transaction_model import Transaction
+from app.schemas.transaction_schema import TransactionStatus
+
+TRACKED_STATUSES = (
+    TransactionStatus.ACCEPTED.value,
+    TransactionStatus.PAID.value,
+    TransactionStatus.CANCELLED.value,
+)
+
+_BUCKET = ("seller_id", "day", "item_id", "status")
+_TOTALS = ("transaction_count", "units", "revenue")
+
+
+def _status_value(status) -> Optional[str]:
+    return status.value if isinstance(status, TransactionStatus) else status
+
+
+def sales_day(created_at: datetime) -> date:
+    """Bangkok calendar day a transaction belongs to."""
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(ZoneInfo("Asia/Bangkok"))
+    return created_at.date()
+
+
+def _upsert(db: Session, rows: list[dict]) -> None:
+    """Add the totals in ``rows`` to their buckets, creating missing ones."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        stmt = postgresql.insert(SellerDailySales)
+    elif dialect == "sqlite":
+        stmt = sqlite.insert(SellerDailySales)
+    else:
+        raise NotImplementedError(f"sales rollup does not support {dialect}")
+
+    table = SellerDailySales.__table__
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(_BUCKET),
+        set_={name: table.c[name] + stmt.excluded[name] for name in _TOTALS},
+    )
+    db.execute(stmt, rows)
+
+
+def apply_changes(db: Session, changes: Iterable[tuple]) -> None:
+    """
+    Apply many status moves at once, merging those that hit the same bucket.
+
+    Args:
+        db: Database session (not committed)
+        changes: ``(transaction, old_status, new_status)`` tuples. The
+            transaction may be a model or any row with seller_id, item_id,
+            created_at, amount and agreed_price.
+    """
+    deltas: dict[tuple, list] = defaultdict(lambda: [0, 0, Decimal("0")])
+    for transaction, old_status, new_status in changes:
+        old_status, new_status = _status_value(old_status), _status_value(new_status)
+        if old_status == new_status:
+            continue
+        day = sales_day(transaction.created_at)
+        for status, sign in ((old_status, -1), (new_status, 1)):
+            if status not in TRACKED_STATUSES:
+                continue
+            totals = deltas[(transaction.seller_id, day, transaction.item_id, status)]
+            totals[0] += sign
+            totals[1] += sign * transaction.amount
+            totals[2] += sign * Decimal(transaction.agreed_price)
+
+    if deltas:
+        _upsert(
+            db,
+            [
+                dict(zip(_BUCKET, bucket), **dict(zip(_TOTALS, totals)))
+                for bucket, totals in deltas.items()
+            ],
+        )
+
+
+def record_status_change(
+    db: Session, transaction: Transaction, old_status, new_status
+) -> None:
+    """
+    Move one transaction between rollup buckets. Call it before committing
+    the status change so both land in the same database transaction.
+    """
+    apply_changes(db, [(transaction, old_status, new_status)])
+
+
+def _day_column(dialect: str):
+    if dialect == "postgresql":
+        return func.date(func.timezone("Asia/Bangkok", Transaction.created_at))
+    # SQLite keeps the Bangkok wall-clock time without an offset
+    return func.date(Transaction.created_at)
+
+
+def rebuild_sales_rollup(db: Session) -> int:
+    """
+    Recompute ``seller_daily_sales`` from scratch with one INSERT ... SELECT.
+
+    Use it once to backfill an existing database, or to repair drift.
+
+    Returns:
+        Number of rollup rows written
+    """
+    day = _day_column(db.get_bind().dialect.name)
+    source = (
+        select(
+            Transaction.seller_id,
+            day.label("day"),
+            Transaction.item_id,
+            Transaction.status,
+            func.count().label("transaction_count"),
+            func.sum(Transaction.amount).label("units"),
+            func.sum(Transaction.agreed_price).label("revenue"),
+        )
+        .where(Transaction.status.in_(TRACKED_STATUSES))
+        .group_by(Transaction.seller_id, day, Transaction.item_id, Transaction.status)
+    )
+
+    db.execute(delete(SellerDailySales))
+    result = db.execute(
+        insert(SellerDailySales).from_select(list(_BUCKET + _TOTALS), source)
+    )
+    db.commit()
+    return result.rowcount
+
+
+def main():
+    with SessionLocal() as db:
+        rows = rebuild_sales_rollup(db)
+    print(f"seller_daily_sales rebuilt: {rows} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Periodic background jobs run inside the application lifespan."""
+
+import asyncio
+import contextlib
+import inspect
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PeriodicJob:
+    """A callable run every ``interval`` seconds, with run metrics."""
+
+    name: str
+    func: Callable[[], Any]
+    interval: float
+    runs: int = 0
+    failures: int = 0
+    last_duration: Optional[float] = None
+    last_result: Any = None
+    last_error: Optional[str] = None
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+    async def run_once(self) -> Any:
+        """
+        Run the job a single time.
+
+        Coroutine functions are awaited; plain functions (usually blocking
+        database work) run in a worker thread so the event loop stays free.
+        """
+        started = time.perf_counter()
+        try:
+            if inspect.iscoroutinefunction(self.func):
+                result = await self.func()
+            else:
+                result = await asyncio.to_thread(self.func)
+        except Exception as exc:
+            self.failures += 1
+            self.last_error = repr(exc)
+            logger.exception("Background job %s failed", self.name)
+            return None
+        finally:
+            self.runs += 1
+            self.last_duration = time.perf_counter() - started
+
+        self.last_result = result
+        return result
+
+    async def loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.run_once()
+
+    def stats(self) -> dict:
+        return {
+            "interval": self.interval,
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_duration": self.last_duration,
+            "last_result": self.last_result,
+            "last_error": self.last_error,
+        }
+
+
+class BackgroundScheduler:
+    """
+    Registry of periodic jobs started and stopped with the app lifespan.
+
+    Set ``BACKGROUND_JOBS_ENABLED=false`` to register jobs without running
+    them (tests drive jobs explicitly through ``run_once``).
+    """
+
+    def __init__(self):
+        self.jobs: dict[str, PeriodicJob] = {}
+
+    def add_job(self, name: str, func: Callable[[], Any], interval: float) -> None:
+        self.jobs[name] = PeriodicJob(name=name, func=func, interval=interval)
+
+    @property
+    def enabled(self) -> bool:
+        return os.getenv("BACKGROUND_JOBS_ENABLED", "true").lower() == "true"
+
+    async def start(self) -> None:
+        if not self.enabled:
+            return
+        for job in self.jobs.values():
+            job.task = asyncio.create_task(job.loop(), name=f"job:{job.name}")
+
+    async def stop(self) -> None:
+        for job in self.jobs.values():
+            if job.task is None:
+                continue
+            job.task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await job.task
+            job.task = None
+
+    async def run_once(self, name: str) -> Any:
+        return await self.jobs[name].run_once()
+
+    def stats(self) -> dict:
+        return {name: job.stats() for name, job in self.jobs.items()}
+
+
+scheduler = BackgroundScheduler()
@@ -3,10 +3,11 @@
 from typing import Annotated
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
+from jose import JWTError
 from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
 import os
+from app.core.jwt_keys import get_key_ring
 from app.db.models.Users.User import User
 from sqlalchemy.orm import Session
 from app.db.database import get_db
@@ -15,14 +16,17 @@ load_dotenv()
 
 # Constants with secure defaults
 DEFAULT_TOKEN_EXPIRE_MINUTES = 30
-DEFAULT_ALGORITHM = "HS256"
+
+ACCESS_TOKEN_EXPIRE_MINUTES = int(
+    os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", DEFAULT_TOKEN_EXPIRE_MINUTES)
+)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/v1/auth/token")
 
 
 def create_access_token(data: dict) -> str:
     """
-    Create a JWT access token.
+    Create a JWT access token signed with the active key.
 
     Args:
         data: Dictionary containing user data to encode in the token
@@ -33,37 +37,26 @@ def create_access_token(data: dict) -> str:
     Raises:
         ValueError: If required environment variables are missing
     """
-    secret_key = os.getenv("JWT_SECRET_KEY")
-    if not secret_key:
-        raise ValueError("JWT_SECRET_KEY environment variable is required")
-
-    algorithm = os.getenv("JWT_ALGORITHM", DEFAULT_ALGORITHM)
-    expire_minutes = int(
-        os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", DEFAULT_TOKEN_EXPIRE_MINUTES)
-    )
-
     to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + timedelta(minutes=expire_minutes)
+    expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, secret_key, algorithm=algorithm)
+    encoded_jwt = get_key_ring().encode(to_encode)
     return encoded_jwt
 
 
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
-) -> User:
+def authenticate_token(db: Session, token: str) -> dict:
     """
-    Get the current authenticated user from JWT token.
+    Resolve a JWT access token to the active user it was issued for.
 
     Args:
         db: Database session
-        token: JWT token from Authorization header
+        token: Encoded JWT
 
     Returns:
-        User object if authentication is successful
+        ``{"username", "id"}`` of the user
 
     Raises:
-        HTTPException: If token is invalid or user not found
+        HTTPException: 401 if the token is invalid or the user is missing or inactive
     """
     credentials_exception = HTTPException(
         status_code=401,
@@ -71,14 +64,10 @@ def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    secret_key = os.getenv("JWT_SECRET_KEY")
-    if not secret_key:
-        raise ValueError("JWT_SECRET_KEY environment variable is required")
-
-    algorithm = os.getenv("JWT_ALGORITHM", DEFAULT_ALGORITHM)
+    key_ring = get_key_ring()
 
     try:
-        payload = jwt.decode(token, secret_key, algorithms=[algorithm])
+        payload = key_ring.decode(token)
         username: str = payload.get("sub")
         user_id: int = payload.get("id")
 
@@ -92,3 +81,22 @@ def get_current_user(
         return {"username": username, "id": user_id}
     except JWTError:
         raise credentials_exception
+
+
+def get_current_user(
+    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
+) -> User:
+    """
+    Get the current authenticated user from JWT token.
+
+    Args:
+        db: Database session
+        token: JWT token from Authorization header
+
+    Returns:
+        User object if authentication is successful
+
+    Raises:
+        HTTPException: If token is invalid or user not found
+    """
+    return authenticate_token(db, token)
@@ -0,0 +1,75 @@
+"""Atomic stock updates for items."""
+
+from typing import Optional
+
+from sqlalchemy import case, update
+from sqlalchemy.orm import Session
+
+from app.db.models.items.item import Item
+from app.schemas.item_schema import ItemStatus
+
+
+def decrement_stock(db: Session, item_id: int, amount: int) -> Optional[int]:
+    """
+    Take ``amount`` units of an item in a single conditional UPDATE.
+
+    The row is only changed when enough stock is left, so concurrent callers
+    can never oversell. The item becomes SOLD when its stock reaches zero and
+    its version is bumped so concurrent optimistic edits notice the change.
+    The change is not committed.
+
+    Args:
+        db: Database session
+        item_id: Item to take stock from
+        amount: Number of units to take
+
+    Returns:
+        Remaining quantity, or None if the item is missing or short of stock
+    """
+    stmt = (
+        update(Item)
+        .where(Item.id == item_id, Item.quantity >= amount)
+        .values(
+            quantity=Item.quantity - amount,
+            version=Item.version + 1,
+            status=case(
+                (Item.quantity == amount, ItemStatus.SOLD.value),
+                else_=Item.status,
+            ),
+        )
+        .returning(Item.quantity)
+        .execution_options(synchronize_session="fetch")
+    )
+    return db.execute(stmt).scalar_one_or_none()
+
+
+def increment_stock(db: Session, item_id: int, amount: int) -> Optional[int]:
+    """
+    Give ``amount`` units back to an item in a single UPDATE.
+
+    A SOLD item becomes AVAILABLE again once it has stock. The change is not
+    committed.
+
+    Args:
+        db: Database session
+        item_id: Item to return stock to
+        amount: Number of units to return
+
+    Returns:
+        New quantity, or None if the item is missing
+    """
+    stmt = (
+        update(Item)
+        .where(Item.id == item_id)
+        .values(
+            quantity=Item.quantity + amount,
+            version=Item.version + 1,
+            status=case(
+                (Item.status == ItemStatus.SOLD.value, ItemStatus.AVAILABLE.value),
+                else_=Item.status,
+            ),
+        )
+        .returning(Item.quantity)
+        .execution_options(synchronize_session="fetch")
+    )
+    return db.execute(stmt).scalar_one_or_none()
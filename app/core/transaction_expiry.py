@@ -0,0 +1,220 @@
+"""Expiry of stale pending / unpaid transactions with batched stock release."""
+
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import and_, bindparam, case, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.outbox import emit
+from app.core.reservations import reservation_engine
+from app.core.sales_rollup import apply_changes
+from app.db.database import SessionLocal
+from app.db.models.items.item import Item
+from app.db.models.Transactions.transaction_model import Transaction
+from app.schemas.item_schema import ItemStatus
+from app.schemas.transaction_schema import TransactionStatus
+
+DEFAULT_PENDING_TTL_MINUTES = 24 * 60
+DEFAULT_UNPAID_TTL_MINUTES = 3 * 24 * 60
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_MAX_BATCHES = 20
+DEFAULT_EXPIRY_INTERVAL_SECONDS = 60
+
+# cumulative counters since process start
+metrics = {"runs": 0, "expired_pending": 0, "expired_unpaid": 0, "units_restored": 0}
+
+_items_table = Item.__table__
+
+# one statement, executed with many parameter sets (executemany)
+_restore_stock_stmt = (
+    update(_items_table)
+    .where(_items_table.c.id == bindparam("b_item_id"))
+    .values(
+        quantity=_items_table.c.quantity + bindparam("b_amount"),
+        version=_items_table.c.version + 1,
+        status=case(
+            (
+                _items_table.c.status == ItemStatus.SOLD.value,
+                ItemStatus.AVAILABLE.value,
+            ),
+            else_=_items_table.c.status,
+        ),
+    )
+)
+
+
+def expire_batch(
+    db: Session, pending_before: datetime, unpaid_before: datetime, batch_size: int
+) -> dict:
+    """
+    Cancel one batch of stale transactions and give their stock back.
+
+    Rows are claimed with ``FOR UPDATE SKIP LOCKED`` so several workers can
+    run the job at once without blocking each other or expiring a row twice.
+    The batch is committed as a single database transaction.
+
+    Returns:
+        Counts for this batch: pending, unpaid, units_restored
+    """
+    stale = (
+        db.execute(
+            select(
+                Transaction.id,
+                Transaction.item_id,
+                Transaction.seller_id,
+                Transaction.buyer_id,
+                Transaction.amount,
+                Transaction.agreed_price,
+                Transaction.status,
+                Transaction.created_at,
+            )
+            .where(
+                or_(
+                    and_(
+                        Transaction.status == TransactionStatus.PENDING.value,
+                        Transaction.created_at < pending_before,
+                    ),
+                    and_(
+                        Transaction.status == TransactionStatus.ACCEPTED.value,
+                        Transaction.paid_at.is_(None),
+                        Transaction.updated_at < unpaid_before,
+                    ),
+                )
+            )
+            .order_by(Transaction.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        .all()
+    )
+    if not stale:
+        return {"pending": 0, "unpaid": 0, "units_restored": 0}
+
+    now = datetime.now(ZoneInfo("Asia/Bangkok"))
+    db.execute(
+        update(Transaction)
+        .where(Transaction.id.in_([row.id for row in stale]))
+        .values(
+            status=TransactionStatus.CANCELLED.value,
+            cancelled_at=now,
+            updated_at=now,
+            version=Transaction.version + 1,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+    apply_changes(
+        db, [(row, row.status, TransactionStatus.CANCELLED) for row in stale]
+    )
+
+    for row in stale:
+        emit(
+            db,
+            "transaction.cancelled",
+            row,
+            status=TransactionStatus.CANCELLED.value,
+            reason="expired",
+        )
+
+    restore: dict[int, int] = defaultdict(int)
+    hot_rows = []
+    for row in stale:
+        if reservation_engine.is_hot(row.item_id):
+            hot_rows.append(row)
+        elif row.status == TransactionStatus.ACCEPTED.value:
+            restore[row.item_id] += row.amount
+
+    if restore:
+        db.execute(
+            _restore_stock_stmt,
+            [{"b_item_id": item_id, "b_amount": n} for item_id, n in restore.items()],
+        )
+    db.commit()
+
+    # hot items keep their stock in memory; only touch it once the batch is in
+    ended: dict[int, int] = defaultdict(int)
+    for row in hot_rows:
+        if row.status == TransactionStatus.ACCEPTED.value:
+            if not reservation_engine.restock(row.item_id, row.amount):
+                # the flash sale ended meanwhile: its units are on the row
+                ended[row.item_id] += row.amount
+        else:
+            reservation_engine.release(row.item_id, row.id)
+    if ended:
+        db.execute(
+            _restore_stock_stmt,
+            [{"b_item_id": item_id, "b_amount": n} for item_id, n in ended.items()],
+        )
+        db.commit()
+        for item_id, n in ended.items():
+            restore[item_id] += n
+
+    unpaid = sum(1 for row in stale if row.status == TransactionStatus.ACCEPTED.value)
+    return {
+        "pending": len(stale) - unpaid,
+        "unpaid": unpaid,
+        "units_restored": sum(restore.values()),
+    }
+
+
+def expire_stale_transactions(
+    db: Session,
+    pending_ttl: Optional[timedelta] = None,
+    unpaid_ttl: Optional[timedelta] = None,
+    batch_size: Optional[int] = None,
+    max_batches: int = DEFAULT_MAX_BATCHES,
+) -> dict:
+    """
+    Expire pending transactions older than ``pending_ttl`` and accepted but
+    unpaid ones untouched for ``unpaid_ttl``, one batch at a time.
+
+    Returns:
+        Totals over all batches: pending, unpaid, units_restored, batches
+    """
+    pending_ttl = pending_ttl or timedelta(
+        minutes=int(
+            os.getenv("TRANSACTION_PENDING_TTL_MINUTES", DEFAULT_PENDING_TTL_MINUTES)
+        )
+    )
+    unpaid_ttl = unpaid_ttl or timedelta(
+        minutes=int(
+            os.getenv("TRANSACTION_UNPAID_TTL_MINUTES", DEFAULT_UNPAID_TTL_MINUTES)
+        )
+    )
+    batch_size = batch_size or int(
+        os.getenv("TRANSACTION_EXPIRY_BATCH_SIZE", DEFAULT_BATCH_SIZE)
+    )
+
+    now = datetime.now(ZoneInfo("Asia/Bangkok"))
+    totals = {"pending": 0, "unpaid": 0, "units_restored": 0, "batches": 0}
+    for _ in range(max_batches):
+        result = expire_batch(db, now - pending_ttl, now - unpaid_ttl, batch_size)
+        expired = result["pending"] + result["unpaid"]
+        if expired:
+            totals["batches"] += 1
+            for key in ("pending", "unpaid", "units_restored"):
+                totals[key] += result[key]
+        if expired < batch_size:
+            break
+
+    metrics["runs"] += 1
+    metrics["expired_pending"] += totals["pending"]
+    metrics["expired_unpaid"] += totals["unpaid"]
+    metrics["units_restored"] += totals["units_restored"]
+    return totals
+
+
+def make_expiry_job(
+    session_factory: Callable[[], Session] = SessionLocal,
+) -> Callable[[], dict]:
+    """Build the periodic job callable that opens its own session."""
+
+    def run() -> dict:
+        with session_factory() as db:
+            return expire_stale_transactions(db)
+
+    return run
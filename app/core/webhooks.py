@@ -0,0 +1,410 @@
+"""
+Outgoing webhooks for transaction events.
+
+``enqueue_transaction_webhooks`` is an outbox consumer: it turns each
+transaction event into one ``webhook_deliveries`` row per matching
+subscription of the seller or buyer. ``WebhookDeliveryWorker`` then POSTs
+due deliveries from the background scheduler over a shared keep-alive
+``httpx.AsyncClient``, signs every request with the subscription secret and
+retries failures with exponential backoff.
+
+Subscriber URLs are untrusted: ``url_problem`` resolves the host and refuses
+loopback, private, link-local and other non-public addresses (and plain
+http outside development), both when a subscription is created and again
+before every send, so a webhook cannot be pointed at internal services.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import ipaddress
+import json
+import logging
+import os
+import socket
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+from urllib.parse import urlsplit
+from zoneinfo import ZoneInfo
+
+import httpx
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.core.outbox import DomainEvent
+from app.db.database import SessionLocal
+from app.db.models.Webhooks.webhook import WebhookDelivery, WebhookSubscription
+from app.schemas.webhook_schema import WebhookDeliveryStatus, WebhookEvent
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DELIVERY_INTERVAL_SECONDS = 1.0
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_MAX_ATTEMPTS = 8
+DEFAULT_BACKOFF_BASE_SECONDS = 5
+DEFAULT_BACKOFF_MAX_SECONDS = 3600
+DEFAULT_TIMEOUT_SECONDS = 10.0
+DEFAULT_MAX_PER_ENDPOINT = 4
+DEFAULT_MAX_CONNECTIONS = 100
+
+# a claimed delivery is hidden from other workers for this long
+CLAIM_LEASE_SECONDS = 60
+
+SIGNATURE_HEADER = "X-Webhook-Signature"
+TIMESTAMP_HEADER = "X-Webhook-Timestamp"
+EVENT_HEADER = "X-Webhook-Event"
+ID_HEADER = "X-Webhook-Id"
+
+# environments where plain http receivers are accepted
+INSECURE_ENVIRONMENTS = {"development", "dev", "local", "test"}
+
+
+def _now() -> datetime:
+    return datetime.now(ZoneInfo("Asia/Bangkok"))
+
+
+def sign(secret: str, timestamp: str, body: bytes) -> str:
+    """Signature header value: HMAC-SHA256 over ``"<timestamp>.<body>"``."""
+    digest = hmac.new(
+        secret.encode("utf-8"), timestamp.encode("ascii") + b"." + body, hashlib.sha256
+    )
+    return f"sha256={digest.hexdigest()}"
+
+
+def verify_signature(secret: str, timestamp: str, body: bytes, signature: str) -> bool:
+    """Check a signature the way a receiver should (constant-time compare)."""
+    return hmac.compare_digest(sign(secret, timestamp, body), signature)
+
+
+def resolve_host(host: str) -> list[ipaddress.IPv4Address | ipaddress.IPv6Address]:
+    """Every address ``host`` resolves to (blocking DNS lookup)."""
+    infos = socket.getaddrinfo(host, None, proto=socket.IPPROTO_TCP)
+    return [ipaddress.ip_address(info[4][0].split("%", 1)[0]) for info in infos]
+
+
+def _is_public(address: ipaddress.IPv4Address | ipaddress.IPv6Address) -> bool:
+    if isinstance(address, ipaddress.IPv6Address) and address.ipv4_mapped:
+        address = address.ipv4_mapped
+    return address.is_global and not address.is_multicast
+
+
+def url_problem(url: str) -> Optional[str]:
+    """
+    Why ``url`` must not receive webhooks, or None if it may.
+
+    Plain http is only accepted when ``ENVIRONMENT`` is a development one;
+    non-public targets only when ``WEBHOOK_ALLOW_PRIVATE_TARGETS`` is true
+    (a receiver on localhost during development). Blocks on DNS.
+    """
+    parts = urlsplit(url)
+    environment = os.getenv("ENVIRONMENT", "production").lower()
+    if parts.scheme != "https" and environment not in INSECURE_ENVIRONMENTS:
+        return "Webhook URL must use https"
+    if not parts.hostname:
+        return "Webhook URL has no host"
+    if os.getenv("WEBHOOK_ALLOW_PRIVATE_TARGETS", "false").lower() == "true":
+        return None
+
+    try:
+        addresses = [ipaddress.ip_address(parts.hostname)]
+    except ValueError:
+        try:
+            addresses = resolve_host(parts.hostname)
+        except (OSError, ValueError):
+            return "Webhook host could not be resolved"
+    if not addresses:
+        return "Webhook host could not be resolved"
+    if not all(_is_public(address) for address in addresses):
+        return "Webhook URL must not point to a private or internal address"
+    return None
+
+
+def fail_pending_deliveries(db: Session, subscription_id: int, reason: str) -> int:
+    """
+    Give up the pending deliveries of a subscription that was deleted or
+    deactivated. Does not commit.
+
+    Returns:
+        Number of deliveries marked failed
+    """
+    return db.execute(
+        update(WebhookDelivery)
+        .where(
+            WebhookDelivery.subscription_id == subscription_id,
+            WebhookDelivery.status == WebhookDeliveryStatus.PENDING.value,
+        )
+        .values(status=WebhookDeliveryStatus.FAILED.value, last_error=reason)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+
+def backoff_delay(attempts: int) -> timedelta:
+    """Wait before retry number ``attempts`` (1-based): base * 2^(n-1), capped."""
+    base = float(os.getenv("WEBHOOK_BACKOFF_BASE_SECONDS", DEFAULT_BACKOFF_BASE_SECONDS))
+    cap = float(os.getenv("WEBHOOK_BACKOFF_MAX_SECONDS", DEFAULT_BACKOFF_MAX_SECONDS))
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), cap))
+
+
+def enqueue_transaction_webhooks(db: Session, event: DomainEvent) -> None:
+    """
+    Outbox consumer: queue a delivery for every subscription of the seller or
+    buyer that listens to ``event``. Redelivered events are ignored.
+    """
+    if event.event_type not in {e.value for e in WebhookEvent}:
+        return
+
+    user_ids = {event.payload.get("seller_id"), event.payload.get("buyer_id")} - {None}
+    subscriptions = db.scalars(
+        select(WebhookSubscription).where(
+            WebhookSubscription.user_id.in_(user_ids),
+            WebhookSubscription.is_active.is_(True),
+            WebhookSubscription.deleted_at.is_(None),
+        )
+    ).all()
+    already_queued = set(
+        db.scalars(
+            select(WebhookDelivery.subscription_id).where(
+                WebhookDelivery.event_id == event.id
+            )
+        )
+    )
+
+    for subscription in subscriptions:
+        if event.event_type not in subscription.events:
+            continue
+        if subscription.id in already_queued:
+            continue
+        db.add(
+            WebhookDelivery(
+                subscription_id=subscription.id,
+                event_id=event.id,
+                event_type=event.event_type,
+                payload={
+                    **event.payload,
+                    "role": "seller"
+                    if subscription.user_id == event.payload.get("seller_id")
+                    else "buyer",
+                },
+                status=WebhookDeliveryStatus.PENDING.value,
+                next_attempt_at=_now(),
+            )
+        )
+
+
+@dataclass(frozen=True)
+class _Attempt:
+    delivery_id: int
+    url: str
+    secret: str
+    event_id: int
+    event_type: str
+    payload: dict
+    created_at: datetime
+    attempts: int
+
+
+@dataclass(frozen=True)
+class _Outcome:
+    attempt: _Attempt
+    status_code: Optional[int]
+    error: Optional[str]
+    latency: float
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code is not None and 200 <= self.status_code < 300
+
+
+class WebhookDeliveryWorker:
+    """
+    Sends due webhook deliveries concurrently.
+
+    All requests share one ``httpx.AsyncClient`` so connections to the same
+    receiver are kept alive and reused. Each endpoint (scheme, host and port)
+    gets at most ``max_per_endpoint`` requests in flight, so one slow
+    receiver cannot take every connection in the pool.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        max_per_endpoint: Optional[int] = None,
+        max_attempts: Optional[int] = None,
+    ):
+        self.session_factory = session_factory
+        self.transport = transport
+        self.max_per_endpoint = max_per_endpoint or int(
+            os.getenv("WEBHOOK_MAX_CONCURRENCY_PER_ENDPOINT", DEFAULT_MAX_PER_ENDPOINT)
+        )
+        self.max_attempts = max_attempts or int(
+            os.getenv("WEBHOOK_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS)
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+        self._endpoint_limits: dict[str, asyncio.Semaphore] = {}
+        self.metrics = {
+            "attempts": 0,
+            "delivered": 0,
+            "failed_attempts": 0,
+            "gave_up": 0,
+            "latency_total": 0.0,
+            "max_in_flight": 0,
+        }
+        self._in_flight = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            max_connections = int(
+                os.getenv("WEBHOOK_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS)
+            )
+            self._client = httpx.AsyncClient(
+                transport=self.transport,
+                timeout=float(
+                    os.getenv("WEBHOOK_TIMEOUT_SECONDS", DEFAULT_TIMEOUT_SECONDS)
+                ),
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_connections,
+                ),
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._endpoint_limits.clear()
+
+    def _limit_for(self, url: str) -> asyncio.Semaphore:
+        parts = urlsplit(url)
+        endpoint = f"{parts.scheme}://{parts.netloc}"
+        if endpoint not in self._endpoint_limits:
+            self._endpoint_limits[endpoint] = asyncio.Semaphore(self.max_per_endpoint)
+        return self._endpoint_limits[endpoint]
+
+    def _claim(self) -> list[_Attempt]:
+        """Lease due deliveries so concurrent workers skip them."""
+        now = _now()
+        batch_size = int(os.getenv("WEBHOOK_BATCH_SIZE", DEFAULT_BATCH_SIZE))
+        with self.session_factory() as db:
+            rows = db.execute(
+                select(WebhookDelivery, WebhookSubscription)
+                .join(WebhookSubscription)
+                .where(
+                    WebhookDelivery.status == WebhookDeliveryStatus.PENDING.value,
+                    WebhookDelivery.next_attempt_at <= now,
+                    WebhookSubscription.is_active.is_(True),
+                    WebhookSubscription.deleted_at.is_(None),
+                )
+                .order_by(WebhookDelivery.next_attempt_at, WebhookDelivery.id)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True, of=WebhookDelivery)
+            ).all()
+
+            attempts = []
+            for delivery, subscription in rows:
+                delivery.next_attempt_at = now + timedelta(seconds=CLAIM_LEASE_SECONDS)
+                attempts.append(
+                    _Attempt(
+                        delivery_id=delivery.id,
+                        url=subscription.url,
+                        secret=subscription.secret,
+                        event_id=delivery.event_id,
+                        event_type=delivery.event_type,
+                        payload=delivery.payload,
+                        created_at=delivery.created_at,
+                        attempts=delivery.attempts,
+                    )
+                )
+            db.commit()
+            return attempts
+
+    async def _send(self, attempt: _Attempt) -> _Outcome:
+        # the host may resolve elsewhere now than when it was subscribed
+        problem = await asyncio.to_thread(url_problem, attempt.url)
+        if problem is not None:
+            return _Outcome(attempt, None, f"Blocked: {problem}", 0.0)
+
+        body = json.dumps(
+            {
+                "id": attempt.event_id,
+                "type": attempt.event_type,
+                "created_at": attempt.created_at.isoformat(),
+                "data": attempt.payload,
+            },
+            separators=(",", ":"),
+        ).encode("utf-8")
+        timestamp = str(int(time.time()))
+        headers = {
+            "Content-Type": "application/json",
+            ID_HEADER: str(attempt.event_id),
+            EVENT_HEADER: attempt.event_type,
+            TIMESTAMP_HEADER: timestamp,
+            SIGNATURE_HEADER: sign(attempt.secret, timestamp, body),
+        }
+
+        async with self._limit_for(attempt.url):
+            self._in_flight += 1
+            self.metrics["max_in_flight"] = max(
+                self.metrics["max_in_flight"], self._in_flight
+            )
+            started = time.perf_counter()
+            try:
+                response = await self.client.post(attempt.url, content=body, headers=headers)
+                status_code, error = response.status_code, None
+                if not response.is_success:
+                    error = f"HTTP {response.status_code}"
+            except httpx.HTTPError as exc:
+                status_code, error = None, repr(exc)
+            finally:
+                self._in_flight -= 1
+        return _Outcome(attempt, status_code, error, time.perf_counter() - started)
+
+    def _record(self, outcomes: list[_Outcome]) -> None:
+        now = _now()
+        with self.session_factory() as db:
+            for outcome in outcomes:
+                delivery = db.get(WebhookDelivery, outcome.attempt.delivery_id)
+                delivery.attempts += 1
+                delivery.last_status_code = outcome.status_code
+                self.metrics["attempts"] += 1
+                self.metrics["latency_total"] += outcome.latency
+
+                if outcome.ok:
+                    delivery.status = WebhookDeliveryStatus.DELIVERED.value
+                    delivery.delivered_at = now
+                    delivery.last_error = None
+                    self.metrics["delivered"] += 1
+                    continue
+
+                delivery.last_error = outcome.error
+                self.metrics["failed_attempts"] += 1
+                if delivery.attempts >= self.max_attempts:
+                    delivery.status = WebhookDeliveryStatus.FAILED.value
+                    self.metrics["gave_up"] += 1
+                else:
+                    delivery.next_attempt_at = now + backoff_delay(delivery.attempts)
+            db.commit()
+
+    async def run_once(self) -> dict:
+        """Periodic job: send every due delivery once."""
+        attempts = await asyncio.to_thread(self._claim)
+        if not attempts:
+            return {"sent": 0, "delivered": 0}
+        outcomes = await asyncio.gather(*(self._send(a) for a in attempts))
+        await asyncio.to_thread(self._record, outcomes)
+        return {"sent": len(outcomes), "delivered": sum(o.ok for o in outcomes)}
+
+    def stats(self) -> dict:
+        attempts = self.metrics["attempts"]
+        return {
+            **self.metrics,
+            "avg_latency": self.metrics["latency_total"] / attempts if attempts else None,
+            "endpoints": len(self._endpoint_limits),
+        }
+
+
+webhook_worker = WebhookDeliveryWorker()
@@ -23,6 +23,20 @@ engine = create_engine(
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# PostgreSQL declarative partitioning of the append-only tables
+# (chat_messages, price_histories); see app.core.partitions
+PARTITIONING_ENABLED = (
+    os.getenv("DB_PARTITIONING", "false").lower() == "true"
+    and engine.dialect.name == "postgresql"
+)
+
+
+def partition_by_range(column: str) -> dict:
+    """Table options that range-partition a table by ``column`` when enabled."""
+    if not PARTITIONING_ENABLED:
+        return {}
+    return {"postgresql_partition_by": f"RANGE ({column})"}
+
 
 class Base(DeclarativeBase):
     """Base class for all database models."""
@@ -1,5 +1,5 @@
 from ...database import Base
-from sqlalchemy import Column, Integer,  DateTime
+from sqlalchemy import Column, Integer,  DateTime, ForeignKey, UniqueConstraint
 from sqlalchemy.orm import relationship
 
 from datetime import datetime
@@ -15,6 +15,16 @@ class Chat(Base):
     id = Column(Integer, primary_key=True, index=True)
     created_at = Column(DateTime(timezone=True), default=get_thai_time)
     updated_at = Column(DateTime(timezone=True), default=get_thai_time, onupdate=get_thai_time)
+    # newest message, kept up to date by app.core.chat_messages.insert_messages
+    last_message_id = Column(Integer, nullable=True)
+    last_message_at = Column(DateTime(timezone=True), nullable=True)
+    # 1:1 chats: the two members, lower user id first (NULL for other chats)
+    user_low_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True)
+    user_high_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True)
 
     messages = relationship("ChatMessage", back_populates="chat", cascade="all, delete-orphan")
     members = relationship("ChatMember", back_populates="chat", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        UniqueConstraint("user_low_id", "user_high_id", name="uq_chats_user_pair"),
+    )
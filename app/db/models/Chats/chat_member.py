@@ -1,5 +1,5 @@
 from ...database import Base
-from sqlalchemy import Column, Integer, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from zoneinfo import ZoneInfo
@@ -15,7 +15,14 @@ class ChatMember(Base):
     chat_id = Column(Integer, ForeignKey("chats.id", ondelete="CASCADE"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     created_at = Column(DateTime(timezone=True), default=get_thai_time)
+    # newest message this member has read; later ones count as unread
+    last_read_message_id = Column(Integer, nullable=True)
 
     # ความสัมพันธ์
     chat = relationship("Chat", back_populates="members")
     user = relationship("User", back_populates="chat_members")
+
+    __table_args__ = (
+        # the inbox starts from the caller's memberships
+        Index("ix_chat_members_user_id_chat_id", "user_id", "chat_id"),
+    )
@@ -1,5 +1,17 @@
-from ...database import Base
-from sqlalchemy import Column, Integer, ForeignKey , String, DateTime
+from ...database import PARTITIONING_ENABLED, Base, partition_by_range
+from sqlalchemy import (
+    DDL,
+    Column,
+    Integer,
+    ForeignKey,
+    String,
+    DateTime,
+    Index,
+    event,
+    func,
+    literal_column,
+)
+from sqlalchemy.dialects import postgresql  # noqa: F401 (registers to_tsvector)
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from zoneinfo import ZoneInfo
@@ -10,13 +22,68 @@ def get_thai_time():
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     chat_id = Column(Integer, ForeignKey("chats.id", ondelete="CASCADE"), nullable=False)
     sender_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     text = Column(String, nullable=True)
     image_url = Column(String, nullable=True)
-    send_at = Column(DateTime(timezone=True), default=get_thai_time)
+    # partition key; part of the primary key when the table is partitioned
+    send_at = Column(
+        DateTime(timezone=True), default=get_thai_time, primary_key=PARTITIONING_ENABLED
+    )
 
     # ความสัมพันธ์
     chat = relationship("Chat", back_populates="messages")
     sender = relationship("User", back_populates="send_messages")
+
+    __table_args__ = (
+        # keyset pagination of a chat's history
+        Index("ix_chat_messages_chat_id_id", "chat_id", "id"),
+        # full-text search on PostgreSQL; the expression must match
+        # app.core.chat_search.search_document
+        Index(
+            "ix_chat_messages_text_search",
+            func.to_tsvector(
+                literal_column("'simple'"), func.coalesce(text, literal_column("''"))
+            ),
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+        partition_by_range("send_at"),
+    )
+
+
+# full-text search on SQLite: an FTS5 index over chat_messages.text, kept in
+# step by triggers (rebuild an existing database with
+# INSERT INTO chat_messages_fts(chat_messages_fts) VALUES ('rebuild'))
+_SQLITE_FTS = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS chat_messages_fts USING fts5(
+        text, content='chat_messages', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS chat_messages_fts_insert
+    AFTER INSERT ON chat_messages BEGIN
+        INSERT INTO chat_messages_fts (rowid, text) VALUES (new.id, new.text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS chat_messages_fts_delete
+    AFTER DELETE ON chat_messages BEGIN
+        INSERT INTO chat_messages_fts (chat_messages_fts, rowid, text)
+        VALUES ('delete', old.id, old.text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS chat_messages_fts_update
+    AFTER UPDATE OF text ON chat_messages BEGIN
+        INSERT INTO chat_messages_fts (chat_messages_fts, rowid, text)
+        VALUES ('delete', old.id, old.text);
+        INSERT INTO chat_messages_fts (rowid, text) VALUES (new.id, new.text);
+    END""",
+]
+for _statement in _SQLITE_FTS:
+    event.listen(
+        ChatMessage.__table__,
+        "after_create",
+        DDL(_statement).execute_if(dialect="sqlite"),
+    )
+event.listen(
+    ChatMessage.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS chat_messages_fts").execute_if(dialect="sqlite"),
+)
@@ -0,0 +1,62 @@
+from ...database import Base
+from sqlalchemy import (
+    JSON,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    and_,
+)
+from sqlalchemy.orm import mapped_column, Mapped
+
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+def get_thai_time():
+    return datetime.now(ZoneInfo("Asia/Bangkok"))
+
+class Notification(Base):
+    """In-app notification for one user."""
+
+    __tablename__ = "notifications"
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
+    type = Column(String, nullable=False)
+    item_id: Mapped[int] = mapped_column(ForeignKey("items.id"), nullable=True)
+    data = Column(JSON, nullable=False)
+    # outbox event that caused it, so redelivered events notify once
+    event_id = Column(Integer, nullable=True, index=True)
+
+    created_at = Column(DateTime(timezone=True), default=get_thai_time)
+    read_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_notifications_user_id_id", "user_id", "id"),
+        # at most one unread price-drop alert per user and item (app.core.price_alerts)
+        Index(
+            "uq_notifications_unread_price_drop",
+            "user_id",
+            "item_id",
+            unique=True,
+            postgresql_where=and_(type == "price_drop", read_at.is_(None)),
+            sqlite_where=and_(type == "price_drop", read_at.is_(None)),
+        ),
+    )
+
+
+class NotificationCounter(Base):
+    """
+    Cached count of a user's unread notifications.
+
+    Only changed by atomic ``unread = unread + n`` statements
+    (``app.core.notifications``), in the transaction that adds or reads the
+    notifications themselves.
+    """
+
+    __tablename__ = "notification_counters"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), primary_key=True)
+    unread = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,33 @@
+from ...database import Base
+from sqlalchemy import JSON, Boolean, Column, DateTime, Index, Integer, String
+from sqlalchemy.orm import mapped_column, Mapped
+
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+def get_thai_time():
+    return datetime.now(ZoneInfo("Asia/Bangkok"))
+
+class OutboxEvent(Base):
+    """Domain event written in the same DB transaction as the change it describes."""
+
+    __tablename__ = "outbox_events"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    aggregate_type = Column(String, nullable=False)
+    aggregate_id = Column(Integer, nullable=False)
+    event_type = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), default=get_thai_time)
+    dispatched_at = Column(DateTime(timezone=True), nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(String, nullable=True)
+    # earliest retry after a failure (exponential backoff); NULL when due now
+    next_attempt_at = Column(DateTime(timezone=True), nullable=True)
+    dead = Column(Boolean, nullable=False, default=False)
+
+    __table_args__ = (
+        Index("ix_outbox_events_dispatched_at_id", "dispatched_at", "id"),
+        Index("ix_outbox_events_aggregate", "aggregate_type", "aggregate_id", "id"),
+    )
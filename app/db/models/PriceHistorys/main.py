@@ -1,5 +1,5 @@
-from ...database import Base
-from sqlalchemy import Column, Integer,  DateTime, ForeignKey, DECIMAL
+from ...database import PARTITIONING_ENABLED, Base, partition_by_range
+from sqlalchemy import Column, Integer,  DateTime, ForeignKey, DECIMAL, Index
 from sqlalchemy.orm import relationship, mapped_column, Mapped
 
 from datetime import datetime
@@ -11,7 +11,9 @@ def get_thai_time():
 class PriceHistory(Base):
     __tablename__ = "price_histories"
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    id: Mapped[int] = mapped_column(
+        Integer, primary_key=True, index=True, autoincrement=True
+    )
     price = Column(DECIMAL(precision=10, scale=2), nullable=False)
 
     item_id : Mapped[int] = mapped_column(ForeignKey("items.id"))
@@ -20,10 +22,14 @@ class PriceHistory(Base):
     item = relationship("Item", back_populates="price_histories")
     editer = relationship("User", back_populates="editPrice")
 
-    start_date = Column(DateTime(timezone=True), default=get_thai_time)
+    # partition key; part of the primary key when the table is partitioned
+    start_date = Column(
+        DateTime(timezone=True), default=get_thai_time, primary_key=PARTITIONING_ENABLED
+    )
     end_date = Column(DateTime(timezone=True), nullable=True)
 
-
-
-
-
+    __table_args__ = (
+        # price at a moment / over a range (app.core.price_history)
+        Index("ix_price_histories_item_id_start_date", "item_id", "start_date"),
+        partition_by_range("start_date"),
+    )
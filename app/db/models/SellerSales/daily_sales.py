@@ -0,0 +1,30 @@
+from ...database import Base
+from sqlalchemy import Column, Date, DECIMAL, ForeignKey, Integer, String, UniqueConstraint
+from sqlalchemy.orm import mapped_column, Mapped
+
+
+class SellerDailySales(Base):
+    """
+    Per-seller rollup of transactions by creation day, item and status.
+
+    Maintained incrementally by ``app.core.sales_rollup`` whenever a
+    transaction enters or leaves a tracked status.
+    """
+
+    __tablename__ = "seller_daily_sales"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    seller_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
+    item_id: Mapped[int] = mapped_column(ForeignKey("items.id"), nullable=False)
+    day = Column(Date, nullable=False)
+    status = Column(String, nullable=False)
+
+    transaction_count = Column(Integer, nullable=False, default=0)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(DECIMAL(precision=12, scale=2), nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "seller_id", "day", "item_id", "status", name="uq_seller_daily_sales_bucket"
+        ),
+    )
@@ -1,6 +1,6 @@
 
 from ...database import Base
-from sqlalchemy import Boolean, Column, Integer, String,  DateTime, ForeignKey, DECIMAL
+from sqlalchemy import Boolean, Column, Integer, String,  DateTime, ForeignKey, DECIMAL, Index
 from sqlalchemy.orm import relationship, mapped_column, Mapped
 
 from datetime import datetime
@@ -18,6 +18,7 @@ class Transaction(Base):
     status = Column(String, default=TransactionStatus.PENDING.value)
     agreed_price = Column(DECIMAL(precision=10, scale=2), nullable=False)
     amount = Column(Integer, nullable=False)
+    version: Mapped[int] = mapped_column(Integer, nullable=False)
 
     item_id: Mapped[int] = mapped_column(ForeignKey("items.id"))
     buyer_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
@@ -38,3 +39,9 @@ class Transaction(Base):
     seller = relationship("User", foreign_keys=[seller_id], back_populates="transactions_sold")
     buyer = relationship("User", foreign_keys=[buyer_id], back_populates="transactions_bought")
 
+    __table_args__ = (
+        Index("ix_transactions_seller_id_created_at", "seller_id", "created_at"),
+        Index("ix_transactions_buyer_id_created_at", "buyer_id", "created_at"),
+    )
+    __mapper_args__ = {"version_id_col": version}
+
@@ -2,6 +2,7 @@ from .Users.User import User
 
 from .items.item import Item
 from .items.wishItem import WishItem
+from .items.price_stats import ItemPriceStats
 
 from .PriceHistorys.main import PriceHistory
 
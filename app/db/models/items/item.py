@@ -24,6 +24,7 @@ class Item(Base):
     status = Column(String, default=ItemStatus.AVAILABLE.value)
     image_url = Column(String, nullable=True)
     search_text = Column(String, nullable=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False)
 
     created_at = Column(DateTime(timezone=True), default=get_thai_time)
     updated_at = Column(DateTime(timezone=True), default=get_thai_time, onupdate=get_thai_time)
@@ -36,7 +37,11 @@ class Item(Base):
     owner = relationship("User", back_populates="items")
     group = relationship("GroupItem", back_populates="item")
     price_histories = relationship("PriceHistory", back_populates="item")
+    # load with joinedload() when listing items, not one query per item
+    price_stats = relationship("ItemPriceStats", uselist=False, viewonly=True)
     wishItem = relationship("WishItem", back_populates="itemWish")
     transaction = relationship("Transaction", back_populates="item")
 
+    __mapper_args__ = {"version_id_col": version}
+
 
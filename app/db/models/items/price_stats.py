@@ -0,0 +1,44 @@
+from ...database import Base
+from sqlalchemy import Boolean, Column, DateTime, DECIMAL, ForeignKey, Index
+from sqlalchemy.orm import mapped_column, Mapped
+
+
+class ItemPriceStats(Base):
+    """
+    Price insights of one item, for badges on listing cards.
+
+    Maintained incrementally by ``app.core.price_history`` whenever a price
+    interval is written; ``low_30d`` is recomputed by a periodic job once
+    the interval holding it has been over for 30 days.
+    """
+
+    __tablename__ = "item_price_stats"
+
+    item_id: Mapped[int] = mapped_column(ForeignKey("items.id"), primary_key=True)
+    current_price = Column(DECIMAL(precision=10, scale=2), nullable=False)
+    previous_price = Column(DECIMAL(precision=10, scale=2), nullable=True)
+    # (current - previous) / previous in percent; negative when the price dropped
+    change_percent = Column(DECIMAL(precision=8, scale=2), nullable=True)
+    price_changed_at = Column(DateTime(timezone=True), nullable=False)
+
+    all_time_low = Column(DECIMAL(precision=10, scale=2), nullable=False)
+    low_30d = Column(DECIMAL(precision=10, scale=2), nullable=False)
+    # when low_30d may leave the window; NULL while the current price is the low
+    low_30d_expires_at = Column(DateTime(timezone=True), nullable=True, index=True)
+
+    # the latest change was a drop wishers have not been told about yet
+    # (app.core.price_alerts)
+    drop_pending = Column(Boolean, nullable=False, default=False)
+
+    __table_args__ = (
+        Index(
+            "ix_item_price_stats_drop_pending",
+            "item_id",
+            postgresql_where=drop_pending.is_(True),
+            sqlite_where=drop_pending.is_(True),
+        ),
+    )
+
+    @property
+    def is_lowest_30d(self) -> bool:
+        return self.current_price <= self.low_30d
@@ -1,5 +1,5 @@
 from ...database import Base
-from sqlalchemy import Column, Integer, String,  DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String,  DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship, mapped_column, Mapped
 
 from app.schemas.wish_item_schema import WishPrivacy
@@ -22,6 +22,11 @@ class WishItem(Base):
     wisher = relationship("User", back_populates="wishItem")
     itemWish = relationship("Item", back_populates="wishItem")
 
+    __table_args__ = (
+        # wishers of an item (price-drop alerts)
+        Index("ix_wish_items_item_id_user_id", "item_id", "user_id"),
+    )
+
 
 
 
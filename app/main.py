@@ -1,5 +1,12 @@
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
+from .core.chat_hub import chat_hub
+from .core.chat_write_buffer import chat_write_buffer
+from .core.jobs import register_consumers, register_jobs
+from .core.outbox import outbox
+from .core.partitions import partition_manager
+from .core.scheduler import scheduler
+from .core.webhooks import webhook_worker
 from .db.database import engine, Base
 from fastapi.middleware.cors import CORSMiddleware
 from .routers import router as api_router
@@ -7,7 +14,17 @@ from .routers import router as api_router
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     Base.metadata.create_all(bind=engine)
+    partition_manager.ensure()
+    await chat_hub.start()
+    await scheduler.start()
     yield
+    await scheduler.stop()
+    chat_write_buffer.close()
+    await chat_hub.stop()
+    await webhook_worker.aclose()
+
+register_jobs(scheduler)
+register_consumers(outbox)
 
 app = FastAPI(lifespan=lifespan)
 
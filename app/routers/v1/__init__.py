@@ -1,6 +1,7 @@
 from fastapi import APIRouter
 
 from . import (
+    health,
     hello,
     user_router,
     item_router,
@@ -14,10 +15,14 @@ from . import (
     transaction_router,
     chat_router,
     cart_router,
+    dashboard_router,
+    webhook_router,
+    notification_router,
 )
 
 router = APIRouter(prefix="/v1")
 router.include_router(auth_router.router)
+router.include_router(health.router)
 router.include_router(hello.router)
 router.include_router(user_router.router)
 router.include_router(item_router.router)
@@ -30,3 +35,6 @@ router.include_router(user_profile_router.router)
 router.include_router(transaction_router.router)
 router.include_router(chat_router.router)
 router.include_router(cart_router.router)
+router.include_router(dashboard_router.router)
+router.include_router(webhook_router.router)
+router.include_router(notification_router.router)
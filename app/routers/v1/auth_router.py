@@ -1,12 +1,15 @@
 """Authentication router for user login and registration."""
 
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from pydantic import BaseModel
 
 from app.db.database import get_db
 from app.db.models.Users.User import User
+from ...core.jwt_keys import get_key_ring
+from ...core.rate_limit import auth_admission
 from ...core.security import create_access_token
 from ...schemas.user_schema import UserCreate, UserResponse
 from app.db.models.Users.UserProfile import UserProfile
@@ -62,6 +65,7 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 @router.post("/token")
 async def login_for_access_token(
+    request: Request,
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     db: Session = Depends(get_db),
 ):
@@ -69,6 +73,7 @@ async def login_for_access_token(
     OAuth2 compatible token login endpoint.
 
     Args:
+        request: Incoming request (used for rate limiting)
         form_data: OAuth2 password request form with username and password
         db: Database session
 
@@ -76,7 +81,7 @@ async def login_for_access_token(
         Dictionary with access_token and token_type
 
     Raises:
-        HTTPException: If credentials are invalid
+        HTTPException: If credentials are invalid or the request is rate limited
     """
     # Validate empty credentials
     if not form_data.username or not form_data.password:
@@ -94,12 +99,15 @@ async def login_for_access_token(
             ],
         )
 
-    user_db = db.query(User).filter(User.username == form_data.username).first()
-    if not user_db:
-        raise HTTPException(status_code=400, detail="Invalid username or password")
+    with auth_admission.admit(request, form_data.username):
+        user_db = db.query(User).filter(User.username == form_data.username).first()
+        if not user_db:
+            raise HTTPException(status_code=400, detail="Invalid username or password")
 
-    if not verify_password(form_data.password, user_db.password):
-        raise HTTPException(status_code=400, detail="Invalid username or password")
+        if not await run_in_threadpool(
+            verify_password, form_data.password, user_db.password
+        ):
+            raise HTTPException(status_code=400, detail="Invalid username or password")
 
     access_token = create_access_token(
         data={
@@ -111,11 +119,12 @@ async def login_for_access_token(
 
 
 @router.post("/login")
-async def login(data: LoginRequest, db: Session = Depends(get_db)):
+async def login(request: Request, data: LoginRequest, db: Session = Depends(get_db)):
     """
     Alternative login endpoint with JSON body.
 
     Args:
+        request: Incoming request (used for rate limiting)
         data: Login request with username and password
         db: Database session
 
@@ -123,14 +132,15 @@ async def login(data: LoginRequest, db: Session = Depends(get_db)):
         Dictionary with access_token and token_type
 
     Raises:
-        HTTPException: If credentials are invalid
+        HTTPException: If credentials are invalid or the request is rate limited
     """
-    user_db = db.query(User).filter(User.username == data.username).first()
-    if not user_db:
-        raise HTTPException(status_code=400, detail="Invalid username or password")
+    with auth_admission.admit(request, data.username):
+        user_db = db.query(User).filter(User.username == data.username).first()
+        if not user_db:
+            raise HTTPException(status_code=400, detail="Invalid username or password")
 
-    if not verify_password(data.password, user_db.password):
-        raise HTTPException(status_code=400, detail="Invalid username or password")
+        if not await run_in_threadpool(verify_password, data.password, user_db.password):
+            raise HTTPException(status_code=400, detail="Invalid username or password")
 
     access_token = create_access_token(
         data={
@@ -142,11 +152,14 @@ async def login(data: LoginRequest, db: Session = Depends(get_db)):
 
 
 @router.post("/register", response_model=UserResponse)
-async def create_user(user: UserCreate, db: Session = Depends(get_db)):
+async def create_user(
+    request: Request, user: UserCreate, db: Session = Depends(get_db)
+):
     """
     Register a new user account.
 
     Args:
+        request: Incoming request (used for rate limiting)
         user: User creation data
         db: Database session
 
@@ -154,13 +167,14 @@ async def create_user(user: UserCreate, db: Session = Depends(get_db)):
         Created user object
 
     Raises:
-        HTTPException: If username already exists
+        HTTPException: If username already exists or the request is rate limited
     """
-    existing_user = db.query(User).filter(User.username == user.username).first()
-    if existing_user:
-        raise HTTPException(status_code=400, detail="User already exists")
+    with auth_admission.admit(request, user.username):
+        existing_user = db.query(User).filter(User.username == user.username).first()
+        if existing_user:
+            raise HTTPException(status_code=400, detail="User already exists")
 
-    hashed_pw = hash_password(user.password)
+        hashed_pw = await run_in_threadpool(hash_password, user.password)
 
     new_user = User(
         username=user.username,
@@ -184,3 +198,14 @@ async def create_user(user: UserCreate, db: Session = Depends(get_db)):
     db.refresh(new_user_profile)
 
     return new_user
+
+
+@router.get("/jwks.json")
+async def get_jwks():
+    """
+    Public signing keys so other services can verify tokens locally.
+
+    Returns:
+        JWK Set with the asymmetric keys currently in the key ring
+    """
+    return get_key_ring().public_jwks()
@@ -1,28 +1,124 @@
+from decimal import Decimal
+
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from app.core.cart_holds import cart_holds
+from app.core.checkout import available_units, checkout_cart
+from app.core.reservations import reservation_engine
 from app.db.database import get_db
 from app.db.models.Carts.cart import Cart
 from app.db.models.Carts.cart_item import CartItem
 from app.db.models.items.item import Item
-from app.schemas.cart_schema import CartResponse
+from app.schemas.cart_schema import (
+    CartLineView,
+    CartSellerSubtotal,
+    CartViewResponse,
+    CheckoutLineResponse,
+    CheckoutRequest,
+    CheckoutResponse,
+    CheckoutSellerGroup,
+)
 from app.schemas.cart_item_response import CartItemCreate, CartItemResponse
+from app.schemas.item_schema import ItemStatus, ItemSummary
 from ...core.security import get_current_user
 
 router = APIRouter(prefix="/cart", tags=["Cart"])
 
 
-@router.get("/", response_model=CartResponse)
+@router.get("/", response_model=CartViewResponse)
 def get_my_cart(
     db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)
 ):
-    cart = db.query(Cart).filter(Cart.user_id == current_user["id"]).first()
-    if not cart:
+    """
+    The caller's cart with each product's current price, price drift since
+    it was added, availability, and subtotals per seller and overall.
+
+    Lines and products come from one query. Availability is worked out the
+    way checkout does it (hot-item stock, other buyers' cart holds), and
+    totals add up the lines that can be bought right now, at current prices.
+    """
+    line_total = Item.price * CartItem.quantity
+    rows = db.execute(
+        select(Cart, CartItem, Item, line_total.label("line_total"))
+        .outerjoin(CartItem, CartItem.cart_id == Cart.id)
+        .outerjoin(Item, Item.id == CartItem.product_id)
+        .where(Cart.user_id == current_user["id"])
+        .order_by(Item.owner_id, CartItem.id)
+    ).all()
+
+    if not rows:
         cart = Cart(user_id=current_user["id"])
         db.add(cart)
         db.commit()
         db.refresh(cart)
-    return cart
+        return CartViewResponse(
+            id=cart.id,
+            user_id=cart.user_id,
+            created_at=cart.created_at,
+            updated_at=cart.updated_at,
+        )
+
+    cart = rows[0].Cart
+    lines = []
+    sellers: dict[int, Decimal] = {}
+    for row in rows:
+        if row.CartItem is None:
+            continue
+        stored_price = Decimal(str(row.CartItem.price))
+        available_quantity = available_units(row.Item, current_user["id"])
+        available = available_quantity >= row.CartItem.quantity
+        lines.append(
+            CartLineView(
+                id=row.CartItem.id,
+                product_id=row.CartItem.product_id,
+                quantity=row.CartItem.quantity,
+                price=row.CartItem.price,
+                product=ItemSummary.model_validate(row.Item),
+                seller_id=row.Item.owner_id,
+                current_price=row.Item.price,
+                price_drift=row.Item.price - stored_price,
+                available=available,
+                available_quantity=available_quantity,
+                line_total=row.line_total,
+                hold_expires_at=cart_holds.expires_at(
+                    row.CartItem.product_id, current_user["id"]
+                ),
+            )
+        )
+        subtotal = sellers.setdefault(row.Item.owner_id, Decimal(0))
+        if available:
+            sellers[row.Item.owner_id] = subtotal + row.line_total
+
+    return CartViewResponse(
+        id=cart.id,
+        user_id=cart.user_id,
+        created_at=cart.created_at,
+        updated_at=cart.updated_at,
+        items=lines,
+        sellers=[
+            CartSellerSubtotal(seller_id=seller_id, subtotal=subtotal)
+            for seller_id, subtotal in sellers.items()
+        ],
+        total=sum(sellers.values(), Decimal(0)),
+    )
+
+
+def _hold_line(product: Item, user_id: int, quantity: int) -> None:
+    """Hold ``quantity`` units of ``product`` for the caller (409 if it cannot)."""
+    if (
+        product.deleted_at is not None
+        or product.owner_id == user_id
+        or product.status != ItemStatus.AVAILABLE.value
+    ):
+        raise HTTPException(status_code=409, detail="Item cannot be held")
+
+    available = reservation_engine.available(product.id)
+    if available is None:
+        available = product.quantity
+    if cart_holds.hold(product.id, user_id, quantity, available) is None:
+        raise HTTPException(status_code=409, detail="Not enough stock to hold")
 
 
 @router.post("/add", response_model=CartItemResponse)
@@ -31,7 +127,13 @@ def add_to_cart(
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user),
 ):
+    """
+    Add a product to the caller's cart, or add to the quantity of its line.
 
+    With ``hold=true`` the line's whole quantity is held for the caller for
+    a few minutes (``hold_expires_at``); held units cannot be bought by
+    anyone else. 409 if other buyers' holds leave too few units.
+    """
     cart = db.query(Cart).filter(Cart.user_id == current_user["id"]).first()
     if not cart:
         cart = Cart(user_id=current_user["id"])
@@ -43,29 +145,40 @@ def add_to_cart(
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
 
-    existing_item = (
+    line = (
         db.query(CartItem)
         .filter(
             CartItem.cart_id == cart.id, CartItem.product_id == item_data.product_id
         )
         .first()
     )
-    if existing_item:
-        existing_item.quantity += item_data.quantity
+    if item_data.hold:
+        quantity = item_data.quantity + (line.quantity if line else 0)
+        _hold_line(product, current_user["id"], quantity)
+
+    if line:
+        line.quantity += item_data.quantity
+    else:
+        line = CartItem(
+            cart_id=cart.id,
+            product_id=item_data.product_id,
+            quantity=item_data.quantity,
+            price=product.price,
+        )
+        db.add(line)
+    try:
         db.commit()
-        db.refresh(existing_item)
-        return existing_item
-
-    new_item = CartItem(
-        cart_id=cart.id,
-        product_id=item_data.product_id,
-        quantity=item_data.quantity,
-        price=product.price,
-    )
-    db.add(new_item)
-    db.commit()
-    db.refresh(new_item)
-    return new_item
+    except Exception:
+        db.rollback()
+        if item_data.hold:
+            # the line was not saved: do not keep its units from other buyers
+            cart_holds.release(product.id, current_user["id"])
+        raise
+    db.refresh(line)
+
+    response = CartItemResponse.model_validate(line)
+    response.hold_expires_at = cart_holds.expires_at(product.id, current_user["id"])
+    return response
 
 
 @router.delete("/remove/{item_id}")
@@ -85,6 +198,7 @@ def remove_from_cart(
 
     db.delete(item)
     db.commit()
+    cart_holds.release(item.product_id, current_user["id"])
     return {"detail": "Item removed"}
 
 
@@ -96,6 +210,46 @@ def clear_cart(
     if not cart:
         raise HTTPException(status_code=404, detail="Cart not found")
 
+    product_ids = db.scalars(
+        select(CartItem.product_id).where(CartItem.cart_id == cart.id)
+    ).all()
     db.query(CartItem).filter(CartItem.cart_id == cart.id).delete()
     db.commit()
+    for product_id in product_ids:
+        cart_holds.release(product_id, current_user["id"])
     return {"detail": "Cart cleared"}
+
+
+@router.post("/checkout", response_model=CheckoutResponse)
+def checkout(
+    data: CheckoutRequest = CheckoutRequest(),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Buy the cart (or the given cart lines) in one go.
+
+    Creates one pending transaction per line that can be bought, grouped by
+    seller, and removes those lines from the cart. Every other line stays in
+    the cart and is reported with its reason. With ``allow_partial=false``
+    nothing is bought unless all lines can be (409 otherwise).
+    """
+    result = checkout_cart(
+        db,
+        current_user["id"],
+        cart_item_ids=data.cart_item_ids,
+        allow_partial=data.allow_partial,
+    )
+    return CheckoutResponse(
+        lines=[CheckoutLineResponse.model_validate(line) for line in result.lines],
+        sellers=[
+            CheckoutSellerGroup(
+                seller_id=seller_id,
+                transaction_ids=[line.transaction_id for line in lines],
+                total=sum(line.agreed_price for line in lines),
+            )
+            for seller_id, lines in result.by_seller().items()
+        ],
+        created=len(result.created),
+        failed=len(result.lines) - len(result.created),
+    )
@@ -1,54 +1,79 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Response,
+    WebSocket,
+    WebSocketDisconnect,
+    status,
+)
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, func, select
+from sqlalchemy.orm import Session, aliased
 
-from app.core.security import get_current_user
+from app.core.chat_hub import chat_hub
+from app.core.chat_messages import insert_messages, publish_messages
+from app.core.chat_pairs import get_or_create_direct_chat
+from app.core.chat_presence import contacts_of, presence, publish_presence
+from app.core.chat_receipts import publish_read, read_receipts
+from app.core.chat_search import highlight, search_messages
+from app.core.chat_write_buffer import chat_write_buffer
+from app.core.outbox import emit
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.core.security import authenticate_token, get_current_user
 from app.db.database import get_db
 from app.db.models.Users.User import User
 from app.db.models.Chats.chat import Chat
 from app.db.models.Chats.chat_member import ChatMember
 from app.db.models.Chats.chat_message import ChatMessage
-from app.schemas.chat_schema import ChatCreate, ChatResponse
+from app.schemas.chat_schema import (
+    ChatCreate,
+    ChatInboxEntry,
+    ChatPresence,
+    ChatReadResponse,
+    ChatReadUpdate,
+    ChatReceipt,
+    ChatResponse,
+)
 from app.schemas.chat_message_schema import (
     ChatMessageCreate,
     ChatMessageResponse,
+    ChatMessageSearchResult,
 )
 
 router = APIRouter(prefix="/chats", tags=["Chats"])
 
 
-# สร้าง Chat ใหม่
+# เปิด Chat 1:1 (ใช้ห้องเดิมถ้ามีอยู่แล้ว)
 @router.post("/", response_model=ChatResponse)
 def create_chat(
     chat_data: ChatCreate,
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user),
 ):
+    """
+    Open the 1:1 chat with ``participant_id``. Two users share one chat: if
+    they already have one it is returned instead of creating another.
+    """
+    if chat_data.participant_id == current_user["id"]:
+        raise HTTPException(status_code=400, detail="You cannot chat with yourself")
 
     user = db.get(User, chat_data.participant_id)
     if not user:
         raise HTTPException(status_code=404, detail="Participant not found")
 
-    new_chat = Chat()
-    db.add(new_chat)
-    db.commit()
-    db.refresh(new_chat)
-
-    members = [
-        ChatMember(chat_id=new_chat.id, user_id=current_user["id"]),
-        ChatMember(chat_id=new_chat.id, user_id=chat_data.participant_id),
-    ]
-
-    db.add_all(members)
-    db.commit()
-
-    return new_chat
+    chat, _ = get_or_create_direct_chat(
+        db, current_user["id"], chat_data.participant_id
+    )
+    return chat
 
 
 # ส่งข้อความ
 @router.post("/messages", response_model=ChatMessageResponse)
-def send_message(
+async def send_message(
     message_data: ChatMessageCreate,
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user),
@@ -72,26 +97,57 @@ def send_message(
     if not message_data.image_url and not message_data.text:
         raise HTTPException(status_code=400, detail="message empyty")
 
-    msg = ChatMessage(
-        chat_id=message_data.chat_id,
-        sender_id=current_user["id"],
-        text=message_data.text,
-        image_url=message_data.image_url,
-    )
-    db.add(msg)
+    row = {
+        "chat_id": message_data.chat_id,
+        "sender_id": current_user["id"],
+        "text": message_data.text,
+        "image_url": message_data.image_url,
+    }
+    if chat_write_buffer.enabled:
+        # the buffer commits in its own session; do not hold this one open
+        db.rollback()
+        try:
+            msg = await chat_write_buffer.submit_async(row)
+        except TimeoutError:
+            raise HTTPException(
+                status_code=503, detail="Message not confirmed, please retry"
+            )
+        return ChatMessageResponse.model_validate(msg)
+
+    msg = await run_in_threadpool(_store_message, db, row)
+    return ChatMessageResponse.model_validate(msg)
+
+
+def _store_message(db: Session, row: dict):
+    [msg] = insert_messages(db, [row])
+    emit(db, "chat.message_sent", msg, aggregate_id=msg.chat_id)
     db.commit()
-    db.refresh(msg)
+    publish_messages(db, [msg])
     return msg
 
 
-# ดึงข้อความทั้งหมดของ chat
+# ดึงข้อความของ chat ทีละหน้า (ใหม่สุดก่อน)
 @router.get("/{chat_id}/messages", response_model=List[ChatMessageResponse])
 def get_chat_messages(
     chat_id: int,
+    response: Response,
+    before: Optional[int] = Query(default=None, ge=1),
+    after: Optional[int] = Query(default=None, ge=1),
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user),
 ):
+    """
+    One page of a chat's messages, newest first.
 
+    Without cursors this is the latest page. ``before=<message id>`` pages
+    back through older history; ``after=<message id>`` returns the messages
+    that follow it (the oldest ones first fill the page), for catching up
+    after a reconnect. ``X-Has-More: true`` means another page exists in
+    that direction. Each page is one range scan of the (chat_id, id) index;
+    no message predates its chat, so partitions older than the chat are
+    skipped.
+    """
     chat = db.get(Chat, chat_id)
     if not chat:
         raise HTTPException(status_code=404, detail="Chat not found")
@@ -105,19 +161,260 @@ def get_chat_messages(
     if not is_member:
         raise HTTPException(status_code=403, detail="You are not a member of this chat")
 
-    return chat.messages
+    if before is not None and after is not None:
+        raise HTTPException(
+            status_code=400, detail="Use either before or after, not both"
+        )
+
+    stmt = select(ChatMessage).where(ChatMessage.chat_id == chat_id)
+    if chat.created_at is not None:
+        stmt = stmt.where(ChatMessage.send_at >= chat.created_at)
+    if after is not None:
+        stmt = stmt.where(ChatMessage.id > after).order_by(ChatMessage.id.asc())
+    else:
+        if before is not None:
+            stmt = stmt.where(ChatMessage.id < before)
+        stmt = stmt.order_by(ChatMessage.id.desc())
+    messages = db.scalars(stmt.limit(limit + 1)).all()
 
+    response.headers["X-Has-More"] = "true" if len(messages) > limit else "false"
+    messages = messages[:limit]
+    if after is not None:
+        messages.reverse()
+    return messages
 
-@router.get("/my", response_model=List[ChatResponse])
+
+@router.post("/{chat_id}/read", response_model=ChatReadResponse)
+def mark_chat_read(
+    chat_id: int,
+    data: ChatReadUpdate = ChatReadUpdate(),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Move the caller's read marker forward to ``message_id`` (default: the
+    newest message). The marker never moves back.
+
+    The members get a ``read`` event at once; the marker itself is stored
+    by a periodic bulk write (see ``app.core.chat_receipts``).
+    """
+    chat = db.get(Chat, chat_id)
+    if not chat:
+        raise HTTPException(status_code=404, detail="Chat not found")
+
+    member = (
+        db.query(ChatMember)
+        .filter(ChatMember.chat_id == chat_id, ChatMember.user_id == current_user["id"])
+        .first()
+    )
+    if not member:
+        raise HTTPException(status_code=403, detail="You are not a member of this chat")
+
+    current = max(
+        member.last_read_message_id or 0,
+        read_receipts.pending(chat_id, member.user_id) or 0,
+    )
+    message_id = data.message_id or chat.last_message_id
+    if message_id is not None and chat.last_message_id is not None:
+        message_id = min(message_id, chat.last_message_id)
+        if message_id > current:
+            read_receipts.record(chat_id, member.user_id, message_id)
+            publish_read(db, chat_id, member.user_id, message_id)
+            current = message_id
+
+    return ChatReadResponse(chat_id=chat_id, last_read_message_id=current or None)
+
+
+@router.get("/{chat_id}/receipts", response_model=List[ChatReceipt])
+def get_chat_receipts(
+    chat_id: int,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """How far each member has read the chat, including unflushed reads."""
+    markers = dict(
+        db.execute(
+            select(ChatMember.user_id, ChatMember.last_read_message_id).where(
+                ChatMember.chat_id == chat_id
+            )
+        ).all()
+    )
+    if current_user["id"] not in markers:
+        raise HTTPException(status_code=403, detail="You are not a member of this chat")
+
+    return [
+        ChatReceipt(user_id=user_id, last_read_message_id=last_read)
+        for user_id, last_read in read_receipts.overlay(chat_id, markers).items()
+    ]
+
+
+@router.get("/presence", response_model=List[ChatPresence])
+def get_presence(
+    db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)
+):
+    """Online state and last heartbeat of everyone the caller chats with."""
+    contacts = contacts_of(db, [current_user["id"]])[current_user["id"]]
+    return [presence.describe(user_id) for user_id in sorted(contacts)]
+
+
+# ค้นหาข้อความใน chat ของตัวเอง (ใหม่สุดก่อน)
+@router.get("/search", response_model=List[ChatMessageSearchResult])
+def search_chat_messages(
+    response: Response,
+    q: str = Query(min_length=1, max_length=200),
+    before: Optional[int] = Query(default=None, ge=1),
+    chat_id: Optional[int] = Query(default=None, ge=1),
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Messages containing every word of ``q``, from the caller's chats only
+    (or only ``chat_id``), newest first.
+
+    Pages like the chat history: pass the last id of a page as ``before``
+    for the next one; ``X-Has-More: true`` means another page exists. Each
+    result carries ``highlight``, the HTML-escaped text with the matched
+    words in ``<mark>`` tags. Served from the full-text index (see
+    ``app.core.chat_search``).
+    """
+    rows = search_messages(
+        db, current_user["id"], q, limit + 1, before=before, chat_id=chat_id
+    )
+
+    response.headers["X-Has-More"] = "true" if len(rows) > limit else "false"
+    return [
+        ChatMessageSearchResult(
+            **ChatMessageResponse.model_validate(message).model_dump(),
+            highlight=highlight(marked or ""),
+        )
+        for message, marked in rows[:limit]
+    ]
+
+
+@router.get("/my", response_model=List[ChatInboxEntry])
 def get_user_chats(
     db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)
 ):
+    """
+    The caller's inbox, most recently active chat first.
+
+    Each chat comes with its last message, the other member and the number
+    of messages from others after the caller's read marker, all in one
+    query: the last message is joined through ``chats.last_message_id`` and
+    the unread count is a range scan of the (chat_id, id) index.
+    """
+    # the caller's own unflushed reads must count
+    read_receipts.flush(db, user_id=current_user["id"])
+
+    me = aliased(ChatMember, name="me")
+    other = aliased(ChatMember, name="other")
+    counterpart = aliased(User, name="counterpart")
+    last_message = aliased(ChatMessage, name="last_message")
 
-    chats = (
-        db.query(Chat)
-        .join(ChatMember)
-        .filter(ChatMember.user_id == current_user["id"])
-        .order_by(Chat.updated_at.desc())
-        .all()
+    unread = (
+        select(func.count())
+        .where(
+            ChatMessage.chat_id == Chat.id,
+            ChatMessage.id > func.coalesce(me.last_read_message_id, 0),
+            ChatMessage.sender_id != me.user_id,
+        )
+        .correlate(Chat, me)
+        .scalar_subquery()
     )
-    return chats
+    rows = db.execute(
+        select(
+            Chat,
+            last_message,
+            counterpart,
+            me.last_read_message_id,
+            unread.label("unread_count"),
+        )
+        .join(me, and_(me.chat_id == Chat.id, me.user_id == current_user["id"]))
+        .outerjoin(
+            last_message,
+            and_(
+                last_message.id == Chat.last_message_id,
+                # the partition key: lets a partitioned table probe one partition
+                last_message.send_at == Chat.last_message_at,
+            ),
+        )
+        .outerjoin(
+            other, and_(other.chat_id == Chat.id, other.user_id != current_user["id"])
+        )
+        .outerjoin(counterpart, counterpart.id == other.user_id)
+        .order_by(
+            func.coalesce(Chat.last_message_at, Chat.created_at).desc(), Chat.id.desc()
+        )
+    ).all()
+
+    return [
+        ChatInboxEntry(
+            **ChatResponse.model_validate(row.Chat).model_dump(),
+            last_message=row.last_message,
+            counterpart=row.counterpart,
+            last_read_message_id=row.last_read_message_id,
+            unread_count=row.unread_count,
+        )
+        for row in rows
+    ]
+
+
+@router.websocket("/ws")
+async def chat_socket(
+    websocket: WebSocket,
+    token: Optional[str] = Query(default=None),
+    db: Session = Depends(get_db),
+):
+    """
+    Real-time channel: pushes ``{"type": "message", "data": <message>}`` for
+    every new message in the caller's chats, ``{"type": "read", ...}`` when a
+    member reads further and ``{"type": "presence", ...}`` when a contact
+    comes online or goes offline.
+
+    Authenticate with the access token as ``?token=`` (browsers cannot set
+    headers on a WebSocket) or an ``Authorization: Bearer`` header. Send
+    ``ping`` to get ``{"type": "pong"}``; pings are also the presence
+    heartbeat (at least every ``CHAT_PRESENCE_TTL_SECONDS``). A client that falls behind is
+    closed with code 1013 and should reconnect and reload its history.
+    """
+    if token is None:
+        authorization = websocket.headers.get("authorization", "")
+        scheme, _, credentials = authorization.partition(" ")
+        token = credentials if scheme.lower() == "bearer" else None
+    try:
+        if token is None:
+            raise HTTPException(status_code=401, detail="Not authenticated")
+        current_user = authenticate_token(db, token)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    finally:
+        # do not keep a connection checked out for the life of the socket
+        db.rollback()
+
+    user_id = current_user["id"]
+    await websocket.accept()
+    subscriber = await chat_hub.connect(websocket, user_id)
+    if presence.heartbeat(user_id):
+        _announce_presence(db, user_id)
+    try:
+        while True:
+            if await websocket.receive_text() == "ping":
+                # back online after the heartbeat expired
+                if presence.heartbeat(user_id):
+                    _announce_presence(db, user_id)
+                subscriber.offer({"type": "pong"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await chat_hub.disconnect(subscriber)
+        if not chat_hub.is_connected(user_id) and presence.leave(user_id):
+            _announce_presence(db, user_id)
+
+
+def _announce_presence(db: Session, user_id: int) -> None:
+    try:
+        publish_presence(db, [user_id], presence)
+    finally:
+        db.rollback()
@@ -0,0 +1,105 @@
+from datetime import date, datetime, timedelta
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.sales_rollup import TRACKED_STATUSES
+from app.core.security import get_current_user
+from app.db.database import get_db
+from app.db.models.SellerSales.daily_sales import SellerDailySales
+from app.schemas.dashboard_schema import (
+    SalesByDay,
+    SalesByItem,
+    SalesDashboardResponse,
+    SalesTotals,
+)
+from app.schemas.transaction_schema import TransactionStatus
+
+router = APIRouter(prefix="/dashboard", tags=["dashboard"])
+
+DEFAULT_RANGE_DAYS = 30
+MAX_RANGE_DAYS = 366
+
+
+@router.get("/sales", response_model=SalesDashboardResponse)
+async def get_sales_dashboard(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    item_id: Optional[int] = None,
+    status: Optional[TransactionStatus] = None,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Revenue, units and transaction counts of the caller's sales, by day,
+    item and status (ACCEPTED, PAID, CANCELLED).
+
+    Reads the ``seller_daily_sales`` rollup only. Days are transaction
+    creation days in Asia/Bangkok; the default range is the last 30 days.
+    """
+    date_to = date_to or datetime.now(ZoneInfo("Asia/Bangkok")).date()
+    date_from = date_from or date_to - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="date_from must be before date_to")
+    if (date_to - date_from).days >= MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=400, detail=f"Date range is limited to {MAX_RANGE_DAYS} days"
+        )
+    if status is not None and status.value not in TRACKED_STATUSES:
+        raise HTTPException(
+            status_code=400, detail=f"Status {status.value} is not tracked"
+        )
+
+    filters = [
+        SellerDailySales.seller_id == current_user["id"],
+        SellerDailySales.day >= date_from,
+        SellerDailySales.day <= date_to,
+    ]
+    if item_id is not None:
+        filters.append(SellerDailySales.item_id == item_id)
+    if status is not None:
+        filters.append(SellerDailySales.status == status.value)
+
+    sums = (
+        func.sum(SellerDailySales.transaction_count).label("transaction_count"),
+        func.sum(SellerDailySales.units).label("units"),
+        func.sum(SellerDailySales.revenue).label("revenue"),
+    )
+    # moves out of a bucket can leave it at zero; those rows are skipped
+    active = func.sum(SellerDailySales.transaction_count) != 0
+
+    daily_rows = db.execute(
+        select(SellerDailySales.day, SellerDailySales.status, *sums)
+        .where(*filters)
+        .group_by(SellerDailySales.day, SellerDailySales.status)
+        .having(active)
+        .order_by(SellerDailySales.day, SellerDailySales.status)
+    ).all()
+    item_rows = db.execute(
+        select(SellerDailySales.item_id, SellerDailySales.status, *sums)
+        .where(*filters)
+        .group_by(SellerDailySales.item_id, SellerDailySales.status)
+        .having(active)
+        .order_by(SellerDailySales.item_id, SellerDailySales.status)
+    ).all()
+
+    daily = [SalesByDay.model_validate(row, from_attributes=True) for row in daily_rows]
+    totals: dict[TransactionStatus, SalesTotals] = {}
+    for bucket in daily:
+        total = totals.setdefault(bucket.status, SalesTotals())
+        total.transaction_count += bucket.transaction_count
+        total.units += bucket.units
+        total.revenue += bucket.revenue
+
+    return SalesDashboardResponse(
+        date_from=date_from,
+        date_to=date_to,
+        totals=totals,
+        daily=daily,
+        items=[
+            SalesByItem.model_validate(row, from_attributes=True) for row in item_rows
+        ],
+    )
@@ -1,12 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, Response
 from typing import List
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 
 from app.db.models.Groups.groupMember import GroupMember
 from ...db.database import get_db
 from ...db.models.items.item import Item
 from ...db.models.Groups.group import Group
 from ...schemas.item_schema import ItemResponse
+from ...core.concurrency import commit_or_conflict
+from ...core.outbox import emit
 from ...core.security import get_current_user
 
 router = APIRouter(prefix="/group_item", tags=["group_item"])
@@ -19,6 +21,7 @@ async def get_items_by_group(
 ):
     items = (
         db.query(Item)
+        .options(joinedload(Item.price_stats))
         .filter(
             Item.group_id == group_id,
             Item.deleted_at.is_(None),
@@ -76,8 +79,9 @@ async def create_item_in_group(
         raise HTTPException(status_code=404, detail="item not found")
 
     item_db.group_id = group_id
+    emit(db, "item.group_changed", item_db)
 
-    db.commit()
+    commit_or_conflict(db)
     db.refresh(item_db)
     return item_db
 
@@ -112,6 +116,7 @@ async def delete_item_in_group(
 
     db_item = (
         db.query(Item)
+        .options(joinedload(Item.price_stats))
         .filter(
             Item.group_id == group_id,
             Item.id == item_id,
@@ -123,7 +128,8 @@ async def delete_item_in_group(
         raise HTTPException(status_code=404, detail="Item not found")
 
     db_item.group_id = None
-    db.commit()
+    emit(db, "item.group_changed", db_item, previous_group_id=group_id)
+    commit_or_conflict(db)
     db.refresh(db_item)
 
     return Response(status_code=204)
@@ -5,6 +5,7 @@ from zoneinfo import ZoneInfo
 from fastapi import APIRouter, HTTPException, Depends, Response
 from sqlalchemy.orm import Session
 
+from app.core.outbox import emit
 from app.core.security import get_current_user
 from app.db.database import get_db
 from app.db.models.Groups.group import Group
@@ -54,16 +55,16 @@ async def create_group(
         updated_at=datetime.now(ZoneInfo(TIMEZONE_BANGKOK)),
     )
     db.add(new_group)
-    db.commit()
-    db.refresh(new_group)
+    db.flush()
 
     owner_member = GroupMember(
         group_id=new_group.id, user_id=current_user["id"], role="owner"
     )
 
     db.add(owner_member)
+    emit(db, "group.created", new_group)
     db.commit()
-    db.refresh(owner_member)
+    db.refresh(new_group)
 
     return new_group
 
@@ -90,6 +91,7 @@ async def update_group(
     db_group.description = group.description
     db_group.image_url = group.image_url
     db_group.updated_at = datetime.now(ZoneInfo(TIMEZONE_BANGKOK))
+    emit(db, "group.updated", db_group)
 
     db.commit()
     db.refresh(db_group)
@@ -118,6 +120,7 @@ async def delete_group(
     db.query(GroupItem).filter(GroupItem.group_id == group_id).delete(
         synchronize_session=False
     )
+    emit(db, "group.deleted", db_group)
 
     db.commit()
     db.refresh(db_group)
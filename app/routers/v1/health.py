@@ -3,6 +3,17 @@
 from fastapi import APIRouter
 from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
+from app.core import price_alerts, transaction_expiry
+from app.core.cart_holds import cart_holds
+from app.core.chat_hub import chat_hub
+from app.core.chat_presence import presence
+from app.core.chat_receipts import read_receipts
+from app.core.chat_write_buffer import chat_write_buffer
+from app.core.outbox import outbox
+from app.core.rate_limit import auth_admission
+from app.core.reservations import reservation_engine
+from app.core.scheduler import scheduler
+from app.core.webhooks import webhook_worker
 from app.db.database import engine
 
 router = APIRouter()
@@ -35,3 +46,42 @@ async def health_check():
             "database": "disconnected",
             "error": f"Database error: {str(db_error)}",
         }
+
+
+@router.get("/health/auth")
+async def auth_admission_stats():
+    """
+    Counters of authentication attempts rejected by admission control.
+
+    Served with the other health metrics. Like every ``/health`` route it
+    needs no authentication: keep ``/v1/health`` off the public ingress.
+
+    Returns:
+        Dictionary with rejected counts per reason and current in-flight load
+    """
+    return auth_admission.stats()
+
+
+@router.get("/health/jobs")
+async def background_jobs():
+    """
+    Metrics of the periodic background jobs.
+
+    Returns:
+        Dictionary with per-job run statistics, cumulative expiry counters,
+        cart hold, outbox, webhook delivery, chat socket, chat write buffer,
+        read receipt, presence, price-drop alert and hot-item stock counters
+    """
+    return {
+        "jobs": scheduler.stats(),
+        "transaction_expiry": transaction_expiry.metrics,
+        "cart_holds": cart_holds.stats(),
+        "outbox": outbox.stats(),
+        "webhooks": webhook_worker.stats(),
+        "chat": chat_hub.stats(),
+        "chat_write_buffer": chat_write_buffer.stats(),
+        "chat_read_receipts": read_receipts.stats(),
+        "chat_presence": presence.stats(),
+        "price_alerts": price_alerts.metrics,
+        "stock_reservations": reservation_engine.metrics,
+    }
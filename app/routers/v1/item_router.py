@@ -2,9 +2,18 @@ from datetime import datetime
 from typing import List, Optional
 from zoneinfo import ZoneInfo
 
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
-
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Response
+from sqlalchemy.orm import Session, joinedload
+
+from app.core.concurrency import check_if_match, commit_or_conflict, set_etag
+from app.core.outbox import emit
+from app.core.price_history import (
+    as_bangkok,
+    price_at,
+    price_series,
+    record_price,
+)
+from app.core.reservations import reservation_engine
 from app.core.security import get_current_user
 from app.db.database import get_db
 from app.db.models.Groups.groupMember import GroupMember
@@ -31,7 +40,8 @@ async def list_items(
     limit: int = 10,
     db: Session = Depends(get_db),
 ):
-    q = db.query(Item)
+    # price badges come from item_price_stats in the same query
+    q = db.query(Item).options(joinedload(Item.price_stats))
 
     if search:
         q = q.filter(Item.name.ilike(f"%{search}%"))
@@ -60,11 +70,12 @@ async def get_price_item_histories(
     if not item_db:
         raise HTTPException(status_code=404, detail="Item not found")
 
+    query = db.query(PriceHistory).filter(PriceHistory.item_id == item_id)
+    if item_db.created_at is not None:
+        # no price predates its item: skips older partitions of price_histories
+        query = query.filter(PriceHistory.start_date >= item_db.created_at)
     item_histories_db = (
-        db.query(PriceHistory)
-        .filter(
-            PriceHistory.item_id == item_id, PriceHistory.user_id == current_user["id"]
-        )
+        query.order_by(PriceHistory.start_date.desc(), PriceHistory.id.desc())
         .offset(skip)
         .limit(limit)
         .all()
@@ -73,15 +84,57 @@ async def get_price_item_histories(
     return item_histories_db
 
 
+# ราคาของ item ณ เวลาที่กำหนด
+@router.get("/{item_id}/price", response_model=PriceHistoryResponse)
+async def get_item_price_at(
+    item_id: int,
+    at: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    The price interval in effect at ``at`` (default now). Naive times are
+    Bangkok time.
+    """
+    history = price_at(db, item_id, at or datetime.now(ZoneInfo("Asia/Bangkok")))
+    if history is None:
+        raise HTTPException(status_code=404, detail="No price at that time")
+    return history
+
+
+# ราคาของ item ตลอดช่วงเวลา
+@router.get("/{item_id}/prices", response_model=List[PriceHistoryResponse])
+async def get_item_price_series(
+    item_id: int,
+    start: datetime = Query(...),
+    end: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    The price intervals overlapping ``[start, end)`` (default end: now),
+    oldest first; the first one may begin before ``start``. Naive times are
+    Bangkok time.
+    """
+    end = end or datetime.now(ZoneInfo("Asia/Bangkok"))
+    if as_bangkok(start) >= as_bangkok(end):
+        raise HTTPException(status_code=400, detail="start must be before end")
+    return price_series(db, item_id, start, end)
+
+
 # get item by id (detail page)
 @router.get("/{item_id}", response_model=ItemResponse)
-async def get_item_by_id(item_id: int, db: Session = Depends(get_db)):
+async def get_item_by_id(
+    item_id: int, response: Response, db: Session = Depends(get_db)
+):
     db_item = (
-        db.query(Item).filter(Item.id == item_id, Item.deleted_at.is_(None)).first()
+        db.query(Item)
+        .options(joinedload(Item.price_stats))
+        .filter(Item.id == item_id, Item.deleted_at.is_(None))
+        .first()
     )
     if not db_item:
         raise HTTPException(status_code=404, detail="Item not found")
 
+    set_etag(response, db_item.version)
     return ItemResponse.model_validate(db_item)
 
 
@@ -94,6 +147,7 @@ async def get_items_by_user(
 ):
     items = (
         db.query(Item)
+        .options(joinedload(Item.price_stats))
         .filter(Item.owner_id == user_id, Item.deleted_at.is_(None))
         .offset(skip)
         .limit(limit)
@@ -129,18 +183,12 @@ async def create_my_item(
         group_id=None,
     )
     db.add(db_item)
-    db.commit()
-    db.refresh(db_item)
-
-    new_price_history_db = PriceHistory(
-        price=item.price,
-        item_id=db_item.id,
-        user_id=current_user["id"],
-    )
+    db.flush()
 
-    db.add(new_price_history_db)
+    record_price(db, db_item, item.price, current_user["id"], at=db_item.created_at)
+    emit(db, "item.created", db_item)
     db.commit()
-    db.refresh(new_price_history_db)
+    db.refresh(db_item)
 
     return db_item
 
@@ -149,6 +197,8 @@ async def create_my_item(
 async def update_my_item(
     item_id: int,
     item: ItemCreate,
+    response: Response,
+    if_match: Optional[str] = Header(default=None),
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user),
 ):
@@ -172,15 +222,16 @@ async def update_my_item(
             status_code=403, detail="You are not allowed to edit this item"
         )
 
-    if db_item.price != item.price:
-        new_price_history_db = PriceHistory(
-            price=item.price,
-            item_id=db_item.id,
-            user_id=current_user["id"],
+    if reservation_engine.is_hot(db_item.id):
+        raise HTTPException(
+            status_code=409, detail="Stop the flash sale before editing this item"
         )
-        db.add(new_price_history_db)
-        db.commit()
-        db.refresh(new_price_history_db)
+
+    check_if_match(if_match, db_item.version)
+
+    if db_item.price != item.price:
+        # closes the current interval; rolled back with the update on conflict
+        record_price(db, db_item, item.price, current_user["id"])
 
     db_item.name = item.name
     db_item.description = item.description
@@ -190,9 +241,12 @@ async def update_my_item(
     db_item.image_url = item.image_url
     db_item.search_text = item.search_text
     db_item.category_id = item.category_id
+    emit(db, "item.updated", db_item)
 
-    db.commit()
+    commit_or_conflict(db)
     db.refresh(db_item)
+
+    set_etag(response, db_item.version)
     return db_item
 
 
@@ -223,7 +277,8 @@ async def delete_my_item(
 
     db_item.deleted_at = datetime.now(ZoneInfo("Asia/Bangkok"))
     db_item.group_id = None
-    db.commit()
+    emit(db, "item.deleted", db_item)
+    commit_or_conflict(db)
     return {"detail": "Item deleted"}
 
 
@@ -261,6 +316,56 @@ async def change_item_status(
         raise HTTPException(status_code=404, detail="Item not found")
 
     db_item.status = data.status
-    db.commit()
+    emit(db, "item.status_changed", db_item)
+    commit_or_conflict(db)
     db.refresh(db_item)
     return db_item
+
+
+@router.post("/my/{item_id}/flash-sale")
+async def start_flash_sale(
+    item_id: int,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    db_item = (
+        db.query(Item).filter(Item.id == item_id, Item.deleted_at.is_(None)).first()
+    )
+    if not db_item:
+        raise HTTPException(status_code=404, detail="Item not found")
+
+    if db_item.owner_id != current_user["id"]:
+        raise HTTPException(
+            status_code=403, detail="You are not allowed to edit this item"
+        )
+
+    reservation_engine.activate(db_item.id, db_item.quantity)
+    return {
+        "item_id": db_item.id,
+        "flash_sale": True,
+        "available": reservation_engine.available(db_item.id),
+    }
+
+
+@router.delete("/my/{item_id}/flash-sale")
+async def stop_flash_sale(
+    item_id: int,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    db_item = db.query(Item).filter(Item.id == item_id).first()
+    if not db_item:
+        raise HTTPException(status_code=404, detail="Item not found")
+
+    if db_item.owner_id != current_user["id"]:
+        raise HTTPException(
+            status_code=403, detail="You are not allowed to edit this item"
+        )
+
+    if not reservation_engine.deactivate(db, db_item.id):
+        raise HTTPException(
+            status_code=409,
+            detail="Stock write-back failed; the item stays in flash-sale mode",
+        )
+    db.refresh(db_item)
+    return {"item_id": db_item.id, "flash_sale": False, "quantity": db_item.quantity}
@@ -0,0 +1,92 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.notifications import mark_all_read, mark_read, unread_count
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.core.security import get_current_user
+from app.db.database import get_db
+from app.db.models.Notifications.notification import Notification
+from app.schemas.notification_schema import (
+    NotificationReadAllResponse,
+    NotificationResponse,
+    NotificationUnreadCount,
+)
+
+router = APIRouter(prefix="/notifications", tags=["Notifications"])
+
+
+# กล่องแจ้งเตือนของฉัน ทีละหน้า (ใหม่สุดก่อน)
+@router.get("/", response_model=List[NotificationResponse])
+def list_my_notifications(
+    response: Response,
+    before: Optional[int] = Query(default=None, ge=1),
+    unread: bool = False,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    One page of the current user's notifications, newest first.
+
+    Pass the last id of a page as ``before`` for the next one;
+    ``X-Has-More: true`` means another page exists. Each page is one range
+    scan of the (user_id, id) index. ``unread=true`` skips read ones.
+    """
+    stmt = select(Notification).where(Notification.user_id == current_user["id"])
+    if before is not None:
+        stmt = stmt.where(Notification.id < before)
+    if unread:
+        stmt = stmt.where(Notification.read_at.is_(None))
+    notifications = db.scalars(
+        stmt.order_by(Notification.id.desc()).limit(limit + 1)
+    ).all()
+
+    response.headers["X-Has-More"] = "true" if len(notifications) > limit else "false"
+    return notifications[:limit]
+
+
+# จำนวนแจ้งเตือนที่ยังไม่อ่าน (สำหรับ badge)
+@router.get("/unread-count", response_model=NotificationUnreadCount)
+def get_unread_count(
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """The cached unread counter: one primary-key read, no COUNT."""
+    return {"unread": unread_count(db, current_user["id"])}
+
+
+# อ่านทั้งหมด
+@router.post("/read-all", response_model=NotificationReadAllResponse)
+def read_all_notifications(
+    up_to: Optional[int] = Query(default=None, ge=1),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Mark every unread notification read with one UPDATE. Pass the newest id
+    the client has shown as ``up_to`` so ones that arrived since stay unread.
+    """
+    marked = mark_all_read(db, current_user["id"], up_to=up_to)
+    db.commit()
+    return {"marked": marked, "unread": unread_count(db, current_user["id"])}
+
+
+# อ่านแจ้งเตือนเดียว
+@router.post("/{notification_id}/read", response_model=NotificationResponse)
+def read_notification(
+    notification_id: int,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """Mark one notification read; reading it again changes nothing."""
+    notification = db.get(Notification, notification_id)
+    if not notification or notification.user_id != current_user["id"]:
+        raise HTTPException(status_code=404, detail="Notification not found")
+
+    mark_read(db, current_user["id"], notification_id)
+    db.commit()
+    db.refresh(notification)
+    return notification
@@ -1,18 +1,31 @@
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 from zoneinfo import ZoneInfo
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import or_
-from sqlalchemy.orm import Session
-
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from sqlalchemy import case, select, tuple_, union
+from sqlalchemy.orm import Session, aliased
+
+from app.core.cart_holds import cart_holds
+from app.core.concurrency import check_if_match, commit_or_conflict, set_etag
+from app.core.outbox import emit
+from app.core.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    decode_cursor,
+    encode_cursor,
+)
+from app.core.reservations import reservation_engine
+from app.core.sales_rollup import record_status_change
 from app.core.security import get_current_user
+from app.core.stock import decrement_stock, increment_stock
 from app.db.database import get_db
 from app.db.models.items.item import Item
 from app.db.models.Transactions.transaction_model import Transaction
 from app.db.models.Users.User import User
-from app.schemas.item_schema import ItemStatus
+from app.schemas.item_schema import ItemStatus, ItemSummary
 from app.schemas.transaction_schema import (
+    TransactionDetailResponse,
     TransactionResponse,
     TransactionAccepted,
     TransactionAdd,
@@ -20,9 +33,16 @@ from app.schemas.transaction_schema import (
     TransactionRole,
     TransactionCreate,
 )
+from app.schemas.user_schema import UserSummary
 
 router = APIRouter(prefix="/transaction", tags=["transaction"])
 
+def _restock(db: Session, item_id: int, amount: int) -> None:
+    """Give back sold units of a hot item, on the row if the sale has ended."""
+    if not reservation_engine.restock(item_id, amount):
+        increment_stock(db, item_id, amount)
+        db.commit()
+
 
 @router.post("/", response_model=TransactionResponse)
 async def create_transaction(
@@ -43,10 +63,16 @@ async def create_transaction(
             status_code=403, detail="You cannot perform this action on your own item"
         )
 
-    if (
-        existing_item.quantity < data.amount
-        or existing_item.status != ItemStatus.AVAILABLE
-    ):
+    is_hot = reservation_engine.is_hot(existing_item.id)
+    # units in other buyers' cart holds are not for sale
+    in_carts = cart_holds.held_by_others(existing_item.id, current_user["id"])
+    stock = (
+        reservation_engine.available(existing_item.id)
+        if is_hot
+        else existing_item.quantity
+    ) - in_carts
+
+    if stock < data.amount or existing_item.status != ItemStatus.AVAILABLE:
         raise HTTPException(status_code=400, detail="Item is not available")
 
     existing_seller = db.query(User).filter(User.id == seller_id).first()
@@ -63,7 +89,32 @@ async def create_transaction(
     )
 
     db.add(new_transaction)
-    db.commit()
+    db.flush()
+    transaction_id = new_transaction.id
+    emit(db, "transaction.created", new_transaction)
+
+    if is_hot:
+        # hot items: hold stock in memory instead of contending on the item row
+        if not reservation_engine.hold(
+            existing_item.id, transaction_id, data.amount, reserved=in_carts
+        ):
+            db.rollback()
+            if not reservation_engine.is_hot(existing_item.id):
+                # the flash sale was stopped since the check; a retry is
+                # served from the items row
+                raise HTTPException(
+                    status_code=409, detail="Flash sale just ended, try again"
+                )
+            raise HTTPException(status_code=400, detail="Item is not available")
+
+    try:
+        db.commit()
+    except Exception:
+        db.rollback()
+        if is_hot:
+            # the transaction does not exist: give its units back to the pool
+            reservation_engine.release(data.item_id, transaction_id)
+        raise
     db.refresh(new_transaction)
 
     return new_transaction
@@ -73,34 +124,44 @@ async def create_transaction(
 async def buyer_accept(
     transaction_id: int,
     accepted: TransactionAccepted,
+    response: Response,
+    if_match: Optional[str] = Header(default=None),
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user),
 ):
-    return update_transaction_accept(
+    transaction = update_transaction_accept(
         db=db,
         transaction_id=transaction_id,
         current_user=current_user,
         role=TransactionRole.buyer.value,
         accepter=accepted.accepter,
         accept_at=accepted.accept_at,
+        if_match=if_match,
     )
+    set_etag(response, transaction.version)
+    return transaction
 
 
 @router.patch("/seller/acception/{transaction_id}", response_model=TransactionResponse)
 async def seller_accept(
     transaction_id: int,
     accepted: TransactionAccepted,
+    response: Response,
+    if_match: Optional[str] = Header(default=None),
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user),
 ):
-    return update_transaction_accept(
+    transaction = update_transaction_accept(
         db=db,
         transaction_id=transaction_id,
         current_user=current_user,
         role=TransactionRole.seller.value,
         accepter=accepted.accepter,
         accept_at=accepted.accept_at,
+        if_match=if_match,
     )
+    set_etag(response, transaction.version)
+    return transaction
 
 
 @router.patch(
@@ -136,20 +197,32 @@ def cancel_transaction(
     # if transaction.buyer_accept and transaction.seller_accept:
     #     raise HTTPException(status_code=400, detail="Transaction already accepted by both parties, cannot cancel")
 
-    if transaction.status == TransactionStatus.ACCEPTED:
-        item_db = db.query(Item).filter(Item.id == transaction.item_id).first()
-        if item_db:
-            item_db.quantity += transaction.amount
+    item_id, amount = transaction.item_id, transaction.amount
+    was_accepted = transaction.status == TransactionStatus.ACCEPTED
+    is_hot = reservation_engine.is_hot(item_id)
+    if was_accepted and not is_hot:
+        increment_stock(db, item_id, amount)
 
     # ยกเลิก transaction
+    record_status_change(
+        db, transaction, transaction.status, TransactionStatus.CANCELLED
+    )
     transaction.status = TransactionStatus.CANCELLED
     transaction.cancelled_at = datetime.now(
         ZoneInfo("Asia/Bangkok")
     )  # ถ้ามี column สำหรับเวลา cancel
-
-    db.commit()
+    emit(db, "transaction.cancelled", transaction)
+
+    # the version check makes a concurrent double cancel fail instead of
+    # returning the stock twice; in-memory stock of hot items is only given
+    # back once the cancellation is committed, so the loser returns nothing
+    commit_or_conflict(db)
+    if is_hot:
+        if was_accepted:
+            _restock(db, item_id, amount)
+        else:
+            reservation_engine.release(item_id, transaction_id)
     db.refresh(transaction)
-    db.refresh(item_db)
     return transaction
 
 
@@ -170,10 +243,22 @@ async def paid_transaction(
             status_code=403, detail="You are not buyer of this transaction"
         )
 
+    # only an accepted transaction can be paid; checked before the rollup
+    # books its revenue
+    if transaction.status != TransactionStatus.ACCEPTED:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Transaction cannot be paid because it is {transaction.status}",
+        )
+
+    record_status_change(db, transaction, transaction.status, TransactionStatus.PAID)
     transaction.status = TransactionStatus.PAID
     transaction.paid_at = datetime.now(ZoneInfo("Asia/Bangkok"))
+    emit(db, "transaction.paid", transaction)
 
-    db.commit()
+    # a concurrent cancel or second payment bumps the version: 409, not a
+    # second status change
+    commit_or_conflict(db)
     db.refresh(transaction)
 
     return transaction
@@ -183,6 +268,8 @@ async def paid_transaction(
 async def change_transaction_detail(
     transaction_id: int,
     data: TransactionCreate,
+    response: Response,
+    if_match: Optional[str] = Header(default=None),
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user),
 ):
@@ -210,31 +297,107 @@ async def change_transaction_detail(
             detail=f"Transaction cannot be modified because it is {existing_transaction.status}",
         )
 
+    check_if_match(if_match, existing_transaction.version)
+
     existing_transaction.agreed_price = data.agreed_price
     existing_transaction.amount = data.amount
+    emit(db, "transaction.updated", existing_transaction)
 
-    db.commit()
+    commit_or_conflict(db)
     db.refresh(existing_transaction)
 
+    set_etag(response, existing_transaction.version)
     return existing_transaction
 
 
-@router.get("/my", response_model=List[TransactionResponse])
+@router.get("/my", response_model=List[TransactionDetailResponse])
 async def get_my_transaction(
-    db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)
+    response: Response,
+    role: Optional[TransactionRole] = None,
+    status: Optional[TransactionStatus] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    include: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
 ):
-    transactions = (
-        db.query(Transaction)
-        .filter(
-            or_(
-                Transaction.seller_id == current_user["id"],
-                Transaction.buyer_id == current_user["id"],
-            )
+    """
+    List the caller's transactions, newest first, one page at a time.
+
+    ``role`` limits the list to purchases or sales, ``status`` to one status.
+    Pass the ``X-Next-Cursor`` header of a page as ``cursor`` to get the next
+    one. ``include=item,counterpart`` embeds item and counterpart summaries,
+    loaded in the same query as the page.
+    """
+    user_id = current_user["id"]
+    includes = {part.strip() for part in (include or "").split(",") if part.strip()}
+    unknown = includes - {"item", "counterpart"}
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown include: {', '.join(sorted(unknown))}"
+        )
+
+    after = None
+    if cursor is not None:
+        try:
+            created_at, last_id = decode_cursor(cursor)
+            after = (datetime.fromisoformat(created_at), int(last_id))
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    # one index-friendly branch per role instead of an OR over both columns
+    columns = {
+        TransactionRole.buyer: Transaction.buyer_id,
+        TransactionRole.seller: Transaction.seller_id,
+    }
+    branches = []
+    for branch_role, column in columns.items():
+        if role is not None and role != branch_role:
+            continue
+        branch = select(Transaction.id, Transaction.created_at).where(column == user_id)
+        if status is not None:
+            branch = branch.where(Transaction.status == status.value)
+        if after is not None:
+            branch = branch.where(tuple_(Transaction.created_at, Transaction.id) < after)
+        branch = branch.order_by(
+            Transaction.created_at.desc(), Transaction.id.desc()
+        ).limit(limit + 1)
+        branches.append(select(branch.subquery()))
+    page_ids = union(*branches).subquery() if len(branches) > 1 else branches[0].subquery()
+
+    stmt = select(Transaction).join(page_ids, page_ids.c.id == Transaction.id)
+    if "item" in includes:
+        stmt = stmt.outerjoin(Item, Item.id == Transaction.item_id).add_columns(Item)
+    if "counterpart" in includes:
+        counterpart = aliased(User, name="counterpart")
+        counterpart_id = case(
+            (Transaction.seller_id == user_id, Transaction.buyer_id),
+            else_=Transaction.seller_id,
         )
-        .all()
+        stmt = stmt.outerjoin(counterpart, counterpart.id == counterpart_id).add_columns(
+            counterpart
+        )
+    stmt = stmt.order_by(Transaction.created_at.desc(), Transaction.id.desc()).limit(
+        limit + 1
     )
+    rows = db.execute(stmt).all()
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1][0]
+        response.headers["X-Next-Cursor"] = encode_cursor(last.created_at, last.id)
 
-    return transactions
+    results = []
+    for row in rows:
+        result = TransactionDetailResponse.model_validate(
+            TransactionResponse.model_validate(row.Transaction).model_dump()
+        )
+        if "item" in includes and row.Item is not None:
+            result.item = ItemSummary.model_validate(row.Item)
+        if "counterpart" in includes and row.counterpart is not None:
+            result.counterpart = UserSummary.model_validate(row.counterpart)
+        results.append(result)
+    return results
 
 
 def update_transaction_accept(
@@ -244,8 +407,8 @@ def update_transaction_accept(
     role: TransactionRole,
     accepter: bool,
     accept_at: datetime,
+    if_match: Optional[str] = None,
 ):
-
     transaction = db.query(Transaction).filter(Transaction.id == transaction_id).first()
     if not transaction:
         raise HTTPException(status_code=404, detail="Transaction not found")
@@ -266,6 +429,8 @@ def update_transaction_accept(
             detail=f"Transaction cannot be modified because it is {transaction.status}",
         )
 
+    check_if_match(if_match, transaction.version)
+
     if role == TransactionRole.buyer:
         transaction.buyer_accept = accepter
         transaction.buyer_accept_at = accept_at
@@ -275,25 +440,51 @@ def update_transaction_accept(
     else:
         raise HTTPException(status_code=400, detail=f"Invalid role: {role}")
 
+    item_id, amount = transaction.item_id, transaction.amount
+    sold_in_memory = False
     if transaction.buyer_accept and transaction.seller_accept:
-        transaction.status = TransactionStatus.ACCEPTED
-        item_db = db.query(Item).filter(Item.id == transaction.item_id).first()
-
-        if not item_db:
-            raise HTTPException(status_code=404, detail="Item not found")
-
-        if item_db.quantity >= transaction.amount:
-            item_db.quantity -= transaction.amount
-            db.commit()
-            db.refresh(item_db)
+        if reservation_engine.is_hot(item_id):
+            # hot items: stock is confirmed in memory and written back in batches
+            sold = sold_in_memory = reservation_engine.confirm(
+                item_id, transaction.id, amount
+            )
+            if not sold and not reservation_engine.is_hot(item_id):
+                db.rollback()
+                raise HTTPException(
+                    status_code=409, detail="Flash sale just ended, try again"
+                )
         else:
+            sold = decrement_stock(db, item_id, amount) is not None
+
+        if not sold:
+            db.rollback()
+            remaining = reservation_engine.available(item_id)
+            if remaining is None:
+                item_db = db.get(Item, item_id)
+                if not item_db:
+                    raise HTTPException(status_code=404, detail="Item not found")
+                remaining = item_db.quantity
             raise HTTPException(
                 status_code=400,
-                detail=f"Item is not available ,remaining :{item_db.quantity}",
+                detail=f"Item is not available ,remaining :{remaining}",
             )
+        record_status_change(
+            db, transaction, transaction.status, TransactionStatus.ACCEPTED
+        )
+        transaction.status = TransactionStatus.ACCEPTED
+        event_type = "transaction.accepted"
     else:
         transaction.status = TransactionStatus.PENDING.value
-
-    db.commit()
+        event_type = "transaction.updated"
+    emit(db, event_type, transaction)
+
+    # buyer and seller accepting at the same time: the version check lets only
+    # one of them win, the other gets a 409 and retries on the fresh row
+    try:
+        commit_or_conflict(db)
+    except HTTPException:
+        if sold_in_memory:
+            _restock(db, item_id, amount)
+        raise
     db.refresh(transaction)
     return transaction
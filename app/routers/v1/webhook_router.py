@@ -0,0 +1,134 @@
+import secrets
+from datetime import datetime
+from typing import List
+from zoneinfo import ZoneInfo
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app.core.security import get_current_user
+from app.core.webhooks import fail_pending_deliveries, url_problem
+from app.db.database import get_db
+from app.db.models.Webhooks.webhook import WebhookDelivery, WebhookSubscription
+from app.schemas.webhook_schema import (
+    WebhookDeliveryResponse,
+    WebhookSubscriptionCreate,
+    WebhookSubscriptionCreated,
+    WebhookSubscriptionResponse,
+)
+
+router = APIRouter(prefix="/webhooks", tags=["webhooks"])
+
+MAX_SUBSCRIPTIONS_PER_USER = 10
+
+
+def get_my_subscription(db: Session, subscription_id: int, user_id: int):
+    subscription = (
+        db.query(WebhookSubscription)
+        .filter(
+            WebhookSubscription.id == subscription_id,
+            WebhookSubscription.user_id == user_id,
+            WebhookSubscription.deleted_at.is_(None),
+        )
+        .first()
+    )
+    if not subscription:
+        raise HTTPException(status_code=404, detail="Webhook not found")
+    return subscription
+
+
+@router.post("/", response_model=WebhookSubscriptionCreated)
+async def create_webhook(
+    data: WebhookSubscriptionCreate,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Subscribe a URL to transaction events where the caller is seller or buyer.
+
+    Every request carries ``X-Webhook-Signature: sha256=<hex>``, an
+    HMAC-SHA256 of ``"<X-Webhook-Timestamp>.<raw body>"`` keyed with the
+    returned ``secret``. The secret is only shown in this response.
+
+    The URL must be https (outside development) and its host must resolve
+    to public addresses only.
+    """
+    problem = await run_in_threadpool(url_problem, str(data.url))
+    if problem is not None:
+        raise HTTPException(status_code=400, detail=problem)
+
+    count = (
+        db.query(WebhookSubscription)
+        .filter(
+            WebhookSubscription.user_id == current_user["id"],
+            WebhookSubscription.deleted_at.is_(None),
+        )
+        .count()
+    )
+    if count >= MAX_SUBSCRIPTIONS_PER_USER:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_SUBSCRIPTIONS_PER_USER} webhooks per user",
+        )
+
+    subscription = WebhookSubscription(
+        user_id=current_user["id"],
+        url=str(data.url),
+        secret=f"whsec_{secrets.token_urlsafe(32)}",
+        events=sorted({event.value for event in data.events}),
+        is_active=True,
+    )
+    db.add(subscription)
+    db.commit()
+    db.refresh(subscription)
+    return subscription
+
+
+@router.get("/", response_model=List[WebhookSubscriptionResponse])
+async def get_my_webhooks(
+    db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)
+):
+    return (
+        db.query(WebhookSubscription)
+        .filter(
+            WebhookSubscription.user_id == current_user["id"],
+            WebhookSubscription.deleted_at.is_(None),
+        )
+        .order_by(WebhookSubscription.id)
+        .all()
+    )
+
+
+@router.delete("/{subscription_id}")
+async def delete_webhook(
+    subscription_id: int,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    subscription = get_my_subscription(db, subscription_id, current_user["id"])
+    subscription.is_active = False
+    subscription.deleted_at = datetime.now(ZoneInfo("Asia/Bangkok"))
+    fail_pending_deliveries(db, subscription.id, "Webhook deleted")
+    db.commit()
+    return Response(status_code=204)
+
+
+@router.get(
+    "/{subscription_id}/deliveries", response_model=List[WebhookDeliveryResponse]
+)
+async def get_webhook_deliveries(
+    subscription_id: int,
+    limit: int = Query(default=50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """Most recent deliveries of a webhook with their retry state."""
+    get_my_subscription(db, subscription_id, current_user["id"])
+    return (
+        db.query(WebhookDelivery)
+        .filter(WebhookDelivery.subscription_id == subscription_id)
+        .order_by(WebhookDelivery.id.desc())
+        .limit(limit)
+        .all()
+    )
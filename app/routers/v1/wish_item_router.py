@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException, Depends
 from typing import List
 
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 
 from app.db.models.items.item import Item
 from app.schemas.item_schema import ItemResponse
@@ -97,6 +97,7 @@ async def get_my_wish_list(
 ):
     items = (
         db.query(Item)
+        .options(joinedload(Item.price_stats))
         .join(WishItem, Item.id == WishItem.item_id)
         .filter(WishItem.user_id == current_user["id"])
         .offset(skip)
@@ -1,3 +1,6 @@
+from datetime import datetime
+from typing import Optional
+
 from pydantic import BaseModel, ConfigDict
 
 
@@ -7,11 +10,12 @@ class CartItemBase(BaseModel):
 
 
 class CartItemCreate(CartItemBase):
-    pass
+    hold: bool = False  # hold the line's units for a few minutes
 
 
 class CartItemResponse(CartItemBase):
     id: int
     price: float
+    hold_expires_at: Optional[datetime] = None
 
     model_config = ConfigDict(from_attributes=True)
@@ -1,9 +1,12 @@
 from datetime import datetime
+from decimal import Decimal
+from enum import Enum
 from typing import List, Optional
 
 from pydantic import BaseModel, ConfigDict
 
 from .cart_item_response import CartItemResponse
+from .item_schema import ItemSummary
 
 
 class CartBase(BaseModel):
@@ -22,3 +25,65 @@ class CartResponse(CartBase):
     items: List[CartItemResponse] = []
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class CartLineView(CartItemResponse):
+    """Cart line with the product as it is now."""
+
+    product: ItemSummary
+    seller_id: int
+    current_price: Decimal
+    price_drift: Decimal
+    available: bool
+    available_quantity: int
+    line_total: Decimal
+
+
+class CartSellerSubtotal(BaseModel):
+    seller_id: int
+    subtotal: Decimal
+
+
+class CartViewResponse(CartResponse):
+    items: List[CartLineView] = []
+    sellers: List[CartSellerSubtotal] = []
+    total: Decimal = Decimal("0")
+
+
+class CheckoutLineStatus(str, Enum):
+    CREATED = "created"
+    NOT_FOUND = "not_found"
+    OWN_ITEM = "own_item"
+    UNAVAILABLE = "unavailable"
+    INSUFFICIENT_STOCK = "insufficient_stock"
+
+
+class CheckoutRequest(BaseModel):
+    cart_item_ids: Optional[List[int]] = None
+    allow_partial: bool = True
+
+
+class CheckoutLineResponse(BaseModel):
+    cart_item_id: int
+    product_id: int
+    quantity: int
+    status: CheckoutLineStatus
+    seller_id: Optional[int] = None
+    available: Optional[int] = None
+    transaction_id: Optional[int] = None
+    agreed_price: Optional[Decimal] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class CheckoutSellerGroup(BaseModel):
+    seller_id: int
+    transaction_ids: List[int]
+    total: Decimal
+
+
+class CheckoutResponse(BaseModel):
+    lines: List[CheckoutLineResponse]
+    sellers: List[CheckoutSellerGroup]
+    created: int
+    failed: int
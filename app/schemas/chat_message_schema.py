@@ -19,3 +19,8 @@ class ChatMessageResponse(ChatMessageBase):
     send_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class ChatMessageSearchResult(ChatMessageResponse):
+    # HTML-escaped text with the matched words in <mark>...</mark>
+    highlight: str
@@ -1,7 +1,11 @@
 from datetime import datetime
+from typing import Optional
 
 from pydantic import BaseModel, ConfigDict
 
+from .chat_message_schema import ChatMessageResponse
+from .user_schema import UserSummary
+
 
 class ChatBase(BaseModel):
     pass
@@ -15,5 +19,38 @@ class ChatResponse(ChatBase):
     id: int
     created_at: datetime
     updated_at: datetime
+    last_message_id: Optional[int] = None
+    last_message_at: Optional[datetime] = None
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class ChatInboxEntry(ChatResponse):
+    """Chat as listed in the caller's inbox."""
+
+    last_message: Optional[ChatMessageResponse] = None
+    counterpart: Optional[UserSummary] = None
+    last_read_message_id: Optional[int] = None
+    unread_count: int = 0
+
+
+class ChatReadUpdate(BaseModel):
+    message_id: Optional[int] = None  # default: the chat's newest message
+
+
+class ChatReadResponse(BaseModel):
+    chat_id: int
+    last_read_message_id: Optional[int]
+
+
+class ChatReceipt(BaseModel):
+    """How far a member has read a chat ("seen")."""
+
+    user_id: int
+    last_read_message_id: Optional[int]
+
+
+class ChatPresence(BaseModel):
+    user_id: int
+    online: bool
+    last_seen_at: Optional[datetime] = None
@@ -0,0 +1,30 @@
+from datetime import date
+from decimal import Decimal
+
+from pydantic import BaseModel
+
+from .transaction_schema import TransactionStatus
+
+
+class SalesTotals(BaseModel):
+    transaction_count: int = 0
+    units: int = 0
+    revenue: Decimal = Decimal("0")
+
+
+class SalesByDay(SalesTotals):
+    day: date
+    status: TransactionStatus
+
+
+class SalesByItem(SalesTotals):
+    item_id: int
+    status: TransactionStatus
+
+
+class SalesDashboardResponse(BaseModel):
+    date_from: date
+    date_to: date
+    totals: dict[TransactionStatus, SalesTotals]
+    daily: list[SalesByDay]
+    items: list[SalesByItem]
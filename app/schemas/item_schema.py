@@ -42,6 +42,19 @@ class ItemStatusUpdate(BaseModel):
     status: ItemStatus
 
 
+class ItemPriceStatsResponse(BaseModel):
+    """Price insights of an item (listing card badges)."""
+
+    previous_price: Optional[Decimal] = None
+    change_percent: Optional[Decimal] = None  # negative when the price dropped
+    price_changed_at: datetime
+    all_time_low: Decimal
+    low_30d: Decimal
+    is_lowest_30d: bool
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 class ItemResponse(ItemBase):
     id: int
     owner_id: int = Field(..., gt=0)
@@ -49,5 +62,20 @@ class ItemResponse(ItemBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
     deleted_at: Optional[datetime] = None
+    version: int = 1
+    price_stats: Optional[ItemPriceStatsResponse] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ItemSummary(BaseModel):
+    """Compact item fields embedded in other responses."""
+
+    id: int
+    name: str
+    price: Decimal
+    quantity: int
+    status: ItemStatus
+    image_url: Optional[str] = None
 
     model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,24 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict
+
+
+class NotificationResponse(BaseModel):
+    id: int
+    type: str
+    item_id: Optional[int]
+    data: dict
+    created_at: datetime
+    read_at: Optional[datetime]
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class NotificationUnreadCount(BaseModel):
+    unread: int
+
+
+class NotificationReadAllResponse(BaseModel):
+    marked: int
+    unread: int
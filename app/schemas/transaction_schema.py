@@ -3,6 +3,9 @@ from datetime import datetime
 from typing import Optional
 from enum import Enum
 
+from .item_schema import ItemSummary
+from .user_schema import UserSummary
+
 
 class TransactionStatus(str, Enum):
     PENDING = "pending"
@@ -52,5 +55,13 @@ class TransactionResponse(TransactionBase):
     seller_accept: bool
     buyer_accept_at: Optional[datetime]
     seller_accept_at: Optional[datetime]
+    version: int = 1
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class TransactionDetailResponse(TransactionResponse):
+    """Transaction with optional embedded item and counterpart summaries."""
+
+    item: Optional[ItemSummary] = None
+    counterpart: Optional[UserSummary] = None
@@ -21,3 +21,11 @@ class UserResponse(UserBase):
     last_login: datetime | None = None
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class UserSummary(BaseModel):
+    id: int
+    username: str
+    full_name: str
+
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,56 @@
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+
+from pydantic import AnyHttpUrl, BaseModel, ConfigDict, Field
+
+
+class WebhookEvent(str, Enum):
+    TRANSACTION_CREATED = "transaction.created"
+    TRANSACTION_ACCEPTED = "transaction.accepted"
+    TRANSACTION_CANCELLED = "transaction.cancelled"
+    TRANSACTION_PAID = "transaction.paid"
+
+
+class WebhookDeliveryStatus(str, Enum):
+    PENDING = "pending"
+    DELIVERED = "delivered"
+    FAILED = "failed"
+
+
+class WebhookSubscriptionCreate(BaseModel):
+    url: AnyHttpUrl
+    events: list[WebhookEvent] = Field(
+        default_factory=lambda: list(WebhookEvent), min_length=1
+    )
+
+
+class WebhookSubscriptionResponse(BaseModel):
+    id: int
+    url: str
+    events: list[WebhookEvent]
+    is_active: bool
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class WebhookSubscriptionCreated(WebhookSubscriptionResponse):
+    """Returned once on creation; the secret is not shown again."""
+
+    secret: str
+
+
+class WebhookDeliveryResponse(BaseModel):
+    id: int
+    event_id: int
+    event_type: WebhookEvent
+    status: WebhookDeliveryStatus
+    attempts: int
+    next_attempt_at: Optional[datetime] = None
+    last_status_code: Optional[int] = None
+    last_error: Optional[str] = None
+    created_at: datetime
+    delivered_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
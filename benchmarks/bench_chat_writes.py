@@ -0,0 +1,139 @@
+"""
+Load benchmark: chat messages stored per second.
+
+Compares the direct path (one INSERT and one commit per message) with the
+group-commit write buffer (messages arriving within a few milliseconds share
+one multi-row INSERT and one commit).
+
+Usage:
+    python -m benchmarks.bench_chat_writes [--messages 5000] [--workers 32]
+        [--chats 50] [--max-delay-ms 5] [--database-url sqlite:////tmp/bench.db]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, func, select  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.core.chat_write_buffer import ChatWriteBuffer  # noqa: E402
+from app.db.database import Base  # noqa: E402
+from app.db.models.Chats.chat import Chat  # noqa: E402
+from app.db.models.Chats.chat_member import ChatMember  # noqa: E402
+from app.db.models.Chats.chat_message import ChatMessage  # noqa: E402
+from app.db.models.Users.User import User  # noqa: E402
+from app.routers.v1 import chat_router  # noqa: E402
+from app.schemas.chat_message_schema import ChatMessageCreate  # noqa: E402
+
+
+def seed(SessionLocal, chats: int) -> list[tuple[int, int]]:
+    """Create ``chats`` 1:1 chats; returns (chat_id, sender_id) per chat."""
+    with SessionLocal() as db:
+        users = [
+            User(username=f"user{n}", full_name="U", email=f"u{n}@x.io", password="x")
+            for n in range(chats * 2)
+        ]
+        db.add_all(users)
+        db.commit()
+
+        pairs = []
+        for n in range(chats):
+            low, high = users[2 * n], users[2 * n + 1]
+            chat = Chat(user_low_id=low.id, user_high_id=high.id)
+            db.add(chat)
+            db.flush()
+            db.add_all(
+                [
+                    ChatMember(chat_id=chat.id, user_id=low.id),
+                    ChatMember(chat_id=chat.id, user_id=high.id),
+                ]
+            )
+            pairs.append((chat.id, low.id))
+        db.commit()
+        return pairs
+
+
+def run(
+    database_url: str,
+    messages: int,
+    workers: int,
+    chats: int,
+    max_delay_ms: float,
+    buffered: bool,
+) -> tuple[float, dict]:
+    connect_args = {"timeout": 60} if database_url.startswith("sqlite") else {}
+    engine = create_engine(database_url, connect_args=connect_args)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    pairs = seed(SessionLocal, chats)
+
+    buffer = ChatWriteBuffer(
+        session_factory=SessionLocal,
+        enabled=buffered,
+        max_delay_ms=max_delay_ms,
+        ack_timeout=60,
+    )
+    chat_router.chat_write_buffer = buffer
+
+    def send(n: int) -> int:
+        chat_id, sender_id = pairs[n % len(pairs)]
+        with SessionLocal() as db:
+            return chat_router.send_message(
+                message_data=ChatMessageCreate(
+                    chat_id=chat_id, text=f"message {n}", image_url=None
+                ),
+                db=db,
+                current_user={"id": sender_id},
+            ).id
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        sent = len(set(pool.map(send, range(messages))))
+    elapsed = time.perf_counter() - started
+    buffer.close()
+
+    with SessionLocal() as db:
+        stored = db.scalar(select(func.count()).select_from(ChatMessage))
+    engine.dispose()
+
+    assert sent == stored == messages, f"{sent} acknowledged, {stored} stored"
+    return messages / elapsed, buffer.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--chats", type=int, default=50)
+    parser.add_argument("--max-delay-ms", type=float, default=5.0)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    database_url = args.database_url
+    if database_url is None:
+        path = os.path.join(tempfile.mkdtemp(), "bench_chat_writes.db")
+        database_url = f"sqlite:///{path}"
+
+    for label, buffered in (("commit per message", False), ("write buffer", True)):
+        rate, stats = run(
+            database_url,
+            args.messages,
+            args.workers,
+            args.chats,
+            args.max_delay_ms,
+            buffered,
+        )
+        line = f"{label:<20} {rate:10.1f} messages/s"
+        if buffered:
+            line += f"  ({stats['batches']} commits, avg batch {stats['avg_batch']:.1f})"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
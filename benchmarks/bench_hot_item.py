@@ -0,0 +1,151 @@
+"""
+Load benchmark: accepted transactions per second on a single hot item.
+
+Compares the direct path (one conditional UPDATE on the item row per
+acceptance) with the flash-sale reservation engine (in-memory confirmation,
+batched write-back).
+
+Usage:
+    python -m benchmarks.bench_hot_item [--transactions 2000] [--workers 16]
+        [--database-url sqlite:////tmp/bench.db]
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from decimal import Decimal
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from fastapi import HTTPException  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.core.reservations import StockReservationEngine  # noqa: E402
+from app.db.database import Base  # noqa: E402
+from app.db.models.Categorys.main import Category  # noqa: E402
+from app.db.models.items.item import Item  # noqa: E402
+from app.db.models.Transactions.transaction_model import Transaction  # noqa: E402
+from app.db.models.Users.User import User  # noqa: E402
+from app.routers.v1 import transaction_router  # noqa: E402
+from app.schemas.transaction_schema import TransactionRole  # noqa: E402
+
+
+def seed(SessionLocal, transactions: int) -> tuple[int, int, list[int]]:
+    """Create one item with enough stock and ``transactions`` pending rows."""
+    with SessionLocal() as db:
+        seller = User(username="seller", full_name="S", email="s@x.io", password="x")
+        buyer = User(username="buyer", full_name="B", email="b@x.io", password="x")
+        category = Category(name="Bench", slug="bench")
+        db.add_all([seller, buyer, category])
+        db.commit()
+
+        item = Item(
+            name="Hot Item",
+            price=Decimal("10.00"),
+            quantity=transactions,
+            status="available",
+            owner_id=seller.id,
+            category_id=category.id,
+        )
+        db.add(item)
+        db.commit()
+
+        rows = [
+            Transaction(
+                item_id=item.id,
+                seller_id=seller.id,
+                buyer_id=buyer.id,
+                status="pending",
+                agreed_price=Decimal("10.00"),
+                amount=1,
+                seller_accept=True,
+            )
+            for _ in range(transactions)
+        ]
+        db.add_all(rows)
+        db.commit()
+        return item.id, buyer.id, [row.id for row in rows]
+
+
+def run(database_url: str, transactions: int, workers: int, hot: bool) -> float:
+    connect_args = {"timeout": 60} if database_url.startswith("sqlite") else {}
+    engine = create_engine(database_url, connect_args=connect_args)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    item_id, buyer_id, transaction_ids = seed(SessionLocal, transactions)
+
+    reservations = StockReservationEngine(session_factory=SessionLocal)
+    transaction_router.reservation_engine = reservations
+    if hot:
+        reservations.activate(item_id, transactions)
+
+    stop = threading.Event()
+
+    def flusher():
+        while not stop.wait(0.05):
+            with SessionLocal() as db:
+                reservations.flush(db)
+
+    def accept(transaction_id: int) -> bool:
+        with SessionLocal() as db:
+            try:
+                transaction_router.update_transaction_accept(
+                    db=db,
+                    transaction_id=transaction_id,
+                    current_user={"id": buyer_id},
+                    role=TransactionRole.buyer.value,
+                    accepter=True,
+                    accept_at=datetime.now(),
+                )
+                return True
+            except HTTPException:
+                return False
+
+    flush_thread = threading.Thread(target=flusher, daemon=True)
+    if hot:
+        flush_thread.start()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        accepted = sum(pool.map(accept, transaction_ids))
+    if hot:
+        stop.set()
+        flush_thread.join()
+        with SessionLocal() as db:
+            reservations.flush(db)
+    elapsed = time.perf_counter() - started
+
+    with SessionLocal() as db:
+        remaining = db.get(Item, item_id).quantity
+    engine.dispose()
+
+    assert accepted == transactions, f"only {accepted} accepted"
+    assert remaining == 0, f"{remaining} units left"
+    return accepted / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--transactions", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    database_url = args.database_url
+    if database_url is None:
+        path = os.path.join(tempfile.mkdtemp(), "bench_hot_item.db")
+        database_url = f"sqlite:///{path}"
+
+    for label, hot in (("direct UPDATE", False), ("reservation engine", True)):
+        rate = run(database_url, args.transactions, args.workers, hot)
+        print(f"{label:<20} {rate:10.1f} accepted tx/s")
+
+
+if __name__ == "__main__":
+    main()
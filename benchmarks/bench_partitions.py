@@ -0,0 +1,305 @@
+"""
+Load benchmark: chat history and price history reads on plain vs monthly
+partitioned tables (PostgreSQL only).
+
+Fills ``chat_messages`` and ``price_histories`` with tens of millions of
+rows spread over ``--months`` months, once in a plain schema and once in a
+schema converted to monthly partitions, then times the router queries
+(latest page, a deep ``before`` page, the inbox, an item's price history)
+and dropping the oldest month (DELETE vs detaching a partition).
+
+Usage:
+    python -m benchmarks.bench_partitions --database-url postgresql://...
+        [--messages 20000000] [--prices 10000000] [--months 24]
+        [--chats 100000] [--items 100000] [--users 1000] [--repeats 200]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from fastapi import Response  # noqa: E402
+from sqlalchemy import create_engine, insert, text  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.core.partitions import PartitionManager, add_months, month_start  # noqa: E402
+from app.db.database import Base  # noqa: E402
+from app.db.models.Categorys.main import Category  # noqa: E402
+from app.db.models.Chats.chat import Chat  # noqa: E402
+from app.db.models.Chats.chat_member import ChatMember  # noqa: E402
+from app.db.models.items.item import Item  # noqa: E402
+from app.db.models.Users.User import User  # noqa: E402
+from app.routers.v1 import chat_router, item_router  # noqa: E402
+
+_BANGKOK = ZoneInfo("Asia/Bangkok")
+_BATCH = 10_000
+
+_MESSAGES_SQL = """
+INSERT INTO chat_messages (chat_id, sender_id, text, image_url, send_at)
+SELECT c.chat_id, (c.chat_id - 1) % :users + 1, 'message ' || g, NULL,
+       :start + (:span * g / :messages)
+FROM generate_series(1, :messages) AS g,
+LATERAL (
+    -- only chats that already existed when the message was sent
+    SELECT 1 + (g::bigint * 7919) % greatest(1, g::bigint * :chats / :messages)
+        AS chat_id
+) AS c
+"""
+
+_PRICES_SQL = """
+INSERT INTO price_histories (price, item_id, user_id, start_date, end_date)
+SELECT 10 + g % 1000, i.item_id, (i.item_id - 1) % :users + 1,
+       :start + (:span * g / :prices), NULL
+FROM generate_series(1, :prices) AS g,
+LATERAL (
+    SELECT 1 + (g::bigint * 104729) % greatest(1, g::bigint * :items / :prices)
+        AS item_id
+) AS i
+"""
+
+_LAST_MESSAGE_SQL = """
+UPDATE chats SET last_message_id = m.id, last_message_at = m.send_at
+FROM (
+    SELECT DISTINCT ON (chat_id) chat_id, id, send_at
+    FROM chat_messages ORDER BY chat_id, id DESC
+) AS m
+WHERE chats.id = m.chat_id
+"""
+
+
+def insert_in_batches(db, model, rows) -> None:
+    for offset in range(0, len(rows), _BATCH):
+        db.execute(insert(model), rows[offset : offset + _BATCH])
+
+
+def seed(engine, args, start: datetime, span: timedelta) -> None:
+    """Users, items and chats with creation times spread over the span."""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(bind=engine)
+    with SessionLocal() as db:
+        insert_in_batches(
+            db,
+            User,
+            [
+                {
+                    "username": f"user{n}",
+                    "full_name": "U",
+                    "email": f"u{n}@x.io",
+                    "password": "x",
+                }
+                for n in range(args.users)
+            ],
+        )
+        category_id = db.scalar(
+            insert(Category).values(name="Bench", slug="bench").returning(Category.id)
+        )
+        insert_in_batches(
+            db,
+            Item,
+            [
+                {
+                    "name": f"item {n}",
+                    "price": Decimal("10.00"),
+                    "quantity": 1,
+                    "version": 1,
+                    "owner_id": n % args.users + 1,
+                    "category_id": category_id,
+                    "created_at": start + span * n / args.items,
+                }
+                for n in range(args.items)
+            ],
+        )
+        insert_in_batches(
+            db,
+            Chat,
+            [
+                {"created_at": start + span * n / args.chats}
+                for n in range(args.chats)
+            ],
+        )
+        insert_in_batches(
+            db,
+            ChatMember,
+            [
+                {"chat_id": chat_id, "user_id": (chat_id - 1 + offset) % args.users + 1}
+                for chat_id in range(1, args.chats + 1)
+                for offset in (0, 1)
+            ],
+        )
+        db.commit()
+
+    params = {
+        "start": start,
+        "span": span,
+        "users": args.users,
+        "chats": args.chats,
+        "items": args.items,
+        "messages": args.messages,
+        "prices": args.prices,
+    }
+    with engine.begin() as conn:
+        conn.execute(text(_MESSAGES_SQL), params)
+        conn.execute(text(_PRICES_SQL), params)
+        conn.execute(text(_LAST_MESSAGE_SQL))
+
+
+def analyze(engine) -> None:
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("ANALYZE"))
+
+
+def timed(func, repeats: int) -> float:
+    """Average milliseconds of ``func(n)`` over ``repeats`` calls."""
+    started = time.perf_counter()
+    for n in range(repeats):
+        func(n)
+    return (time.perf_counter() - started) * 1000 / repeats
+
+
+def measure(engine, args, cutoff: datetime, manager) -> dict:
+    SessionLocal = sessionmaker(bind=engine)
+    picks = random.Random(42)
+    recent_chats = [
+        args.chats - picks.randrange(args.chats // 10) for _ in range(args.repeats)
+    ]
+    users = [picks.randrange(args.users) + 1 for _ in range(args.repeats)]
+    recent_items = [
+        args.items - picks.randrange(args.items // 10) for _ in range(args.repeats)
+    ]
+
+    def member_of(chat_id: int) -> dict:
+        return {"id": (chat_id - 1) % args.users + 1}
+
+    def latest_page(n: int) -> None:
+        chat_id = recent_chats[n]
+        with SessionLocal() as db:
+            chat_router.get_chat_messages(
+                chat_id, Response(), None, None, 20, db, member_of(chat_id)
+            )
+
+    def deep_page(n: int) -> None:
+        chat_id = recent_chats[n]
+        with SessionLocal() as db:
+            before = db.scalar(
+                text(
+                    "SELECT id FROM chat_messages WHERE chat_id = :chat_id "
+                    "ORDER BY id LIMIT 1 OFFSET 5"
+                ),
+                {"chat_id": chat_id},
+            )
+            chat_router.get_chat_messages(
+                chat_id, Response(), before or 1, None, 20, db, member_of(chat_id)
+            )
+
+    def inbox(n: int) -> None:
+        with SessionLocal() as db:
+            chat_router.get_user_chats(db, {"id": users[n]})
+
+    def price_history(n: int) -> None:
+        item_id = recent_items[n]
+        with SessionLocal() as db:
+            asyncio.run(
+                item_router.get_price_item_histories(
+                    item_id, 0, 10, db, {"id": (item_id - 1) % args.users + 1}
+                )
+            )
+
+    results = {
+        "latest page": timed(latest_page, args.repeats),
+        "deep page": timed(deep_page, args.repeats),
+        "inbox": timed(inbox, args.repeats),
+        "price history": timed(price_history, args.repeats),
+    }
+
+    started = time.perf_counter()
+    if manager is None:
+        with engine.begin() as conn:
+            conn.execute(
+                text("DELETE FROM chat_messages WHERE send_at < :cutoff"),
+                {"cutoff": cutoff},
+            )
+            conn.execute(
+                text("DELETE FROM price_histories WHERE start_date < :cutoff"),
+                {"cutoff": cutoff},
+            )
+    else:
+        manager.archive()
+    results["drop oldest month"] = (time.perf_counter() - started) * 1000
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--messages", type=int, default=20_000_000)
+    parser.add_argument("--prices", type=int, default=10_000_000)
+    parser.add_argument("--months", type=int, default=24)
+    parser.add_argument("--chats", type=int, default=100_000)
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+    if not args.database_url.startswith("postgresql"):
+        parser.error("partitioning needs a PostgreSQL --database-url")
+    if args.months < 3:
+        parser.error("--months must be at least 3")
+
+    now = datetime.now(_BANGKOK)
+    start = add_months(month_start(now), -args.months + 1)
+    span = now - start
+    cutoff = add_months(start, 1)
+
+    results = {}
+    for layout in ("plain", "partitioned"):
+        schema = f"bench_{layout}"
+        admin = create_engine(args.database_url)
+        with admin.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {schema}_archive CASCADE"))
+            conn.execute(text(f"CREATE SCHEMA {schema}"))
+        admin.dispose()
+        engine = create_engine(
+            args.database_url, connect_args={"options": f"-csearch_path={schema}"}
+        )
+
+        started = time.perf_counter()
+        seed(engine, args, start, span)
+        print(f"{layout}: loaded in {time.perf_counter() - started:.0f}s")
+
+        manager = None
+        if layout == "partitioned":
+            manager = PartitionManager(
+                db_engine=engine,
+                enabled=True,
+                # keeps every month but the oldest one
+                retention_months=args.months - 2,
+                archive_schema=f"{schema}_archive",
+                clock=lambda: now,
+            )
+            started = time.perf_counter()
+            for table in ("chat_messages", "price_histories"):
+                manager.convert(table)
+            print(f"{layout}: converted in {time.perf_counter() - started:.0f}s")
+        analyze(engine)
+
+        results[layout] = measure(engine, args, cutoff, manager)
+        engine.dispose()
+
+    print(f"{'':<20} {'plain ms':>12} {'partitioned ms':>16}")
+    for name in results["plain"]:
+        print(
+            f"{name:<20} {results['plain'][name]:12.2f} "
+            f"{results['partitioned'][name]:16.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
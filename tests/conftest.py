@@ -21,6 +21,11 @@ from app.main import app
 from app.db.database import Base, get_db
 from app.db.models.Users.User import User
 from app.core.security import create_access_token
+from app.core.rate_limit import auth_admission
+from app.core.cart_holds import cart_holds
+from app.core.reservations import reservation_engine
+from app.core.chat_presence import presence
+from app.core.chat_receipts import read_receipts
 import bcrypt
 
 
@@ -55,6 +60,49 @@ def db_session() -> Generator[Session, None, None]:
         Base.metadata.drop_all(bind=test_engine)
 
 
+@pytest.fixture(autouse=True)
+def reset_auth_rate_limits() -> Generator[None, None, None]:
+    """
+    ล้าง rate limit buckets ของ auth endpoints ก่อนแต่ละ test
+    (TestClient ใช้ IP เดียวกันทุก request)
+    """
+    auth_admission.reset()
+    yield
+    auth_admission.reset()
+
+
+@pytest.fixture(autouse=True)
+def reset_reservation_engine() -> Generator[None, None, None]:
+    """
+    ล้าง ledger ของ hot items (flash sale) ที่อยู่ใน memory ระหว่าง tests
+    """
+    reservation_engine.reset()
+    yield
+    reservation_engine.reset()
+
+
+@pytest.fixture(autouse=True)
+def reset_cart_holds() -> Generator[None, None, None]:
+    """
+    ล้าง cart holds ที่อยู่ใน memory ระหว่าง tests
+    """
+    cart_holds.reset()
+    yield
+    cart_holds.reset()
+
+
+@pytest.fixture(autouse=True)
+def reset_chat_state() -> Generator[None, None, None]:
+    """
+    ล้าง read receipts ที่ยังไม่ได้เขียนและสถานะ online ที่อยู่ใน memory ระหว่าง tests
+    """
+    read_receipts.reset()
+    presence.reset()
+    yield
+    read_receipts.reset()
+    presence.reset()
+
+
 @pytest.fixture(scope="function")
 def client(db_session: Session) -> Generator[TestClient, None, None]:
     """
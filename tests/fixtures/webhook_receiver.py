@@ -0,0 +1,63 @@
+"""
+Local stub receiver for outgoing webhooks.
+
+Records every request, checks its signature and can be told to fail or to
+answer slowly. Tests mount it with ``httpx.ASGITransport``; it can also be
+run by hand to watch deliveries from a dev server:
+
+    uvicorn tests.fixtures.webhook_receiver:app --port 9000
+
+(the dev server must set ``WEBHOOK_ALLOW_PRIVATE_TARGETS=true`` to deliver to
+localhost).
+"""
+
+import asyncio
+from typing import Optional
+
+from fastapi import FastAPI, Request, Response
+
+from app.core.webhooks import SIGNATURE_HEADER, TIMESTAMP_HEADER, verify_signature
+
+
+class StubWebhookReceiver:
+    def __init__(self, secret: Optional[str] = None):
+        self.secret = secret
+        self.requests: list[dict] = []
+        self.fail_next = 0
+        self.status_code = 200
+        self.delay = 0.0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.app = FastAPI()
+        self.app.post("/{path:path}")(self.receive)
+
+    async def receive(self, path: str, request: Request) -> Response:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            body = await request.body()
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            self.requests.append(
+                {
+                    "path": "/" + path,
+                    "headers": dict(request.headers),
+                    "json": await request.json(),
+                    "signature_valid": self.secret is None
+                    or verify_signature(
+                        self.secret,
+                        request.headers.get(TIMESTAMP_HEADER, ""),
+                        body,
+                        request.headers.get(SIGNATURE_HEADER, ""),
+                    ),
+                }
+            )
+            if self.fail_next:
+                self.fail_next -= 1
+                return Response(status_code=500)
+            return Response(status_code=self.status_code)
+        finally:
+            self.in_flight -= 1
+
+
+app = StubWebhookReceiver().app
@@ -406,3 +406,234 @@ class TestRegister:
         assert user is not None
         assert user.password != "plainpassword123"  # Password should be hashed
         assert len(user.password) > len("plainpassword123")  # Hashed password is longer
+
+
+class TestAuthRateLimit:
+    """Test suite for admission control on auth endpoints"""
+
+    def test_login_rejected_after_username_burst(self, client: TestClient):
+        """
+        Test: ล็อกอินผิดซ้ำหลายครั้งด้วย username เดียวกัน
+        Expected: ได้รับ status 429 พร้อม Retry-After และ counter เพิ่มขึ้น
+        """
+        from app.core.rate_limit import auth_admission
+
+        payload = {"username": "bruteforced", "password": "wrongpassword"}
+        for _ in range(int(auth_admission.username_burst)):
+            response = client.post("/v1/auth/login", json=payload)
+            assert response.status_code == 400
+
+        response = client.post("/v1/auth/login", json=payload)
+
+        assert response.status_code == 429
+        assert "Retry-After" in response.headers
+        stats = client.get("/v1/health/auth").json()
+        assert stats["rejected"]["username"] == 1
+
+    def test_login_rejected_after_ip_burst(self, client: TestClient):
+        """
+        Test: ล็อกอินจาก IP เดียวกันด้วย username ต่างกันเกิน burst
+        Expected: ได้รับ status 429 ก่อนมีการตรวจ password
+        """
+        from app.core.rate_limit import auth_admission
+
+        for i in range(int(auth_admission.ip_burst)):
+            response = client.post(
+                "/v1/auth/token", data={"username": f"user{i}", "password": "x"}
+            )
+            assert response.status_code == 400
+
+        response = client.post(
+            "/v1/auth/token", data={"username": "another", "password": "x"}
+        )
+
+        assert response.status_code == 429
+        assert auth_admission.stats()["rejected"]["ip"] == 1
+
+    def test_concurrency_cap_fails_fast(self, client: TestClient):
+        """
+        Test: มี auth request ทำงานอยู่เต็ม concurrency cap แล้ว
+        Expected: request ใหม่ได้รับ status 503 ทันที
+        """
+        from app.core.rate_limit import auth_admission
+
+        auth_admission._in_flight = auth_admission.max_concurrent
+        try:
+            response = client.post(
+                "/v1/auth/login", json={"username": "busy", "password": "x"}
+            )
+        finally:
+            auth_admission._in_flight = 0
+
+        assert response.status_code == 503
+        assert auth_admission.stats()["rejected"]["concurrency"] == 1
+
+    def test_explicit_zero_is_not_replaced_by_default(self, monkeypatch):
+        """
+        Test: สร้าง AuthAdmissionControl ด้วย max_concurrent=0 และ burst=0
+        Expected: ใช้ค่า 0 ตามที่ส่งมา ไม่ถูกแทนด้วยค่าจาก environment
+        """
+        from app.core.rate_limit import AuthAdmissionControl
+
+        monkeypatch.setenv("AUTH_MAX_CONCURRENT", "8")
+        control = AuthAdmissionControl(max_concurrent=0, username_burst=0.0)
+
+        assert control.max_concurrent == 0
+        assert control.username_burst == 0.0
+        assert control.ip_burst > 0
+
+    def test_stats_are_not_served_from_auth_routes(self, client: TestClient):
+        """
+        Test: เรียก stats ผ่าน auth routes เดิม
+        Expected: ไม่มี endpoint นี้แล้ว (ย้ายไป /v1/health/auth)
+        """
+        assert client.get("/v1/auth/rate-limit/stats").status_code == 404
+
+
+class TestJWTKeyRotation:
+    """Test suite for JWT key ring (kid based rotation)"""
+
+    @pytest.fixture
+    def rsa_private_pem(self) -> str:
+        from cryptography.hazmat.primitives import serialization
+        from cryptography.hazmat.primitives.asymmetric import rsa
+
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        return private_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption(),
+        ).decode("utf-8")
+
+    @pytest.fixture
+    def rotated_keys(self, monkeypatch, rsa_private_pem: str):
+        """ตั้งค่า key ring ที่มี key เก่า (HS256) และ key ใหม่ (RS256)"""
+        import json
+        from app.core.jwt_keys import reload_key_ring
+
+        keys = [
+            {"kid": "old", "alg": "HS256", "secret": "old-secret"},
+            {"kid": "new", "alg": "RS256", "private_key": rsa_private_pem},
+        ]
+        monkeypatch.setenv("JWT_KEYS", json.dumps(keys))
+        monkeypatch.setenv("JWT_ACTIVE_KID", "new")
+        yield reload_key_ring()
+        monkeypatch.delenv("JWT_KEYS")
+        monkeypatch.delenv("JWT_ACTIVE_KID")
+        reload_key_ring()
+
+    def test_token_header_carries_active_kid(self, rotated_keys):
+        """
+        Test: สร้าง token หลังหมุน key
+        Expected: header มี kid ของ active key และ alg เป็น RS256
+        """
+        from jose import jwt
+        from app.core.security import create_access_token
+
+        token = create_access_token({"sub": "someone", "id": 1})
+        header = jwt.get_unverified_header(token)
+
+        assert header["kid"] == "new"
+        assert header["alg"] == "RS256"
+
+    def test_token_signed_with_old_key_still_valid(
+        self, client: TestClient, test_user: User, rotated_keys
+    ):
+        """
+        Test: ใช้ token ที่เซ็นด้วย key เก่า (verify-only) เรียก protected endpoint
+        Expected: ได้รับ status 200
+        """
+        from datetime import datetime, timedelta, timezone
+        from jose import jwt
+
+        token = jwt.encode(
+            {
+                "sub": test_user.username,
+                "id": test_user.id,
+                "exp": datetime.now(timezone.utc) + timedelta(minutes=5),
+            },
+            "old-secret",
+            algorithm="HS256",
+            headers={"kid": "old"},
+        )
+
+        response = client.get(
+            "/v1/user/me", headers={"Authorization": f"Bearer {token}"}
+        )
+        assert response.status_code == 200
+
+    def test_token_without_kid_uses_legacy_key(
+        self, client: TestClient, test_user: User, rotated_keys, monkeypatch
+    ):
+        """
+        Test: token เก่าที่ไม่มี kid (เซ็นด้วย HS256 secret เดิม) หลัง active key เป็น RS256
+        Expected: verify ด้วย legacy key ได้ status 200 แต่ token ไม่มี kid ที่เซ็นด้วย key อื่นได้ 401
+        """
+        from datetime import datetime, timedelta, timezone
+        from jose import jwt
+        from app.core.jwt_keys import reload_key_ring
+
+        monkeypatch.setenv("JWT_LEGACY_KID", "old")
+        reload_key_ring()
+        claims = {
+            "sub": test_user.username,
+            "id": test_user.id,
+            "exp": datetime.now(timezone.utc) + timedelta(minutes=5),
+        }
+
+        legacy = jwt.encode(claims, "old-secret", algorithm="HS256")
+        response = client.get(
+            "/v1/user/me", headers={"Authorization": f"Bearer {legacy}"}
+        )
+        assert response.status_code == 200
+
+        forged = jwt.encode(claims, "other-secret", algorithm="HS256")
+        response = client.get(
+            "/v1/user/me", headers={"Authorization": f"Bearer {forged}"}
+        )
+        assert response.status_code == 401
+
+    def test_legacy_key_must_be_hmac(self, rotated_keys):
+        """
+        Test: ตั้ง legacy key เป็น RS256 key
+        Expected: ValueError ตอนสร้าง key ring
+        """
+        from app.core.jwt_keys import JWTKeyRing
+
+        keys = [rotated_keys.get("old"), rotated_keys.get("new")]
+        with pytest.raises(ValueError):
+            JWTKeyRing(keys, "new", legacy_kid="new")
+
+    def test_token_with_unknown_kid_rejected(
+        self, client: TestClient, test_user: User, rotated_keys
+    ):
+        """
+        Test: ใช้ token ที่ระบุ kid ที่ไม่มีใน key ring
+        Expected: ได้รับ status 401
+        """
+        from jose import jwt
+
+        token = jwt.encode(
+            {"sub": test_user.username, "id": test_user.id},
+            "old-secret",
+            algorithm="HS256",
+            headers={"kid": "missing"},
+        )
+
+        response = client.get(
+            "/v1/user/me", headers={"Authorization": f"Bearer {token}"}
+        )
+        assert response.status_code == 401
+
+    def test_jwks_exposes_only_public_keys(self, client: TestClient, rotated_keys):
+        """
+        Test: เรียก /v1/auth/jwks.json
+        Expected: ได้เฉพาะ public key ของ RS256 ไม่มี secret ของ HS256
+        """
+        response = client.get("/v1/auth/jwks.json")
+
+        assert response.status_code == 200
+        keys = response.json()["keys"]
+        assert [key["kid"] for key in keys] == ["new"]
+        assert keys[0]["kty"] == "RSA"
+        assert "d" not in keys[0]
@@ -0,0 +1,630 @@
+"""
+Unit tests for cart endpoints (checkout, view, stock holds)
+"""
+
+from decimal import Decimal
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.cart_holds import CartHoldLedger, cart_holds
+from app.core.reservations import reservation_engine
+from app.core.security import create_access_token
+from app.db.models.Carts.cart_hold import CartHold
+from app.db.models.Carts.cart_item import CartItem
+from app.db.models.Categorys.main import Category
+from app.db.models.items.item import Item
+from app.db.models.Outbox.outbox_event import OutboxEvent
+from app.db.models.Transactions.transaction_model import Transaction
+from app.db.models.Users.User import User
+
+
+def make_seller(db_session: Session, name: str) -> User:
+    seller = User(
+        username=name, full_name=name, email=f"{name}@example.com", password="x"
+    )
+    db_session.add(seller)
+    db_session.commit()
+    return seller
+
+
+def make_item(
+    db_session: Session,
+    owner: User,
+    category: Category,
+    name: str,
+    price: str = "10.00",
+    quantity: int = 5,
+    status: str = "available",
+) -> Item:
+    item = Item(
+        name=name,
+        price=Decimal(price),
+        quantity=quantity,
+        status=status,
+        owner_id=owner.id,
+        category_id=category.id,
+    )
+    db_session.add(item)
+    db_session.commit()
+    return item
+
+
+def add(client: TestClient, item: Item, quantity: int = 1) -> int:
+    response = client.post(
+        "/v1/cart/add", json={"product_id": item.id, "quantity": quantity}
+    )
+    assert response.status_code == 200
+    return response.json()["id"]
+
+
+def headers_for(user: User) -> dict:
+    token = create_access_token(data={"sub": user.username, "id": user.id})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def sellers(db_session: Session) -> list[User]:
+    return [make_seller(db_session, "alice"), make_seller(db_session, "bob")]
+
+
+class TestCartCheckout:
+    """Test suite for POST /v1/cart/checkout"""
+
+    def test_requires_authentication(self, client: TestClient):
+        """
+        Test: checkout โดยไม่มี authentication
+        Expected: ได้รับ status 401
+        """
+        assert client.post("/v1/cart/checkout").status_code == 401
+
+    def test_empty_cart(self, authenticated_client: TestClient):
+        """
+        Test: checkout ตะกร้าว่าง
+        Expected: ได้รับ status 404
+        """
+        assert authenticated_client.post("/v1/cart/checkout").status_code == 404
+
+    def test_checkout_groups_transactions_by_seller(
+        self,
+        authenticated_client: TestClient,
+        db_session: Session,
+        test_user: User,
+        test_category: Category,
+        sellers: list[User],
+    ):
+        """
+        Test: checkout ตะกร้าที่มีสินค้าจาก 2 ผู้ขาย
+        Expected: ได้ pending transaction ต่อบรรทัด จัดกลุ่มตามผู้ขาย และตะกร้าว่าง
+        """
+        alice, bob = sellers
+        a1 = make_item(db_session, alice, test_category, "A1", "10.00")
+        a2 = make_item(db_session, alice, test_category, "A2", "5.50")
+        b1 = make_item(db_session, bob, test_category, "B1", "20.00")
+        add(authenticated_client, a1, 2)
+        add(authenticated_client, b1, 1)
+        add(authenticated_client, a2, 3)
+
+        response = authenticated_client.post("/v1/cart/checkout")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["created"] == 3
+        assert data["failed"] == 0
+        groups = {g["seller_id"]: g for g in data["sellers"]}
+        assert Decimal(groups[alice.id]["total"]) == Decimal("36.50")
+        assert len(groups[alice.id]["transaction_ids"]) == 2
+        assert Decimal(groups[bob.id]["total"]) == Decimal("20.00")
+
+        transactions = db_session.scalars(select(Transaction)).all()
+        assert len(transactions) == 3
+        assert all(t.status == "pending" and t.buyer_id == test_user.id for t in transactions)
+        assert {(t.item_id, t.amount) for t in transactions} == {
+            (a1.id, 2),
+            (a2.id, 3),
+            (b1.id, 1),
+        }
+        assert db_session.scalars(select(CartItem)).all() == []
+        events = db_session.scalars(select(OutboxEvent.event_type)).all()
+        assert events == ["transaction.created"] * 3
+
+    def test_partial_availability_is_reported_per_line(
+        self,
+        authenticated_client: TestClient,
+        db_session: Session,
+        test_category: Category,
+        sellers: list[User],
+    ):
+        """
+        Test: ตะกร้ามีสินค้าที่ซื้อได้, stock ไม่พอ, ไม่ว่างขาย และถูกลบ
+        Expected: ซื้อเฉพาะบรรทัดที่ได้ ที่เหลือรายงานเหตุผลและยังอยู่ในตะกร้า
+        """
+        alice, _ = sellers
+        ok = make_item(db_session, alice, test_category, "OK")
+        short = make_item(db_session, alice, test_category, "Short", quantity=1)
+        reserved = make_item(db_session, alice, test_category, "Reserved")
+        deleted = make_item(db_session, alice, test_category, "Gone")
+        ok_line = add(authenticated_client, ok)
+        short_line = add(authenticated_client, short, 3)
+        reserved_line = add(authenticated_client, reserved)
+        deleted_line = add(authenticated_client, deleted)
+        reserved.status = "reserved"
+        deleted.deleted_at = deleted.created_at
+        db_session.commit()
+
+        response = authenticated_client.post("/v1/cart/checkout")
+
+        assert response.status_code == 200
+        lines = {line["cart_item_id"]: line for line in response.json()["lines"]}
+        assert lines[ok_line]["status"] == "created"
+        assert lines[ok_line]["transaction_id"] is not None
+        assert lines[short_line]["status"] == "insufficient_stock"
+        assert lines[short_line]["available"] == 1
+        assert lines[reserved_line]["status"] == "unavailable"
+        assert lines[deleted_line]["status"] == "not_found"
+        remaining = set(db_session.scalars(select(CartItem.id)))
+        assert remaining == {short_line, reserved_line, deleted_line}
+
+    def test_all_or_nothing(
+        self,
+        authenticated_client: TestClient,
+        db_session: Session,
+        test_category: Category,
+        sellers: list[User],
+    ):
+        """
+        Test: checkout แบบ allow_partial=false เมื่อมีบางบรรทัดซื้อไม่ได้
+        Expected: ได้รับ status 409 และไม่มี transaction ถูกสร้าง ตะกร้าไม่เปลี่ยน
+        """
+        alice, _ = sellers
+        ok = make_item(db_session, alice, test_category, "OK")
+        short = make_item(db_session, alice, test_category, "Short", quantity=1)
+        add(authenticated_client, ok)
+        short_line = add(authenticated_client, short, 2)
+
+        response = authenticated_client.post(
+            "/v1/cart/checkout", json={"allow_partial": False}
+        )
+
+        assert response.status_code == 409
+        detail = response.json()["detail"]
+        assert detail["lines"] == [
+            {"cart_item_id": short_line, "status": "insufficient_stock", "available": 1}
+        ]
+        assert db_session.scalars(select(Transaction)).all() == []
+        assert len(db_session.scalars(select(CartItem)).all()) == 2
+
+    def test_selected_lines_only(
+        self,
+        authenticated_client: TestClient,
+        db_session: Session,
+        test_category: Category,
+        sellers: list[User],
+    ):
+        """
+        Test: checkout เฉพาะบางบรรทัดด้วย cart_item_ids
+        Expected: บรรทัดอื่นยังอยู่ในตะกร้า
+        """
+        alice, _ = sellers
+        first = add(authenticated_client, make_item(db_session, alice, test_category, "1"))
+        second = add(authenticated_client, make_item(db_session, alice, test_category, "2"))
+
+        response = authenticated_client.post(
+            "/v1/cart/checkout", json={"cart_item_ids": [first]}
+        )
+
+        assert response.json()["created"] == 1
+        assert set(db_session.scalars(select(CartItem.id))) == {second}
+
+    def test_own_item_is_rejected(
+        self, authenticated_client: TestClient, test_item: Item
+    ):
+        """
+        Test: checkout สินค้าของตัวเอง
+        Expected: บรรทัดนั้นได้สถานะ own_item
+        """
+        add(authenticated_client, test_item)
+
+        data = authenticated_client.post("/v1/cart/checkout").json()
+
+        assert data["created"] == 0
+        assert data["lines"][0]["status"] == "own_item"
+
+    def test_hot_item_checkout_holds_stock(
+        self,
+        authenticated_client: TestClient,
+        db_session: Session,
+        test_category: Category,
+        sellers: list[User],
+    ):
+        """
+        Test: checkout สินค้าที่อยู่ใน flash sale
+        Expected: stock ถูก hold ใน reservation engine ตามจำนวนที่ซื้อ
+        """
+        alice, _ = sellers
+        hot = make_item(db_session, alice, test_category, "Hot", quantity=3)
+        reservation_engine.activate(hot.id, hot.quantity)
+        add(authenticated_client, hot, 2)
+
+        data = authenticated_client.post("/v1/cart/checkout").json()
+
+        assert data["created"] == 1
+        assert reservation_engine.available(hot.id) == 1
+
+
+class TestCartView:
+    """Test suite for GET /v1/cart/"""
+
+    def test_empty_cart_is_created(self, authenticated_client: TestClient, test_user: User):
+        """
+        Test: เปิดตะกร้าครั้งแรก
+        Expected: ได้ตะกร้าว่างที่มียอดรวม 0
+        """
+        response = authenticated_client.get("/v1/cart/")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["user_id"] == test_user.id
+        assert data["items"] == []
+        assert data["sellers"] == []
+        assert Decimal(data["total"]) == 0
+
+    def test_lines_show_current_product_and_totals(
+        self,
+        authenticated_client: TestClient,
+        db_session: Session,
+        test_category: Category,
+        sellers: list[User],
+    ):
+        """
+        Test: ตะกร้ามีสินค้าจาก 2 ผู้ขาย มีสินค้าที่ราคาเปลี่ยนและสินค้าที่ซื้อไม่ได้
+        Expected: แต่ละบรรทัดมีข้อมูลสินค้า ราคาปัจจุบัน ส่วนต่างราคา และยอดรวมไม่นับบรรทัดที่ซื้อไม่ได้
+        """
+        alice, bob = sellers
+        cheaper = make_item(db_session, alice, test_category, "Cheaper", "10.00")
+        sold_out = make_item(db_session, alice, test_category, "Sold out", "7.00")
+        other = make_item(db_session, bob, test_category, "Other", "3.25")
+        add(authenticated_client, cheaper, 2)
+        add(authenticated_client, sold_out, 1)
+        add(authenticated_client, other, 4)
+        cheaper.price = Decimal("8.00")
+        sold_out.status = "sold"
+        db_session.commit()
+
+        data = authenticated_client.get("/v1/cart/").json()
+
+        lines = {line["product_id"]: line for line in data["items"]}
+        assert lines[cheaper.id]["product"]["name"] == "Cheaper"
+        assert Decimal(lines[cheaper.id]["current_price"]) == Decimal("8.00")
+        assert Decimal(lines[cheaper.id]["price_drift"]) == Decimal("-2.00")
+        assert Decimal(lines[cheaper.id]["line_total"]) == Decimal("16.00")
+        assert lines[cheaper.id]["available"] is True
+        assert lines[sold_out.id]["available"] is False
+        assert lines[sold_out.id]["available_quantity"] == 0
+
+        subtotals = {s["seller_id"]: Decimal(s["subtotal"]) for s in data["sellers"]}
+        assert subtotals == {alice.id: Decimal("16.00"), bob.id: Decimal("13.00")}
+        assert Decimal(data["total"]) == Decimal("29.00")
+
+    def test_insufficient_stock_line_is_not_available(
+        self,
+        authenticated_client: TestClient,
+        db_session: Session,
+        test_category: Category,
+        sellers: list[User],
+    ):
+        """
+        Test: จำนวนในตะกร้ามากกว่า stock
+        Expected: available เป็น false และแสดง stock ที่เหลือ
+        """
+        alice, _ = sellers
+        item = make_item(db_session, alice, test_category, "Few", quantity=2)
+        add(authenticated_client, item, 5)
+
+        [line] = authenticated_client.get("/v1/cart/").json()["items"]
+
+        assert line["available"] is False
+        assert line["available_quantity"] == 2
+
+
+    def test_availability_matches_checkout(
+        self,
+        authenticated_client: TestClient,
+        db_session: Session,
+        test_category: Category,
+        sellers: list[User],
+    ):
+        """
+        Test: ตะกร้ามีสินค้า flash sale ที่ขายไปบางส่วนในหน่วยความจำ และสินค้าที่ผู้ซื้ออื่น hold ไว้
+        Expected: available_quantity นับ stock ใน reservation engine และหัก hold ของคนอื่นเหมือน checkout
+        """
+        alice, bob = sellers
+        hot = make_item(db_session, alice, test_category, "Hot", quantity=5)
+        held = make_item(db_session, alice, test_category, "Held", quantity=3)
+        reservation_engine.activate(hot.id, hot.quantity)
+        assert reservation_engine.hold(hot.id, 999, 4)
+        cart_holds.hold(held.id, bob.id, 2, held.quantity)
+        add(authenticated_client, hot, 2)
+        add(authenticated_client, held, 1)
+
+        data = authenticated_client.get("/v1/cart/").json()
+
+        lines = {line["product_id"]: line for line in data["items"]}
+        assert lines[hot.id]["available"] is False
+        assert lines[hot.id]["available_quantity"] == 1
+        assert lines[held.id]["available"] is True
+        assert lines[held.id]["available_quantity"] == 1
+        assert Decimal(data["total"]) == Decimal("10.00")
+
+
+class TestCartHolds:
+    """Test suite for cart stock holds (POST /v1/cart/add with hold=true)"""
+
+    def hold(self, client: TestClient, item: Item, quantity: int, **kwargs):
+        return client.post(
+            "/v1/cart/add",
+            json={"product_id": item.id, "quantity": quantity, "hold": True},
+            **kwargs,
+        )
+
+    def test_add_with_hold_returns_expiry(
+        self,
+        authenticated_client: TestClient,
+        db_session: Session,
+        test_user: User,
+        test_category: Category,
+        sellers: list[User],
+    ):
+        """
+        Test: เพิ่มสินค้าลงตะกร้าพร้อม hold
+        Expected: ได้ hold_expires_at และ ledger จองจำนวนทั้งบรรทัด
+        """
+        alice, bob = sellers
+        item = make_item(db_session, alice, test_category, "Held", quantity=3)
+        add(authenticated_client, item, 1)
+
+        response = self.hold(authenticated_client, item, 1)
+
+        assert response.status_code == 200
+        assert response.json()["quantity"] == 2
+        assert response.json()["hold_expires_at"] is not None
+        assert cart_holds.held_by_others(item.id, bob.id) == 2
+        [line] = authenticated_client.get("/v1/cart/").json()["items"]
+        assert line["hold_expires_at"] is not None
+
+    def test_held_units_cannot_be_bought_by_others(
+        self,
+        authenticated_client: TestClient,
+        db_session: Session,
+        test_category: Category,
+        sellers: list[User],
+    ):
+        """
+        Test: ผู้ซื้ออื่นสร้าง transaction เกินจำนวนที่ไม่ได้ถูกจอง
+        Expected: ได้ 400 แต่ซื้อส่วนที่เหลือได้
+        """
+        alice, bob = sellers
+        item = make_item(db_session, alice, test_category, "Held", quantity=3)
+        assert self.hold(authenticated_client, item, 2).status_code == 200
+
+        def buy(amount: int) -> int:
+            return authenticated_client.post(
+                "/v1/transaction/",
+                json={"item_id": item.id, "amount": amount},
+                headers=headers_for(bob),
+            ).status_code
+
+        assert buy(2) == 400
+        assert buy(1) == 200
+
+    def test_hold_rejected_when_others_hold_stock(
+        self,
+        authenticated_client: TestClient,
+        db_session: Session,
+        test_category: Category,
+        sellers: list[User],
+    ):
+        """
+        Test: ขอ hold เมื่อผู้ซื้ออื่นจองไปแล้วจนเหลือไม่พอ
+        Expected: ได้ 409 และไม่เพิ่มบรรทัดในตะกร้า
+        """
+        alice, bob = sellers
+        item = make_item(db_session, alice, test_category, "Held", quantity=3)
+        bob_hold = self.hold(authenticated_client, item, 2, headers=headers_for(bob))
+        assert bob_hold.status_code == 200
+
+        response = self.hold(authenticated_client, item, 2)
+
+        assert response.status_code == 409
+        assert authenticated_client.get("/v1/cart/").json()["items"] == []
+
+    def test_own_item_cannot_be_held(
+        self,
+        authenticated_client: TestClient,
+        test_item: Item,
+    ):
+        """
+        Test: hold สินค้าของตัวเอง
+        Expected: ได้ 409
+        """
+        assert self.hold(authenticated_client, test_item, 1).status_code == 409
+
+    def test_checkout_respects_others_holds_and_releases_own(
+        self,
+        authenticated_client: TestClient,
+        db_session: Session,
+        test_user: User,
+        test_category: Category,
+        sellers: list[User],
+    ):
+        """
+        Test: checkout เมื่อมีทั้ง hold ของตัวเองและของผู้ซื้ออื่น
+        Expected: บรรทัดที่เหลือไม่พอถูกปฏิเสธ บรรทัดที่ซื้อแล้วไม่มี hold ค้าง
+        """
+        alice, bob = sellers
+        held = make_item(db_session, alice, test_category, "Mine", quantity=3)
+        contested = make_item(db_session, alice, test_category, "Theirs", quantity=3)
+        as_bob = headers_for(bob)
+        assert self.hold(authenticated_client, held, 2).status_code == 200
+        assert self.hold(authenticated_client, contested, 2, headers=as_bob).status_code == 200
+        assert self.hold(authenticated_client, held, 1, headers=as_bob).status_code == 200
+        add(authenticated_client, contested, 2)
+
+        data = authenticated_client.post("/v1/cart/checkout").json()
+
+        lines = {line["product_id"]: line for line in data["lines"]}
+        assert lines[held.id]["status"] == "created"
+        assert lines[contested.id]["status"] == "insufficient_stock"
+        assert lines[contested.id]["available"] == 1
+        assert cart_holds.held_by_others(held.id, alice.id) == 1  # bob's hold stays
+
+    def test_failed_add_releases_hold(
+        self,
+        authenticated_client: TestClient,
+        db_session: Session,
+        test_user: User,
+        test_category: Category,
+        sellers: list[User],
+        monkeypatch,
+    ):
+        """
+        Test: เพิ่มสินค้าพร้อม hold แต่ commit ล้มเหลว
+        Expected: error ถูกส่งต่อ และไม่มี hold ค้างใน ledger
+        """
+        alice, bob = sellers
+        item = make_item(db_session, alice, test_category, "Held", quantity=3)
+        authenticated_client.get("/v1/cart/")  # create the cart first
+
+        def broken_commit():
+            raise RuntimeError("database went away")
+
+        monkeypatch.setattr(db_session, "commit", broken_commit)
+        with pytest.raises(RuntimeError):
+            self.hold(authenticated_client, item, 2)
+
+        assert cart_holds.held_by_others(item.id, bob.id) == 0
+        assert cart_holds.expires_at(item.id, test_user.id) is None
+
+    def test_remove_releases_hold(
+        self,
+        authenticated_client: TestClient,
+        db_session: Session,
+        test_category: Category,
+        sellers: list[User],
+    ):
+        """
+        Test: ลบบรรทัดที่มี hold ออกจากตะกร้า
+        Expected: hold ถูกยกเลิกทันที
+        """
+        alice, bob = sellers
+        item = make_item(db_session, alice, test_category, "Held", quantity=3)
+        line_id = self.hold(authenticated_client, item, 2).json()["id"]
+
+        authenticated_client.delete(f"/v1/cart/remove/{line_id}")
+
+        assert cart_holds.held_by_others(item.id, bob.id) == 0
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestCartHoldLedger:
+    """Test suite for the in-memory hold ledger and its timer wheel"""
+
+    def make_ledger(self, **kwargs) -> tuple[CartHoldLedger, FakeClock]:
+        clock = FakeClock()
+        kwargs.setdefault("ttl_seconds", 10)
+        ledger = CartHoldLedger(tick_seconds=1, wheel_slots=8, clock=clock, **kwargs)
+        return ledger, clock
+
+    def test_hold_expires_after_ttl(self):
+        """
+        Test: เลื่อนเวลาผ่าน TTL ของ hold
+        Expected: hold หมดอายุและคืนจำนวนให้ผู้ซื้ออื่น
+        """
+        ledger, clock = self.make_ledger()
+        ledger.hold(1, 10, 2, available=5)
+
+        clock.now += 9.5
+        assert ledger.advance() == 0
+        assert ledger.held_by_others(1, 20) == 2
+
+        clock.now += 1
+        assert ledger.advance() == 1
+        assert ledger.held_by_others(1, 20) == 0
+
+    def test_refreshed_hold_is_not_expired_early(self):
+        """
+        Test: hold ซ้ำก่อนหมดอายุ (entry เก่ายังอยู่ใน slot เดิมของ wheel)
+        Expected: หมดอายุตามเวลาใหม่เท่านั้น
+        """
+        ledger, clock = self.make_ledger()
+        ledger.hold(1, 10, 1, available=5)
+        clock.now += 5
+        ledger.hold(1, 10, 3, available=5)
+
+        clock.now += 6
+        assert ledger.advance() == 0
+        assert ledger.held_by_others(1, 20) == 3
+
+        clock.now += 5
+        assert ledger.advance() == 1
+
+    def test_ttl_longer_than_wheel(self):
+        """
+        Test: TTL ยาวกว่าหนึ่งรอบของ wheel (8 slots)
+        Expected: hold อยู่รอดรอบแรกและหมดอายุในรอบที่ถูกต้อง
+        """
+        ledger, clock = self.make_ledger(ttl_seconds=20)
+        ledger.hold(1, 10, 1, available=5)
+
+        for _ in range(19):
+            clock.now += 1
+            assert ledger.advance() == 0
+
+        clock.now += 1
+        assert ledger.advance() == 1
+
+    def test_hold_rejected_when_stock_is_held(self):
+        """
+        Test: hold เกินจำนวนที่เหลือหลังหัก hold ของคนอื่น
+        Expected: ได้ None และ hold เดิมของตัวเองไม่ถูกนับซ้ำ
+        """
+        ledger, _ = self.make_ledger()
+        ledger.hold(1, 10, 3, available=5)
+
+        assert ledger.hold(1, 20, 3, available=5) is None
+        assert ledger.hold(1, 10, 5, available=5) is not None
+
+    def test_persist_and_load(
+        self, db_session: Session, test_user: User, test_item: Item
+    ):
+        """
+        Test: บันทึก holds ลง cart_holds แล้วโหลดใน ledger ใหม่
+        Expected: hold ที่ยังไม่หมดอายุกลับมาครบ และ hold ที่ถูกยกเลิกถูกลบจากตาราง
+        """
+        ledger, clock = self.make_ledger(ttl_seconds=60)
+        other = make_seller(db_session, "carol")
+        ledger.hold(test_item.id, test_user.id, 2, available=10)
+        ledger.hold(test_item.id, other.id, 1, available=10)
+        assert ledger.persist(db_session) == 2
+
+        ledger.release(test_item.id, other.id)
+        assert ledger.persist(db_session) == 1
+        assert ledger.persist(db_session) == 0
+        assert db_session.scalars(select(CartHold.user_id)).all() == [test_user.id]
+
+        restored, restored_clock = self.make_ledger()
+        restored_clock.now = clock.now
+        assert restored.load(db_session) == 1
+        assert restored.held_by_others(test_item.id, other.id) == 2
+        assert restored.expires_at(test_item.id, test_user.id) == ledger.expires_at(
+            test_item.id, test_user.id
+        )
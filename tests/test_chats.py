@@ -0,0 +1,886 @@
+"""
+Unit tests for chat endpoints (history, inbox, real-time delivery)
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from starlette.websockets import WebSocketDisconnect
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+
+from app.core.chat_hub import SLOW_CONSUMER_CLOSE_CODE, ChatHub, InMemoryBroker
+from app.core.chat_pairs import dedupe_direct_chats
+from app.core.chat_presence import PresenceTracker, presence
+from app.core.chat_receipts import read_receipts
+from app.core.chat_write_buffer import ChatWriteBuffer
+from app.core.security import create_access_token
+from app.db.models.Chats.chat import Chat
+from app.db.models.Chats.chat_member import ChatMember
+from app.db.models.Chats.chat_message import ChatMessage
+from app.db.models.Users.User import User
+from app.routers.v1 import chat_router
+from tests.conftest import TestingSessionLocal
+
+
+def make_user(db_session: Session, name: str) -> User:
+    user = User(
+        username=name, full_name=name, email=f"{name}@example.com", password="x"
+    )
+    db_session.add(user)
+    db_session.commit()
+    return user
+
+
+def token_for(user: User) -> str:
+    return create_access_token(data={"sub": user.username, "id": user.id})
+
+
+@pytest.fixture
+def other_user(db_session: Session) -> User:
+    return make_user(db_session, "friend")
+
+
+@pytest.fixture
+def chat_id(authenticated_client: TestClient, other_user: User) -> int:
+    response = authenticated_client.post(
+        "/v1/chats/", json={"participant_id": other_user.id}
+    )
+    assert response.status_code == 200
+    return response.json()["id"]
+
+
+def send(client: TestClient, chat_id: int, text: str) -> int:
+    response = client.post(
+        "/v1/chats/messages", json={"chat_id": chat_id, "text": text, "image_url": None}
+    )
+    assert response.status_code == 200
+    return response.json()["id"]
+
+
+class TestCreateChat:
+    """Test suite for POST /v1/chats/"""
+
+    def test_pair_reuses_existing_chat(
+        self,
+        authenticated_client: TestClient,
+        db_session: Session,
+        test_user: User,
+        other_user: User,
+        chat_id: int,
+    ):
+        """
+        Test: เปิดแชทกับคนเดิมซ้ำ ทั้งจากฝั่งเราและฝั่งอีกฝ่าย
+        Expected: ได้แชทเดิมทุกครั้ง และมีสมาชิกแค่ 2 แถว
+        """
+        again = authenticated_client.post(
+            "/v1/chats/", json={"participant_id": other_user.id}
+        )
+        reverse = authenticated_client.post(
+            "/v1/chats/",
+            json={"participant_id": test_user.id},
+            headers=as_user(other_user),
+        )
+
+        assert again.json()["id"] == chat_id
+        assert reverse.json()["id"] == chat_id
+        assert db_session.scalar(select(func.count()).select_from(Chat)) == 1
+        assert db_session.scalar(select(func.count()).select_from(ChatMember)) == 2
+
+    def test_cannot_chat_with_yourself(
+        self, authenticated_client: TestClient, test_user: User
+    ):
+        """
+        Test: เปิดแชทกับตัวเอง
+        Expected: ได้รับ status 400
+        """
+        response = authenticated_client.post(
+            "/v1/chats/", json={"participant_id": test_user.id}
+        )
+        assert response.status_code == 400
+
+
+class TestDedupeDirectChats:
+    """Test suite for merging duplicate 1:1 chats created before the pair key"""
+
+    def make_legacy_chat(
+        self, db_session: Session, users: list[User], texts: list[str]
+    ) -> Chat:
+        chat = Chat()
+        db_session.add(chat)
+        db_session.flush()
+        db_session.add_all(ChatMember(chat_id=chat.id, user_id=u.id) for u in users)
+        db_session.add_all(
+            ChatMessage(chat_id=chat.id, sender_id=users[0].id, text=text)
+            for text in texts
+        )
+        db_session.commit()
+        return chat
+
+    def test_duplicates_are_merged_into_oldest(
+        self, db_session: Session, test_user: User, other_user: User
+    ):
+        """
+        Test: คู่เดียวกันมี 3 แชทจากโค้ดเดิม และอีกคู่มีแชทเดียว
+        Expected: เหลือแชทเก่าสุดแชทเดียวต่อคู่ ข้อความย้ายมาครบ read marker ไกลสุดถูกเก็บ
+        """
+        pair = [test_user, other_user]
+        keeper = self.make_legacy_chat(db_session, pair, ["a"])
+        self.make_legacy_chat(db_session, pair, ["b", "c"])
+        newest = self.make_legacy_chat(db_session, pair[::-1], ["d"])
+        lonely = self.make_legacy_chat(
+            db_session, [test_user, make_user(db_session, "solo")], ["e"]
+        )
+        last_id = db_session.scalar(
+            select(ChatMessage.id).where(ChatMessage.chat_id == newest.id)
+        )
+        db_session.execute(
+            ChatMember.__table__.update()
+            .where(ChatMember.chat_id == newest.id, ChatMember.user_id == test_user.id)
+            .values(last_read_message_id=last_id)
+        )
+        db_session.commit()
+
+        result = dedupe_direct_chats(db_session)
+
+        assert result == {"pairs": 2, "merged": 2, "messages_moved": 3}
+        db_session.expire_all()
+        chats = {c.id: c for c in db_session.scalars(select(Chat))}
+        assert set(chats) == {keeper.id, lonely.id}
+        kept = chats[keeper.id]
+        assert (kept.user_low_id, kept.user_high_id) == (
+            min(test_user.id, other_user.id),
+            max(test_user.id, other_user.id),
+        )
+        assert kept.last_message_id == last_id
+        texts = db_session.scalars(
+            select(ChatMessage.text)
+            .where(ChatMessage.chat_id == keeper.id)
+            .order_by(ChatMessage.id)
+        ).all()
+        assert texts == ["a", "b", "c", "d"]
+        marker = db_session.scalar(
+            select(ChatMember.last_read_message_id).where(
+                ChatMember.chat_id == keeper.id, ChatMember.user_id == test_user.id
+            )
+        )
+        assert marker == last_id
+
+
+class TestChatHistory:
+    """Test suite for GET /v1/chats/{chat_id}/messages"""
+
+    def test_pages_newest_first(self, authenticated_client: TestClient, chat_id: int):
+        """
+        Test: ดึงประวัติแชทครั้งละ 2 ข้อความแล้วเลื่อนด้วย before
+        Expected: ได้ข้อความใหม่สุดก่อนและ X-Has-More บอกว่ามีหน้าถัดไปหรือไม่
+        """
+        ids = [send(authenticated_client, chat_id, f"m{n}") for n in range(5)]
+        url = f"/v1/chats/{chat_id}/messages"
+
+        first = authenticated_client.get(url, params={"limit": 2})
+        assert [m["id"] for m in first.json()] == [ids[4], ids[3]]
+        assert first.headers["X-Has-More"] == "true"
+
+        second = authenticated_client.get(url, params={"limit": 2, "before": ids[3]})
+        assert [m["id"] for m in second.json()] == [ids[2], ids[1]]
+
+        last = authenticated_client.get(url, params={"limit": 2, "before": ids[1]})
+        assert [m["id"] for m in last.json()] == [ids[0]]
+        assert last.headers["X-Has-More"] == "false"
+
+    def test_after_returns_following_messages(
+        self, authenticated_client: TestClient, chat_id: int
+    ):
+        """
+        Test: ดึงข้อความที่ตามหลัง message id ที่เคยเห็น
+        Expected: ได้ข้อความถัดไปที่เก่าสุดก่อนเต็มหน้า แต่เรียงใหม่สุดก่อนในหน้า
+        """
+        ids = [send(authenticated_client, chat_id, f"m{n}") for n in range(5)]
+
+        response = authenticated_client.get(
+            f"/v1/chats/{chat_id}/messages", params={"after": ids[0], "limit": 2}
+        )
+
+        assert [m["id"] for m in response.json()] == [ids[2], ids[1]]
+        assert response.headers["X-Has-More"] == "true"
+
+    def test_before_and_after_together(
+        self, authenticated_client: TestClient, chat_id: int
+    ):
+        """
+        Test: ส่งทั้ง before และ after
+        Expected: ได้รับ status 400
+        """
+        response = authenticated_client.get(
+            f"/v1/chats/{chat_id}/messages", params={"after": 1, "before": 5}
+        )
+        assert response.status_code == 400
+
+    def test_page_size_is_capped(self, authenticated_client: TestClient, chat_id: int):
+        """
+        Test: ขอ limit เกินค่าสูงสุด
+        Expected: ได้รับ status 422
+        """
+        response = authenticated_client.get(
+            f"/v1/chats/{chat_id}/messages", params={"limit": 1000}
+        )
+        assert response.status_code == 422
+
+    def test_non_member_is_forbidden(
+        self, client: TestClient, db_session: Session, chat_id: int
+    ):
+        """
+        Test: ผู้ที่ไม่ใช่สมาชิกดึงประวัติแชท
+        Expected: ได้รับ status 403
+        """
+        stranger = make_user(db_session, "stranger")
+        response = client.get(
+            f"/v1/chats/{chat_id}/messages",
+            headers={"Authorization": f"Bearer {token_for(stranger)}"},
+        )
+        assert response.status_code == 403
+
+
+def as_user(user: User) -> dict:
+    return {"Authorization": f"Bearer {token_for(user)}"}
+
+
+class TestChatInbox:
+    """Test suite for GET /v1/chats/my and POST /v1/chats/{chat_id}/read"""
+
+    def test_inbox_shows_last_message_counterpart_and_unread(
+        self,
+        authenticated_client: TestClient,
+        db_session: Session,
+        other_user: User,
+        chat_id: int,
+    ):
+        """
+        Test: อีกฝ่ายส่งข้อความมา 2 ข้อความ และเราตอบ 1 ข้อความ
+        Expected: inbox แสดงข้อความล่าสุด คู่สนทนา และ unread นับเฉพาะข้อความของอีกฝ่าย
+        """
+        client = authenticated_client
+        for text in ("hi", "are you there?"):
+            client.post(
+                "/v1/chats/messages",
+                json={"chat_id": chat_id, "text": text, "image_url": None},
+                headers=as_user(other_user),
+            )
+        reply_id = send(client, chat_id, "yes")
+
+        [entry] = client.get("/v1/chats/my").json()
+
+        assert entry["id"] == chat_id
+        assert entry["last_message_id"] == reply_id
+        assert entry["last_message"]["text"] == "yes"
+        assert entry["counterpart"]["username"] == other_user.username
+        assert entry["unread_count"] == 2
+
+    def test_inbox_orders_by_latest_message(
+        self,
+        authenticated_client: TestClient,
+        db_session: Session,
+        chat_id: int,
+    ):
+        """
+        Test: มี 2 แชทและส่งข้อความในแชทที่สร้างก่อน
+        Expected: แชทที่มีข้อความล่าสุดอยู่บนสุด
+        """
+        third = make_user(db_session, "third")
+        newer_chat = authenticated_client.post(
+            "/v1/chats/", json={"participant_id": third.id}
+        ).json()["id"]
+        send(authenticated_client, chat_id, "bump")
+
+        inbox = authenticated_client.get("/v1/chats/my").json()
+
+        assert [entry["id"] for entry in inbox] == [chat_id, newer_chat]
+        assert inbox[1]["last_message"] is None
+
+    def test_late_commit_does_not_move_last_message_backwards(
+        self,
+        authenticated_client: TestClient,
+        db_session: Session,
+        chat_id: int,
+    ):
+        """
+        Test: การส่งที่ได้ message id ต่ำกว่า commit หลังข้อความที่ใหม่กว่า
+        Expected: last_message_id ของแชทยังชี้ไปที่ข้อความใหม่สุด
+        """
+        from app.core.chat_messages import _bump_chat_stmt
+
+        older_id = send(authenticated_client, chat_id, "older")
+        newer_id = send(authenticated_client, chat_id, "newer")
+        older = db_session.get(ChatMessage, older_id)
+
+        db_session.execute(
+            _bump_chat_stmt,
+            [
+                {
+                    "b_chat_id": chat_id,
+                    "b_message_id": older_id,
+                    "b_send_at": older.send_at,
+                }
+            ],
+        )
+        db_session.commit()
+
+        [entry] = authenticated_client.get("/v1/chats/my").json()
+        assert entry["last_message_id"] == newer_id
+        assert entry["last_message"]["text"] == "newer"
+
+    def test_mark_read_clears_unread(
+        self,
+        authenticated_client: TestClient,
+        other_user: User,
+        chat_id: int,
+    ):
+        """
+        Test: อ่านถึงข้อความแรกแล้วอ่านทั้งหมด และพยายามย้อน marker กลับ
+        Expected: unread ลดลงตามลำดับ และ marker ไม่ถอยหลัง
+        """
+        client = authenticated_client
+        ids = [
+            client.post(
+                "/v1/chats/messages",
+                json={"chat_id": chat_id, "text": f"m{n}", "image_url": None},
+                headers=as_user(other_user),
+            ).json()["id"]
+            for n in range(3)
+        ]
+
+        client.post(f"/v1/chats/{chat_id}/read", json={"message_id": ids[0]})
+        assert client.get("/v1/chats/my").json()[0]["unread_count"] == 2
+
+        response = client.post(f"/v1/chats/{chat_id}/read")
+        assert response.json()["last_read_message_id"] == ids[2]
+        assert client.get("/v1/chats/my").json()[0]["unread_count"] == 0
+
+        response = client.post(f"/v1/chats/{chat_id}/read", json={"message_id": ids[0]})
+        assert response.json()["last_read_message_id"] == ids[2]
+
+
+class TestChatSearch:
+    """Test suite for GET /v1/chats/search"""
+
+    def test_searches_only_own_chats(
+        self,
+        authenticated_client: TestClient,
+        db_session: Session,
+        other_user: User,
+        chat_id: int,
+    ):
+        """
+        Test: ค้นหาคำที่มีทั้งในแชทของตัวเองและแชทที่ตัวเองไม่ได้เป็นสมาชิก
+        Expected: ได้เฉพาะข้อความจากแชทของตัวเอง และต้องมีครบทุกคำ
+        """
+        mine = send(authenticated_client, chat_id, "Blue bicycle for sale")
+        send(authenticated_client, chat_id, "red bicycle")
+        stranger = make_user(db_session, "stranger")
+        other_chat = authenticated_client.post(
+            "/v1/chats/",
+            json={"participant_id": other_user.id},
+            headers=as_user(stranger),
+        ).json()["id"]
+        authenticated_client.post(
+            "/v1/chats/messages",
+            json={"chat_id": other_chat, "text": "blue bicycle, used", "image_url": None},
+            headers=as_user(stranger),
+        )
+
+        response = authenticated_client.get(
+            "/v1/chats/search", params={"q": "bicycle BLUE"}
+        )
+
+        assert response.status_code == 200
+        assert [m["id"] for m in response.json()] == [mine]
+
+    def test_highlights_escaped_matches(
+        self, authenticated_client: TestClient, chat_id: int
+    ):
+        """
+        Test: ค้นหาข้อความที่มีอักขระ HTML
+        Expected: highlight escape HTML และครอบคำที่ตรงด้วย <mark>
+        """
+        send(authenticated_client, chat_id, "<b>camera</b> & lens")
+
+        results = authenticated_client.get(
+            "/v1/chats/search", params={"q": "camera"}
+        ).json()
+
+        assert results[0]["text"] == "<b>camera</b> & lens"
+        assert results[0]["highlight"] == (
+            "&lt;b&gt;<mark>camera</mark>&lt;/b&gt; &amp; lens"
+        )
+
+    def test_pages_with_before(self, authenticated_client: TestClient, chat_id: int):
+        """
+        Test: ค้นหาครั้งละ 2 ผลลัพธ์แล้วเลื่อนด้วย before
+        Expected: ได้ข้อความใหม่สุดก่อนและ X-Has-More บอกว่ามีหน้าถัดไปหรือไม่
+        """
+        ids = [send(authenticated_client, chat_id, f"lamp {n}") for n in range(3)]
+
+        first = authenticated_client.get(
+            "/v1/chats/search", params={"q": "lamp", "limit": 2}
+        )
+        assert [m["id"] for m in first.json()] == [ids[2], ids[1]]
+        assert first.headers["X-Has-More"] == "true"
+
+        last = authenticated_client.get(
+            "/v1/chats/search", params={"q": "lamp", "limit": 2, "before": ids[1]}
+        )
+        assert [m["id"] for m in last.json()] == [ids[0]]
+        assert last.headers["X-Has-More"] == "false"
+
+    def test_query_syntax_is_not_interpreted(
+        self, authenticated_client: TestClient, chat_id: int
+    ):
+        """
+        Test: ค้นหาด้วยคำที่เป็น syntax ของ full-text search (OR, *, ")
+        Expected: ถือเป็นคำธรรมดา ไม่เกิด error
+        """
+        send(authenticated_client, chat_id, "tripod")
+
+        response = authenticated_client.get(
+            "/v1/chats/search", params={"q": 'tripod OR "*'}
+        )
+        assert response.status_code == 200
+        assert response.json() == []
+        assert authenticated_client.get(
+            "/v1/chats/search", params={"q": '"*'}
+        ).json() == []
+
+
+class TestReadReceipts:
+    """Test suite for coalesced read receipts"""
+
+    def test_reads_are_coalesced_until_flush(
+        self,
+        db_session: Session,
+        authenticated_client: TestClient,
+        test_user: User,
+        other_user: User,
+        chat_id: int,
+    ):
+        """
+        Test: อ่านแชทหลายครั้งก่อน flush
+        Expected: ยังไม่เขียนลง database, receipts เห็นค่าล่าสุดทันที
+            และ flush เขียน marker สูงสุดครั้งเดียว
+        """
+        client = authenticated_client
+        client.headers.update(as_user(other_user))
+        ids = [send(client, chat_id, f"m{n}") for n in range(3)]
+        client.headers.update(as_user(test_user))
+
+        client.post(f"/v1/chats/{chat_id}/read", json={"message_id": ids[0]})
+        client.post(f"/v1/chats/{chat_id}/read", json={"message_id": ids[1]})
+        client.post(f"/v1/chats/{chat_id}/read", json={"message_id": ids[0]})
+
+        stored = select(ChatMember.last_read_message_id).where(
+            ChatMember.chat_id == chat_id, ChatMember.user_id == test_user.id
+        )
+        assert db_session.scalar(stored) is None
+
+        receipts = client.get(f"/v1/chats/{chat_id}/receipts").json()
+        assert {r["user_id"]: r["last_read_message_id"] for r in receipts} == {
+            test_user.id: ids[1],
+            other_user.id: None,
+        }
+
+        assert read_receipts.flush(db_session) == 1
+        assert db_session.scalar(stored) == ids[1]
+        assert read_receipts.stats()["coalesced"] == 1
+
+    def test_flush_never_moves_marker_back(
+        self, db_session: Session, test_user: User, chat_id: int
+    ):
+        """
+        Test: flush marker ที่เก่ากว่าค่าใน database
+        Expected: marker ใน database ไม่ถอยหลัง
+        """
+        member = db_session.scalar(
+            select(ChatMember).where(
+                ChatMember.chat_id == chat_id, ChatMember.user_id == test_user.id
+            )
+        )
+        member.last_read_message_id = 10
+        db_session.commit()
+
+        read_receipts.record(chat_id, test_user.id, 5)
+        read_receipts.flush(db_session)
+        db_session.refresh(member)
+        assert member.last_read_message_id == 10
+
+    def test_receipts_require_membership(
+        self, client: TestClient, db_session: Session, chat_id: int
+    ):
+        """
+        Test: คนนอกขอ receipts ของแชท
+        Expected: 403
+        """
+        stranger = make_user(db_session, "stranger")
+        response = client.get(
+            f"/v1/chats/{chat_id}/receipts", headers=as_user(stranger)
+        )
+        assert response.status_code == 403
+
+    def test_read_event_is_pushed(
+        self,
+        authenticated_client: TestClient,
+        other_user: User,
+        chat_id: int,
+    ):
+        """
+        Test: อ่านข้อความขณะที่ผู้ส่งเชื่อมต่อ WebSocket อยู่
+        Expected: ผู้ส่งได้รับ event "read" ทันที
+        """
+        message_id = send(authenticated_client, chat_id, "hello")
+        url = f"/v1/chats/ws?token={token_for(other_user)}"
+        with authenticated_client.websocket_connect(url) as ws:
+            authenticated_client.post(
+                f"/v1/chats/{chat_id}/read", headers=as_user(other_user)
+            )
+            event = ws.receive_json()
+        assert event == {
+            "type": "read",
+            "data": {
+                "chat_id": chat_id,
+                "user_id": other_user.id,
+                "last_read_message_id": message_id,
+            },
+        }
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestPresence:
+    """Test suite for online presence"""
+
+    def test_heartbeat_expiry(self):
+        """
+        Test: ไม่มี heartbeat เกิน TTL
+        Expected: เฉพาะผู้ใช้ที่เงียบเกิน TTL ถูกนับว่า offline
+        """
+        clock = FakeClock()
+        tracker = PresenceTracker(ttl_seconds=30, clock=clock)
+        assert tracker.heartbeat(1) is True
+        assert tracker.heartbeat(1) is False
+        clock.now += 20
+        tracker.heartbeat(2)
+        clock.now += 15
+
+        assert tracker.expire() == [1]
+        assert tracker.is_online(2) and not tracker.is_online(1)
+        assert tracker.last_seen_at(1) is not None
+
+    def test_contact_sees_online_and_offline(
+        self,
+        authenticated_client: TestClient,
+        test_user: User,
+        other_user: User,
+        chat_id: int,
+    ):
+        """
+        Test: อีกฝ่ายเชื่อมต่อแล้วปิด WebSocket
+        Expected: ได้รับ event presence online แล้ว offline และ GET presence ตรงกัน
+        """
+        mine = f"/v1/chats/ws?token={token_for(test_user)}"
+        theirs = f"/v1/chats/ws?token={token_for(other_user)}"
+        with authenticated_client.websocket_connect(mine) as ws:
+            with authenticated_client.websocket_connect(theirs):
+                online = ws.receive_json()
+                response = authenticated_client.get("/v1/chats/presence")
+                assert response.json()[0]["online"] is True
+            offline = ws.receive_json()
+
+        assert online["type"] == "presence"
+        assert online["data"]["user_id"] == other_user.id
+        assert online["data"]["online"] is True
+        assert offline["data"]["online"] is False
+        assert offline["data"]["last_seen_at"] is not None
+        assert not presence.is_online(other_user.id)
+
+
+    def test_ping_after_expiry_announces_online_again(
+        self,
+        authenticated_client: TestClient,
+        test_user: User,
+        other_user: User,
+        chat_id: int,
+    ):
+        """
+        Test: heartbeat ของอีกฝ่ายหมดอายุขณะที่ socket ยังเปิด แล้วอีกฝ่ายส่ง ping
+        Expected: ได้รับ event presence online อีกครั้ง
+        """
+        mine = f"/v1/chats/ws?token={token_for(test_user)}"
+        theirs = f"/v1/chats/ws?token={token_for(other_user)}"
+        with authenticated_client.websocket_connect(mine) as ws:
+            with authenticated_client.websocket_connect(theirs) as their_ws:
+                assert ws.receive_json()["data"]["online"] is True
+                presence.leave(other_user.id)  # as if the heartbeat expired
+
+                their_ws.send_text("ping")
+                assert their_ws.receive_json() == {"type": "pong"}
+                back = ws.receive_json()
+
+        assert back["type"] == "presence"
+        assert back["data"]["user_id"] == other_user.id
+        assert back["data"]["online"] is True
+
+
+class TestChatSocket:
+    """Test suite for WS /v1/chats/ws"""
+
+    def test_requires_valid_token(self, client: TestClient):
+        """
+        Test: เชื่อมต่อ WebSocket ด้วย token ไม่ถูกต้อง
+        Expected: ถูกปิดด้วย code 1008
+        """
+        with pytest.raises(WebSocketDisconnect) as exc:
+            with client.websocket_connect("/v1/chats/ws?token=invalid") as ws:
+                ws.receive_json()
+        assert exc.value.code == 1008
+
+    def test_member_receives_new_message(
+        self,
+        authenticated_client: TestClient,
+        other_user: User,
+        chat_id: int,
+    ):
+        """
+        Test: ส่งข้อความขณะที่อีกฝ่ายเชื่อมต่อ WebSocket อยู่
+        Expected: อีกฝ่ายได้รับข้อความทันทีโดยไม่ต้อง poll
+        """
+        url = f"/v1/chats/ws?token={token_for(other_user)}"
+        with authenticated_client.websocket_connect(url) as ws:
+            ws.send_text("ping")
+            assert ws.receive_json() == {"type": "pong"}
+
+            sent = authenticated_client.post(
+                "/v1/chats/messages",
+                json={"chat_id": chat_id, "text": "hello", "image_url": None},
+            ).json()
+
+            event = ws.receive_json()
+        assert event["type"] == "message"
+        assert event["data"]["id"] == sent["id"]
+        assert event["data"]["text"] == "hello"
+
+    def test_bearer_header_is_accepted(
+        self, client: TestClient, other_user: User
+    ):
+        """
+        Test: ส่ง token ผ่าน Authorization header แทน query string
+        Expected: เชื่อมต่อได้
+        """
+        headers = {"Authorization": f"Bearer {token_for(other_user)}"}
+        with client.websocket_connect("/v1/chats/ws", headers=headers) as ws:
+            ws.send_text("ping")
+            assert ws.receive_json() == {"type": "pong"}
+
+
+@pytest.fixture
+def write_buffer():
+    buffer = ChatWriteBuffer(
+        session_factory=TestingSessionLocal,
+        enabled=True,
+        max_delay_ms=100,
+        ack_timeout=5,
+    )
+    yield buffer
+    buffer.close()
+
+
+class TestChatWriteBuffer:
+    """Test suite for group commit of chat messages"""
+
+    def test_concurrent_messages_share_commits(
+        self, db_session: Session, test_user: User, chat_id: int, write_buffer
+    ):
+        """
+        Test: ส่งข้อความ 20 ข้อความพร้อมกัน
+        Expected: ทุกข้อความถูกบันทึกโดยใช้ batch น้อยกว่าจำนวนข้อความ
+            และ last_message ของ chat ชี้ไปที่ข้อความล่าสุด
+        """
+        rows = [
+            {"chat_id": chat_id, "sender_id": test_user.id, "text": f"m{n}"}
+            for n in range(20)
+        ]
+        with ThreadPoolExecutor(max_workers=20) as pool:
+            messages = list(pool.map(write_buffer.submit, rows))
+
+        ids = {message.id for message in messages}
+        assert len(ids) == 20
+        stats = write_buffer.stats()
+        assert stats["messages"] == 20
+        assert stats["batches"] < 20
+
+        db_session.expire_all()
+        assert db_session.get(Chat, chat_id).last_message_id == max(ids)
+
+    def test_async_submit_returns_committed_message(
+        self, test_user: User, chat_id: int, write_buffer
+    ):
+        """
+        Test: ส่งข้อความ 5 ข้อความพร้อมกันผ่าน submit_async บน event loop เดียว
+        Expected: แต่ละ request ได้ข้อความของตัวเองกลับมา
+        """
+
+        async def send_all():
+            return await asyncio.gather(
+                *(
+                    write_buffer.submit_async(
+                        {"chat_id": chat_id, "sender_id": test_user.id, "text": f"a{n}"}
+                    )
+                    for n in range(5)
+                )
+            )
+
+        messages = asyncio.run(send_all())
+
+        assert [message.text for message in messages] == [f"a{n}" for n in range(5)]
+        assert write_buffer.stats()["messages"] == 5
+
+    def test_postgres_batch_pairs_each_row_with_its_message(self):
+        """
+        Test: compile statement ของ PostgreSQL สำหรับข้อความหนึ่งข้อความ
+        Expected: INSERT ทีละแถวพร้อม UPDATE chats ใน statement เดียว
+        """
+        from datetime import datetime
+
+        from sqlalchemy.dialects import postgresql
+
+        from app.core.chat_messages import _insert_and_bump_stmt
+
+        value = {
+            "chat_id": 1,
+            "sender_id": 2,
+            "text": "hi",
+            "image_url": None,
+            "send_at": datetime(2026, 1, 1),
+        }
+        sql = str(_insert_and_bump_stmt(value).compile(dialect=postgresql.dialect()))
+
+        assert sql.startswith("WITH inserted AS")
+        assert sql.count("INSERT INTO chat_messages") == 1
+        assert "UPDATE chats" in sql
+
+    def test_bad_message_does_not_fail_batch(
+        self, test_user: User, chat_id: int, write_buffer
+    ):
+        """
+        Test: batch ที่มีข้อความหนึ่งบันทึกไม่ได้
+        Expected: เฉพาะข้อความนั้นได้ error ข้อความอื่นถูกบันทึก
+        """
+        rows = [
+            {"chat_id": chat_id, "sender_id": test_user.id, "text": "ok 1"},
+            {"chat_id": None, "sender_id": test_user.id, "text": "broken"},
+            {"chat_id": chat_id, "sender_id": test_user.id, "text": "ok 2"},
+        ]
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            futures = [pool.submit(write_buffer.submit, row) for row in rows]
+
+        assert futures[0].result().text == "ok 1"
+        assert futures[2].result().text == "ok 2"
+        with pytest.raises(IntegrityError):
+            futures[1].result()
+        assert write_buffer.stats()["failed"] == 1
+
+    def test_route_acknowledges_after_commit(
+        self,
+        monkeypatch,
+        authenticated_client: TestClient,
+        other_user: User,
+        chat_id: int,
+        write_buffer,
+    ):
+        """
+        Test: ส่งข้อความผ่าน API เมื่อเปิด write buffer
+        Expected: ได้ id ของข้อความที่ commit แล้ว และอีกฝ่ายได้รับผ่าน WebSocket
+        """
+        monkeypatch.setattr(chat_router, "chat_write_buffer", write_buffer)
+        url = f"/v1/chats/ws?token={token_for(other_user)}"
+        with authenticated_client.websocket_connect(url) as ws:
+            sent = authenticated_client.post(
+                "/v1/chats/messages",
+                json={"chat_id": chat_id, "text": "buffered", "image_url": None},
+            )
+            event = ws.receive_json()
+
+        assert sent.status_code == 200
+        assert event["data"]["id"] == sent.json()["id"]
+        assert write_buffer.stats()["messages"] == 1
+
+        history = authenticated_client.get(f"/v1/chats/{chat_id}/messages").json()
+        assert [m["text"] for m in history] == ["buffered"]
+
+
+class FakeSocket:
+    def __init__(self, stalled: bool = False):
+        self.stalled = stalled
+        self.sent: list[dict] = []
+        self.close_code = None
+
+    async def send_json(self, data: dict) -> None:
+        if self.stalled:
+            await asyncio.Event().wait()
+        self.sent.append(data)
+
+    async def close(self, code: int = 1000, reason: str = "") -> None:
+        self.close_code = code
+
+
+class TestChatHub:
+    """Test suite for the pub/sub hub"""
+
+    def test_fan_out_to_recipients_only(self):
+        """
+        Test: publish event ให้สมาชิกบางคน
+        Expected: เฉพาะ socket ของผู้รับได้รับ event
+        """
+
+        async def scenario():
+            hub = ChatHub(broker=InMemoryBroker(), queue_size=10, send_timeout=1)
+            alice, bob, carol = FakeSocket(), FakeSocket(), FakeSocket()
+            for user_id, socket in ((1, alice), (2, bob), (3, carol)):
+                await hub.connect(socket, user_id)
+
+            hub.publish([1, 2], {"type": "message"})
+            await asyncio.sleep(0.01)
+            return alice, bob, carol
+
+        alice, bob, carol = asyncio.run(scenario())
+        assert alice.sent == bob.sent == [{"type": "message"}]
+        assert carol.sent == []
+
+    def test_slow_consumer_is_disconnected(self):
+        """
+        Test: client ไม่อ่านข้อมูลจน queue เต็ม
+        Expected: ถูกปิดด้วย code 1013 และถูกนับใน slow_disconnects
+        """
+
+        async def scenario():
+            hub = ChatHub(broker=InMemoryBroker(), queue_size=2, send_timeout=60)
+            slow = FakeSocket(stalled=True)
+            subscriber = await hub.connect(slow, 1)
+            for n in range(5):
+                hub.publish([1], {"n": n})
+            await asyncio.sleep(0.01)
+            await hub.disconnect(subscriber)
+            return hub, slow
+
+        hub, slow = asyncio.run(scenario())
+        assert slow.close_code == SLOW_CONSUMER_CLOSE_CODE
+        assert hub.stats()["slow_disconnects"] == 1
+        assert hub.stats()["sockets"] == 0
@@ -0,0 +1,287 @@
+"""
+Unit tests for the seller sales dashboard (seller_daily_sales rollup)
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+
+import bcrypt
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.sales_rollup import rebuild_sales_rollup
+from app.core.security import create_access_token
+from app.core.transaction_expiry import expire_stale_transactions
+from app.db.models.items.item import Item
+from app.db.models.SellerSales.daily_sales import SellerDailySales
+from app.db.models.Transactions.transaction_model import Transaction
+from app.db.models.Users.User import User
+
+
+@pytest.fixture
+def buyer(db_session: Session) -> User:
+    """สร้าง buyer ที่ซื้อสินค้าของ test_user"""
+    user = User(
+        username="buyer",
+        full_name="Buyer User",
+        email="buyer@example.com",
+        password=bcrypt.hashpw(b"password", bcrypt.gensalt()).decode("utf-8"),
+        is_active=True,
+    )
+    db_session.add(user)
+    db_session.commit()
+    db_session.refresh(user)
+    return user
+
+
+@pytest.fixture
+def buyer_headers(buyer: User) -> dict:
+    token = create_access_token(data={"sub": buyer.username, "id": buyer.id})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def seller_headers(test_user: User) -> dict:
+    token = create_access_token(data={"sub": test_user.username, "id": test_user.id})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def buy(client: TestClient, item_id: int, amount: int, buyer_headers, seller_headers):
+    """สร้าง transaction แล้วให้ทั้งสองฝ่าย accept"""
+    created = client.post(
+        "/v1/transaction/",
+        json={"item_id": item_id, "amount": amount},
+        headers=buyer_headers,
+    ).json()
+    body = {"accepter": True, "accept_at": datetime.now().isoformat()}
+    client.patch(
+        f"/v1/transaction/buyer/acception/{created['id']}",
+        json=body,
+        headers=buyer_headers,
+    )
+    response = client.patch(
+        f"/v1/transaction/seller/acception/{created['id']}",
+        json=body,
+        headers=seller_headers,
+    )
+    assert response.json()["status"] == "accepted"
+    return created["id"]
+
+
+class TestSalesDashboard:
+    """Test suite for GET /v1/dashboard/sales"""
+
+    def test_requires_authentication(self, client: TestClient):
+        """
+        Test: เรียก dashboard โดยไม่มี authentication
+        Expected: ได้รับ status 401
+        """
+        assert client.get("/v1/dashboard/sales").status_code == 401
+
+    def test_empty_dashboard(self, client: TestClient, seller_headers):
+        """
+        Test: ยังไม่มียอดขาย
+        Expected: totals, daily และ items ว่าง
+        """
+        response = client.get("/v1/dashboard/sales", headers=seller_headers)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["totals"] == {}
+        assert data["daily"] == []
+        assert data["items"] == []
+
+    def test_status_changes_move_between_buckets(
+        self,
+        client: TestClient,
+        test_item: Item,
+        buyer_headers,
+        seller_headers,
+    ):
+        """
+        Test: accept 2 รายการ, จ่ายเงิน 1 รายการ และยกเลิก 1 รายการ
+        Expected: แต่ละรายการอยู่ใน bucket ของสถานะล่าสุดเพียงที่เดียว
+        """
+        price = Decimal(str(test_item.price))
+        first = buy(client, test_item.id, 2, buyer_headers, seller_headers)
+        second = buy(client, test_item.id, 1, buyer_headers, seller_headers)
+
+        data = client.get("/v1/dashboard/sales", headers=seller_headers).json()
+        assert data["totals"]["accepted"]["transaction_count"] == 2
+        assert data["totals"]["accepted"]["units"] == 3
+        assert Decimal(data["totals"]["accepted"]["revenue"]) == price * 3
+
+        client.patch(f"/v1/transaction/paid/{first}", headers=buyer_headers)
+        client.patch(
+            f"/v1/transaction/transaction/cancel/{second}", headers=seller_headers
+        )
+
+        data = client.get("/v1/dashboard/sales", headers=seller_headers).json()
+        assert "accepted" not in data["totals"]
+        assert data["totals"]["paid"]["transaction_count"] == 1
+        assert data["totals"]["paid"]["units"] == 2
+        assert data["totals"]["cancelled"]["transaction_count"] == 1
+        assert data["totals"]["cancelled"]["units"] == 1
+        assert {row["status"] for row in data["daily"]} == {"paid", "cancelled"}
+        assert all(row["item_id"] == test_item.id for row in data["items"])
+
+    def test_pending_transactions_are_not_counted(
+        self, client: TestClient, test_item: Item, buyer_headers, seller_headers
+    ):
+        """
+        Test: มี transaction ที่ยัง pending
+        Expected: ไม่ถูกนับใน dashboard
+        """
+        client.post(
+            "/v1/transaction/",
+            json={"item_id": test_item.id, "amount": 1},
+            headers=buyer_headers,
+        )
+
+        data = client.get("/v1/dashboard/sales", headers=seller_headers).json()
+        assert data["totals"] == {}
+
+    def test_paying_unaccepted_books_nothing(
+        self, client: TestClient, test_item: Item, buyer_headers, seller_headers
+    ):
+        """
+        Test: จ่ายเงิน transaction ที่ยัง pending และที่ถูกยกเลิกแล้ว
+        Expected: ได้ 409 ทั้งคู่ และไม่มียอดขาย paid ใน dashboard
+        """
+        pending = client.post(
+            "/v1/transaction/",
+            json={"item_id": test_item.id, "amount": 1},
+            headers=buyer_headers,
+        ).json()["id"]
+        cancelled = buy(client, test_item.id, 1, buyer_headers, seller_headers)
+        client.patch(
+            f"/v1/transaction/transaction/cancel/{cancelled}", headers=seller_headers
+        )
+
+        for transaction_id in (pending, cancelled):
+            response = client.patch(
+                f"/v1/transaction/paid/{transaction_id}", headers=buyer_headers
+            )
+            assert response.status_code == 409
+
+        data = client.get("/v1/dashboard/sales", headers=seller_headers).json()
+        assert "paid" not in data["totals"]
+        assert data["totals"]["cancelled"]["transaction_count"] == 1
+
+    def test_only_own_sales(
+        self, client: TestClient, test_item: Item, buyer_headers, seller_headers
+    ):
+        """
+        Test: buyer เปิด dashboard ของตัวเอง
+        Expected: ไม่เห็นยอดขายของ seller
+        """
+        buy(client, test_item.id, 1, buyer_headers, seller_headers)
+
+        data = client.get("/v1/dashboard/sales", headers=buyer_headers).json()
+        assert data["totals"] == {}
+
+    def test_filters(
+        self, client: TestClient, test_item: Item, buyer_headers, seller_headers
+    ):
+        """
+        Test: กรองด้วย status, item_id และช่วงวันที่
+        Expected: ได้เฉพาะ buckets ที่ตรงเงื่อนไข
+        """
+        first = buy(client, test_item.id, 1, buyer_headers, seller_headers)
+        buy(client, test_item.id, 1, buyer_headers, seller_headers)
+        client.patch(f"/v1/transaction/paid/{first}", headers=buyer_headers)
+
+        paid = client.get(
+            "/v1/dashboard/sales?status=paid", headers=seller_headers
+        ).json()
+        assert set(paid["totals"]) == {"paid"}
+
+        other_item = client.get(
+            f"/v1/dashboard/sales?item_id={test_item.id + 1000}",
+            headers=seller_headers,
+        ).json()
+        assert other_item["totals"] == {}
+
+        past = client.get(
+            "/v1/dashboard/sales?date_from=2020-01-01&date_to=2020-01-31",
+            headers=seller_headers,
+        ).json()
+        assert past["totals"] == {}
+
+    def test_invalid_ranges(self, client: TestClient, seller_headers):
+        """
+        Test: ช่วงวันที่กลับด้าน, ยาวเกินไป หรือ status ที่ไม่ได้เก็บ
+        Expected: ได้รับ status 400
+        """
+        for query in (
+            "date_from=2025-02-01&date_to=2025-01-01",
+            "date_from=2020-01-01&date_to=2025-01-01",
+            "status=pending",
+        ):
+            response = client.get(f"/v1/dashboard/sales?{query}", headers=seller_headers)
+            assert response.status_code == 400
+
+
+class TestSalesRollupMaintenance:
+    """Test suite for rollup backfill and background expiry"""
+
+    def bucket_rows(self, db_session: Session) -> set:
+        return {
+            (row.seller_id, row.day, row.item_id, row.status, row.transaction_count, row.units)
+            for row in db_session.scalars(select(SellerDailySales))
+            if row.transaction_count
+        }
+
+    def test_rebuild_matches_incremental(
+        self,
+        client: TestClient,
+        db_session: Session,
+        test_item: Item,
+        buyer_headers,
+        seller_headers,
+    ):
+        """
+        Test: สร้าง rollup ใหม่ทั้งหมดด้วย backfill หลังจากอัปเดตแบบ incremental
+        Expected: ผลลัพธ์ตรงกัน
+        """
+        first = buy(client, test_item.id, 2, buyer_headers, seller_headers)
+        second = buy(client, test_item.id, 1, buyer_headers, seller_headers)
+        buy(client, test_item.id, 1, buyer_headers, seller_headers)
+        client.patch(f"/v1/transaction/paid/{first}", headers=buyer_headers)
+        client.patch(
+            f"/v1/transaction/transaction/cancel/{second}", headers=seller_headers
+        )
+        incremental = self.bucket_rows(db_session)
+
+        written = rebuild_sales_rollup(db_session)
+
+        assert written == 3
+        assert self.bucket_rows(db_session) == incremental
+
+    def test_expiry_moves_unpaid_to_cancelled(
+        self,
+        client: TestClient,
+        db_session: Session,
+        test_item: Item,
+        buyer_headers,
+        seller_headers,
+    ):
+        """
+        Test: transaction ที่ accept แล้วไม่จ่ายเงินถูก expire โดย background job
+        Expected: ย้ายจาก accepted ไป cancelled ใน rollup
+        """
+        transaction_id = buy(client, test_item.id, 1, buyer_headers, seller_headers)
+        transaction = db_session.get(Transaction, transaction_id)
+        transaction.updated_at = datetime.now(ZoneInfo("Asia/Bangkok")) - timedelta(
+            days=10
+        )
+        db_session.commit()
+
+        expire_stale_transactions(db_session)
+
+        data = client.get("/v1/dashboard/sales", headers=seller_headers).json()
+        assert "accepted" not in data["totals"]
+        assert data["totals"]["cancelled"]["transaction_count"] == 1
@@ -3,13 +3,24 @@ Unit tests for item endpoints
 """
 
 import pytest
+from sqlalchemy import event
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
 from decimal import Decimal
+from zoneinfo import ZoneInfo
 
 from app.db.models.Users.User import User
 from app.db.models.items.item import Item
 from app.db.models.Categorys.main import Category
+from app.db.models.PriceHistorys.main import PriceHistory
+from app.core.price_history import (
+    rebuild_price_stats,
+    record_price,
+    refresh_price_stats,
+)
+from app.db.models.items.price_stats import ItemPriceStats
+from tests.conftest import test_engine
 from app.schemas.item_schema import ItemStatus
 
 
@@ -219,6 +230,245 @@ class TestGetPriceHistories:
         assert response.json() == []
 
 
+class TestPriceIntervals:
+    """Test suite for price validity intervals and point-in-time price queries"""
+
+    @staticmethod
+    def bangkok(day: int, hour: int = 0) -> datetime:
+        return datetime(2030, 3, day, hour, tzinfo=ZoneInfo("Asia/Bangkok"))
+
+    @pytest.fixture
+    def priced_item(self, db_session: Session, test_item: Item, test_user: User):
+        """ราคา 100 ตั้งแต่วันที่ 1, 80 ตั้งแต่วันที่ 10, 90 ตั้งแต่วันที่ 20"""
+        for day, price in ((1, "100.00"), (10, "80.00"), (20, "90.00")):
+            record_price(
+                db_session, test_item, Decimal(price), test_user.id, at=self.bangkok(day)
+            )
+            db_session.commit()
+        return test_item
+
+    def test_price_change_closes_previous_interval(
+        self,
+        authenticated_client: TestClient,
+        test_category: Category,
+        db_session: Session,
+    ):
+        """
+        Test: สร้าง item แล้วเปลี่ยนราคา
+        Expected: ช่วงราคาเดิมปิดตรงเวลาที่ช่วงใหม่เริ่ม และช่วงใหม่ยังเปิดอยู่
+        """
+        item_data = {
+            "name": "Lamp",
+            "price": 100.00,
+            "quantity": 1,
+            "status": "available",
+            "category_id": test_category.id,
+        }
+        item_id = authenticated_client.post("/v1/item/my", json=item_data).json()["id"]
+        response = authenticated_client.put(
+            f"/v1/item/my/{item_id}", json={**item_data, "price": 75.00}
+        )
+        assert response.status_code == 200
+
+        first, second = (
+            db_session.query(PriceHistory)
+            .filter(PriceHistory.item_id == item_id)
+            .order_by(PriceHistory.start_date)
+            .all()
+        )
+        assert first.price == Decimal("100.00")
+        assert first.end_date == second.start_date
+        assert second.price == Decimal("75.00")
+        assert second.end_date is None
+
+    def test_histories_list_item_prices_newest_first(
+        self, authenticated_client: TestClient, priced_item: Item
+    ):
+        """
+        Test: ดึง price histories ของ item
+        Expected: ได้ทุกช่วงราคาของ item เรียงใหม่สุดก่อน
+        """
+        response = authenticated_client.get(
+            f"/v1/item/my/{priced_item.id}/pricehistories"
+        )
+
+        assert [float(h["price"]) for h in response.json()] == [90.0, 80.0, 100.0]
+
+    def test_price_at_moment(self, client: TestClient, priced_item: Item):
+        """
+        Test: ขอราคา ณ เวลาต่าง ๆ (รวมเวลาที่ราคาเปลี่ยนพอดี และเวลาแบบ UTC)
+        Expected: ได้ช่วงราคาที่มีผล ณ เวลานั้น
+        """
+        url = f"/v1/item/{priced_item.id}/price"
+
+        assert client.get(url, params={"at": "2030-03-05T12:00:00"}).json()[
+            "price"
+        ] == "100.00"
+        assert client.get(url, params={"at": "2030-03-10T00:00:00+07:00"}).json()[
+            "price"
+        ] == "80.00"
+        # 2030-03-19T17:00Z is 2030-03-20 00:00 in Bangkok
+        assert client.get(url, params={"at": "2030-03-19T17:00:00Z"}).json()[
+            "price"
+        ] == "90.00"
+
+    def test_price_before_first_interval(self, client: TestClient, priced_item: Item):
+        """
+        Test: ขอราคา ณ เวลาก่อนที่ item จะมีราคา
+        Expected: ได้รับ status 404
+        """
+        response = client.get(
+            f"/v1/item/{priced_item.id}/price", params={"at": "2030-02-01T00:00:00"}
+        )
+        assert response.status_code == 404
+
+    def test_price_series_over_range(self, client: TestClient, priced_item: Item):
+        """
+        Test: ขอช่วงราคาระหว่างวันที่ 5 ถึงวันที่ 20
+        Expected: ได้ช่วงที่มีผลตอนเริ่ม (เริ่มก่อนวันที่ 5) และช่วงที่เริ่มในช่วงนั้น
+        """
+        response = client.get(
+            f"/v1/item/{priced_item.id}/prices",
+            params={"start": "2030-03-05T00:00:00", "end": "2030-03-20T00:00:00"},
+        )
+
+        assert response.status_code == 200
+        assert [h["price"] for h in response.json()] == ["100.00", "80.00"]
+        assert response.json()[0]["end_date"].startswith("2030-03-10T00:00:00")
+
+    def test_price_series_rejects_empty_range(
+        self, client: TestClient, priced_item: Item
+    ):
+        """
+        Test: ขอช่วงราคาที่ start ไม่ได้อยู่ก่อน end
+        Expected: ได้รับ status 400
+        """
+        response = client.get(
+            f"/v1/item/{priced_item.id}/prices",
+            params={"start": "2030-03-05T00:00:00", "end": "2030-03-05T00:00:00"},
+        )
+        assert response.status_code == 400
+
+
+class TestPriceStats:
+    """Test suite for precomputed price insights (item_price_stats)"""
+
+    @staticmethod
+    def bangkok(day: int) -> datetime:
+        return datetime(2030, 1, 1, tzinfo=ZoneInfo("Asia/Bangkok")) + timedelta(
+            days=day
+        )
+
+    def test_price_drop_shows_in_listing(
+        self, authenticated_client: TestClient, test_category: Category
+    ):
+        """
+        Test: สร้าง item ราคา 100 แล้วลดเหลือ 80
+        Expected: listing แสดงราคาเดิม ลดลง 20% และเป็นราคาต่ำสุดใน 30 วัน
+        """
+        item_data = {
+            "name": "Kettle",
+            "price": 100.00,
+            "quantity": 1,
+            "status": "available",
+            "category_id": test_category.id,
+        }
+        item_id = authenticated_client.post("/v1/item/my", json=item_data).json()["id"]
+        authenticated_client.put(
+            f"/v1/item/my/{item_id}", json={**item_data, "price": 80.00}
+        )
+
+        stats = authenticated_client.get("/v1/item/").json()[0]["price_stats"]
+
+        assert stats["previous_price"] == "100.00"
+        assert stats["change_percent"] == "-20.00"
+        assert stats["all_time_low"] == "80.00"
+        assert stats["low_30d"] == "80.00"
+        assert stats["is_lowest_30d"] is True
+
+    def test_listing_loads_stats_in_one_query(
+        self,
+        client: TestClient,
+        db_session: Session,
+        multiple_test_items: list[Item],
+        test_user: User,
+    ):
+        """
+        Test: ดึง listing ของ items ที่มี price stats
+        Expected: ใช้ SELECT เดียว (join) ไม่ query ทีละ item
+        """
+        for item in multiple_test_items:
+            record_price(db_session, item, item.price, test_user.id)
+        db_session.commit()
+
+        selects = []
+
+        def count(conn, cursor, statement, *args):
+            if statement.lstrip().upper().startswith("SELECT"):
+                selects.append(statement)
+
+        event.listen(test_engine, "before_cursor_execute", count)
+        try:
+            response = client.get("/v1/item/")
+        finally:
+            event.remove(test_engine, "before_cursor_execute", count)
+
+        assert all(item["price_stats"] for item in response.json())
+        assert len(selects) == 1
+
+    def test_30_day_low_expires(
+        self, db_session: Session, test_item: Item, test_user: User
+    ):
+        """
+        Test: ราคา 50 ในวันที่ 0 แล้วขึ้นเป็น 100 ในวันที่ 1
+        Expected: low_30d ยังเป็น 50 จนช่วงราคา 50 พ้น 30 วัน แล้ว job คำนวณใหม่เป็น 100
+        """
+        for day, price in ((0, "50.00"), (1, "100.00")):
+            record_price(
+                db_session, test_item, Decimal(price), test_user.id, at=self.bangkok(day)
+            )
+        db_session.commit()
+
+        assert refresh_price_stats(db_session, now=self.bangkok(30)) == 0
+        stats = db_session.get(ItemPriceStats, test_item.id)
+        assert stats.low_30d == Decimal("50.00")
+        assert stats.is_lowest_30d is False
+
+        assert refresh_price_stats(db_session, now=self.bangkok(31)) == 1
+        db_session.refresh(stats)
+        assert stats.low_30d == Decimal("100.00")
+        assert stats.low_30d_expires_at is None
+        assert stats.all_time_low == Decimal("50.00")
+        assert stats.is_lowest_30d is True
+
+    def test_rebuild_matches_incremental(
+        self, db_session: Session, test_item: Item, test_user: User
+    ):
+        """
+        Test: rebuild price stats จาก price_histories
+        Expected: ได้ค่าเดียวกับที่คำนวณแบบ incremental
+        """
+        for day, price in ((0, "90.00"), (5, "60.00"), (10, "75.00")):
+            record_price(
+                db_session, test_item, Decimal(price), test_user.id, at=self.bangkok(day)
+            )
+        db_session.commit()
+        columns = ("current_price", "previous_price", "change_percent")
+        columns += ("all_time_low", "low_30d")
+
+        def snapshot():
+            stats = db_session.get(ItemPriceStats, test_item.id)
+            values = {name: getattr(stats, name) for name in columns}
+            return values, stats.low_30d_expires_at
+
+        incremental = snapshot()
+        assert rebuild_price_stats(db_session, now=self.bangkok(10)) == 1
+        db_session.expire_all()
+
+        assert snapshot() == incremental
+        assert incremental[0]["change_percent"] == Decimal("25.00")
+
+
 class TestItemValidation:
     """Test suite for item data validation"""
 
@@ -517,6 +767,65 @@ class TestUpdateItem:
         assert response.status_code == 403
         assert "not allowed" in response.json()["detail"]
 
+    def test_update_item_with_matching_if_match(
+        self,
+        authenticated_client: TestClient,
+        test_item: Item,
+        test_category: Category,
+    ):
+        """
+        Test: อัพเดท item พร้อม If-Match ตรงกับ ETag ล่าสุด
+        Expected: ได้รับ status 200 และ ETag/version ใหม่
+        """
+        etag = authenticated_client.get(f"/v1/item/{test_item.id}").headers["ETag"]
+        update_data = {
+            "name": "Versioned Item",
+            "price": 100.00,
+            "quantity": 10,
+            "category_id": test_category.id,
+        }
+
+        response = authenticated_client.put(
+            f"/v1/item/my/{test_item.id}",
+            json=update_data,
+            headers={"If-Match": etag},
+        )
+
+        assert response.status_code == 200
+        assert response.json()["version"] == 2
+        assert response.headers["ETag"] == '"2"'
+
+    def test_update_item_with_stale_if_match(
+        self,
+        authenticated_client: TestClient,
+        test_item: Item,
+        test_category: Category,
+        db_session: Session,
+    ):
+        """
+        Test: อัพเดท item ด้วย If-Match ของ version เก่า
+        Expected: ได้รับ status 412 และข้อมูลไม่ถูกเขียนทับ
+        """
+        test_item.quantity = 5  # คนอื่นแก้ไขไปก่อน (version 2)
+        db_session.commit()
+
+        update_data = {
+            "name": "Overwrite",
+            "price": 100.00,
+            "quantity": 10,
+            "category_id": test_category.id,
+        }
+        response = authenticated_client.put(
+            f"/v1/item/my/{test_item.id}",
+            json=update_data,
+            headers={"If-Match": '"1"'},
+        )
+
+        assert response.status_code == 412
+        db_session.refresh(test_item)
+        assert test_item.name == "Test Item"
+        assert test_item.quantity == 5
+
 
 class TestDeleteItem:
     """Test suite for DELETE /v1/item/my/{item_id} endpoint"""
@@ -0,0 +1,179 @@
+"""
+Unit tests for the in-app notification inbox (/v1/notifications)
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.notifications import notify, notify_transaction_event, unread_count
+from app.core.outbox import OutboxDispatcher
+from app.core.security import create_access_token
+from app.db.models.items.item import Item
+from app.db.models.Notifications.notification import Notification
+from app.db.models.Outbox.outbox_event import OutboxEvent
+from app.db.models.Users.User import User
+
+
+@pytest.fixture
+def other_user(db_session: Session) -> User:
+    user = User(
+        username="other", full_name="Other", email="other@example.com", password="x"
+    )
+    db_session.add(user)
+    db_session.commit()
+    return user
+
+
+def headers_for(user: User) -> dict:
+    token = create_access_token(data={"sub": user.username, "id": user.id})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def send(db_session: Session, user_ids: list[int], times: int = 1) -> list[int]:
+    """ส่ง notification ``times`` ครั้ง แล้วคืน id ของ test_user (เรียงจากเก่าไปใหม่)"""
+    for n in range(times):
+        notify(db_session, user_ids, "announcement", {"n": n})
+    db_session.commit()
+    return list(
+        db_session.scalars(
+            select(Notification.id)
+            .where(Notification.user_id == user_ids[0])
+            .order_by(Notification.id)
+        )
+    )
+
+
+class TestNotificationInbox:
+    """Test suite for /v1/notifications endpoints"""
+
+    def test_requires_authentication(self, client: TestClient):
+        """
+        Test: ดู notifications โดยไม่มี authentication
+        Expected: ได้รับ status 401
+        """
+        assert client.get("/v1/notifications/").status_code == 401
+
+    def test_fan_out_inserts_one_row_per_user_and_counts(
+        self,
+        authenticated_client: TestClient,
+        db_session: Session,
+        test_user: User,
+        other_user: User,
+    ):
+        """
+        Test: notify ไปยังผู้ใช้สองคน (ส่ง id ซ้ำ)
+        Expected: แต่ละคนได้ notification หนึ่งรายการ และ unread counter เป็น 1
+        """
+        added = notify(
+            db_session, [test_user.id, other_user.id, test_user.id], "announcement", {}
+        )
+        db_session.commit()
+
+        assert added == 2
+        assert unread_count(db_session, test_user.id) == 1
+        assert unread_count(db_session, other_user.id) == 1
+        response = authenticated_client.get("/v1/notifications/unread-count")
+        assert response.json() == {"unread": 1}
+
+    def test_list_pages_newest_first(
+        self, authenticated_client: TestClient, db_session: Session, test_user: User
+    ):
+        """
+        Test: ดู notifications ทีละหน้า หน้าละ 2 รายการจากทั้งหมด 5 รายการ
+        Expected: เรียงใหม่สุดก่อน ใช้ before ไปหน้าถัดไป และ X-Has-More ถูกต้อง
+        """
+        ids = send(db_session, [test_user.id], times=5)
+
+        first = authenticated_client.get("/v1/notifications/?limit=2")
+        assert [n["id"] for n in first.json()] == ids[:-3:-1]
+        assert first.headers["X-Has-More"] == "true"
+
+        last = authenticated_client.get(f"/v1/notifications/?limit=2&before={ids[1]}")
+        assert [n["id"] for n in last.json()] == [ids[0]]
+        assert last.headers["X-Has-More"] == "false"
+
+    def test_read_all_is_bounded_by_up_to(
+        self, authenticated_client: TestClient, db_session: Session, test_user: User
+    ):
+        """
+        Test: อ่านทั้งหมดถึง notification ที่สอง แล้วอ่านทั้งหมดอีกสองครั้ง
+        Expected: ครั้งแรก mark 2 เหลือ 1, ครั้งที่สอง mark 1 เหลือ 0, ครั้งที่สามไม่มีอะไร
+        """
+        ids = send(db_session, [test_user.id], times=3)
+
+        response = authenticated_client.post(f"/v1/notifications/read-all?up_to={ids[1]}")
+        assert response.json() == {"marked": 2, "unread": 1}
+        unread = authenticated_client.get("/v1/notifications/?unread=true").json()
+        assert [n["id"] for n in unread] == [ids[2]]
+
+        response = authenticated_client.post("/v1/notifications/read-all")
+        assert response.json() == {"marked": 1, "unread": 0}
+        response = authenticated_client.post("/v1/notifications/read-all")
+        assert response.json() == {"marked": 0, "unread": 0}
+
+    def test_read_one_counts_once(
+        self,
+        authenticated_client: TestClient,
+        db_session: Session,
+        test_user: User,
+        other_user: User,
+    ):
+        """
+        Test: อ่าน notification เดียวสองครั้ง และอ่านของผู้ใช้อื่น
+        Expected: counter ลดครั้งเดียว, ของผู้ใช้อื่นได้ 404
+        """
+        [first, second] = send(db_session, [test_user.id, other_user.id], times=2)
+
+        for _ in range(2):
+            response = authenticated_client.post(f"/v1/notifications/{first}/read")
+            assert response.status_code == 200
+            assert response.json()["read_at"] is not None
+        assert authenticated_client.get(
+            "/v1/notifications/unread-count"
+        ).json() == {"unread": 1}
+
+        response = authenticated_client.post(
+            f"/v1/notifications/{second}/read", headers=headers_for(other_user)
+        )
+        assert response.status_code == 404
+
+
+class TestTransactionNotifications:
+    """Test suite for notifications from transaction events (outbox consumer)"""
+
+    def test_created_notifies_seller_once(
+        self,
+        client: TestClient,
+        db_session: Session,
+        test_user: User,
+        test_item: Item,
+        other_user: User,
+    ):
+        """
+        Test: buyer สร้าง transaction แล้ว dispatch event ซ้ำ
+        Expected: seller ได้ notification transaction.created หนึ่งรายการ buyer ไม่ได้
+        """
+        created = client.post(
+            "/v1/transaction/",
+            json={"item_id": test_item.id, "amount": 1},
+            headers=headers_for(other_user),
+        ).json()
+        dispatcher = OutboxDispatcher(session_factory=lambda: db_session)
+        dispatcher.subscribe("transaction.*", notify_transaction_event)
+
+        dispatcher.drain(db_session)
+        # simulate redelivery of every event
+        for event in db_session.scalars(select(OutboxEvent)):
+            event.dispatched_at = None
+        db_session.commit()
+        dispatcher.drain(db_session)
+
+        [notification] = db_session.scalars(select(Notification)).all()
+        assert notification.user_id == test_user.id
+        assert notification.type == "transaction.created"
+        assert notification.item_id == test_item.id
+        assert notification.data["transaction_id"] == created["id"]
+        assert unread_count(db_session, test_user.id) == 1
+        assert unread_count(db_session, other_user.id) == 0
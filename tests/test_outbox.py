@@ -0,0 +1,302 @@
+"""
+Unit tests for the transactional outbox and its dispatcher
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.outbox import OutboxDispatcher
+from app.core.transaction_expiry import expire_stale_transactions
+from app.db.models.Categorys.main import Category
+from app.db.models.items.item import Item
+from app.db.models.Outbox.outbox_event import OutboxEvent
+from app.db.models.Transactions.transaction_model import Transaction
+from app.db.models.Users.User import User
+
+
+@pytest.fixture
+def dispatcher(db_session: Session) -> OutboxDispatcher:
+    """dispatcher แยกต่อ test ที่ใช้ session ของ test"""
+    return OutboxDispatcher(session_factory=lambda: db_session, max_attempts=3)
+
+
+def events(db_session: Session) -> list[OutboxEvent]:
+    return db_session.scalars(select(OutboxEvent).order_by(OutboxEvent.id)).all()
+
+
+def backoff_elapsed(db_session: Session) -> None:
+    """ทำให้ event ที่รอ retry ถึงเวลาส่งใหม่ทันที"""
+    for event in events(db_session):
+        if event.next_attempt_at is not None:
+            event.next_attempt_at = datetime(2000, 1, 1, tzinfo=ZoneInfo("Asia/Bangkok"))
+    db_session.commit()
+
+
+class TestOutboxEmit:
+    """Test suite for events written by the routers"""
+
+    def test_create_item_writes_event(
+        self,
+        authenticated_client: TestClient,
+        db_session: Session,
+        test_user: User,
+        test_category: Category,
+    ):
+        """
+        Test: สร้าง item ผ่าน API
+        Expected: มี event item.created พร้อม payload ของ item ใน outbox
+        """
+        response = authenticated_client.post(
+            "/v1/item/my",
+            json={
+                "name": "Outbox Item",
+                "price": 99.5,
+                "quantity": 3,
+                "status": "available",
+                "category_id": test_category.id,
+            },
+        )
+        assert response.status_code == 200
+
+        [event] = events(db_session)
+        assert event.event_type == "item.created"
+        assert event.aggregate_type == "item"
+        assert event.aggregate_id == response.json()["id"]
+        assert event.payload["owner_id"] == test_user.id
+        assert Decimal(event.payload["price"]) == Decimal("99.5")
+        assert event.dispatched_at is None
+
+    def test_rejected_change_writes_no_event(
+        self, authenticated_client: TestClient, db_session: Session, test_item: Item
+    ):
+        """
+        Test: แก้ไข item ด้วย If-Match ที่เก่าแล้ว
+        Expected: request ถูกปฏิเสธ และไม่มี event ใน outbox
+        """
+        response = authenticated_client.put(
+            f"/v1/item/my/{test_item.id}",
+            json={
+                "name": "Renamed",
+                "price": 1,
+                "quantity": 1,
+                "status": "available",
+                "category_id": test_item.category_id,
+            },
+            headers={"If-Match": '"99"'},
+        )
+
+        assert response.status_code == 412
+        assert events(db_session) == []
+
+    def test_expiry_writes_cancelled_events(
+        self, db_session: Session, test_user: User, test_item: Item
+    ):
+        """
+        Test: background job expire transaction ที่ค้าง pending
+        Expected: มี event transaction.cancelled ที่ระบุว่า expired
+        """
+        seller = db_session.get(User, test_item.owner_id)
+        buyer = User(
+            username="buyer", full_name="B", email="b@example.com", password="x"
+        )
+        db_session.add(buyer)
+        db_session.commit()
+        transaction = Transaction(
+            item_id=test_item.id,
+            seller_id=seller.id,
+            buyer_id=buyer.id,
+            status="pending",
+            agreed_price=100,
+            amount=1,
+            created_at=datetime.now(ZoneInfo("Asia/Bangkok")) - timedelta(days=5),
+        )
+        db_session.add(transaction)
+        db_session.commit()
+
+        expire_stale_transactions(db_session)
+
+        [event] = events(db_session)
+        assert event.event_type == "transaction.cancelled"
+        assert event.aggregate_id == transaction.id
+        assert event.payload["status"] == "cancelled"
+        assert event.payload["reason"] == "expired"
+
+
+class TestOutboxDispatcher:
+    """Test suite for OutboxDispatcher delivery"""
+
+    def add_events(self, db_session: Session, *specs: tuple[str, int]):
+        for event_type, aggregate_id in specs:
+            db_session.add(
+                OutboxEvent(
+                    aggregate_type=event_type.split(".")[0],
+                    aggregate_id=aggregate_id,
+                    event_type=event_type,
+                    payload={"id": aggregate_id},
+                )
+            )
+        db_session.commit()
+
+    def test_delivers_to_matching_consumers_in_order(
+        self, db_session: Session, dispatcher: OutboxDispatcher
+    ):
+        """
+        Test: ลงทะเบียน consumer แบบ exact, wildcard และ *
+        Expected: แต่ละ consumer ได้เฉพาะ event ที่ตรง pattern เรียงตามลำดับที่เขียน
+        """
+        self.add_events(
+            db_session,
+            ("item.created", 1),
+            ("transaction.created", 7),
+            ("transaction.accepted", 7),
+        )
+        seen = {"accepted": [], "transactions": [], "all": []}
+        dispatcher.subscribe(
+            "transaction.accepted", lambda db, e: seen["accepted"].append(e.event_type)
+        )
+
+        @dispatcher.consumer("transaction.*")
+        def transactions(db, event):
+            seen["transactions"].append(event.event_type)
+
+        dispatcher.subscribe("*", lambda db, e: seen["all"].append(e.id), name="all")
+
+        assert dispatcher.drain(db_session) == 3
+
+        assert seen["accepted"] == ["transaction.accepted"]
+        assert seen["transactions"] == ["transaction.created", "transaction.accepted"]
+        assert seen["all"] == sorted(seen["all"])
+        assert all(e.dispatched_at is not None for e in events(db_session))
+        assert dispatcher.metrics["dispatched"] == 3
+        assert dispatcher.drain(db_session) == 0
+
+    def test_failure_holds_back_same_aggregate_only(
+        self, db_session: Session, dispatcher: OutboxDispatcher
+    ):
+        """
+        Test: consumer ล้มเหลวกับ event แรกของ transaction 7
+        Expected: event ถัดไปของ transaction 7 รอก่อน ส่วน aggregate อื่นส่งต่อได้
+                  และเมื่อ consumer กลับมาทำงาน ได้รับ event ของ 7 ตามลำดับ
+        """
+        self.add_events(
+            db_session,
+            ("transaction.created", 7),
+            ("transaction.created", 8),
+            ("transaction.accepted", 7),
+        )
+        delivered = []
+        broken = {"on": True}
+
+        def consumer(db, event):
+            if broken["on"] and event.aggregate_id == 7:
+                raise RuntimeError("downstream unavailable")
+            delivered.append((event.aggregate_id, event.event_type))
+
+        dispatcher.subscribe("*", consumer)
+        dispatcher.drain(db_session)
+
+        assert delivered == [(8, "transaction.created")]
+        first = events(db_session)[0]
+        assert first.attempts == 1
+        assert "downstream unavailable" in first.last_error
+        assert first.next_attempt_at is not None
+
+        broken["on"] = False
+        # still backing off: neither event of 7 is delivered yet
+        dispatcher.drain(db_session)
+        assert delivered == [(8, "transaction.created")]
+
+        backoff_elapsed(db_session)
+        dispatcher.drain(db_session)
+
+        assert delivered[1:] == [
+            (7, "transaction.created"),
+            (7, "transaction.accepted"),
+        ]
+
+    def test_event_marked_dead_after_max_attempts(
+        self, db_session: Session, dispatcher: OutboxDispatcher
+    ):
+        """
+        Test: consumer ล้มเหลวทุกครั้ง
+        Expected: หลังครบ max_attempts event ถูก mark dead และ event ถัดไปถูกส่งต่อ
+        """
+        self.add_events(db_session, ("item.updated", 1), ("item.deleted", 1))
+        delivered = []
+
+        def consumer(db, event):
+            if event.event_type == "item.updated":
+                raise RuntimeError("poison")
+            delivered.append(event.event_type)
+
+        dispatcher.subscribe("item.*", consumer)
+        for _ in range(3):
+            dispatcher.drain(db_session)
+            backoff_elapsed(db_session)
+
+        dead, ok = events(db_session)
+        assert dead.dead is True
+        assert dead.attempts == 3
+        assert ok.dead is False
+        assert delivered == ["item.deleted"]
+        assert dispatcher.metrics["dead"] == 1
+
+    def test_retry_backoff_grows_exponentially(self, dispatcher: OutboxDispatcher):
+        """
+        Test: คำนวณเวลารอก่อน retry
+        Expected: เพิ่มเป็นสองเท่าต่อครั้ง และไม่เกิน retry_max_seconds
+        """
+        dispatcher.retry_base_seconds, dispatcher.retry_max_seconds = 2, 10
+
+        delays = [dispatcher.retry_delay(n).total_seconds() for n in (1, 2, 3, 4)]
+
+        assert delays == [2, 4, 8, 10]
+
+    def test_full_batches_do_not_burn_attempts(
+        self, db_session: Session, dispatcher: OutboxDispatcher
+    ):
+        """
+        Test: event แรกล้มเหลวและมี event ของ aggregate เดียวกันค้างเต็ม batch
+        Expected: drain หยุดเมื่อ batch ไม่มีความคืบหน้า event แรกถูกลองครั้งเดียว ไม่ถูก mark dead
+        """
+        self.add_events(db_session, *[("item.updated", 1)] * 5)
+        calls = []
+
+        def consumer(db, event):
+            calls.append(event.id)
+            raise RuntimeError("downstream unavailable")
+
+        dispatcher.subscribe("item.*", consumer)
+        dispatcher.drain(db_session, batch_size=2, max_batches=10)
+
+        head = events(db_session)[0]
+        assert len(calls) == 1
+        assert head.attempts == 1
+        assert head.dead is False
+
+    def test_failed_consumer_writes_are_rolled_back(
+        self, db_session: Session, dispatcher: OutboxDispatcher
+    ):
+        """
+        Test: consumer เขียนข้อมูลลง DB แล้วล้มเหลว
+        Expected: ข้อมูลที่เขียนถูก rollback (savepoint) แต่ event อื่นใน batch ยัง commit
+        """
+        self.add_events(db_session, ("group.created", 1), ("group.created", 2))
+
+        def consumer(db, event):
+            db.add(Category(name=f"cat-{event.aggregate_id}", slug=f"cat-{event.aggregate_id}"))
+            db.flush()
+            if event.aggregate_id == 1:
+                raise RuntimeError("after write")
+
+        dispatcher.subscribe("group.*", consumer)
+        dispatcher.drain(db_session)
+
+        names = db_session.scalars(select(Category.name)).all()
+        assert names == ["cat-2"]
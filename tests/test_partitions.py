@@ -0,0 +1,63 @@
+"""
+Unit tests for monthly partition maintenance (app.core.partitions)
+"""
+
+from datetime import datetime, timezone
+
+from app.core.partitions import (
+    PartitionManager,
+    add_months,
+    create_partition_sql,
+    month_start,
+    partition_name,
+)
+from tests.conftest import test_engine
+
+
+class TestPartitionMonths:
+    """Test suite for partition boundaries"""
+
+    def test_month_start_uses_bangkok_time(self):
+        """
+        Test: เวลา UTC ปลายเดือนที่เป็นต้นเดือนถัดไปในเวลาไทย
+        Expected: partition ของเดือนถัดไป (ตามเวลาไทย)
+        """
+        moment = datetime(2026, 12, 31, 20, 0, tzinfo=timezone.utc)
+        month = month_start(moment)
+        assert (month.year, month.month, month.day, month.hour) == (2027, 1, 1, 0)
+        assert partition_name("chat_messages", month) == "chat_messages_p2027_01"
+
+    def test_add_months_crosses_years(self):
+        """
+        Test: บวก/ลบเดือนข้ามปี
+        Expected: ได้วันแรกของเดือนที่ถูกต้อง
+        """
+        month = month_start(datetime(2026, 11, 15))
+        assert add_months(month, 2).strftime("%Y-%m") == "2027-01"
+        assert add_months(month, -11).strftime("%Y-%m") == "2025-12"
+
+    def test_create_partition_sql(self):
+        """
+        Test: สร้าง DDL ของ partition หนึ่งเดือน
+        Expected: ช่วง [ต้นเดือน, ต้นเดือนถัดไป) ตามเวลาไทย
+        """
+        sql = create_partition_sql("price_histories", month_start(datetime(2026, 10, 19)))
+        assert sql == (
+            "CREATE TABLE IF NOT EXISTS price_histories_p2026_10 "
+            "PARTITION OF price_histories FOR VALUES "
+            "FROM ('2026-10-01T00:00:00+07:00') TO ('2026-11-01T00:00:00+07:00')"
+        )
+
+
+class TestPartitionManager:
+    """Test suite for PartitionManager"""
+
+    def test_disabled_manager_does_nothing(self):
+        """
+        Test: partitioning ปิดอยู่ (ค่า default และ SQLite)
+        Expected: job ไม่สร้างและไม่ archive partition ใด ๆ
+        """
+        manager = PartitionManager(
+            db_engine=test_engine, enabled=False, retention_months=1
+        )
+        assert manager.tick() == {"created": [], "archived": []}
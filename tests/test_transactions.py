@@ -466,3 +466,984 @@ class TestGetMyTransactions:
         data = response.json()
         transaction_ids = [t["id"] for t in data]
         assert other_transaction.id not in transaction_ids
+
+
+class TestGetMyTransactionsPagination:
+    """Test suite for filters, cursor pagination and include on /v1/transaction/my"""
+
+    @pytest.fixture
+    def mixed_transactions(
+        self,
+        db_session: Session,
+        test_user: User,
+        test_seller: User,
+        test_seller_item: Item,
+        test_category: Category,
+    ) -> list[Transaction]:
+        """สร้าง transactions 5 รายการ: ซื้อ 3 (pending 2, cancelled 1) และขาย 2"""
+        my_item = Item(
+            name="My Item",
+            price=Decimal("50.00"),
+            quantity=5,
+            status="available",
+            owner_id=test_user.id,
+            category_id=test_category.id,
+        )
+        db_session.add(my_item)
+        db_session.commit()
+
+        rows = [
+            Transaction(
+                item_id=test_seller_item.id,
+                seller_id=test_seller.id,
+                buyer_id=test_user.id,
+                status=status,
+                agreed_price=Decimal("100.00"),
+                amount=1,
+            )
+            for status in ("pending", "cancelled", "pending")
+        ] + [
+            Transaction(
+                item_id=my_item.id,
+                seller_id=test_user.id,
+                buyer_id=test_seller.id,
+                status="pending",
+                agreed_price=Decimal("50.00"),
+                amount=1,
+            )
+            for _ in range(2)
+        ]
+        for row in rows:
+            db_session.add(row)
+            db_session.commit()
+        return rows
+
+    def test_filter_by_role(
+        self, authenticated_client: TestClient, test_user: User, mixed_transactions
+    ):
+        """
+        Test: กรองด้วย role=buyer และ role=seller
+        Expected: ได้เฉพาะ transactions ตาม role นั้น
+        """
+        bought = authenticated_client.get("/v1/transaction/my?role=buyer").json()
+        sold = authenticated_client.get("/v1/transaction/my?role=seller").json()
+
+        assert len(bought) == 3
+        assert all(t["buyer_id"] == test_user.id for t in bought)
+        assert len(sold) == 2
+        assert all(t["seller_id"] == test_user.id for t in sold)
+
+    def test_filter_by_status(self, authenticated_client: TestClient, mixed_transactions):
+        """
+        Test: กรองด้วย status=cancelled
+        Expected: ได้เฉพาะ transaction ที่ถูกยกเลิก
+        """
+        response = authenticated_client.get("/v1/transaction/my?status=cancelled")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [t["id"] for t in data] == [mixed_transactions[1].id]
+
+    def test_cursor_pagination_walks_all_pages(
+        self, authenticated_client: TestClient, mixed_transactions
+    ):
+        """
+        Test: ดึงทีละ 2 รายการโดยใช้ X-Next-Cursor
+        Expected: ได้ครบทุกรายการ ไม่ซ้ำ เรียงจากใหม่ไปเก่า และหน้าสุดท้ายไม่มี cursor
+        """
+        seen = []
+        url = "/v1/transaction/my?limit=2"
+        pages = 0
+        while True:
+            response = authenticated_client.get(url)
+            assert response.status_code == 200
+            page = response.json()
+            assert len(page) <= 2
+            seen.extend(t["id"] for t in page)
+            pages += 1
+            cursor = response.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+            url = f"/v1/transaction/my?limit=2&cursor={cursor}"
+
+        assert pages == 3
+        assert seen == sorted((t.id for t in mixed_transactions), reverse=True)
+
+    def test_invalid_cursor(self, authenticated_client: TestClient):
+        """
+        Test: ส่ง cursor ที่ไม่ถูกต้อง
+        Expected: ได้รับ status 400
+        """
+        response = authenticated_client.get("/v1/transaction/my?cursor=not-a-cursor")
+        assert response.status_code == 400
+
+    def test_limit_out_of_range(self, authenticated_client: TestClient):
+        """
+        Test: ส่ง limit เกินค่าสูงสุด
+        Expected: ได้รับ status 422
+        """
+        response = authenticated_client.get("/v1/transaction/my?limit=1000")
+        assert response.status_code == 422
+
+    def test_include_item_and_counterpart(
+        self,
+        authenticated_client: TestClient,
+        test_user: User,
+        test_seller: User,
+        mixed_transactions,
+    ):
+        """
+        Test: ขอ include=item,counterpart
+        Expected: แต่ละรายการมีข้อมูลสินค้าและคู่ค้า (อีกฝั่งของ transaction)
+        """
+        response = authenticated_client.get(
+            "/v1/transaction/my?include=item,counterpart"
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data) == 5
+        for t in data:
+            assert t["item"]["id"] == t["item_id"]
+            assert t["counterpart"]["id"] == test_seller.id
+            assert t["counterpart"]["username"] == test_seller.username
+            assert "password" not in t["counterpart"]
+
+    def test_without_include_has_no_embeds(
+        self, authenticated_client: TestClient, mixed_transactions
+    ):
+        """
+        Test: ไม่ส่ง include
+        Expected: item และ counterpart เป็น null
+        """
+        data = authenticated_client.get("/v1/transaction/my").json()
+        assert all(t["item"] is None and t["counterpart"] is None for t in data)
+
+    def test_unknown_include(self, authenticated_client: TestClient):
+        """
+        Test: ส่ง include ที่ไม่รู้จัก
+        Expected: ได้รับ status 400
+        """
+        response = authenticated_client.get("/v1/transaction/my?include=password")
+        assert response.status_code == 400
+
+
+class TestAcceptTransaction:
+    """Test suite for buyer/seller acceptance and cancellation stock handling"""
+
+    def _seller_headers(self, seller: User) -> dict:
+        from app.core.security import create_access_token
+
+        token = create_access_token(data={"sub": seller.username, "id": seller.id})
+        return {"Authorization": f"Bearer {token}"}
+
+    def test_both_accept_decrements_stock(
+        self,
+        authenticated_client: TestClient,
+        test_seller: User,
+        test_transaction: Transaction,
+        test_seller_item: Item,
+        db_session: Session,
+    ):
+        """
+        Test: buyer และ seller accept transaction
+        Expected: status เป็น accepted และ stock ของ item ลดลงตาม amount
+        """
+        accepted = {"accepter": True, "accept_at": "2025-01-01T10:00:00"}
+
+        response = authenticated_client.patch(
+            f"/v1/transaction/buyer/acception/{test_transaction.id}", json=accepted
+        )
+        assert response.status_code == 200
+        assert response.json()["status"] == "pending"
+
+        response = authenticated_client.patch(
+            f"/v1/transaction/seller/acception/{test_transaction.id}",
+            json=accepted,
+            headers=self._seller_headers(test_seller),
+        )
+        assert response.status_code == 200
+        assert response.json()["status"] == "accepted"
+
+        db_session.refresh(test_seller_item)
+        assert test_seller_item.quantity == 9
+
+    def test_accept_last_unit_marks_item_sold(
+        self,
+        authenticated_client: TestClient,
+        test_seller: User,
+        test_transaction: Transaction,
+        test_seller_item: Item,
+        db_session: Session,
+    ):
+        """
+        Test: accept transaction ที่ซื้อ stock ชิ้นสุดท้าย
+        Expected: quantity เป็น 0 และ item เปลี่ยนเป็น sold อัตโนมัติ
+        """
+        test_seller_item.quantity = 1
+        test_transaction.seller_accept = True
+        db_session.commit()
+
+        response = authenticated_client.patch(
+            f"/v1/transaction/buyer/acception/{test_transaction.id}",
+            json={"accepter": True, "accept_at": "2025-01-01T10:00:00"},
+        )
+
+        assert response.status_code == 200
+        db_session.refresh(test_seller_item)
+        assert test_seller_item.quantity == 0
+        assert test_seller_item.status == "sold"
+
+    def test_accept_with_insufficient_stock(
+        self,
+        authenticated_client: TestClient,
+        test_transaction: Transaction,
+        test_seller_item: Item,
+        db_session: Session,
+    ):
+        """
+        Test: accept transaction เมื่อ stock ไม่พอ
+        Expected: ได้รับ status 400 และ transaction ยังเป็น pending
+        """
+        test_seller_item.quantity = 0
+        test_transaction.seller_accept = True
+        db_session.commit()
+
+        response = authenticated_client.patch(
+            f"/v1/transaction/buyer/acception/{test_transaction.id}",
+            json={"accepter": True, "accept_at": "2025-01-01T10:00:00"},
+        )
+
+        assert response.status_code == 400
+        assert "not available" in response.json()["detail"]
+        db_session.refresh(test_transaction)
+        assert test_transaction.status == "pending"
+        assert test_transaction.buyer_accept is False
+
+    def test_seller_cancel_accepted_restores_stock(
+        self,
+        client: TestClient,
+        test_seller: User,
+        test_transaction: Transaction,
+        test_seller_item: Item,
+        db_session: Session,
+    ):
+        """
+        Test: seller ยกเลิก transaction ที่ accepted แล้ว (item sold)
+        Expected: stock คืนกลับและ item กลับเป็น available
+        """
+        test_transaction.status = "accepted"
+        test_seller_item.quantity = 0
+        test_seller_item.status = "sold"
+        db_session.commit()
+
+        response = client.patch(
+            f"/v1/transaction/transaction/cancel/{test_transaction.id}",
+            headers=self._seller_headers(test_seller),
+        )
+
+        assert response.status_code == 200
+        assert response.json()["status"] == "cancelled"
+        db_session.refresh(test_seller_item)
+        assert test_seller_item.quantity == 1
+        assert test_seller_item.status == "available"
+
+    def test_buyer_cancel_pending(
+        self,
+        authenticated_client: TestClient,
+        test_transaction: Transaction,
+        test_seller_item: Item,
+        db_session: Session,
+    ):
+        """
+        Test: buyer ยกเลิก transaction ที่ยัง pending
+        Expected: ได้รับ status 200 และ stock ไม่เปลี่ยน
+        """
+        response = authenticated_client.patch(
+            f"/v1/transaction/transaction/cancel/{test_transaction.id}"
+        )
+
+        assert response.status_code == 200
+        assert response.json()["status"] == "cancelled"
+        db_session.refresh(test_seller_item)
+        assert test_seller_item.quantity == 10
+
+
+class TestTransactionConcurrency:
+    """Stress test: parallel acceptances against a single item"""
+
+    def test_parallel_acceptances_never_oversell(self, tmp_path):
+        """
+        Test: acceptance 20 รายการพร้อมกันบน item ที่มี stock 5 ชิ้น
+        Expected: สำเร็จ 5 รายการพอดี ที่เหลือได้ 400, stock เป็น 0 และ item sold
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        from datetime import datetime
+
+        from fastapi import HTTPException
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+
+        from app.db.database import Base
+        from app.routers.v1.transaction_router import update_transaction_accept
+        from app.schemas.transaction_schema import TransactionRole
+
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'stress.db'}",
+            connect_args={"check_same_thread": False, "timeout": 30},
+        )
+        Base.metadata.create_all(bind=engine)
+        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        with SessionLocal() as setup:
+            seller = User(
+                username="s", full_name="S", email="s@example.com", password="x"
+            )
+            buyer = User(
+                username="b", full_name="B", email="b@example.com", password="x"
+            )
+            category = Category(name="Stress", slug="stress")
+            setup.add_all([seller, buyer, category])
+            setup.commit()
+            item = Item(
+                name="Hot Item",
+                price=Decimal("10.00"),
+                quantity=5,
+                status="available",
+                owner_id=seller.id,
+                category_id=category.id,
+            )
+            setup.add(item)
+            setup.commit()
+            transactions = [
+                Transaction(
+                    item_id=item.id,
+                    seller_id=seller.id,
+                    buyer_id=buyer.id,
+                    status="pending",
+                    agreed_price=Decimal("10.00"),
+                    amount=1,
+                    seller_accept=True,
+                )
+                for _ in range(20)
+            ]
+            setup.add_all(transactions)
+            setup.commit()
+            item_id, buyer_id = item.id, buyer.id
+            transaction_ids = [t.id for t in transactions]
+
+        def accept(transaction_id: int) -> int:
+            with SessionLocal() as session:
+                try:
+                    update_transaction_accept(
+                        db=session,
+                        transaction_id=transaction_id,
+                        current_user={"id": buyer_id},
+                        role=TransactionRole.buyer.value,
+                        accepter=True,
+                        accept_at=datetime.now(),
+                    )
+                    return 200
+                except HTTPException as exc:
+                    return exc.status_code
+
+        with ThreadPoolExecutor(max_workers=10) as pool:
+            results = list(pool.map(accept, transaction_ids))
+
+        assert results.count(200) == 5
+        assert results.count(400) == 15
+
+        with SessionLocal() as check:
+            item = check.get(Item, item_id)
+            assert item.quantity == 0
+            assert item.status == "sold"
+            accepted = (
+                check.query(Transaction)
+                .filter(Transaction.status == "accepted")
+                .count()
+            )
+            assert accepted == 5
+
+        engine.dispose()
+
+
+class TestFlashSaleReservations:
+    """Test suite for hot item stock holds (flash sale mode)"""
+
+    def _seller_headers(self, seller: User) -> dict:
+        from app.core.security import create_access_token
+
+        token = create_access_token(data={"sub": seller.username, "id": seller.id})
+        return {"Authorization": f"Bearer {token}"}
+
+    @pytest.fixture
+    def hot_item(
+        self, client: TestClient, test_seller: User, test_seller_item: Item
+    ) -> Item:
+        response = client.post(
+            f"/v1/item/my/{test_seller_item.id}/flash-sale",
+            headers=self._seller_headers(test_seller),
+        )
+        assert response.status_code == 200
+        assert response.json()["available"] == 10
+        return test_seller_item
+
+    def test_only_owner_can_start_flash_sale(
+        self, authenticated_client: TestClient, test_seller_item: Item
+    ):
+        """
+        Test: คนที่ไม่ใช่เจ้าของเปิด flash sale
+        Expected: ได้รับ status 403
+        """
+        response = authenticated_client.post(
+            f"/v1/item/my/{test_seller_item.id}/flash-sale"
+        )
+        assert response.status_code == 403
+
+    def test_create_transaction_holds_stock(
+        self, authenticated_client: TestClient, hot_item: Item, db_session: Session
+    ):
+        """
+        Test: สร้าง transaction บน hot item เกินจำนวนที่เหลือ
+        Expected: hold สำเร็จจนหมด stock จากนั้นได้ 400 และ DB ยังไม่ถูกแก้
+        """
+        from app.core.reservations import reservation_engine
+
+        for _ in range(2):
+            response = authenticated_client.post(
+                "/v1/transaction/", json={"item_id": hot_item.id, "amount": 5}
+            )
+            assert response.status_code == 200
+
+        response = authenticated_client.post(
+            "/v1/transaction/", json={"item_id": hot_item.id, "amount": 1}
+        )
+
+        assert response.status_code == 400
+        assert reservation_engine.available(hot_item.id) == 0
+        db_session.refresh(hot_item)
+        assert hot_item.quantity == 10
+
+    def test_accept_then_flush_writes_stock_in_batch(
+        self,
+        authenticated_client: TestClient,
+        test_seller: User,
+        hot_item: Item,
+        db_session: Session,
+    ):
+        """
+        Test: accept transaction หลายรายการบน hot item แล้ว flush
+        Expected: DB ถูกลด stock ครั้งเดียวตามผลรวม และ item เป็น sold เมื่อหมด
+        """
+        from app.core.reservations import reservation_engine
+
+        accepted = {"accepter": True, "accept_at": "2025-01-01T10:00:00"}
+        for amount in (4, 6):
+            created = authenticated_client.post(
+                "/v1/transaction/", json={"item_id": hot_item.id, "amount": amount}
+            ).json()
+            authenticated_client.patch(
+                f"/v1/transaction/buyer/acception/{created['id']}", json=accepted
+            )
+            response = authenticated_client.patch(
+                f"/v1/transaction/seller/acception/{created['id']}",
+                json=accepted,
+                headers=self._seller_headers(test_seller),
+            )
+            assert response.json()["status"] == "accepted"
+
+        db_session.refresh(hot_item)
+        assert hot_item.quantity == 10
+
+        assert reservation_engine.flush(db_session) == 1
+        db_session.refresh(hot_item)
+        assert hot_item.quantity == 0
+        assert hot_item.status == "sold"
+
+    def test_failed_write_back_stays_pending(
+        self,
+        client: TestClient,
+        authenticated_client: TestClient,
+        test_seller: User,
+        hot_item: Item,
+        db_session: Session,
+    ):
+        """
+        Test: flush ตอนที่ stock ใน DB น้อยกว่าจำนวนที่ขายไปแล้วใน memory
+        Expected: units ยังค้างอยู่ (ไม่หาย), metric เพิ่มขึ้น, ปิด flash sale ไม่ได้จน DB ถูกแก้
+        """
+        from app.core.reservations import reservation_engine
+
+        accepted = {"accepter": True, "accept_at": "2025-01-01T10:00:00"}
+        created = authenticated_client.post(
+            "/v1/transaction/", json={"item_id": hot_item.id, "amount": 4}
+        ).json()
+        authenticated_client.patch(
+            f"/v1/transaction/buyer/acception/{created['id']}", json=accepted
+        )
+        authenticated_client.patch(
+            f"/v1/transaction/seller/acception/{created['id']}",
+            json=accepted,
+            headers=self._seller_headers(test_seller),
+        )
+        hot_item.quantity = 2
+        db_session.commit()
+
+        assert reservation_engine.flush(db_session) == 0
+        assert reservation_engine._items[hot_item.id].pending == 4
+        assert reservation_engine.metrics["write_back_failed"] == 1
+        response = client.delete(
+            f"/v1/item/my/{hot_item.id}/flash-sale",
+            headers=self._seller_headers(test_seller),
+        )
+        assert response.status_code == 409
+        assert reservation_engine.is_hot(hot_item.id)
+
+        hot_item.quantity = 10
+        db_session.commit()
+        assert reservation_engine.flush(db_session) == 1
+        db_session.refresh(hot_item)
+        assert hot_item.quantity == 6
+
+    def test_failed_commit_releases_hold(
+        self,
+        authenticated_client: TestClient,
+        hot_item: Item,
+        db_session: Session,
+        monkeypatch,
+    ):
+        """
+        Test: commit ของการสร้าง transaction บน hot item ล้มเหลวหลัง hold แล้ว
+        Expected: hold ถูกคืน stock ใน memory กลับเท่าเดิม
+        """
+        from app.core.reservations import reservation_engine
+
+        def failing_commit():
+            raise RuntimeError("database unavailable")
+
+        monkeypatch.setattr(db_session, "commit", failing_commit)
+        with pytest.raises(RuntimeError):
+            authenticated_client.post(
+                "/v1/transaction/", json={"item_id": hot_item.id, "amount": 3}
+            )
+
+        assert reservation_engine.available(hot_item.id) == 10
+        assert reservation_engine._items[hot_item.id].holds == {}
+
+    def test_expired_holds_return_to_pool(
+        self, authenticated_client: TestClient, hot_item: Item
+    ):
+        """
+        Test: hold ที่หมดอายุ
+        Expected: stock กลับมาให้คนอื่นจองได้
+        """
+        from app.core.reservations import reservation_engine
+
+        authenticated_client.post(
+            "/v1/transaction/", json={"item_id": hot_item.id, "amount": 10}
+        )
+        assert reservation_engine.available(hot_item.id) == 0
+
+        for hold in reservation_engine._items[hot_item.id].holds.values():
+            hold.expires_at = 0
+
+        assert reservation_engine.expire_holds() == 1
+        assert reservation_engine.available(hot_item.id) == 10
+
+    def test_cancel_pending_releases_hold(
+        self, authenticated_client: TestClient, hot_item: Item
+    ):
+        """
+        Test: buyer ยกเลิก transaction ที่ยัง pending บน hot item
+        Expected: hold ถูกคืนทันที
+        """
+        from app.core.reservations import reservation_engine
+
+        created = authenticated_client.post(
+            "/v1/transaction/", json={"item_id": hot_item.id, "amount": 3}
+        ).json()
+        assert reservation_engine.available(hot_item.id) == 7
+
+        response = authenticated_client.patch(
+            f"/v1/transaction/transaction/cancel/{created['id']}"
+        )
+
+        assert response.status_code == 200
+        assert reservation_engine.available(hot_item.id) == 10
+
+    def test_cancel_conflict_returns_no_stock(
+        self,
+        client: TestClient,
+        authenticated_client: TestClient,
+        test_seller: User,
+        hot_item: Item,
+        db_session: Session,
+        monkeypatch,
+    ):
+        """
+        Test: seller ยกเลิก transaction ที่ accepted แล้วบน hot item แต่แพ้ version check
+        Expected: ได้ 409 และ stock ใน memory ไม่ถูกคืน (คืนได้ครั้งเดียวโดยฝ่ายที่ชนะ)
+        """
+        from sqlalchemy.orm.exc import StaleDataError
+
+        from app.core.reservations import reservation_engine
+
+        accepted = {"accepter": True, "accept_at": "2025-01-01T10:00:00"}
+        created = authenticated_client.post(
+            "/v1/transaction/", json={"item_id": hot_item.id, "amount": 4}
+        ).json()
+        authenticated_client.patch(
+            f"/v1/transaction/buyer/acception/{created['id']}", json=accepted
+        )
+        client.patch(
+            f"/v1/transaction/seller/acception/{created['id']}",
+            json=accepted,
+            headers=self._seller_headers(test_seller),
+        )
+        assert reservation_engine.available(hot_item.id) == 6
+
+        def lost_race():
+            raise StaleDataError("row was updated by another request")
+
+        monkeypatch.setattr(db_session, "commit", lost_race)
+        response = client.patch(
+            f"/v1/transaction/transaction/cancel/{created['id']}",
+            headers=self._seller_headers(test_seller),
+        )
+
+        assert response.status_code == 409
+        assert reservation_engine.available(hot_item.id) == 6
+
+    def test_engine_ignores_item_that_is_no_longer_hot(self):
+        """
+        Test: เรียก hold/confirm/release/restock กับ item ที่ flash sale ถูกปิดไปแล้ว
+        Expected: hold และ confirm ได้ False, restock ได้ False และไม่เกิด KeyError
+        """
+        from app.core.reservations import StockReservationEngine
+
+        engine = StockReservationEngine(hold_ttl_seconds=60)
+
+        assert engine.hold(1, 1, 1) is False
+        assert engine.confirm(1, 1, 1) is False
+        engine.release(1, 1)
+        assert engine.restock(1, 1) is False
+
+    def test_engine_hold_counts_cart_holds(self):
+        """
+        Test: hold บน hot item ที่มี 10 ชิ้น โดย 5 ชิ้นอยู่ในตะกร้าของคนอื่น
+        Expected: hold 6 ชิ้นไม่ได้ แต่ hold 5 ชิ้นได้
+        """
+        from app.core.reservations import StockReservationEngine
+
+        engine = StockReservationEngine(hold_ttl_seconds=60)
+        engine.activate(1, 10)
+
+        assert engine.hold(1, 1, 6, reserved=5) is False
+        assert engine.hold(1, 2, 5, reserved=5) is True
+        assert engine.available(1) == 5
+
+    def test_accept_when_flash_sale_stops_midway_conflicts(
+        self,
+        client: TestClient,
+        authenticated_client: TestClient,
+        test_seller: User,
+        hot_item: Item,
+        monkeypatch,
+    ):
+        """
+        Test: flash sale ถูกปิดระหว่างที่ seller กำลัง accept (หลังเช็ค is_hot)
+        Expected: ได้ 409 แทน 500 และ accept ซ้ำได้ผ่าน items row
+        """
+        from app.core.reservations import reservation_engine
+
+        accepted = {"accepter": True, "accept_at": "2025-01-01T10:00:00"}
+        created = authenticated_client.post(
+            "/v1/transaction/", json={"item_id": hot_item.id, "amount": 2}
+        ).json()
+        authenticated_client.patch(
+            f"/v1/transaction/buyer/acception/{created['id']}", json=accepted
+        )
+
+        confirm = reservation_engine.confirm
+
+        def stopped_first(item_id, key, amount):
+            reservation_engine.reset()
+            return confirm(item_id, key, amount)
+
+        monkeypatch.setattr(reservation_engine, "confirm", stopped_first)
+        headers = self._seller_headers(test_seller)
+        response = client.patch(
+            f"/v1/transaction/seller/acception/{created['id']}",
+            json=accepted,
+            headers=headers,
+        )
+        assert response.status_code == 409
+
+        response = client.patch(
+            f"/v1/transaction/seller/acception/{created['id']}",
+            json=accepted,
+            headers=headers,
+        )
+        assert response.status_code == 200
+        assert response.json()["status"] == "accepted"
+
+    def test_stop_flash_sale_flushes_and_unlocks_editing(
+        self, client: TestClient, test_seller: User, hot_item: Item
+    ):
+        """
+        Test: แก้ไข item ระหว่าง flash sale แล้วปิด flash sale
+        Expected: แก้ไขระหว่าง flash sale ได้ 409, ปิดแล้วได้ quantity ล่าสุด
+        """
+        from app.core.reservations import reservation_engine
+
+        headers = self._seller_headers(test_seller)
+        item_data = {
+            "name": "Seller Item",
+            "price": "100.00",
+            "quantity": 10,
+            "category_id": hot_item.category_id,
+        }
+        response = client.put(
+            f"/v1/item/my/{hot_item.id}", json=item_data, headers=headers
+        )
+        assert response.status_code == 409
+
+        response = client.delete(
+            f"/v1/item/my/{hot_item.id}/flash-sale", headers=headers
+        )
+        assert response.status_code == 200
+        assert response.json()["quantity"] == 10
+        assert not reservation_engine.is_hot(hot_item.id)
+
+
+class TestTransactionOptimisticLocking:
+    """Test suite for version column / If-Match on transaction updates"""
+
+    def test_change_detail_with_stale_if_match(
+        self,
+        authenticated_client: TestClient,
+        test_transaction: Transaction,
+        test_seller: User,
+        test_user: User,
+        db_session: Session,
+    ):
+        """
+        Test: แก้ไข transaction ด้วย If-Match ของ version เก่า
+        Expected: ได้รับ status 412
+        """
+        test_transaction.amount = 2  # อีกฝ่ายแก้ไขไปก่อน
+        db_session.commit()
+
+        response = authenticated_client.patch(
+            f"/v1/transaction/{test_transaction.id}",
+            json={
+                "item_id": test_transaction.item_id,
+                "seller_id": test_seller.id,
+                "buyer_id": test_user.id,
+                "amount": 3,
+                "agreed_price": "300.00",
+            },
+            headers={"If-Match": '"1"'},
+        )
+
+        assert response.status_code == 412
+        assert response.headers["ETag"] == '"2"'
+
+    def test_change_detail_returns_new_etag(
+        self,
+        authenticated_client: TestClient,
+        test_transaction: Transaction,
+        test_seller: User,
+        test_user: User,
+    ):
+        """
+        Test: แก้ไข transaction ด้วย If-Match ที่ถูกต้อง
+        Expected: ได้รับ status 200 พร้อม version และ ETag ใหม่
+        """
+        response = authenticated_client.patch(
+            f"/v1/transaction/{test_transaction.id}",
+            json={
+                "item_id": test_transaction.item_id,
+                "seller_id": test_seller.id,
+                "buyer_id": test_user.id,
+                "amount": 3,
+                "agreed_price": "300.00",
+            },
+            headers={"If-Match": '"1"'},
+        )
+
+        assert response.status_code == 200
+        assert response.json()["version"] == 2
+        assert response.headers["ETag"] == '"2"'
+
+    def test_paid_conflict_returns_409(
+        self,
+        authenticated_client: TestClient,
+        test_transaction: Transaction,
+        db_session: Session,
+        monkeypatch,
+    ):
+        """
+        Test: buyer จ่ายเงินแต่อีก request เปลี่ยน transaction ไปก่อน (แพ้ version check)
+        Expected: ได้รับ status 409 แทน 500
+        """
+        from sqlalchemy.orm.exc import StaleDataError
+
+        test_transaction.status = "accepted"
+        db_session.commit()
+
+        def lost_race():
+            raise StaleDataError("row was updated by another request")
+
+        monkeypatch.setattr(db_session, "commit", lost_race)
+        response = authenticated_client.patch(
+            f"/v1/transaction/paid/{test_transaction.id}"
+        )
+
+        assert response.status_code == 409
+
+    def test_concurrent_buyer_and_seller_accept_conflict(self, tmp_path):
+        """
+        Test: buyer และ seller accept พร้อมกันบน row เดียวกัน (อ่าน version เดียวกัน)
+        Expected: ฝ่ายที่ commit ทีหลังได้ 409 แทนการเขียนทับ
+        """
+        from datetime import datetime
+
+        from fastapi import HTTPException
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+
+        from app.core.concurrency import commit_or_conflict
+        from app.db.database import Base
+
+        engine = create_engine(f"sqlite:///{tmp_path / 'occ.db'}")
+        Base.metadata.create_all(bind=engine)
+        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        with SessionLocal() as setup:
+            seller = User(
+                username="s", full_name="S", email="s@example.com", password="x"
+            )
+            buyer = User(
+                username="b", full_name="B", email="b@example.com", password="x"
+            )
+            category = Category(name="OCC", slug="occ")
+            setup.add_all([seller, buyer, category])
+            setup.commit()
+            item = Item(
+                name="Item",
+                price=Decimal("10.00"),
+                quantity=5,
+                owner_id=seller.id,
+                category_id=category.id,
+            )
+            setup.add(item)
+            setup.commit()
+            transaction = Transaction(
+                item_id=item.id,
+                seller_id=seller.id,
+                buyer_id=buyer.id,
+                agreed_price=Decimal("10.00"),
+                amount=1,
+            )
+            setup.add(transaction)
+            setup.commit()
+            transaction_id = transaction.id
+
+        buyer_session, seller_session = SessionLocal(), SessionLocal()
+        buyer_view = buyer_session.get(Transaction, transaction_id)
+        seller_view = seller_session.get(Transaction, transaction_id)
+
+        buyer_view.buyer_accept = True
+        buyer_view.buyer_accept_at = datetime.now()
+        commit_or_conflict(buyer_session)
+
+        seller_view.seller_accept = True
+        seller_view.seller_accept_at = datetime.now()
+        with pytest.raises(HTTPException) as exc_info:
+            commit_or_conflict(seller_session)
+
+        assert exc_info.value.status_code == 409
+        buyer_session.close()
+        seller_session.close()
+        engine.dispose()
+
+
+class TestTransactionExpiry:
+    """Test suite for the background expiry of stale transactions"""
+
+    def _make_transaction(
+        self, db_session: Session, buyer: User, seller: User, item: Item, **fields
+    ) -> Transaction:
+        transaction = Transaction(
+            item_id=item.id,
+            seller_id=seller.id,
+            buyer_id=buyer.id,
+            agreed_price=Decimal("100.00"),
+            **fields,
+        )
+        db_session.add(transaction)
+        db_session.commit()
+        db_session.refresh(transaction)
+        return transaction
+
+    def test_expires_stale_pending_and_unpaid(
+        self,
+        db_session: Session,
+        test_user: User,
+        test_seller: User,
+        test_seller_item: Item,
+    ):
+        """
+        Test: รัน expiry job เมื่อมี transaction pending เก่า, accepted ที่ไม่จ่ายเงิน และ transaction ใหม่
+        Expected: เฉพาะรายการเก่าถูกยกเลิก และ stock ของรายการ accepted ถูกคืน
+        """
+        from datetime import datetime, timedelta
+        from zoneinfo import ZoneInfo
+
+        from app.core.transaction_expiry import expire_stale_transactions
+
+        old = datetime.now(ZoneInfo("Asia/Bangkok")) - timedelta(days=10)
+        args = (db_session, test_user, test_seller, test_seller_item)
+        stale_pending = self._make_transaction(
+            *args, status="pending", amount=1, created_at=old
+        )
+        stale_unpaid = self._make_transaction(
+            *args, status="accepted", amount=3, created_at=old, updated_at=old
+        )
+        fresh_pending = self._make_transaction(*args, status="pending", amount=1)
+        paid = self._make_transaction(
+            *args, status="paid", amount=1, created_at=old, updated_at=old
+        )
+        test_seller_item.quantity = 7  # 3 units held by the accepted transaction
+        db_session.commit()
+
+        totals = expire_stale_transactions(db_session, batch_size=1)
+
+        assert totals["pending"] == 1
+        assert totals["unpaid"] == 1
+        assert totals["units_restored"] == 3
+        assert totals["batches"] == 2
+
+        for transaction in (stale_pending, stale_unpaid, fresh_pending, paid):
+            db_session.refresh(transaction)
+        assert stale_pending.status == "cancelled"
+        assert stale_unpaid.status == "cancelled"
+        assert stale_unpaid.cancelled_at is not None
+        assert fresh_pending.status == "pending"
+        assert paid.status == "paid"
+
+        db_session.refresh(test_seller_item)
+        assert test_seller_item.quantity == 10
+
+    def test_expiry_metrics_exposed(self, client: TestClient):
+        """
+        Test: ดู metrics ของ background jobs
+        Expected: มี transaction-expiry job และ counters
+        """
+        response = client.get("/v1/health/jobs")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert "transaction-expiry" in data["jobs"]
+        assert "expired_pending" in data["transaction_expiry"]
@@ -0,0 +1,462 @@
+"""
+Unit tests for seller webhooks (subscriptions, queueing and delivery)
+"""
+
+import asyncio
+import ipaddress
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.outbox import OutboxDispatcher
+from app.core.security import create_access_token
+from app.core.webhooks import (
+    WebhookDeliveryWorker,
+    backoff_delay,
+    enqueue_transaction_webhooks,
+    sign,
+    verify_signature,
+)
+from app.db.models.items.item import Item
+from app.db.models.Outbox.outbox_event import OutboxEvent
+from app.db.models.Users.User import User
+from app.db.models.Webhooks.webhook import WebhookDelivery, WebhookSubscription
+from tests.conftest import TestingSessionLocal
+from tests.fixtures.webhook_receiver import StubWebhookReceiver
+
+
+@pytest.fixture
+def buyer_headers(db_session: Session) -> dict:
+    """สร้าง buyer และคืน Authorization header"""
+    buyer = User(
+        username="buyer", full_name="Buyer", email="buyer@example.com", password="x"
+    )
+    db_session.add(buyer)
+    db_session.commit()
+    token = create_access_token(data={"sub": buyer.username, "id": buyer.id})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def dispatcher(db_session: Session) -> OutboxDispatcher:
+    dispatcher = OutboxDispatcher(session_factory=lambda: db_session)
+    dispatcher.subscribe("transaction.*", enqueue_transaction_webhooks)
+    return dispatcher
+
+
+@pytest.fixture(autouse=True)
+def dns(monkeypatch) -> dict:
+    """ให้ทุก host resolve เป็น public IP (ไม่ใช้ DNS จริง) แก้ได้ต่อ host"""
+    addresses = {}
+
+    def resolve(host):
+        return [ipaddress.ip_address(addresses.get(host, "93.184.216.34"))]
+
+    monkeypatch.setattr("app.core.webhooks.resolve_host", resolve)
+    return addresses
+
+
+@pytest.fixture
+def receiver() -> StubWebhookReceiver:
+    return StubWebhookReceiver()
+
+
+@pytest.fixture
+def worker(receiver: StubWebhookReceiver) -> WebhookDeliveryWorker:
+    return WebhookDeliveryWorker(
+        session_factory=TestingSessionLocal,
+        transport=httpx.ASGITransport(app=receiver.app),
+        max_per_endpoint=2,
+        max_attempts=3,
+    )
+
+
+def subscribe(client: TestClient, receiver: StubWebhookReceiver, **body) -> dict:
+    response = client.post(
+        "/v1/webhooks/", json={"url": "http://seller.test/hooks", **body}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    receiver.secret = data["secret"]
+    return data
+
+
+def run(worker: WebhookDeliveryWorker, times: int = 1) -> list[dict]:
+    async def main():
+        try:
+            return [await worker.run_once() for _ in range(times)]
+        finally:
+            await worker.aclose()
+
+    return asyncio.run(main())
+
+
+def deliveries(db_session: Session) -> list[WebhookDelivery]:
+    db_session.expire_all()
+    return db_session.scalars(select(WebhookDelivery).order_by(WebhookDelivery.id)).all()
+
+
+class TestWebhookSubscriptions:
+    """Test suite for /v1/webhooks endpoints"""
+
+    def test_requires_authentication(self, client: TestClient):
+        """
+        Test: สร้าง webhook โดยไม่มี authentication
+        Expected: ได้รับ status 401
+        """
+        response = client.post("/v1/webhooks/", json={"url": "http://x.test/"})
+        assert response.status_code == 401
+
+    def test_create_list_delete(
+        self, authenticated_client: TestClient, receiver: StubWebhookReceiver
+    ):
+        """
+        Test: สร้าง, ดูรายการ และลบ webhook
+        Expected: secret แสดงเฉพาะตอนสร้าง และหลังลบจะไม่อยู่ในรายการ
+        """
+        created = subscribe(
+            authenticated_client, receiver, events=["transaction.paid"]
+        )
+        assert created["secret"].startswith("whsec_")
+        assert created["events"] == ["transaction.paid"]
+
+        listed = authenticated_client.get("/v1/webhooks/").json()
+        assert [w["id"] for w in listed] == [created["id"]]
+        assert "secret" not in listed[0]
+
+        response = authenticated_client.delete(f"/v1/webhooks/{created['id']}")
+        assert response.status_code == 204
+        assert authenticated_client.get("/v1/webhooks/").json() == []
+
+    def test_invalid_url_and_event(self, authenticated_client: TestClient):
+        """
+        Test: ส่ง url ที่ไม่ใช่ http(s) หรือ event ที่ไม่รองรับ
+        Expected: ได้รับ status 422
+        """
+        for body in (
+            {"url": "ftp://x.test/"},
+            {"url": "http://x.test/", "events": ["item.created"]},
+            {"url": "http://x.test/", "events": []},
+        ):
+            response = authenticated_client.post("/v1/webhooks/", json=body)
+            assert response.status_code == 422
+
+    def test_internal_targets_are_rejected(
+        self, authenticated_client: TestClient, dns: dict
+    ):
+        """
+        Test: สร้าง webhook ที่ชี้ไป loopback, private หรือ link-local (เช่น metadata service)
+        Expected: ได้รับ status 400 และไม่มี webhook ถูกสร้าง
+        """
+        dns["localhost"] = "127.0.0.1"
+        dns["intranet.test"] = "10.0.0.5"
+        for url in (
+            "http://169.254.169.254/latest/meta-data/",
+            "http://localhost:8000/",
+            "http://[::1]/",
+            "http://intranet.test/hooks",
+        ):
+            response = authenticated_client.post("/v1/webhooks/", json={"url": url})
+            assert response.status_code == 400, url
+
+        assert authenticated_client.get("/v1/webhooks/").json() == []
+
+    def test_https_required_outside_development(
+        self, authenticated_client: TestClient, monkeypatch
+    ):
+        """
+        Test: สร้าง webhook แบบ http เมื่อ ENVIRONMENT=production
+        Expected: http ได้ 400, https สร้างได้
+        """
+        monkeypatch.setenv("ENVIRONMENT", "production")
+
+        response = authenticated_client.post(
+            "/v1/webhooks/", json={"url": "http://seller.test/hooks"}
+        )
+        assert response.status_code == 400
+        response = authenticated_client.post(
+            "/v1/webhooks/", json={"url": "https://seller.test/hooks"}
+        )
+        assert response.status_code == 200
+
+    def test_cannot_see_other_users_deliveries(
+        self,
+        authenticated_client: TestClient,
+        receiver: StubWebhookReceiver,
+        buyer_headers,
+    ):
+        """
+        Test: user อื่นขอดู deliveries ของ webhook ที่ไม่ใช่ของตัวเอง
+        Expected: ได้รับ status 404
+        """
+        created = subscribe(authenticated_client, receiver)
+
+        response = authenticated_client.get(
+            f"/v1/webhooks/{created['id']}/deliveries", headers=buyer_headers
+        )
+        assert response.status_code == 404
+
+
+class TestWebhookDelivery:
+    """Test suite for queueing and sending webhook deliveries"""
+
+    def sell(self, client: TestClient, item: Item, buyer_headers) -> int:
+        """buyer สร้าง transaction แล้วทั้งสองฝ่าย accept"""
+        created = client.post(
+            "/v1/transaction/",
+            json={"item_id": item.id, "amount": 1},
+            headers=buyer_headers,
+        ).json()
+        body = {"accepter": True, "accept_at": "2025-01-01T00:00:00"}
+        client.patch(
+            f"/v1/transaction/buyer/acception/{created['id']}",
+            json=body,
+            headers=buyer_headers,
+        )
+        client.patch(f"/v1/transaction/seller/acception/{created['id']}", json=body)
+        return created["id"]
+
+    def test_events_queue_one_delivery_per_matching_subscription(
+        self,
+        authenticated_client: TestClient,
+        db_session: Session,
+        test_item: Item,
+        buyer_headers,
+        receiver: StubWebhookReceiver,
+        dispatcher: OutboxDispatcher,
+    ):
+        """
+        Test: seller subscribe เฉพาะ transaction.accepted แล้วมีการซื้อขาย
+        Expected: มี delivery เดียวสำหรับ accepted และ dispatch ซ้ำไม่สร้างซ้ำ
+        """
+        subscribe(authenticated_client, receiver, events=["transaction.accepted"])
+        transaction_id = self.sell(authenticated_client, test_item, buyer_headers)
+
+        dispatcher.drain(db_session)
+        # simulate redelivery of every event
+        for event in db_session.scalars(select(OutboxEvent)):
+            event.dispatched_at = None
+        db_session.commit()
+        dispatcher.drain(db_session)
+
+        [delivery] = deliveries(db_session)
+        assert delivery.event_type == "transaction.accepted"
+        assert delivery.payload["id"] == transaction_id
+        assert delivery.payload["role"] == "seller"
+        assert delivery.status == "pending"
+
+    def test_worker_delivers_signed_request(
+        self,
+        authenticated_client: TestClient,
+        db_session: Session,
+        test_item: Item,
+        buyer_headers,
+        receiver: StubWebhookReceiver,
+        dispatcher: OutboxDispatcher,
+        worker: WebhookDeliveryWorker,
+    ):
+        """
+        Test: worker ส่ง webhook ไปยัง stub receiver
+        Expected: receiver ได้ request ที่ signature ถูกต้อง และ delivery เป็น delivered
+        """
+        subscribe(authenticated_client, receiver)
+        transaction_id = self.sell(authenticated_client, test_item, buyer_headers)
+        dispatcher.drain(db_session)
+
+        [result] = run(worker)
+
+        assert result == {"sent": 2, "delivered": 2}
+        assert [r["json"]["type"] for r in receiver.requests] == [
+            "transaction.created",
+            "transaction.accepted",
+        ]
+        assert all(r["signature_valid"] for r in receiver.requests)
+        assert receiver.requests[0]["path"] == "/hooks"
+        assert receiver.requests[0]["json"]["data"]["id"] == transaction_id
+        assert all(d.status == "delivered" for d in deliveries(db_session))
+        assert worker.metrics["delivered"] == 2
+
+    def test_tampered_body_fails_verification(self):
+        """
+        Test: ตรวจ signature ของ body ที่ถูกแก้ไข
+        Expected: verify ไม่ผ่าน
+        """
+        body = json.dumps({"id": 1}).encode()
+        signature = sign("secret", "1700000000", body)
+        assert verify_signature("secret", "1700000000", body, signature)
+        assert not verify_signature("secret", "1700000000", body + b" ", signature)
+        assert not verify_signature("other", "1700000000", body, signature)
+
+    def test_failed_delivery_is_retried_then_given_up(
+        self,
+        authenticated_client: TestClient,
+        db_session: Session,
+        test_item: Item,
+        buyer_headers,
+        receiver: StubWebhookReceiver,
+        dispatcher: OutboxDispatcher,
+        worker: WebhookDeliveryWorker,
+        monkeypatch,
+    ):
+        """
+        Test: receiver ตอบ 500 ครั้งแรก แล้วตอบ 500 ตลอด
+        Expected: ครั้งแรก retry แล้วสำเร็จ, ครั้งหลังล้มเหลวครบ max_attempts แล้วเลิกส่ง
+        """
+        monkeypatch.setenv("WEBHOOK_BACKOFF_BASE_SECONDS", "0")
+        subscribe(authenticated_client, receiver, events=["transaction.created"])
+
+        authenticated_client.post(
+            "/v1/transaction/",
+            json={"item_id": test_item.id, "amount": 1},
+            headers=buyer_headers,
+        )
+        dispatcher.drain(db_session)
+        receiver.fail_next = 1
+        run(worker, times=2)
+
+        [delivery] = deliveries(db_session)
+        assert delivery.status == "delivered"
+        assert delivery.attempts == 2
+        assert delivery.last_status_code == 200
+
+        authenticated_client.post(
+            "/v1/transaction/",
+            json={"item_id": test_item.id, "amount": 1},
+            headers=buyer_headers,
+        )
+        dispatcher.drain(db_session)
+        receiver.status_code = 503
+        run(worker, times=5)
+
+        failed = deliveries(db_session)[1]
+        assert failed.status == "failed"
+        assert failed.attempts == 3
+        assert failed.last_status_code == 503
+        assert worker.metrics["gave_up"] == 1
+
+    def test_per_endpoint_concurrency_limit(
+        self,
+        authenticated_client: TestClient,
+        db_session: Session,
+        test_item: Item,
+        buyer_headers,
+        receiver: StubWebhookReceiver,
+        dispatcher: OutboxDispatcher,
+        worker: WebhookDeliveryWorker,
+    ):
+        """
+        Test: มี deliveries หลายรายการไปยัง endpoint เดียวกันที่ตอบช้า
+        Expected: ส่งพร้อมกันไม่เกิน max_per_endpoint
+        """
+        subscribe(authenticated_client, receiver, events=["transaction.created"])
+        for _ in range(6):
+            authenticated_client.post(
+                "/v1/transaction/",
+                json={"item_id": test_item.id, "amount": 1},
+                headers=buyer_headers,
+            )
+        dispatcher.drain(db_session)
+        receiver.delay = 0.05
+
+        [result] = run(worker)
+
+        assert result["delivered"] == 6
+        assert receiver.max_in_flight == 2
+
+    def test_backoff_is_exponential_and_capped(self, monkeypatch):
+        """
+        Test: คำนวณเวลารอก่อน retry
+        Expected: เพิ่มเป็นเท่าตัวและไม่เกินค่าสูงสุด
+        """
+        monkeypatch.setenv("WEBHOOK_BACKOFF_BASE_SECONDS", "5")
+        monkeypatch.setenv("WEBHOOK_BACKOFF_MAX_SECONDS", "60")
+
+        delays = [backoff_delay(n).total_seconds() for n in range(1, 6)]
+        assert delays == [5, 10, 20, 40, 60]
+
+    def test_host_is_checked_again_before_send(
+        self,
+        authenticated_client: TestClient,
+        db_session: Session,
+        test_item: Item,
+        buyer_headers,
+        receiver: StubWebhookReceiver,
+        dispatcher: OutboxDispatcher,
+        worker: WebhookDeliveryWorker,
+        dns: dict,
+    ):
+        """
+        Test: host ของ webhook เปลี่ยนไป resolve เป็น private IP หลัง subscribe
+        Expected: ไม่มี request ถูกส่ง และ delivery บันทึกว่าถูก block
+        """
+        subscribe(authenticated_client, receiver, events=["transaction.created"])
+        self.sell(authenticated_client, test_item, buyer_headers)
+        dispatcher.drain(db_session)
+        dns["seller.test"] = "192.168.1.10"
+
+        [result] = run(worker)
+
+        assert result == {"sent": 1, "delivered": 0}
+        assert receiver.requests == []
+        [delivery] = deliveries(db_session)
+        assert delivery.status == "pending"
+        assert delivery.last_error.startswith("Blocked:")
+
+    def test_pending_deliveries_stop_when_subscription_is_removed(
+        self,
+        authenticated_client: TestClient,
+        db_session: Session,
+        test_item: Item,
+        buyer_headers,
+        receiver: StubWebhookReceiver,
+        dispatcher: OutboxDispatcher,
+        worker: WebhookDeliveryWorker,
+    ):
+        """
+        Test: มี deliveries รอส่งแล้ว webhook หนึ่งถูกลบ อีกอันถูกปิด (is_active=False)
+        Expected: ของที่ลบถูก mark failed, ของที่ปิดไม่ถูก claim และไม่มี request ถูกส่ง
+        """
+        deleted = subscribe(authenticated_client, receiver, events=["transaction.created"])
+        disabled = subscribe(authenticated_client, receiver, events=["transaction.created"])
+        self.sell(authenticated_client, test_item, buyer_headers)
+        dispatcher.drain(db_session)
+        assert len(deliveries(db_session)) == 2
+
+        authenticated_client.delete(f"/v1/webhooks/{deleted['id']}")
+        db_session.get(WebhookSubscription, disabled["id"]).is_active = False
+        db_session.commit()
+
+        [result] = run(worker)
+
+        assert result == {"sent": 0, "delivered": 0}
+        assert receiver.requests == []
+        by_subscription = {d.subscription_id: d for d in deliveries(db_session)}
+        assert by_subscription[deleted["id"]].status == "failed"
+        assert by_subscription[deleted["id"]].last_error == "Webhook deleted"
+        assert by_subscription[disabled["id"]].status == "pending"
+
+    def test_deleted_subscription_gets_nothing(
+        self,
+        authenticated_client: TestClient,
+        db_session: Session,
+        test_item: Item,
+        buyer_headers,
+        receiver: StubWebhookReceiver,
+        dispatcher: OutboxDispatcher,
+    ):
+        """
+        Test: ลบ webhook ก่อนมี event
+        Expected: ไม่มี delivery ถูกสร้าง
+        """
+        created = subscribe(authenticated_client, receiver)
+        authenticated_client.delete(f"/v1/webhooks/{created['id']}")
+        self.sell(authenticated_client, test_item, buyer_headers)
+
+        dispatcher.drain(db_session)
+
+        assert deliveries(db_session) == []
+        assert db_session.get(WebhookSubscription, created["id"]).is_active is False
@@ -5,12 +5,18 @@ Unit tests for wish item endpoints
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
+from datetime import datetime
 from decimal import Decimal
 
 from app.db.models.Users.User import User
 from app.db.models.items.item import Item
+from app.db.models.items.price_stats import ItemPriceStats
 from app.db.models.items.wishItem import WishItem
 from app.db.models.Categorys.main import Category
+from app.db.models.Notifications.notification import Notification
+from app.core.notifications import notify, unread_count
+from app.core.price_alerts import PRICE_DROP, notify_price_drops
+from app.core.price_history import record_price
 
 
 @pytest.fixture
@@ -470,3 +476,153 @@ class TestShareWishList:
         assert response.status_code == 200
         data = response.json()
         assert len(data) <= 1
+
+
+class TestPriceDropAlerts:
+    """Test suite for price-drop alerts to wishers (app.core.price_alerts)"""
+
+    @pytest.fixture
+    def wishers(self, db_session: Session, test_user: User, test_item: Item):
+        """ผู้ใช้สองคนที่ใส่ test_item ใน wish list (รวมถึงเจ้าของ item เอง)"""
+        users = []
+        for name in ("wisher1", "wisher2"):
+            user = User(
+                username=name, full_name=name, email=f"{name}@example.com", password="x"
+            )
+            db_session.add(user)
+            users.append(user)
+        db_session.flush()
+        for user in [*users, test_user]:
+            db_session.add(WishItem(user_id=user.id, item_id=test_item.id))
+        record_price(db_session, test_item, Decimal("100.00"), test_user.id)
+        db_session.commit()
+        return users
+
+    @staticmethod
+    def change_price(db_session: Session, item: Item, price: str) -> None:
+        record_price(db_session, item, Decimal(price), item.owner_id)
+        db_session.commit()
+
+    @staticmethod
+    def alerts(db_session: Session) -> list[Notification]:
+        return (
+            db_session.query(Notification)
+            .filter(Notification.type == PRICE_DROP)
+            .order_by(Notification.user_id)
+            .all()
+        )
+
+    def test_drop_notifies_each_wisher_once(
+        self, db_session: Session, test_item: Item, wishers: list[User]
+    ):
+        """
+        Test: ราคาลดจาก 100 เป็น 80 แล้ว job ทำงานสองรอบ
+        Expected: wisher ทุกคนได้ alert หนึ่งครั้ง (ยกเว้นเจ้าของ item) รอบที่สองไม่มีอะไรใหม่
+        """
+        self.change_price(db_session, test_item, "80.00")
+        assert self.alerts(db_session) == []
+
+        totals = notify_price_drops(db_session)
+
+        assert totals["drops"] == 1
+        alerts = self.alerts(db_session)
+        assert [alert.user_id for alert in alerts] == [user.id for user in wishers]
+        assert float(alerts[0].data["price"]) == 80.0
+        assert float(alerts[0].data["change_percent"]) == -20.0
+        assert alerts[0].data["name"] == test_item.name
+
+        assert notify_price_drops(db_session)["drops"] == 0
+        assert len(self.alerts(db_session)) == 2
+
+    def test_rise_before_job_cancels_alert(
+        self, db_session: Session, test_item: Item, wishers: list[User]
+    ):
+        """
+        Test: ราคาลดแล้วขึ้นกลับก่อนที่ job จะทำงาน
+        Expected: ไม่มี alert
+        """
+        self.change_price(db_session, test_item, "80.00")
+        self.change_price(db_session, test_item, "120.00")
+
+        assert db_session.get(ItemPriceStats, test_item.id).drop_pending is False
+        assert notify_price_drops(db_session)["drops"] == 0
+        assert self.alerts(db_session) == []
+
+    def test_owner_and_deleted_items_get_no_alert(
+        self,
+        db_session: Session,
+        test_user: User,
+        test_item: Item,
+        wishers: list[User],
+    ):
+        """
+        Test: เจ้าของ item ก็ใส่ wish list ไว้ และราคาลดก่อนที่ item จะถูกลบ
+        Expected: เจ้าของไม่ได้ alert, item ที่ถูกลบแล้วไม่มี alert และ flag ถูกล้าง
+        """
+        self.change_price(db_session, test_item, "80.00")
+        notify_price_drops(db_session)
+        assert test_user.id not in [alert.user_id for alert in self.alerts(db_session)]
+
+        for alert in self.alerts(db_session):
+            alert.read_at = alert.created_at
+        self.change_price(db_session, test_item, "70.00")
+        test_item.deleted_at = datetime.now()
+        db_session.commit()
+
+        assert notify_price_drops(db_session) == {
+            "drops": 1,
+            "notifications": 0,
+            "batches": 1,
+        }
+        assert len(self.alerts(db_session)) == 2
+        assert db_session.get(ItemPriceStats, test_item.id).drop_pending is False
+
+    def test_unread_alert_is_updated_not_duplicated(
+        self, db_session: Session, test_item: Item, wishers: list[User]
+    ):
+        """
+        Test: ราคาลดสองครั้งก่อนผู้ใช้อ่าน alert แล้วลดอีกครั้งหลังอ่าน
+        Expected: alert ที่ยังไม่อ่านถูกอัปเดตเป็นราคาล่าสุด หลังอ่านแล้วได้ alert ใหม่
+        """
+        self.change_price(db_session, test_item, "80.00")
+        notify_price_drops(db_session)
+        self.change_price(db_session, test_item, "60.00")
+        notify_price_drops(db_session)
+
+        alerts = self.alerts(db_session)
+        assert len(alerts) == 2
+        assert float(alerts[0].data["price"]) == 60.0
+        # the refreshed alert is not counted twice
+        assert [unread_count(db_session, user.id) for user in wishers] == [1, 1]
+
+        alerts[0].read_at = alerts[0].created_at
+        db_session.commit()
+        self.change_price(db_session, test_item, "50.00")
+        notify_price_drops(db_session)
+
+        assert len(self.alerts(db_session)) == 3
+
+    def test_refreshed_alert_moves_to_top_of_inbox(
+        self, db_session: Session, test_item: Item, wishers: list[User]
+    ):
+        """
+        Test: wisher ได้ alert แล้วได้ notification อื่น จากนั้นราคาลดอีกก่อนอ่าน alert
+        Expected: alert ที่ถูกแทนที่ได้ id ใหม่และอยู่บนสุดของกล่องแจ้งเตือน (เรียงตาม id)
+        """
+        wisher = wishers[0]
+        self.change_price(db_session, test_item, "80.00")
+        notify_price_drops(db_session)
+        notify(db_session, [wisher.id], "announcement", {})
+        db_session.commit()
+        self.change_price(db_session, test_item, "60.00")
+        notify_price_drops(db_session)
+
+        inbox = (
+            db_session.query(Notification)
+            .filter(Notification.user_id == wisher.id)
+            .order_by(Notification.id.desc())
+            .all()
+        )
+        assert [n.type for n in inbox] == [PRICE_DROP, "announcement"]
+        assert float(inbox[0].data["price"]) == 60.0
+        assert unread_count(db_session, wisher.id) == 2